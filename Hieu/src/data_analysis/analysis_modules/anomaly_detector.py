@@ -1,23 +1,50 @@
-# file: analysis_modules/anomaly_detector.py (v1.4 - Added Cabin Pressure Alerts)
+# file: analysis_modules/anomaly_detector.py (v2.0 - Optional statistical change detectors)
 
+import numpy as np
 import pandas as pd
 import argparse
 import os
-from typing import List
+from typing import List, Optional
+
+from .logging_utils import get_logger
+from .tracing import span
+
+logger = get_logger("anomaly_detector")
+
+# Telemetry channels each rule reads, so recorded data lacking some channels can run the rest.
+RULE_CHANNELS = {
+    "FLAP_ASYMMETRY": ['timestamp', 'left_flap_angle_deg', 'right_flap_angle_deg'],
+    "GREEN_HYDRAULIC_LOSS": ['timestamp', 'green_hydraulic_pressure_psi'],
+    "SENSOR_FAILURE": ['timestamp', 'flap_lever_position', 'right_flap_angle_deg', 'right_flap_sensor_faulty_output_deg'],
+    "G_FORCE_ANOMALY": ['timestamp', 'vertical_g_force'],
+    "CRITICAL_ECAM_ALERT": ['timestamp', 'ecam_alerts'],
+    "MOTOR_CURRENT_FAILURE": ['timestamp', 'flap_lever_position', 'left_flap_motor_current'],
+    "FLAP_STUCK": ['timestamp', 'flap_lever_position', 'left_flap_angle_deg'],
+}
+
+
+def available_rules(columns) -> list:
+    """The rules whose channels are all among `columns`, in reporting order."""
+    columns = set(columns)
+    return [name for name, channels in RULE_CHANNELS.items() if columns.issuperset(channels)]
 
 class AnomalyDetector:
     """
     Phát hiện các điểm bất thường trong dữ liệu telemetry của chuyến bay
     dựa trên một bộ các quy tắc được định nghĩa trước.
     """
-    def __init__(self):
+    def __init__(self, statistical_detectors: Optional[list] = None):
         """
         Khởi tạo detector và định nghĩa các ngưỡng (thresholds) cho các quy tắc.
+
+        statistical_detectors: optional StatisticalDetector instances (see statistical_detectors.py)
+        whose first alarms are reported after the rules, e.g. default_statistical_detectors().
         """
-        print("AnomalyDetector (Rule-Based v1.5 - Adjusted Thresholds & ECAM Alerts) initialized.")
+        logger.debug("AnomalyDetector (Rule-Based v1.5 - Adjusted Thresholds & ECAM Alerts) initialized.")
         self.flap_asymmetry_threshold_deg = 2.0 # Adjusted for more sensitivity
         self.hydraulic_pressure_threshold_psi = 900.0 # Adjusted for more sensitivity
         self.g_force_deviation_threshold = 0.3 # Adjusted for more sensitivity
+        self.statistical_detectors = list(statistical_detectors or [])
 
     def _check_flap_asymmetry(self, df: pd.DataFrame) -> tuple[bool, int]:
         df['temp_flap_diff'] = abs(df['left_flap_angle_deg'] - df['right_flap_angle_deg'])
@@ -25,7 +52,7 @@ class AnomalyDetector:
         del df['temp_flap_diff']
         if not asymmetric_events.empty:
             first_detection_timestamp = int(asymmetric_events.iloc[0]['timestamp'])
-            print(f"  -> [RULE CHECK PASSED] Flap asymmetry DETECTED at timestamp: {first_detection_timestamp}s")
+            logger.debug("[RULE CHECK PASSED] Flap asymmetry DETECTED at timestamp: %ss", first_detection_timestamp)
             return True, first_detection_timestamp
         return False, -1
 
@@ -33,7 +60,7 @@ class AnomalyDetector:
         hydraulic_loss_events = df[df['green_hydraulic_pressure_psi'] < self.hydraulic_pressure_threshold_psi]
         if not hydraulic_loss_events.empty:
             first_detection_timestamp = int(hydraulic_loss_events.iloc[0]['timestamp'])
-            print(f"  -> [RULE CHECK PASSED] Green hydraulic pressure loss DETECTED at timestamp: {first_detection_timestamp}s")
+            logger.debug("[RULE CHECK PASSED] Green hydraulic pressure loss DETECTED at timestamp: %ss", first_detection_timestamp)
             return True, first_detection_timestamp
         return False, -1
 
@@ -41,43 +68,48 @@ class AnomalyDetector:
         discrepancy_events = df[(df['flap_lever_position'] > 0) & (df['right_flap_angle_deg'] > 0) & (df['right_flap_sensor_faulty_output_deg'] == 0)]
         if not discrepancy_events.empty:
             first_detection_timestamp = int(discrepancy_events.iloc[0]['timestamp'])
-            print(f"  -> [RULE CHECK PASSED] Sensor discrepancy DETECTED at timestamp: {first_detection_timestamp}s")
+            logger.debug("[RULE CHECK PASSED] Sensor discrepancy DETECTED at timestamp: %ss", first_detection_timestamp)
             return True, first_detection_timestamp
         return False, -1
 
     def _check_g_force_anomaly(self, df: pd.DataFrame) -> tuple[bool, int]:
         # Removed time window to check for G-force anomalies throughout the flight
         max_g_force = df['vertical_g_force'].max()
-        print(f"  -> [DEBUG] G-Force Check: Max G-force found = {max_g_force:.4f}")
+        logger.debug("G-Force Check: Max G-force found = %.4f", max_g_force)
         g_force_events = df[abs(df['vertical_g_force'] - 1.0) > self.g_force_deviation_threshold]
         if not g_force_events.empty:
             first_detection_timestamp = int(g_force_events.iloc[0]['timestamp'])
-            print(f"  -> [RULE CHECK PASSED] Significant G-force anomaly DETECTED at timestamp: {first_detection_timestamp}s")
+            logger.debug("[RULE CHECK PASSED] Significant G-force anomaly DETECTED at timestamp: %ss", first_detection_timestamp)
             return True, first_detection_timestamp
         return False, -1
 
     def _check_critical_ecam_alerts(self, df: pd.DataFrame) -> tuple[bool, int]:
         critical_alerts = ['OVERSPEED', 'ENG 1 FIRE', 'ENG 1 STALL', 'F/CTL FLAP SYS', 'CAB PR SYS 1 FAULT', 'CAB PR EXCESS CAB ALT', 'GEAR NOT DOWN', 'F/CTL FLAPS LOCKED']
-        print(f"  -> [DEBUG] ECAM Check: Looking for alerts: {critical_alerts}")
+        logger.debug("ECAM Check: Looking for alerts: %s", critical_alerts)
+        alerts = df['ecam_alerts']
+        if isinstance(alerts.dtype, pd.CategoricalDtype):
+            # Schema frames: test each distinct alert string once, then map through the codes (-1 = missing).
+            texts = alerts.cat.categories.astype(str)
+            codes = alerts.cat.codes.to_numpy()
+        else:
+            texts = alerts.map(str)
+            codes = None
         for alert in critical_alerts:
-            try:
-                df['alert_present'] = df['ecam_alerts'].apply(lambda x: alert in str(x))
-                alert_events = df[df['alert_present'] == True]
-                if not alert_events.empty:
-                    first_detection_timestamp = int(alert_events.iloc[0]['timestamp'])
-                    print(f"  -> [RULE CHECK PASSED] Critical ECAM alert '{alert}' DETECTED at timestamp: {first_detection_timestamp}s")
-                    del df['alert_present']
-                    return True, first_detection_timestamp
-            finally:
-                if 'alert_present' in df.columns:
-                    del df['alert_present']
+            present = np.asarray(texts.str.contains(alert, regex=False), dtype=bool)
+            if codes is not None:
+                present = np.append(present, False)[codes]
+            hits = np.flatnonzero(present)
+            if len(hits):
+                first_detection_timestamp = int(df['timestamp'].iloc[hits[0]])
+                logger.debug("[RULE CHECK PASSED] Critical ECAM alert '%s' DETECTED at timestamp: %ss", alert, first_detection_timestamp)
+                return True, first_detection_timestamp
         return False, -1
 
     def _check_motor_current_failure(self, df: pd.DataFrame) -> tuple[bool, int]:
         motor_failure_events = df[(df['timestamp'] > 90) & (df['flap_lever_position'] > 0) & (df['left_flap_motor_current'] == 0.0)]
         if not motor_failure_events.empty:
             first_detection_timestamp = int(motor_failure_events.iloc[0]['timestamp'])
-            print(f"  -> [RULE CHECK PASSED] Left flap motor current failure DETECTED at timestamp: {first_detection_timestamp}s")
+            logger.debug("[RULE CHECK PASSED] Left flap motor current failure DETECTED at timestamp: %ss", first_detection_timestamp)
             return True, first_detection_timestamp
         return False, -1
 
@@ -104,7 +136,7 @@ class AnomalyDetector:
                 # If the angle hasn't changed by at least 0.5 degree, it's likely stuck
                 if max_angle_change < 0.5:
                     timestamp = int(start_time)
-                    print(f"  -> [RULE CHECK PASSED] Flap stuck/unresponsive DETECTED at timestamp: {timestamp}s")
+                    logger.debug("[RULE CHECK PASSED] Flap stuck/unresponsive DETECTED at timestamp: %ss", timestamp)
                     # Clean up the temporary column before returning
                     if 'lever_change' in df.columns:
                         del df['lever_change']
@@ -116,10 +148,9 @@ class AnomalyDetector:
             
         return False, -1
 
-    def detect(self, telemetry_df: pd.DataFrame) -> list[tuple[str, int]]:
-        print("\nStarting anomaly detection process...")
-        detected_anomalies = []
-        checks = {
+    def rule_checks(self) -> dict:
+        """The rules in reporting order, {anomaly name: check function}."""
+        return {
             "FLAP_ASYMMETRY": self._check_flap_asymmetry,
             "GREEN_HYDRAULIC_LOSS": self._check_hydraulic_failure,
             "SENSOR_FAILURE": self._check_sensor_discrepancy,
@@ -128,12 +159,22 @@ class AnomalyDetector:
             "MOTOR_CURRENT_FAILURE": self._check_motor_current_failure,
             "FLAP_STUCK": self._check_flap_stuck # New check
         }
-        for name, check_func in checks.items():
-            is_detected, timestamp = check_func(telemetry_df)
-            if is_detected:
-                detected_anomalies.append((name, timestamp))
+
+    def detect(self, telemetry_df: pd.DataFrame) -> list[tuple[str, int]]:
+        logger.debug("Starting anomaly detection process...")
+        detected_anomalies = []
+        checks = self.rule_checks()
+        with span("detect", rows=len(telemetry_df)):
+            for name, check_func in checks.items():
+                with span(f"detect.{name}"):
+                    is_detected, timestamp = check_func(telemetry_df)
+                if is_detected:
+                    detected_anomalies.append((name, timestamp))
+            for detector in self.statistical_detectors:
+                with span(f"detect.{detector.method}"):
+                    detected_anomalies.extend(detector.detect(telemetry_df))
         if not detected_anomalies:
-            print("No anomalies detected based on the current rules.")
+            logger.debug("No anomalies detected based on the current rules.")
         return detected_anomalies
 
 # main function remains the same
\ No newline at end of file
@@ -0,0 +1,312 @@
+# file: analysis_modules/detector_calibration.py (v1.1 - Import the simulator through src. like its callers)
+
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.data_simulation.data_input_simulator.scenario_expander import ScenarioExpander, list_templates
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+from src.data_simulation.data_input_simulator.telemetry_generator import TelemetryGenerator, baseline_profile
+from .anomaly_detector import RULE_CHANNELS, AnomalyDetector
+from .logging_utils import get_logger
+from .streaming_detector import FLAP_STUCK_MIN_CHANGE_DEG, FLAP_STUCK_WINDOW_S
+
+logger = get_logger("detector_calibration")
+
+CALIBRATION_CELLS_PER_CHUNK = 50_000_000  # flights x thresholds x samples compared at once
+DEFAULT_NUM_THRESHOLDS = 101
+_SIGNS = {">": 1.0, "<": -1.0, "<=": -1.0}
+
+
+class RuleSweep:
+    """
+    One thresholded AnomalyDetector rule written as a per-sample score that alarms when
+    `score op threshold` (">", "<" or "<="); samples the rule does not look at score NaN.
+    At `current` (the detector's own threshold) the first alarm is the rule's detection.
+    """
+    def __init__(self, name: str, op: str, current: float, score: Callable[[pd.DataFrame], np.ndarray], unit: str = ""):
+        if op not in _SIGNS:
+            raise ValueError(f"Unsupported comparison '{op}' for rule {name}.")
+        self.name = name
+        self.op = op
+        self.current = current
+        self.score = score
+        self.unit = unit
+        # The telemetry an event has to change for this rule to have something to find.
+        self.channels = [channel for channel in RULE_CHANNELS[name] if channel not in ('timestamp', 'ecam_alerts')]
+
+
+def _eligible(values, mask) -> np.ndarray:
+    return np.where(np.asarray(mask), np.asarray(values), np.nan)
+
+
+def _flap_stuck_score(df: pd.DataFrame) -> np.ndarray:
+    """At each lever move to a new extended position, the largest flap angle change in the next 4 s."""
+    times = df['timestamp'].to_numpy()
+    lever = df['flap_lever_position'].to_numpy()
+    angles = df['left_flap_angle_deg'].to_numpy()
+    score = np.full(len(df), np.nan, dtype=angles.dtype)
+    for index in np.flatnonzero((np.diff(lever, prepend=lever[:1]) > 0) & (lever > 0)):
+        lo = np.searchsorted(times, times[index], side='right')
+        hi = np.searchsorted(times, times[index] + FLAP_STUCK_WINDOW_S, side='right')
+        if hi > lo:
+            score[index] = np.abs(angles[lo:hi] - angles[index]).max()
+    return score
+
+
+def rule_sweeps(detector: Optional[AnomalyDetector] = None) -> Dict[str, RuleSweep]:
+    """
+    The sweepable rules, with the current thresholds of `detector`. CRITICAL_ECAM_ALERT matches
+    alert text and has no threshold, so it is not swept. The equality tests of SENSOR_FAILURE and
+    MOTOR_CURRENT_FAILURE (reading == 0) become |reading| <= threshold, the same rule at 0.
+    """
+    detector = detector or AnomalyDetector()
+    sweeps = [
+        RuleSweep("FLAP_ASYMMETRY", ">", detector.flap_asymmetry_threshold_deg,
+                  lambda df: np.abs(df['left_flap_angle_deg'].to_numpy() - df['right_flap_angle_deg'].to_numpy()), "deg"),
+        RuleSweep("GREEN_HYDRAULIC_LOSS", "<", detector.hydraulic_pressure_threshold_psi,
+                  lambda df: df['green_hydraulic_pressure_psi'].to_numpy(), "psi"),
+        RuleSweep("SENSOR_FAILURE", "<=", 0.0,
+                  lambda df: _eligible(np.abs(df['right_flap_sensor_faulty_output_deg'].to_numpy()),
+                                       (df['flap_lever_position'] > 0) & (df['right_flap_angle_deg'] > 0)), "deg"),
+        RuleSweep("G_FORCE_ANOMALY", ">", detector.g_force_deviation_threshold,
+                  lambda df: np.abs(df['vertical_g_force'].to_numpy() - 1.0), "g"),
+        RuleSweep("MOTOR_CURRENT_FAILURE", "<=", 0.0,
+                  lambda df: _eligible(np.abs(df['left_flap_motor_current'].to_numpy()),
+                                       (df['timestamp'] > 90) & (df['flap_lever_position'] > 0)), "A"),
+        RuleSweep("FLAP_STUCK", "<", FLAP_STUCK_MIN_CHANGE_DEG, _flap_stuck_score, "deg"),
+    ]
+    return {sweep.name: sweep for sweep in sweeps}
+
+
+def ground_truth_onset(telemetry: pd.DataFrame, baseline_channels: dict, sweep: RuleSweep) -> float:
+    """
+    When the injected events first change any of the rule's channels, compared with the
+    noise-free event-free profile of the same flight length and rate; NaN when they never do
+    (a negative flight for this rule).
+    """
+    changed = np.zeros(len(telemetry), dtype=bool)
+    for channel in sweep.channels:
+        if baseline_channels.get(channel) is not None:
+            changed |= telemetry[channel].to_numpy() != baseline_channels[channel]
+    hits = np.flatnonzero(changed)
+    return float(telemetry['timestamp'].iloc[hits[0]]) if len(hits) else np.nan
+
+
+class LabeledFlightSet:
+    """
+    Per-rule scores, ground-truth onsets and timestamps of many flights, reduced from the
+    telemetry as each flight is added, so the flights themselves are not kept.
+    """
+    def __init__(self, sweeps: Optional[Dict[str, RuleSweep]] = None):
+        self.sweeps = sweeps or rule_sweeps()
+        self.scenarios: List[str] = []
+        self.is_anomaly: List[bool] = []
+        self._timestamps: List[np.ndarray] = []
+        self._scores = {name: [] for name in self.sweeps}
+        self._onsets = {name: [] for name in self.sweeps}
+
+    def __len__(self) -> int:
+        return len(self.scenarios)
+
+    def add(self, telemetry: pd.DataFrame, scenario: str, is_anomaly: bool, baseline_channels: dict):
+        self.scenarios.append(scenario)
+        self.is_anomaly.append(bool(is_anomaly))
+        self._timestamps.append(telemetry['timestamp'].to_numpy(dtype=np.float64))
+        for name, sweep in self.sweeps.items():
+            self._scores[name].append(sweep.score(telemetry))
+            self._onsets[name].append(ground_truth_onset(telemetry, baseline_channels, sweep))
+
+    @classmethod
+    def simulate(cls, scenarios: Optional[Sequence[str]] = None, flights_per_scenario: int = 20,
+                 variants_per_template: int = 0, total_flight_seconds: int = 600, data_frequency_hz: int = 1,
+                 seed: int = 0, sweeps: Optional[Dict[str, RuleSweep]] = None) -> "LabeledFlightSet":
+        """
+        Seeded flights of each scenario (all of them by default), plus `variants_per_template`
+        variants of every scenario template. Each flight carries its scenario's ground-truth
+        is_anomaly and, per rule, the onset of the changes its events made.
+        """
+        loader = ScenarioLoader()
+        configs = []
+        for name in scenarios or loader.list_scenarios():
+            configs.extend([(name, dict(loader.load(name)))] * flights_per_scenario)
+        templates = list_templates() if variants_per_template else []
+        if templates:
+            for variant in ScenarioExpander.from_names(templates, seed).iter_variants(variants_per_template * len(templates)):
+                configs.append((variant['variant_id'], variant))
+        baseline = baseline_profile(total_flight_seconds, data_frequency_hz).schema_channels
+        flight_set = cls(sweeps)
+        np.random.seed(seed)
+        for name, config in configs:
+            telemetry = TelemetryGenerator(config, total_flight_seconds, data_frequency_hz).generate()
+            flight_set.add(telemetry, name, config.get('ground_truth', {}).get('is_anomaly', False), baseline)
+        logger.info("Simulated %d labeled flights", len(flight_set))
+        return flight_set
+
+    def timestamps(self) -> np.ndarray:
+        """(flights x samples) timestamps, NaN past the end of shorter flights."""
+        return _padded(self._timestamps, np.nan, np.float64)
+
+    def scores(self, name: str) -> np.ndarray:
+        dtype = np.result_type(*self._scores[name]) if self._scores[name] else np.float64
+        return _padded(self._scores[name], np.nan, dtype)
+
+    def onsets(self, name: str) -> np.ndarray:
+        return np.array(self._onsets[name], dtype=np.float64)
+
+
+def _padded(rows: List[np.ndarray], fill, dtype) -> np.ndarray:
+    width = max((len(row) for row in rows), default=0)
+    matrix = np.full((len(rows), width), fill, dtype=dtype)
+    for position, row in enumerate(rows):
+        matrix[position, :len(row)] = row
+    return matrix
+
+
+def first_alarm_indices(scores: np.ndarray, thresholds: Sequence[float], op: str) -> np.ndarray:
+    """
+    (flights x thresholds) sample index of each flight's first alarm at each threshold (the
+    number of samples when it never alarms). The scores are signed so every rule alarms above
+    its threshold; a sample alarms iff the running maximum up to it does, and the running
+    maximum never decreases, so the first alarm is the count of samples whose running maximum
+    does not. That count is one broadcast comparison over (flights x thresholds x samples),
+    done in chunks of flights.
+    """
+    sign = _SIGNS[op]
+    signed = np.where(np.isnan(scores), -np.inf, sign * scores)  # NaN samples never alarm
+    running = np.maximum.accumulate(signed, axis=1)
+    # Thresholds in the scores' dtype, as the rules compare float32 channels with Python floats.
+    limits = (sign * np.asarray(thresholds, dtype=np.float64)).astype(scores.dtype)
+    compare = np.greater_equal if op == "<=" else np.greater
+    flights, samples = running.shape
+    step = max(1, CALIBRATION_CELLS_PER_CHUNK // max(len(limits) * samples, 1))
+    indices = np.empty((flights, len(limits)), dtype=np.int64)
+    for lo in range(0, flights, step):
+        quiet = ~compare(running[lo:lo + step, None, :], limits[None, :, None])
+        indices[lo:lo + step] = quiet.sum(axis=2)
+    return indices
+
+
+def default_thresholds(scores: np.ndarray, sweep: RuleSweep, num: int = DEFAULT_NUM_THRESHOLDS) -> np.ndarray:
+    """
+    `num` even steps across the observed score range, the same number of score quantiles (dense
+    where the data is) and the current threshold.
+    """
+    finite = scores[np.isfinite(scores)].astype(np.float64)
+    if not len(finite):
+        return np.array([sweep.current])
+    steps = np.linspace(0, 1, num)
+    grid = np.concatenate([np.linspace(finite.min(), finite.max(), num), np.quantile(finite, steps), [sweep.current]])
+    return np.unique(grid)
+
+
+def sweep_rule(flight_set: LabeledFlightSet, name: str, thresholds: Optional[Sequence[float]] = None) -> dict:
+    """
+    Outcomes of one rule over the flight set at every threshold.
+
+    A flight is flagged when the rule alarms anywhere in it; flagged positives (the events change
+    the rule's channels) are true positives, flagged negatives false positives, so the flagged
+    set only grows as the threshold loosens and the ROC curve is monotone. Timing is scored
+    separately: the delay is first alarm minus onset, negative for 'early' alarms that fire before
+    the fault begins (e.g. on the normal profile).
+
+    Returns:
+        dict: 'curve' (DataFrame, one row per threshold with counts, TPR/FPR, precision/recall/F1
+        and delay percentiles), 'delays' ((flights x thresholds) seconds from onset to first alarm,
+        NaN where not a true positive) and 'thresholds'.
+    """
+    sweep = flight_set.sweeps[name]
+    scores = flight_set.scores(name)
+    thresholds = default_thresholds(scores, sweep) if thresholds is None else np.asarray(thresholds, dtype=np.float64)
+    timestamps = flight_set.timestamps()
+    onsets = flight_set.onsets(name)
+
+    indices = first_alarm_indices(scores, thresholds, sweep.op)
+    padded = np.concatenate([timestamps, np.full((len(timestamps), 1), np.nan)], axis=1)
+    alarm_times = np.take_along_axis(padded, indices, axis=1)  # NaN where no alarm
+    alarmed = ~np.isnan(alarm_times)
+    positive = ~np.isnan(onsets)[:, None]
+    detected = alarmed & positive
+    delays = np.where(detected, alarm_times - onsets[:, None], np.nan)
+
+    tp = detected.sum(axis=0)
+    early = (delays < 0).sum(axis=0)
+    fp = (alarmed & ~positive).sum(axis=0)
+    positives, negatives = int(positive.sum()), int((~positive).sum())
+    fn, tn = positives - tp, negatives - fp
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        tpr = tp / positives if positives else np.full(len(thresholds), np.nan)
+        fpr = fp / negatives if negatives else np.full(len(thresholds), np.nan)
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.nan_to_num(tpr)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    any_detected = tp > 0
+    delay_stats = np.full((3, len(thresholds)), np.nan)
+    if any_detected.any():
+        delay_stats[:, any_detected] = np.nanpercentile(delays[:, any_detected], [50, 90, 100], axis=0)
+    curve = pd.DataFrame({
+        "rule": name, "threshold": thresholds, "tp": tp, "fp": fp, "early": early, "fn": fn, "tn": tn,
+        "tpr": tpr, "fpr": fpr, "precision": precision, "recall": recall, "f1_score": f1,
+        "delay_median_s": delay_stats[0], "delay_p90_s": delay_stats[1], "delay_max_s": delay_stats[2],
+    })
+    return {"curve": curve, "delays": delays, "thresholds": thresholds}
+
+
+def roc_auc(fpr: np.ndarray, tpr: np.ndarray) -> float:
+    """Area under the (monotone) ROC points, closed with (0, 0) and (1, 1); NaN without positives or negatives."""
+    if np.isnan(fpr).any() or np.isnan(tpr).any():
+        return np.nan
+    points = sorted(zip(np.append(fpr, [0.0, 1.0]), np.append(tpr, [0.0, 1.0])))
+    x, y = np.array(points).T
+    return float(np.trapezoid(y, x))
+
+
+def calibrate(flight_set: LabeledFlightSet, rules: Optional[Iterable[str]] = None,
+              thresholds: Optional[Dict[str, Sequence[float]]] = None) -> dict:
+    """
+    Sweeps every rule (or `rules`) over its threshold grid (`thresholds` per rule, data quantiles
+    by default).
+
+    Returns:
+        dict: 'curves' (all rules' sweep rows), 'summary' (per rule: flights with and without the
+        fault, ROC AUC, the current threshold's outcome and the best-F1 threshold), 'delays'
+        (long format, detection delay of each detected flight at the current threshold) and
+        'flights' (scenario, is_anomaly and per-rule onset of every flight).
+    """
+    thresholds = thresholds or {}
+    curves, summary, delays = [], [], []
+    flights = pd.DataFrame({"scenario": flight_set.scenarios, "is_anomaly": flight_set.is_anomaly})
+    for name in rules or flight_set.sweeps:
+        sweep = flight_set.sweeps[name]
+        grid = thresholds.get(name)
+        if grid is not None:
+            grid = np.unique(np.append(np.asarray(grid, dtype=np.float64), sweep.current))
+        result = sweep_rule(flight_set, name, grid)
+        curve = result["curve"]
+        current = int(np.flatnonzero(np.isclose(curve["threshold"], sweep.current))[0])
+        # Among equally good thresholds, the one nearest the current setting.
+        f1 = curve["f1_score"].to_numpy()
+        ties = np.flatnonzero(f1 == f1.max())
+        best = int(ties[np.abs(curve["threshold"].to_numpy()[ties] - sweep.current).argmin()])
+        summary.append({
+            "rule": name, "op": sweep.op, "unit": sweep.unit,
+            "positives": int(curve["tp"].iloc[0] + curve["fn"].iloc[0]), "negatives": int(curve["fp"].iloc[0] + curve["tn"].iloc[0]),
+            "roc_auc": roc_auc(curve["fpr"].to_numpy(), curve["tpr"].to_numpy()),
+            "current_threshold": sweep.current, "current_tpr": curve["tpr"].iloc[current], "current_fpr": curve["fpr"].iloc[current],
+            "current_f1": curve["f1_score"].iloc[current], "current_delay_median_s": curve["delay_median_s"].iloc[current],
+            "best_f1_threshold": curve["threshold"].iloc[best], "best_f1": curve["f1_score"].iloc[best],
+            "best_tpr": curve["tpr"].iloc[best], "best_fpr": curve["fpr"].iloc[best],
+        })
+        detected = np.flatnonzero(~np.isnan(result["delays"][:, current]))
+        delays.append(pd.DataFrame({"rule": name, "flight": detected, "scenario": flights["scenario"].to_numpy()[detected],
+                                    "delay_s": result["delays"][detected, current]}))
+        flights[f"onset_{name}"] = flight_set.onsets(name)
+        curves.append(curve)
+    return {
+        "curves": pd.concat(curves, ignore_index=True),
+        "summary": pd.DataFrame(summary),
+        "delays": pd.concat(delays, ignore_index=True),
+        "flights": flights,
+    }
@@ -0,0 +1,161 @@
+# file: analysis_modules/downsampling.py (v1.1 - windowed sample counts, min/max within budget)
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, Optional, Tuple
+
+# Two samples per horizontal pixel is enough for an envelope to look identical to the raw line.
+POINTS_PER_PIXEL = 2
+DEFAULT_MAX_POINTS = 2000
+
+DOWNSAMPLING_METHODS = ("lttb", "minmax")
+
+
+def pixel_budget(fig_width_in: float, dpi: float = 100.0, axes_fraction: float = 0.8,
+                 points_per_pixel: int = POINTS_PER_PIXEL) -> int:
+    """
+    Number of points worth drawing for one line on an axes of the given figure width.
+    """
+    return max(int(fig_width_in * dpi * axes_fraction * points_per_pixel), 3)
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets: picks, for every bucket, the sample that forms the largest
+    triangle with the previously kept sample and the average of the next bucket.
+    First and last samples are always kept.
+    """
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    # Bucket edges for the n - 2 interior samples.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    # Next-bucket averages, computed once via cumulative sums.
+    cx = np.concatenate(([0.0], np.cumsum(x)))
+    cy = np.concatenate(([0.0], np.cumsum(y)))
+    next_lo = edges[1:]
+    next_hi = np.append(edges[2:], n)
+    counts = np.maximum(next_hi - next_lo, 1)
+    avg_x = (cx[next_hi] - cx[next_lo]) / counts
+    avg_y = (cy[next_hi] - cy[next_lo]) / counts
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    prev = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        bx = x[lo:hi]
+        by = y[lo:hi]
+        # Twice the triangle area; the constant factor does not change the argmax.
+        area = np.abs((x[prev] - avg_x[b]) * (by - y[prev]) - (x[prev] - bx) * (avg_y[b] - y[prev]))
+        prev = lo + int(np.argmax(area))
+        selected[b + 1] = prev
+    return selected
+
+
+def minmax_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Min/max envelope: keeps the minimum and maximum of each bucket, so single-sample spikes
+    always survive. Returns at most n_out sorted indices (two per bucket plus the end points)
+    for n_out >= 4.
+    """
+    n = len(y)
+    n_buckets = max((n_out - 2) // 2, 1)
+    if n_out >= n or n_buckets * 2 >= n:
+        return np.arange(n)
+
+    y = np.asarray(y, dtype=np.float64)
+    bucket_size = int(np.ceil(n / n_buckets))
+    padded = np.full(bucket_size * n_buckets, np.nan)
+    padded[:n] = y
+    blocks = padded.reshape(n_buckets, bucket_size)
+    valid = ~np.all(np.isnan(blocks), axis=1)
+    blocks = blocks[valid]
+    offsets = np.flatnonzero(valid) * bucket_size
+    mins = offsets + np.nanargmin(blocks, axis=1)
+    maxs = offsets + np.nanargmax(blocks, axis=1)
+    return np.unique(np.concatenate(([0, n - 1], mins, maxs)))
+
+
+def downsample_series(x, y, n_out: int, method: str = "lttb") -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reduces one channel to about n_out points. Series that already fit the budget are returned as-is.
+    """
+    if method not in DOWNSAMPLING_METHODS:
+        raise ValueError(f"Unknown downsampling method '{method}'. Use one of {DOWNSAMPLING_METHODS}.")
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if len(y) <= n_out:
+        return x, y
+    # NaN gaps would poison the bucket averages; decimate the finite samples only.
+    finite = np.isfinite(y.astype(np.float64))
+    if not finite.all():
+        x, y = x[finite], y[finite]
+    idx = lttb_indices(x, y, n_out) if method == "lttb" else minmax_indices(y, n_out)
+    return x[idx], y[idx]
+
+
+def numeric_channels(df: pd.DataFrame, x_col: str = "timestamp") -> list:
+    """Columns that can be plotted as a line (numeric or boolean, excluding the x axis)."""
+    return [c for c in df.columns
+            if c != x_col and (pd.api.types.is_numeric_dtype(df[c]) or pd.api.types.is_bool_dtype(df[c]))]
+
+
+def _window(df: pd.DataFrame, x_col: str, x_range: Optional[Tuple[float, float]]) -> pd.DataFrame:
+    """Rows of df whose x value lies in the inclusive (start, end) range; df itself when there is no range."""
+    if x_range is None:
+        return df
+    start, end = x_range
+    x_all = df[x_col].to_numpy()
+    lo = np.searchsorted(x_all, start, side="left")
+    hi = np.searchsorted(x_all, end, side="right")
+    return df.iloc[lo:hi]
+
+
+def downsample_frame(df: pd.DataFrame, columns: Optional[Iterable[str]] = None, n_out: int = DEFAULT_MAX_POINTS,
+                     x_col: str = "timestamp", method: str = "lttb",
+                     x_range: Optional[Tuple[float, float]] = None) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    """
+    Downsamples several channels of a telemetry frame independently.
+
+    Args:
+        df (pd.DataFrame): Telemetry frame.
+        columns: Channels to keep; defaults to every numeric channel.
+        n_out (int): Point budget per channel.
+        x_col (str): Time axis column.
+        method (str): 'lttb' (shape preserving) or 'minmax' (envelope, keeps every spike).
+        x_range: Optional (start, end) window on the x axis, used for zoomed views.
+
+    Returns:
+        dict: channel -> (x, y) arrays.
+    """
+    df = _window(df, x_col, x_range)
+    columns = list(columns) if columns is not None else numeric_channels(df, x_col)
+    x = df[x_col].to_numpy()
+    result = {}
+    for column in columns:
+        if column not in df.columns:
+            continue
+        result[column] = downsample_series(x, df[column].to_numpy(dtype=np.float64), n_out, method)
+    return result
+
+
+def downsampled_payload(df: pd.DataFrame, columns: Optional[Iterable[str]] = None, n_out: int = DEFAULT_MAX_POINTS,
+                        x_col: str = "timestamp", method: str = "lttb",
+                        x_range: Optional[Tuple[float, float]] = None) -> dict:
+    """
+    JSON-ready version of downsample_frame, used by the dashboard API. total_samples counts the
+    raw samples inside x_range, i.e. the samples the returned points stand for.
+    """
+    window = _window(df, x_col, x_range)
+    series = downsample_frame(window, columns, n_out, x_col, method)
+    return {
+        "method": method,
+        "points": n_out,
+        "total_samples": int(len(window)),
+        "channels": {name: {"x": xs.tolist(), "y": ys.tolist()} for name, (xs, ys) in series.items()},
+    }
@@ -0,0 +1,197 @@
+# file: analysis_modules/envelope_index.py (v1.1 - EnvelopeDetector on the shared StreamingDetector base)
+
+import json
+import os
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .logging_utils import get_logger
+from .statistical_detectors import StreamingDetector
+
+logger = get_logger("envelope_index")
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+DEFAULT_INDEX_PATH = os.path.join(_PROJECT_ROOT, "config", "envelopes", "normal_flight.npz")
+INDEX_FORMAT_VERSION = 1
+
+# Channels with an envelope, with the smallest half-width allowed around each envelope (about
+# the sensor resolution), so channels that are constant in a phase do not alarm on rounding.
+DEFAULT_ENVELOPE_CHANNELS = {
+    'altitude_ft': 200.0,
+    'airspeed_kts': 10.0,
+    'roll_angle_deg': 1.0,
+    'left_flap_angle_deg': 1.0,
+    'right_flap_angle_deg': 1.0,
+    'green_hydraulic_pressure_psi': 50.0,
+    'vertical_g_force': 0.05,
+    'left_flap_motor_current': 0.5,
+    'cabin_altitude_ft': 100.0,
+    'rate_of_climb_fpm': 500.0,
+    'engine_1_vibration_n1': 0.01,
+    'engine_1_egt_degc': 5.0,
+}
+ENVELOPE_PERCENTILES = (0.0, 0.1, 1.0, 50.0, 99.0, 99.9, 100.0)
+
+
+class EnvelopeIndex:
+    """
+    Percentiles of each channel in each flight phase over a fleet of simulated flights, as a
+    (phases x channels x percentiles) float32 table. Phases are given by their start times on a
+    reference timeline; starts after `stretch_after` move with the flight's end, as the
+    simulator lengthens only the cruise (see TelemetryGenerator._t), so one index serves every
+    flight length.
+
+    The file is a NumPy .npz archive of the table and its labels (no pickled objects), a few
+    kilobytes for the default channels.
+    """
+    def __init__(self, phases: Sequence[str], reference_starts: Sequence[float], reference_seconds: float,
+                 stretch_after: float, channels: Sequence[str], percentiles: Sequence[float], table: np.ndarray,
+                 info: Optional[dict] = None):
+        self.phases = list(phases)
+        self.reference_starts = np.asarray(reference_starts, dtype=np.float64)
+        self.reference_seconds = float(reference_seconds)
+        self.stretch_after = float(stretch_after)
+        self.channels = list(channels)
+        self.percentiles = np.asarray(percentiles, dtype=np.float64)
+        self.table = np.asarray(table, dtype=np.float32)
+        self.info = dict(info or {})
+        if self.table.shape != (len(self.phases), len(self.channels), len(self.percentiles)):
+            raise ValueError(f"Envelope table shape {self.table.shape} does not match the phases, channels and percentiles.")
+
+    def phase_starts(self, flight_seconds: float) -> np.ndarray:
+        """The phase start times on a flight of `flight_seconds`."""
+        starts = self.reference_starts
+        return np.where(starts <= self.stretch_after, starts, starts + (flight_seconds - self.reference_seconds))
+
+    def phase_ids(self, timestamps: np.ndarray, flight_seconds: float) -> np.ndarray:
+        """Row of the table for each timestamp (samples before the first phase count as the first)."""
+        ids = np.searchsorted(self.phase_starts(flight_seconds), timestamps, side='right') - 1
+        return np.maximum(ids, 0)
+
+    def percentile(self, level: float) -> np.ndarray:
+        """The (phases x channels) table at one of the stored percentile levels."""
+        matches = np.flatnonzero(np.isclose(self.percentiles, level))
+        if not len(matches):
+            raise ValueError(f"Percentile {level} is not in the index (stored: {self.percentiles.tolist()}).")
+        return self.table[:, :, matches[0]]
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "wb") as f:
+            np.savez(f, version=np.int32(INDEX_FORMAT_VERSION), phases=np.array(self.phases),
+                     reference_starts=self.reference_starts, timeline=np.array([self.reference_seconds, self.stretch_after]),
+                     channels=np.array(self.channels), percentiles=self.percentiles, table=self.table,
+                     info=np.array(json.dumps(self.info)))
+        return path
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_INDEX_PATH) -> "EnvelopeIndex":
+        """
+        Raises:
+            FileNotFoundError: When the index has not been built (see src/scripts/build_envelope_index.py).
+            ValueError: For an index written in another format version.
+        """
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"Envelope index not found: {path}. Build it with src/scripts/build_envelope_index.py.")
+        with np.load(path, allow_pickle=False) as data:
+            if int(data["version"]) != INDEX_FORMAT_VERSION:
+                raise ValueError(f"Envelope index {path} has format version {int(data['version'])}, expected {INDEX_FORMAT_VERSION}.")
+            reference_seconds, stretch_after = data["timeline"].tolist()
+            return cls(data["phases"].tolist(), data["reference_starts"], reference_seconds, stretch_after,
+                       data["channels"].tolist(), data["percentiles"], data["table"], json.loads(str(data["info"])))
+
+
+def build_envelope_index(flights: Iterable[Tuple[pd.DataFrame, np.ndarray]], phases: Sequence[Tuple[str, float]],
+                         reference_seconds: float, stretch_after: float,
+                         channels: Optional[Sequence[str]] = None,
+                         percentiles: Sequence[float] = ENVELOPE_PERCENTILES, info: Optional[dict] = None) -> EnvelopeIndex:
+    """
+    Pools every flight's samples by phase and takes the percentiles of each channel.
+
+    flights: (telemetry, phase start times on that flight's timeline) pairs; timestamps ascend,
+        so each phase is one slice of the flight.
+    phases: (name, start on the reference timeline) in order, e.g. telemetry_generator.FLIGHT_PHASES.
+
+    The pooled samples are held as float32 until the end (flights x samples x channels x 4 bytes).
+    """
+    channels = list(channels or DEFAULT_ENVELOPE_CHANNELS)
+    pooled = [[] for _ in phases]
+    count = 0
+    for telemetry, starts in flights:
+        values = telemetry[channels].to_numpy(dtype=np.float32)
+        edges = np.searchsorted(telemetry['timestamp'].to_numpy(), np.asarray(starts), side='left').tolist()
+        for phase, (lo, hi) in enumerate(zip(edges, edges[1:] + [len(values)])):
+            pooled[phase].append(values[lo:hi])
+        count += 1
+    if not count:
+        raise ValueError("No flights to build the envelope index from.")
+    table = np.full((len(phases), len(channels), len(percentiles)), np.nan, dtype=np.float32)
+    samples = []
+    for phase, parts in enumerate(pooled):
+        values = np.concatenate(parts)
+        samples.append(len(values))
+        if len(values):
+            table[phase] = np.percentile(values, percentiles, axis=0).T
+    if not all(samples):
+        logger.warning("Phases without samples: %s", [name for (name, _), n in zip(phases, samples) if not n])
+    info = dict(info or {}, flights=count, samples_per_phase=samples)
+    return EnvelopeIndex([name for name, _ in phases], [start for _, start in phases], reference_seconds, stretch_after,
+                         channels, percentiles, table, info)
+
+
+class EnvelopeDetector(StreamingDetector):
+    """
+    Phase-aware exceedance check against a fleet envelope index. Each channel's band for each
+    phase is [lower, upper] percentile widened by `widen` x its width on both sides (at least the
+    channel's resolution from DEFAULT_ENVELOPE_CHANNELS), computed once per detector; a sample
+    then costs one phase lookup and one table read per channel. Each channel reports its first
+    sample outside the band as (f"ENVELOPE_EXCEEDANCE:{channel}", timestamp).
+
+    The phases depend on the flight's length: pass `flight_seconds` for streaming use, otherwise
+    it is taken from the frame given to start() (right for whole flights only).
+
+    Shares update() / finish() / detect() with the StatisticalDetector classes (StreamingDetector),
+    so it can be passed to AnomalyDetector(statistical_detectors=[...]).
+    """
+    method = "ENVELOPE_EXCEEDANCE"
+
+    def __init__(self, index: Optional[EnvelopeIndex] = None, channels: Optional[Dict[str, float]] = None,
+                 lower: float = 0.1, upper: float = 99.9, widen: float = 0.5, flight_seconds: Optional[float] = None):
+        self.index = index if index is not None else EnvelopeIndex.load()
+        resolutions = dict(channels or DEFAULT_ENVELOPE_CHANNELS)
+        self.channels = [channel for channel in resolutions if channel in self.index.channels]
+        positions = [self.index.channels.index(channel) for channel in self.channels]
+        low, high = self.index.percentile(lower)[:, positions], self.index.percentile(upper)[:, positions]
+        margin = np.maximum(widen * (high - low), np.array([resolutions[channel] for channel in self.channels]))
+        # Phases no flight reached stay NaN and never alarm.
+        self.low, self.high = (low - margin).astype(np.float64), (high + margin).astype(np.float64)
+        self.flight_seconds = flight_seconds
+
+    def start(self, df: pd.DataFrame) -> dict:
+        columns = [column for column in self.channels if column in df.columns]
+        positions = [self.channels.index(column) for column in columns]
+        flight_seconds = self.flight_seconds
+        if flight_seconds is None:
+            times = df['timestamp'].to_numpy(dtype=np.float64)
+            step = times[1] - times[0] if len(times) > 1 else 1.0
+            flight_seconds = times[-1] + step if len(times) else self.index.reference_seconds
+        return {
+            "columns": columns,
+            "low": self.low[:, positions],
+            "high": self.high[:, positions],
+            "flight_seconds": flight_seconds,
+            "first": {},
+        }
+
+    def _alarms(self, block: pd.DataFrame, timestamps: np.ndarray, state: dict) -> Tuple[np.ndarray, object]:
+        phase = self.index.phase_ids(timestamps, state["flight_seconds"])
+        values = block[state["columns"]].to_numpy(dtype=np.float64)
+        return (values < state["low"][phase]) | (values > state["high"][phase]), (values, phase)
+
+    def _log_alarm(self, column: str, position: int, row: int, context, state: dict):
+        values, phase = context
+        logger.debug("[ENVELOPE CHECK PASSED] %s = %s outside [%s, %s] in %s at timestamp: %ss", column,
+                     values[row, position], state["low"][phase[row], position], state["high"][phase[row], position],
+                     self.index.phases[phase[row]], state["first"][column])
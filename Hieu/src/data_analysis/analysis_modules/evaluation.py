@@ -0,0 +1,153 @@
+# file: analysis_modules/evaluation.py (v1.0 - Vectorized multi-hot tag evaluation)
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .hfacs_analyzer import ALL_EVIDENCE_TAGS, HFACS_RUBRIC
+
+HFACS_LEVEL_NAMES = ["Level 1: Unsafe Acts", "Level 2: Preconditions for Unsafe Acts",
+                     "Level 3: Unsafe Supervision", "Level 4: Organizational Influences"]
+BOOTSTRAP_CELLS_PER_CHUNK = 5_000_000  # replicates x runs held in memory at once
+
+
+def parse_tag_string(tags) -> List[str]:
+    """'L1_A, L2_B' (the reports' reasoning format) -> ['L1_A', 'L2_B']; lists pass through."""
+    if isinstance(tags, (list, tuple, set, np.ndarray)):
+        return list(tags)
+    if not tags or not isinstance(tags, str) or tags.strip() == "NONE":
+        return []
+    return [tag.strip() for tag in tags.split(",") if tag.strip()]
+
+
+def encode_tags(tag_lists: Sequence, tags: Sequence[str] = ALL_EVIDENCE_TAGS) -> np.ndarray:
+    """Multi-hot (runs x tags) boolean matrix. Tags outside `tags` are ignored."""
+    positions = {tag: i for i, tag in enumerate(tags)}
+    rows, cols = [], []
+    for row, run_tags in enumerate(tag_lists):
+        for tag in parse_tag_string(run_tags):
+            col = positions.get(tag)
+            if col is not None:
+                rows.append(row)
+                cols.append(col)
+    matrix = np.zeros((len(tag_lists), len(tags)), dtype=bool)
+    matrix[rows, cols] = True
+    return matrix
+
+
+def prf1(tp, fp, fn) -> Dict[str, np.ndarray]:
+    """Element-wise precision / recall / F1 (0 where undefined), for scalars or arrays of counts."""
+    tp, fp, fn = (np.asarray(x, dtype=np.float64) for x in (tp, fp, fn))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(tp + fp > 0, tp / (tp + fp), 0.0)
+        recall = np.where(tp + fn > 0, tp / (tp + fn), 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    return {"precision": precision, "recall": recall, "f1_score": f1}
+
+
+def _counts_table(tp, fp, fn, index, index_name: str) -> pd.DataFrame:
+    table = pd.DataFrame({"tp": tp, "fp": fp, "fn": fn}, index=pd.Index(index, name=index_name))
+    for key, values in prf1(tp, fp, fn).items():
+        table[key] = values
+    return table
+
+
+def _bootstrap_f1_intervals(run_counts: np.ndarray, n_bootstrap: int, confidence: float, seed: int) -> np.ndarray:
+    """
+    Percentile intervals for P/R/F1 of every column group in `run_counts` (runs x (3 * groups),
+    laid out tp, fp, fn per group). Each replicate is turned into a vector of resampling counts
+    (one flat bincount per chunk), so all groups of a chunk are re-aggregated by one matrix product.
+
+    Returns:
+        array (groups, 3 metrics, 2 bounds)
+    """
+    n_runs = run_counts.shape[0]
+    rng = np.random.default_rng(seed)
+    chunk = max(1, BOOTSTRAP_CELLS_PER_CHUNK // max(n_runs, 1))
+    replicates = []
+    for start in range(0, n_bootstrap, chunk):
+        size = min(chunk, n_bootstrap - start)
+        draws = rng.integers(0, n_runs, size=(size, n_runs)) + (np.arange(size) * n_runs)[:, None]
+        weights = np.bincount(draws.ravel(), minlength=size * n_runs).reshape(size, n_runs).astype(np.float32)
+        replicates.append(weights @ run_counts)
+    totals = np.concatenate(replicates).reshape(n_bootstrap, -1, 3)
+    metrics = prf1(totals[..., 0], totals[..., 1], totals[..., 2])
+    stacked = np.stack([metrics["precision"], metrics["recall"], metrics["f1_score"]], axis=-1)  # B x groups x 3
+    alpha = (1.0 - confidence) / 2.0
+    bounds = np.quantile(stacked, [alpha, 1.0 - alpha], axis=0)  # 2 x groups x 3
+    return np.moveaxis(bounds, 0, -1)
+
+
+def evaluate_runs(predicted: Sequence, expected: Sequence, scenarios: Optional[Sequence[str]] = None,
+                  tags: Sequence[str] = ALL_EVIDENCE_TAGS, n_bootstrap: int = 0, confidence: float = 0.95,
+                  seed: int = 0) -> dict:
+    """
+    Multi-label evaluation of predicted vs. expected HFACS tags, entirely as matrix reductions.
+
+    Args:
+        predicted / expected: Per-run tag lists or "L1_A, L2_B" strings.
+        scenarios: (Optional) Scenario name per run for the per-scenario tables.
+        n_bootstrap: Bootstrap replicates for confidence intervals on the overall, per-level and
+                     per-tag metrics (0 disables).
+
+    Returns:
+        dict with DataFrames 'per_run', 'per_tag', 'per_level', 'per_scenario', 'per_scenario_tag'
+        (long format, only cells with any tp/fp/fn) and the 'overall' metrics dict.
+    """
+    tags = list(tags)
+    predicted_hot = encode_tags(predicted, tags)
+    expected_hot = encode_tags(expected, tags)
+    tp = predicted_hot & expected_hot
+    fp = predicted_hot & ~expected_hot
+    fn = ~predicted_hot & expected_hot
+
+    run_tp, run_fp, run_fn = tp.sum(axis=1), fp.sum(axis=1), fn.sum(axis=1)
+    per_run = _counts_table(run_tp, run_fp, run_fn, np.arange(len(predicted_hot)), "run")
+
+    tag_tp, tag_fp, tag_fn = tp.sum(axis=0), fp.sum(axis=0), fn.sum(axis=0)
+    per_tag = _counts_table(tag_tp, tag_fp, tag_fn, tags, "tag")
+
+    # tags x levels membership matrix turns per-tag counts into per-level counts
+    membership = np.zeros((len(tags), len(HFACS_LEVEL_NAMES)))
+    for i, tag in enumerate(tags):
+        if tag in HFACS_RUBRIC:
+            membership[i, HFACS_LEVEL_NAMES.index(HFACS_RUBRIC[tag][0])] = 1.0
+    level_counts = np.stack([tag_tp, tag_fp, tag_fn]) @ membership  # 3 x levels
+    per_level = _counts_table(*level_counts.astype(np.int64), HFACS_LEVEL_NAMES, "level")
+
+    overall_counts = (int(run_tp.sum()), int(run_fp.sum()), int(run_fn.sum()))
+    overall = dict(zip(("tp", "fp", "fn"), overall_counts))
+    overall.update({key: float(value) for key, value in prf1(*overall_counts).items()})
+
+    per_scenario = per_scenario_tag = None
+    if scenarios is not None:
+        codes, names = pd.factorize(pd.Series(list(scenarios)), sort=False)
+        sums = [np.bincount(codes, weights=column, minlength=len(names)).astype(np.int64)
+                for column in (run_tp, run_fp, run_fn)]
+        per_scenario = _counts_table(*sums, list(names), "scenario")
+        # scenarios x tags counts in one product per outcome
+        one_hot = np.zeros((len(names), len(codes)), dtype=np.float32)
+        one_hot[codes, np.arange(len(codes))] = 1.0
+        cells = np.stack([one_hot @ m.astype(np.float32) for m in (tp, fp, fn)], axis=-1).astype(np.int64)
+        s_idx, t_idx = np.nonzero(cells.sum(axis=-1))
+        per_scenario_tag = pd.DataFrame({
+            "scenario": np.asarray(names)[s_idx], "tag": np.asarray(tags)[t_idx],
+            "tp": cells[s_idx, t_idx, 0], "fp": cells[s_idx, t_idx, 1], "fn": cells[s_idx, t_idx, 2],
+        })
+
+    if n_bootstrap > 0 and len(predicted_hot):
+        run_counts = np.concatenate([
+            np.stack([run_tp, run_fp, run_fn], axis=1),
+            np.stack([tp, fp, fn], axis=-1).reshape(len(predicted_hot), -1),
+            (np.stack([tp, fp, fn], axis=-1).transpose(0, 2, 1) @ membership).transpose(0, 2, 1).reshape(len(predicted_hot), -1),
+        ], axis=1).astype(np.float32)
+        intervals = _bootstrap_f1_intervals(run_counts, n_bootstrap, confidence, seed)
+        for position, key in enumerate(("precision", "recall", "f1_score")):
+            overall[f"{key}_ci"] = tuple(float(v) for v in intervals[0, position])
+            for table, block in ((per_tag, intervals[1:1 + len(tags)]), (per_level, intervals[1 + len(tags):])):
+                table[f"{key}_ci_low"] = block[:, position, 0]
+                table[f"{key}_ci_high"] = block[:, position, 1]
+
+    return {"per_run": per_run, "per_tag": per_tag, "per_level": per_level, "per_scenario": per_scenario,
+            "per_scenario_tag": per_scenario_tag, "overall": overall}
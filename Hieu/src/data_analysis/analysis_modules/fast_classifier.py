@@ -0,0 +1,211 @@
+# file: analysis_modules/fast_classifier.py (v1.0 - Local hashed n-gram HFACS pre-classifier)
+
+import argparse
+import json
+import os
+import re
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from .hfacs_analyzer import ALL_EVIDENCE_TAGS
+
+_TOKEN_PATTERN = re.compile(r"[a-z]+|\d+")
+_SIGN_BIT = np.uint32(1 << 31)
+
+
+class FastHFACSClassifier:
+    """
+    Multi-label HFACS tagger that runs locally in well under a millisecond per document:
+    signed hashed word uni/bi-grams (L2-normalized) and one-vs-rest logistic regression over
+    ALL_EVIDENCE_TAGS, trained with Adam on the tags the LLM panel already produced.
+
+    predict() also returns a confidence: the least certain per-tag decision, max(p, 1 - p),
+    so a document is only "confident" if every tag is clearly in or clearly out.
+    """
+    def __init__(self, n_features: int = 2 ** 15, tags: Optional[List[str]] = None, l2: float = 1e-4):
+        if n_features & (n_features - 1):
+            raise ValueError("n_features must be a power of two.")
+        self.n_features = n_features
+        self.tags = list(tags or ALL_EVIDENCE_TAGS)
+        self.l2 = l2
+        self.weights = np.zeros((n_features, len(self.tags)), dtype=np.float32)
+        self.bias = np.full(len(self.tags), -4.0, dtype=np.float32)  # tags are rare: start near "absent"
+        self.trained_examples = 0
+
+    # --- Features ---
+    def _hash(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        tokens = _TOKEN_PATTERN.findall(str(text).lower())
+        grams = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint32, count=len(grams))
+        indices = (hashes & np.uint32(self.n_features - 1)).astype(np.int64)
+        signs = np.where(hashes & _SIGN_BIT, -1.0, 1.0)
+        unique, inverse = np.unique(indices, return_inverse=True)
+        values = np.bincount(inverse, weights=signs).astype(np.float32) if len(unique) else np.zeros(0, np.float32)
+        norm = np.linalg.norm(values)
+        if norm > 0:
+            values /= norm
+        # A zero-valued entry keeps every row non-empty, which np.add.reduceat relies on.
+        return np.append(unique, 0), np.append(values, np.float32(0.0))
+
+    def vectorize(self, texts: Iterable[str]):
+        """Sparse CSR-style (indptr, indices, values) matrix for a batch of texts."""
+        rows = [self._hash(text) for text in texts]
+        indptr = np.zeros(len(rows) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(indices) for indices, _ in rows])
+        if not rows:
+            return indptr, np.zeros(0, np.int64), np.zeros(0, np.float32)
+        return indptr, np.concatenate([r[0] for r in rows]), np.concatenate([r[1] for r in rows])
+
+    def _logits(self, matrix) -> np.ndarray:
+        indptr, indices, values = matrix
+        return np.add.reduceat(self.weights[indices] * values[:, None], indptr[:-1], axis=0) + self.bias
+
+    def _label_matrix(self, labels: List[List[str]]) -> np.ndarray:
+        positions = {tag: i for i, tag in enumerate(self.tags)}
+        targets = np.zeros((len(labels), len(self.tags)), dtype=np.float32)
+        for row, doc_tags in enumerate(labels):
+            for tag in doc_tags:
+                if tag in positions:
+                    targets[row, positions[tag]] = 1.0
+        return targets
+
+    # --- Training ---
+    def fit(self, texts: List[str], labels: List[List[str]], epochs: int = 100, learning_rate: float = 0.2):
+        """Trains from the current weights (so calling it again on new examples is an incremental update)."""
+        if not texts:
+            return self
+        matrix = self.vectorize(texts)
+        indptr, indices, values = matrix
+        targets = self._label_matrix(labels)
+        rows = np.repeat(np.arange(len(texts)), np.diff(indptr))
+        # X^T @ errors only touches the features present in the batch: sort the non-zeros by feature once,
+        # then every step is a single reduceat over contiguous runs.
+        order = np.argsort(indices, kind="stable")
+        touched, starts = np.unique(indices[order], return_index=True)
+        sorted_rows, sorted_values = rows[order], values[order][:, None]
+
+        m_w, v_w = np.zeros((len(touched), len(self.tags)), np.float32), np.zeros((len(touched), len(self.tags)), np.float32)
+        m_b, v_b = np.zeros_like(self.bias), np.zeros_like(self.bias)
+        beta1, beta2, eps = 0.9, 0.999, 1e-8
+        for step in range(1, epochs + 1):
+            errors = (1.0 / (1.0 + np.exp(-self._logits(matrix))) - targets) / len(texts)
+            grad_w = np.add.reduceat(sorted_values * errors[sorted_rows], starts, axis=0).astype(np.float32)
+            grad_w += self.l2 * self.weights[touched]
+            grad_b = errors.sum(axis=0)
+
+            m_w = beta1 * m_w + (1 - beta1) * grad_w
+            v_w = beta2 * v_w + (1 - beta2) * grad_w ** 2
+            m_b = beta1 * m_b + (1 - beta1) * grad_b
+            v_b = beta2 * v_b + (1 - beta2) * grad_b ** 2
+            correction = np.sqrt(1 - beta2 ** step) / (1 - beta1 ** step)
+            self.weights[touched] -= learning_rate * correction * m_w / (np.sqrt(v_w) + eps)
+            self.bias -= (learning_rate * correction * m_b / (np.sqrt(v_b) + eps)).astype(np.float32)
+        self.trained_examples += len(texts)
+        return self
+
+    # --- Inference ---
+    def predict_proba(self, texts: List[str]) -> np.ndarray:
+        return 1.0 / (1.0 + np.exp(-self._logits(self.vectorize(texts))))
+
+    def predict_many(self, texts: List[str], threshold: float = 0.5) -> List[Tuple[List[str], float]]:
+        """(tags, confidence) per text."""
+        probabilities = self.predict_proba(texts)
+        confidences = np.maximum(probabilities, 1.0 - probabilities).min(axis=1)
+        return [([tag for tag, p in zip(self.tags, row) if p >= threshold], round(float(confidence), 4))
+                for row, confidence in zip(probabilities, confidences)]
+
+    def predict(self, text: str, threshold: float = 0.5) -> Tuple[List[str], float]:
+        return self.predict_many([text], threshold)[0]
+
+    def evaluate(self, texts: List[str], labels: List[List[str]], min_confidence: float = 0.9) -> dict:
+        """Exact-match accuracy overall and on the confident share the engine would not send to the panel."""
+        predictions = self.predict_many(texts)
+        exact = [set(tags) == set(expected) for (tags, _), expected in zip(predictions, labels)]
+        confident = [match for match, (_, confidence) in zip(exact, predictions) if confidence >= min_confidence]
+        return {
+            "examples": len(texts),
+            "exact_match": round(float(np.mean(exact)), 4) if exact else None,
+            "confident_share": round(len(confident) / len(texts), 4) if texts else None,
+            "confident_exact_match": round(float(np.mean(confident)), 4) if confident else None,
+        }
+
+    # --- Persistence ---
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        meta = {"n_features": self.n_features, "tags": self.tags, "l2": self.l2,
+                "trained_examples": self.trained_examples}
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(tmp_path, weights=self.weights, bias=self.bias, meta=json.dumps(meta))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FastHFACSClassifier":
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            model = cls(n_features=meta["n_features"], tags=meta["tags"], l2=meta["l2"])
+            model.weights = data["weights"].astype(np.float32)
+            model.bias = data["bias"].astype(np.float32)
+        model.trained_examples = meta["trained_examples"]
+        return model
+
+
+def examples_from_panel_cache(cache_paths: List[str]) -> Tuple[List[str], List[List[str]]]:
+    """
+    (evidence texts, adjudicated tags) from saved ClassificationCache files. Only entries
+    written since the engine started storing the evidence alongside the result can be used.
+    """
+    texts, labels = [], []
+    for path in cache_paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            entries: Dict[str, dict] = json.load(f)
+        for entry in entries.values():
+            if isinstance(entry, dict) and entry.get("evidence"):
+                texts.append(entry["evidence"])
+                labels.append(list(entry.get("final_reasoning") or []))
+    return texts, labels
+
+
+def main():
+    """
+    Trains, updates and evaluates the local pre-classifier from panel cache files.
+    """
+    parser = argparse.ArgumentParser(description="Local fast HFACS pre-classifier.")
+    parser.add_argument("command", choices=["train", "update", "evaluate"],
+                        help="train: new model; update: continue training an existing model; evaluate: report accuracy.")
+    parser.add_argument("--model", type=str, required=True, help="Path of the .npz model file.")
+    parser.add_argument("--panel_cache", type=str, nargs='+', required=True, help="Panel cache JSON file(s) with labelled evidence.")
+    parser.add_argument("--n_features", type=int, default=2 ** 15, help="Hashed feature space (power of two; train only).")
+    parser.add_argument("--epochs", type=int, default=100, help="Training epochs.")
+    parser.add_argument("--min_confidence", type=float, default=0.9, help="Confidence used for the evaluation report.")
+    parser.add_argument("--holdout", type=float, default=0.2, help="Share of examples held out for evaluation after training.")
+    args = parser.parse_args()
+
+    texts, labels = examples_from_panel_cache(args.panel_cache)
+    print(f"Loaded {len(texts)} labelled examples from {len(args.panel_cache)} panel cache file(s).")
+    if not texts:
+        return
+
+    if args.command == "evaluate":
+        print(json.dumps(FastHFACSClassifier.load(args.model).evaluate(texts, labels, args.min_confidence), indent=2))
+        return
+
+    order = np.random.default_rng(0).permutation(len(texts))
+    n_holdout = int(len(texts) * args.holdout)
+    holdout, train = order[:n_holdout], order[n_holdout:]
+    model = FastHFACSClassifier(n_features=args.n_features) if args.command == "train" else FastHFACSClassifier.load(args.model)
+    start = time.perf_counter()
+    model.fit([texts[i] for i in train], [labels[i] for i in train], epochs=args.epochs)
+    print(f"Trained on {len(train)} examples in {time.perf_counter() - start:.1f}s "
+          f"({model.trained_examples} examples seen in total).")
+    if n_holdout:
+        report = model.evaluate([texts[i] for i in holdout], [labels[i] for i in holdout], args.min_confidence)
+        print(f"Holdout: {json.dumps(report)}")
+    model.save(args.model)
+    print(f"Model saved to {args.model}")
+
+
+if __name__ == '__main__':
+    main()
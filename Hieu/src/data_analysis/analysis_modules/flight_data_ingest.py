@@ -0,0 +1,241 @@
+# file: analysis_modules/flight_data_ingest.py (v1.3 - Close the columnar store when ingestion fails)
+
+import json
+import os
+import time
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_simulation.data_input_simulator.columnar_store import ColumnarTelemetryWriter
+from src.data_simulation.data_input_simulator.telemetry_schema import (
+    ALERT_SEPARATOR, TELEMETRY_SCHEMA, cast_channel, encode_alerts
+)
+from .anomaly_detector import AnomalyDetector, available_rules
+from .logging_utils import get_logger
+from .run_catalog import RunCatalog, source_fingerprint
+from .streaming_detector import StreamingAnomalyDetector
+from .tracing import span
+
+logger = get_logger("flight_data_ingest")
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+DEFAULT_CHANNEL_MAP_DIR = os.path.join(_PROJECT_ROOT, "config", "channel_maps")
+DEFAULT_CHUNK_ROWS = 250_000
+PARQUET_SUFFIXES = (".parquet", ".pq")
+TIME_UNITS = {"s": 1.0, "ms": 1e-3, "datetime": None}
+
+
+class ChannelMap:
+    """
+    How a recorder's columns map onto the telemetry channels, loaded from JSON:
+
+        {"name": "generic_fdr",
+         "time": {"column": "TIME", "unit": "s", "relative": true},   # unit: "s", "ms" or "datetime"
+         "channels": {"altitude_ft": "ALT_STD",
+                      "green_hydraulic_pressure_psi": {"column": "HYD_G", "scale": 1.0, "offset": 0.0},
+                      "ecam_alerts": {"column": "WARNINGS", "separator": ";"}}}
+
+    Numeric channels become raw * scale + offset in the channel's schema dtype. With "relative"
+    (the default) timestamps count seconds from the file's first sample, as the rules expect.
+    """
+    def __init__(self, channels: dict, time: Optional[dict] = None, name: str = "custom"):
+        unknown = set(channels) - set(TELEMETRY_SCHEMA)
+        if unknown:
+            raise ValueError(f"Channel map '{name}' targets unknown channels: {sorted(unknown)}")
+        self.name = name
+        self.time = {"column": "timestamp", "unit": "s", "relative": True, **(time or {})}
+        if self.time["unit"] not in TIME_UNITS:
+            raise ValueError(f"Unknown time unit '{self.time['unit']}'. Available: {sorted(TIME_UNITS)}")
+        self.channels = {}
+        for channel, spec in channels.items():
+            spec = {"column": spec} if isinstance(spec, str) else dict(spec)
+            self.channels[channel] = {"scale": 1.0, "offset": 0.0, "separator": ALERT_SEPARATOR, **spec}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ChannelMap":
+        return cls(data.get("channels", {}), data.get("time"), data.get("name", "custom"))
+
+    @classmethod
+    def load(cls, name_or_path: str, map_dir: str = DEFAULT_CHANNEL_MAP_DIR) -> "ChannelMap":
+        """A map by file path, or by name from config/channel_maps."""
+        path = name_or_path if os.path.isfile(name_or_path) else os.path.join(map_dir, f"{name_or_path}.json")
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Channel map '{name_or_path}' not found (looked for {path}).")
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def restricted_to(self, columns) -> "ChannelMap":
+        """The map without channels whose source column the file lacks (the time column is required)."""
+        columns = set(columns)
+        if self.time["column"] not in columns:
+            raise ValueError(f"Time column '{self.time['column']}' not found in the recording.")
+        missing = sorted(channel for channel, spec in self.channels.items() if spec["column"] not in columns)
+        if missing:
+            logger.warning("Channel map '%s': recording has no column for %s", self.name, missing)
+        restricted = ChannelMap({}, self.time, self.name)
+        restricted.channels = {channel: spec for channel, spec in self.channels.items() if channel not in missing}
+        return restricted
+
+    def source_columns(self) -> List[str]:
+        return [self.time["column"]] + [spec["column"] for spec in self.channels.values()]
+
+    def source_dtypes(self) -> dict:
+        """Parse types for the source columns: text for alerts and datetimes, float64 otherwise."""
+        dtypes = {spec["column"]: (str if channel == 'ecam_alerts' else np.float64)
+                  for channel, spec in self.channels.items()}
+        dtypes[self.time["column"]] = str if self.time["unit"] == "datetime" else np.float64
+        return dtypes
+
+
+def _source_columns(path: str) -> List[str]:
+    if path.lower().endswith(PARQUET_SUFFIXES):
+        return list(_parquet_file(path).schema_arrow.names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _parquet_file(path: str):
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Reading Parquet flight data needs pyarrow (pip install pyarrow).") from e
+    return pq.ParquetFile(path)
+
+
+def _read_chunks(path: str, channel_map: ChannelMap, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """Raw chunks of the mapped source columns, parsed with fixed dtypes."""
+    columns = channel_map.source_columns()
+    if path.lower().endswith(PARQUET_SUFFIXES):
+        for batch in _parquet_file(path).iter_batches(batch_size=chunk_rows, columns=columns):
+            yield batch.to_pandas()
+    else:
+        # The compression of .csv.gz / .zip files is inferred from the extension.
+        yield from pd.read_csv(path, usecols=columns, dtype=channel_map.source_dtypes(), chunksize=chunk_rows)
+
+
+class _ChunkMapper:
+    """Maps raw chunks onto the telemetry channels, carrying the time origin and last values across chunks."""
+    def __init__(self, channel_map: ChannelMap):
+        self.channel_map = channel_map
+        self.origin = None
+        self.last_values = {}
+        self.offset = 0
+
+    def _seconds(self, raw: pd.Series) -> np.ndarray:
+        unit = self.channel_map.time["unit"]
+        if unit == "datetime":
+            stamps = pd.to_datetime(raw, format=self.channel_map.time.get("format"))
+            seconds = stamps.to_numpy(dtype="datetime64[ns]").astype(np.int64) / 1e9
+        else:
+            seconds = raw.to_numpy(dtype=np.float64) * TIME_UNITS[unit]
+        if self.channel_map.time["relative"]:
+            if self.origin is None:
+                self.origin = seconds[0]
+            seconds = seconds - self.origin
+        return seconds
+
+    def map(self, raw: pd.DataFrame) -> pd.DataFrame:
+        data = {'timestamp': self._seconds(raw[self.channel_map.time["column"]])}
+        for channel, spec in self.channel_map.channels.items():
+            values = raw[spec["column"]]
+            if channel == 'ecam_alerts':
+                data[channel] = self._alerts(values, spec["separator"])
+                continue
+            values = values.to_numpy(dtype=np.float64) * spec["scale"] + spec["offset"]
+            data[channel] = cast_channel(channel, self._fill_gaps(channel, values))
+        frame = pd.DataFrame(data, index=pd.RangeIndex(self.offset, self.offset + len(raw)))
+        self.offset += len(raw)
+        return frame
+
+    @staticmethod
+    def _alerts(values: pd.Series, separator: str) -> pd.Categorical:
+        # Encodes each distinct alert text once; empty samples (code -1) map to "".
+        codes, uniques = pd.factorize(values)
+        texts = [encode_alerts(str(value).replace(separator, ALERT_SEPARATOR)) for value in uniques] + [""]
+        categories = sorted(set(texts))
+        lookup = {text: code for code, text in enumerate(categories)}
+        remap = np.array([lookup[text] for text in texts], dtype=np.int32)
+        return pd.Categorical.from_codes(remap[codes], categories=categories)
+
+    def _fill_gaps(self, channel: str, values: np.ndarray) -> np.ndarray:
+        """
+        Holds the last recorded value over empty samples (channels recorded at a lower rate),
+        continuing from the previous chunk. Integer channels have no NaN, so their samples before
+        the first recorded value are 0.
+        """
+        missing = np.isnan(values)
+        if missing.any():
+            values = pd.Series(values).ffill().to_numpy(copy=True)
+            if channel in self.last_values:
+                values[np.isnan(values)] = self.last_values[channel]
+            if np.dtype(TELEMETRY_SCHEMA[channel]).kind == 'i':
+                values[np.isnan(values)] = 0
+        if len(values) and not np.isnan(values[-1]):
+            self.last_values[channel] = values[-1]
+        return values
+
+
+def iter_flight_data(path: str, channel_map: ChannelMap, chunk_rows: int = DEFAULT_CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+    """A recorded flight (CSV or Parquet) as telemetry blocks in the schema dtypes, index = sample number."""
+    mapper = _ChunkMapper(channel_map)
+    for raw in _read_chunks(path, channel_map, chunk_rows):
+        yield mapper.map(raw)
+
+
+def ingest_flight_file(path: str, channel_map: ChannelMap, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                       catalog: Optional[RunCatalog] = None, store_dir: Optional[str] = None,
+                       statistical_detectors: Optional[list] = None) -> dict:
+    """
+    Streams one recording through the anomaly rules it has channels for (plus any statistical
+    detectors, over the channels present), optionally writing the mapped telemetry to a columnar
+    store and recording the run in the catalog. Memory use depends on chunk_rows, not on the file size.
+
+    Returns:
+        dict: {"source", "rows", "chunks", "anomalies", "rules", "bytes", "seconds", "mb_per_s",
+               "output_path", "run_id"}
+    """
+    channel_map = channel_map.restricted_to(_source_columns(path))
+    rules = available_rules(['timestamp', *channel_map.channels])
+    skipped = [name for name in StreamingAnomalyDetector().rules if name not in rules]
+    if skipped:
+        logger.info("%s: skipping rules without their channels: %s", os.path.basename(path), sorted(skipped))
+    detector = StreamingAnomalyDetector(AnomalyDetector(statistical_detectors), rules=rules)
+    writer = ColumnarTelemetryWriter(store_dir) if store_dir else None
+
+    started = time.perf_counter()
+    chunks = 0
+    try:
+        with span("ingest", source=os.path.basename(path)):
+            for frame in iter_flight_data(path, channel_map, chunk_rows):
+                detector.update(frame)
+                if writer is not None:
+                    writer.write(frame)
+                chunks += 1
+    finally:
+        if writer is not None:
+            writer.close()  # also on a bad chunk: the rows written so far stay readable
+    anomalies = detector.finish()
+    seconds = time.perf_counter() - started
+    size = os.path.getsize(path)
+    result = {
+        "source": path,
+        "rows": detector.rows,
+        "chunks": chunks,
+        "anomalies": anomalies,
+        "rules": rules,
+        "bytes": size,
+        "seconds": seconds,
+        "mb_per_s": size / 2 ** 20 / seconds if seconds > 0 else 0.0,
+        "output_path": store_dir or "",
+        "run_id": None,
+    }
+    logger.info("Ingested %s: %d samples, %d chunks, %.1f MiB/s, anomalies %s",
+                os.path.basename(path), result["rows"], chunks, result["mb_per_s"], anomalies)
+    if catalog is not None:
+        entry = catalog.append(kind="ingest", source=os.path.abspath(path), source_fingerprint=source_fingerprint(path),
+                               channel_map=channel_map.name, rows=result["rows"], duration_s=f"{seconds:.3f}",
+                               anomalies=anomalies, output_path=result["output_path"],
+                               notes=f"rules={len(rules)}/{len(detector.detector.rule_checks())}")
+        result["run_id"] = entry["run_id"]
+    return result
@@ -1,21 +1,21 @@
-# file: analysis_modules/hfacs_analyzer.py (v2.0 - Multi-Agent)
+# file: analysis_modules/hfacs_analyzer.py (v2.8 - One immediate retry on timeouts)
 
 import json
 import argparse
-import time
+import logging
 import os
 
-# Thư viện chuyên dụng cho Vertex AI và xác thực Service Account
-import vertexai
-from vertexai.generative_models import (
-    GenerativeModel,
-    GenerationConfig,
-    SafetySetting,
-    HarmCategory,
-    HarmBlockThreshold
-)
-from google.oauth2 import service_account
 from google.api_core.exceptions import ResourceExhausted, PermissionDenied, DeadlineExceeded
+from vertexai.generative_models import GenerationConfig
+
+# Credentials, vertexai.init and the model handle are shared process-wide.
+from .vertex_client import get_model, load_prompt, estimate_tokens
+from .rate_limiter import get_rate_limiter
+from .resilience import CircuitOpenError
+from .logging_utils import get_logger
+from .tracing import span
+
+logger = get_logger("hfacs_analyzer")
 
 # *** BƯỚC 1: DI CHUYỂN BAREM VÀO TRONG FILE NÀY ***
 HFACS_RUBRIC = {
@@ -98,6 +98,37 @@ HFACS_RUBRIC = {
 }
 ALL_EVIDENCE_TAGS = list(HFACS_RUBRIC.keys())
 
+# --- Batched (multi-flight) analysis ---
+DEFAULT_BATCH_PROMPT_TOKENS = 120000   # well inside the model's context window
+DEFAULT_BATCH_OUTPUT_TOKENS = 8192
+BATCH_OUTPUT_TOKENS_PER_FLIGHT = 80    # flight id + a handful of tags in JSON
+RESPONSE_TOKEN_ALLOWANCE = 100        # single-flight answers are one line of tags
+# A call that hit the deadline already waited CALL_TIMEOUT_SECONDS: retry it once, right away, and
+# leave failing fast on a slow backend to the circuit breaker.
+TIMEOUT_RETRIES = 1
+PERMISSION_DENIED_HINT = ("PERMISSION DENIED. Check Project ID, that Vertex AI API is enabled, and that the service "
+                         "account has the 'Vertex AI User' role. Error: %s")
+BATCH_PER_FLIGHT_KEYS = ('combined_text', 'original_evidence', 'specialist_findings_json')
+BATCH_RESPONSE_SCHEMA = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "flight_id": {"type": "string"},
+            "tags": {"type": "array", "items": {"type": "string"}},
+        },
+        "required": ["flight_id", "tags"],
+    },
+}
+BATCH_INSTRUCTIONS = """
+
+**BATCH MODE (replaces the OUTPUT REQUIREMENT above):**
+The material above covers {num_flights} separate flights, each introduced by a line "=== FLIGHT <id> ===".
+Analyze every flight independently, applying all rules above to that flight's material only.
+Return JSON only: an array with exactly one object per flight, {{"flight_id": "<id>", "tags": ["TAG", ...]}}.
+Use an empty tag list where you would otherwise return "NONE".
+"""
+
 
 class HFACSAnalyzer:
     """
@@ -106,33 +137,41 @@ class HFACSAnalyzer:
     Its 'analyze' method takes a dictionary to format the prompt, making it flexible
     for different analysis roles (e.g., Specialist, Adjudicator).
     """
-    def __init__(self, project_id, location, credentials_path, prompt_path: str, project_root: str):
+    def __init__(self, project_id, location, credentials_path, prompt_path: str, project_root: str,
+                 rate_limiter=None, model=None):
+        """
+        Args:
+            rate_limiter: (Optional) Limiter to draw from; defaults to the process-wide one.
+            model: (Optional) Any object with generate_content(), e.g. a ResilientModel around
+                   stub_backend.FaultInjectingBackend. Skips Vertex AI initialization entirely.
+        """
         self.model = None
         self.prompt_template = ""
+        # Every analyzer in the process (or across processes, via a coordinator) shares one quota.
+        self.rate_limiter = rate_limiter or get_rate_limiter()
         try:
             # Construct the full path using the provided project_root
             full_prompt_path = os.path.join(project_root, prompt_path)
-            with open(full_prompt_path, 'r', encoding='utf-8') as f:
-                self.prompt_template = f.read()
-            print(f"Prompt loaded successfully from {full_prompt_path}")
+            self.prompt_template = load_prompt(full_prompt_path)
+            logger.debug("Prompt loaded successfully from %s", full_prompt_path)
         except FileNotFoundError:
-            print(f"[ERROR] Prompt file not found at {full_prompt_path}")
+            logger.error("Prompt file not found at %s", full_prompt_path)
             self.model = None
             return
         except Exception as e:
-            print(f"[ERROR] Failed to read prompt file {full_prompt_path}: {e}")
+            logger.error("Failed to read prompt file %s: %s", full_prompt_path, e)
             self.model = None
             return
 
+        if model is not None:
+            self.model = model
+            return
         try:
-            credentials = service_account.Credentials.from_service_account_file(credentials_path)
-            vertexai.init(project=project_id, location=location, credentials=credentials)
-            safety_settings = [SafetySetting(category=c, threshold=HarmBlockThreshold.BLOCK_NONE) for c in HarmCategory]
-            generation_config = GenerationConfig(temperature=0.0, max_output_tokens=2048) # Increased token limit for complex prompts
-            self.model = GenerativeModel("gemini-2.5-flash-lite", safety_settings=safety_settings, generation_config=generation_config)
-            print(f"HFACSAnalyzer instance for '{os.path.basename(prompt_path)}' initialized successfully.")
+            # Roles differ only by prompt template: every analyzer reuses the same model handle.
+            self.model = get_model(project_id, location, credentials_path) # 2048 output tokens for complex prompts
+            logger.info("HFACSAnalyzer instance for '%s' initialized successfully.", os.path.basename(prompt_path))
         except Exception as e:
-            print(f"[ERROR] Failed to initialize HFACSAnalyzer for '{os.path.basename(prompt_path)}': {e}")
+            logger.error("Failed to initialize HFACSAnalyzer for '%s': %s", os.path.basename(prompt_path), e)
             self.model = None
 
     def analyze(self, prompt_context: dict, retries=6):
@@ -153,25 +192,32 @@ class HFACSAnalyzer:
 
         try:
             # Ensure all context values are strings to prevent TypeError during formatting
-            string_prompt_context = {k: str(v) for k, v in prompt_context.items()}
-            prompt_to_send = self.prompt_template.format(**string_prompt_context)
-            print(f"DEBUG: Prompt to send (first 500 chars): {prompt_to_send[:500]}...") # Debugging
+            with span("llm.format_prompt", "llm"):
+                string_prompt_context = {k: str(v) for k, v in prompt_context.items()}
+                prompt_to_send = self.prompt_template.format(**string_prompt_context)
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Prompt to send (first 500 chars): %s...", prompt_to_send[:500])
         except KeyError as e:
-            print(f"[ERROR] Missing key in prompt_context for prompt formatting: {e}")
+            logger.error("Missing key in prompt_context for prompt formatting: %s", e)
             return f"API_Error: Prompt formatting error", 0, {}, {}
         except TypeError as e: # Catch TypeError specifically for formatting issues
-            print(f"[ERROR] TypeError during prompt formatting: {e}. Context: {prompt_context}")
+            logger.error("TypeError during prompt formatting: %s. Context: %s", e, prompt_context)
             return f"API_Error: PromptFormattingTypeError", 0, {}, {}
 
         found_tags_str = ""
+        timeouts = 0
         for i in range(retries):
             try:
-                response = self.model.generate_content(prompt_to_send)
+                with span("llm.rate_limit_wait", "llm"):
+                    self.rate_limiter.acquire(estimate_tokens(prompt_to_send) + RESPONSE_TOKEN_ALLOWANCE)
+                with span("llm.generate", "llm", attempt=i):
+                    response = self.model.generate_content(prompt_to_send)
+                self.rate_limiter.on_success()
                 if response and hasattr(response, 'text'):
                     found_tags_str = response.text.strip()
                     break
                 else:
-                    print(f"  -> HFACS Analyzer received an invalid response object. Type: {type(response)}, Content: {response}")
+                    logger.warning("HFACS Analyzer received an invalid response object. Type: %s, Content: %s", type(response), response)
                     # Attempt to get error details if available
                     error_message = "Unknown error"
                     if hasattr(response, 'candidates') and response.candidates:
@@ -183,48 +229,232 @@ class HFACSAnalyzer:
                     elif hasattr(response, 'prompt_feedback') and response.prompt_feedback:
                         error_message = f"Prompt Feedback: {response.prompt_feedback}"
                     
-                    print(f"  -> Error details: {error_message}")
+                    logger.warning("Error details: %s", error_message)
                     return "API_Error: InvalidResponse", 0, {}, {"error_details": error_message}
+            except CircuitOpenError as e:
+                # The backend is failing for everyone: don't burn retries on it.
+                logger.warning("%s", e)
+                return "API_Error: CircuitOpen", 0, {}, {}
             except PermissionDenied as e:
-                print(f"  -> PERMISSION DENIED. Check Project ID, that Vertex AI API is enabled, and that the service account has the 'Vertex AI User' role. Error: {e}")
+                logger.error(PERMISSION_DENIED_HINT, e)
                 return "API_Error: PermissionDenied", 0, {}, {}
-            except (ResourceExhausted, DeadlineExceeded) as e: # Catch DeadlineExceeded as well
-                wait_time = 2 ** (i + 1)
-                error_type = "Rate Limited" if isinstance(e, ResourceExhausted) else "Timeout"
-                print(f"  -> HFACS Analyzer {error_type}. Retrying in {wait_time}s...")
-                time.sleep(wait_time)
+            except ResourceExhausted:
+                # The shared limiter slows every caller down; the next acquire() waits accordingly.
+                self.rate_limiter.on_rate_limited()
+                logger.warning("HFACS Analyzer Rate Limited. Lowering shared rate to %s req/min and retrying...",
+                               self.rate_limiter.stats()['requests_per_minute'])
                 if i == retries - 1:
-                    return f"API_Error: Failed after {error_type} retries", 0, {}, {}
+                    return "API_Error: Failed after Rate Limited retries", 0, {}, {}
+            except DeadlineExceeded:
+                timeouts += 1
+                if timeouts > TIMEOUT_RETRIES or i == retries - 1:
+                    return "API_Error: Failed after Timeout retries", 0, {}, {}
+                logger.warning("HFACS Analyzer Timeout. Retrying...")
             except Exception as e:
-                import traceback
-                traceback.print_exc()
+                logger.exception("HFACS Analyzer request failed")
                 return f"API_Error: {type(e).__name__}", 0, {}, {"error": repr(e)}
 
-        level_scores = {"Level 1: Unsafe Acts": 0, "Level 2: Preconditions for Unsafe Acts": 0, "Level 3: Unsafe Supervision": 0, "Level 4: Organizational Influences": 0}
-        level_evidence_tags = {level: [] for level in level_scores.keys()}
-        
-        all_possible_tags = list(HFACS_RUBRIC.keys())
-        
+        found_tags = []
         if found_tags_str and found_tags_str.upper() != "NONE":
             # Expecting comma-separated tags or "NONE"
             found_tags = [tag.strip() for tag in found_tags_str.split(',') if tag.strip()]
+        return score_evidence_tags(found_tags)
 
-            for tag in found_tags:
-                if tag in all_possible_tags:
-                    level_name, points = HFACS_RUBRIC[tag]
-                    level_scores[level_name] += points
-                    level_evidence_tags[level_name].append(tag)
-                else:
-                    print(f"[Warning] Tag '{tag}' returned by AI is not in the HFACS_RUBRIC.")
+    def _format_batch_prompt(self, prompt_contexts: dict) -> str:
+        """
+        Packs several flights into the role's own prompt: every placeholder whose value differs
+        between flights gets one "=== FLIGHT <id> ===" block per flight, shared values
+        (e.g. the tag vocabulary) are filled in once.
+        """
+        keys = next(iter(prompt_contexts.values())).keys()
+        merged = {}
+        for key in keys:
+            values = {flight_id: str(ctx[key]) for flight_id, ctx in prompt_contexts.items()}
+            if len(set(values.values())) == 1 and len(values) > 1 and key not in BATCH_PER_FLIGHT_KEYS:
+                merged[key] = next(iter(values.values()))
+            else:
+                merged[key] = "\n".join(f"=== FLIGHT {flight_id} ===\n{value}" for flight_id, value in values.items())
+        return self.prompt_template.format(**merged) + BATCH_INSTRUCTIONS.format(num_flights=len(prompt_contexts))
+
+    def _estimate_batch_tokens(self, prompt_contexts: list) -> int:
+        """Prompt tokens _format_batch_prompt() would produce for these contexts, without formatting it."""
+        tokens = estimate_tokens(self.prompt_template) + estimate_tokens(BATCH_INSTRUCTIONS)
+        for key in prompt_contexts[0]:
+            values = [str(ctx[key]) for ctx in prompt_contexts]
+            if len(values) > 1 and len(set(values)) == 1 and key not in BATCH_PER_FLIGHT_KEYS:
+                tokens += estimate_tokens(values[0])
+            else:
+                tokens += sum(estimate_tokens(value) + 10 for value in values)  # + the "=== FLIGHT <id> ===" line
+        return tokens
+
+    def plan_batches(self, prompt_contexts: dict, max_prompt_tokens: int = DEFAULT_BATCH_PROMPT_TOKENS,
+                     max_output_tokens: int = DEFAULT_BATCH_OUTPUT_TOKENS) -> list:
+        """
+        Greedily groups flight ids so each request fits the input budget and the expected JSON
+        answer fits the output budget. K therefore shrinks for long evidence bundles; values
+        shared by the whole batch (e.g. the tag vocabulary) are counted once, as they are sent.
+        """
+        max_flights = max(1, max_output_tokens // BATCH_OUTPUT_TOKENS_PER_FLIGHT)
+        batches, current, current_contexts = [], [], []
+        for flight_id, ctx in prompt_contexts.items():
+            if current and (len(current) >= max_flights
+                            or self._estimate_batch_tokens(current_contexts + [ctx]) > max_prompt_tokens):
+                batches.append(current)
+                current, current_contexts = [], []
+            current.append(flight_id)
+            current_contexts.append(ctx)
+        if current:
+            batches.append(current)
+        return batches
 
-        total_score = sum(level_scores.values())
+    def _generate_batch(self, prompt: str, max_output_tokens: int, retries: int, expected_output_tokens: int = 0):
+        """One JSON-mode request; retries rate limits/timeouts the same way analyze() does."""
+        generation_config = GenerationConfig(
+            temperature=0.0,
+            max_output_tokens=max_output_tokens,
+            response_mime_type="application/json",
+            response_schema=BATCH_RESPONSE_SCHEMA,
+        )
+        timeouts = 0
+        for i in range(retries):
+            try:
+                with span("llm.rate_limit_wait", "llm"):
+                    self.rate_limiter.acquire(estimate_tokens(prompt) + expected_output_tokens)
+                with span("llm.generate_batch", "llm", attempt=i):
+                    response = self.model.generate_content(prompt, generation_config=generation_config)
+                self.rate_limiter.on_success()
+                return response
+            except ResourceExhausted:
+                self.rate_limiter.on_rate_limited()
+                if i == retries - 1:
+                    raise
+                logger.warning("HFACS Analyzer (batch) Rate Limited. Lowering shared rate and retrying...")
+            except DeadlineExceeded:
+                timeouts += 1
+                if timeouts > TIMEOUT_RETRIES or i == retries - 1:
+                    raise
+                logger.warning("HFACS Analyzer (batch) Timeout. Retrying...")
 
-        if total_score > 0:
-            winning_level = max(level_scores, key=level_scores.get)
-            confidence_percentage = round((level_scores[winning_level] / total_score) * 100) if total_score > 0 else 0
-            return winning_level, confidence_percentage, level_scores, level_evidence_tags
+    @staticmethod
+    def _parse_batch_response(response, expected_ids: list):
+        """
+        Returns ({flight_id: [tags]}, truncated). Flights missing from a malformed or
+        truncated answer are simply absent from the mapping.
+        """
+        truncated = False
+        for candidate in getattr(response, 'candidates', None) or []:
+            reason = getattr(candidate, 'finish_reason', None)
+            if getattr(reason, 'name', str(reason)) == "MAX_TOKENS":
+                truncated = True
+        try:
+            items = json.loads(response.text)
+        except (ValueError, AttributeError):
+            return {}, truncated
+        if isinstance(items, dict):
+            items = items.get("flights", [])
+        results = {}
+        wanted = {str(flight_id): flight_id for flight_id in expected_ids}
+        for item in items if isinstance(items, list) else []:
+            if not isinstance(item, dict) or str(item.get("flight_id")) not in wanted:
+                continue
+            tags = item.get("tags") or []
+            if isinstance(tags, str):
+                tags = [] if tags.strip().upper() == "NONE" else [t.strip() for t in tags.split(',') if t.strip()]
+            results[wanted[str(item["flight_id"])]] = [str(t).strip() for t in tags]
+        return results, truncated
+
+    def analyze_batch(self, prompt_contexts: dict, max_prompt_tokens: int = DEFAULT_BATCH_PROMPT_TOKENS,
+                      max_output_tokens: int = DEFAULT_BATCH_OUTPUT_TOKENS, retries=6) -> dict:
+        """
+        Analyzes many flights with as few requests as possible.
+
+        Args:
+            prompt_contexts (dict): flight_id -> the prompt_context analyze() would receive.
+            max_prompt_tokens (int): Estimated input budget per request.
+            max_output_tokens (int): Output budget per request (bounds K, see plan_batches).
+
+        Returns:
+            dict: flight_id -> the same tuple analyze() returns. When a batched answer is
+            truncated or malformed, the missing flights are split in halves and re-sent;
+            a single leftover flight falls back to analyze().
+        """
+        if not prompt_contexts:
+            return {}
+        if not self.model:
+            return {flight_id: ("API_Error: Model not configured", 0, {}, {}) for flight_id in prompt_contexts}
+
+        results = {}
+        pending = self.plan_batches(prompt_contexts, max_prompt_tokens, max_output_tokens)
+        while pending:
+            batch_ids = pending.pop(0)
+            if len(batch_ids) == 1:
+                results[batch_ids[0]] = self.analyze(prompt_contexts[batch_ids[0]], retries=retries)
+                continue
+            batch = {flight_id: prompt_contexts[flight_id] for flight_id in batch_ids}
+            try:
+                prompt = self._format_batch_prompt(batch)
+            except (KeyError, IndexError, TypeError) as e:
+                logger.error("Missing key in prompt_context for batch prompt formatting: %s", e)
+                results.update({flight_id: ("API_Error: Prompt formatting error", 0, {}, {}) for flight_id in batch_ids})
+                continue
+            logger.debug("HFACS Analyzer sending %d flights in one request (~%d prompt tokens)", len(batch_ids), estimate_tokens(prompt))
+            try:
+                response = self._generate_batch(prompt, max_output_tokens, retries,
+                                                expected_output_tokens=len(batch_ids) * BATCH_OUTPUT_TOKENS_PER_FLIGHT)
+            except CircuitOpenError as e:
+                logger.warning("%s", e)
+                results.update({flight_id: ("API_Error: CircuitOpen", 0, {}, {}) for flight_id in batch_ids})
+                continue
+            except PermissionDenied as e:
+                logger.error(PERMISSION_DENIED_HINT, e)
+                results.update({flight_id: ("API_Error: PermissionDenied", 0, {}, {}) for flight_id in batch_ids})
+                continue
+            except (ResourceExhausted, DeadlineExceeded) as e:
+                error_type = "Rate Limited" if isinstance(e, ResourceExhausted) else "Timeout"
+                results.update({flight_id: (f"API_Error: Failed after {error_type} retries", 0, {}, {}) for flight_id in batch_ids})
+                continue
+            except Exception as e:
+                logger.warning("Batched request failed (%s: %s); splitting the batch.", type(e).__name__, e)
+                response = None
+
+            parsed, truncated = self._parse_batch_response(response, batch_ids) if response is not None else ({}, False)
+            for flight_id, tags in parsed.items():
+                results[flight_id] = score_evidence_tags(tags)
+            missing = [flight_id for flight_id in batch_ids if flight_id not in parsed]
+            if missing:
+                reason = "truncated" if truncated else "malformed or incomplete"
+                logger.info("Batched answer %s: re-sending %d of %d flights in smaller batches.", reason, len(missing), len(batch_ids))
+                half = (len(missing) + 1) // 2
+                pending.extend(chunk for chunk in (missing[:half], missing[half:]) if chunk)
+        return results
+
+
+def score_evidence_tags(found_tags: list):
+    """
+    Scores a list of returned tags against HFACS_RUBRIC.
+
+    Returns:
+        A tuple containing: (winning_level, confidence, level_scores, level_evidence_tags)
+    """
+    level_scores = {"Level 1: Unsafe Acts": 0, "Level 2: Preconditions for Unsafe Acts": 0, "Level 3: Unsafe Supervision": 0, "Level 4: Organizational Influences": 0}
+    level_evidence_tags = {level: [] for level in level_scores.keys()}
+
+    for tag in found_tags:
+        if tag in HFACS_RUBRIC:
+            level_name, points = HFACS_RUBRIC[tag]
+            level_scores[level_name] += points
+            level_evidence_tags[level_name].append(tag)
         else:
-            return "No Fault", 100, {}, {}
+            logger.warning("Tag '%s' returned by AI is not in the HFACS_RUBRIC.", tag)
+
+    total_score = sum(level_scores.values())
+
+    if total_score > 0:
+        winning_level = max(level_scores, key=level_scores.get)
+        confidence_percentage = round((level_scores[winning_level] / total_score) * 100)
+        return winning_level, confidence_percentage, level_scores, level_evidence_tags
+    else:
+        return "No Fault", 100, {}, {}
 
 
 # *** BƯỚC 3: TẠO HÀM MAIN ĐỂ KIỂM THỬ ĐỘC LẬP ***
@@ -0,0 +1,85 @@
+# file: analysis_modules/logging_utils.py (v1.0 - Leveled, per-module logging)
+
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import datetime, timezone
+
+ROOT_LOGGER_NAME = "hfacs"
+LOG_LEVEL_ENV = "HFACS_LOG_LEVEL"      # e.g. DEBUG, INFO, WARNING
+LOG_JSON_FILE_ENV = "HFACS_LOG_FILE"   # path of an optional JSON-lines log file
+CONSOLE_FORMAT = "%(asctime)s %(levelname)-7s %(name)s | %(message)s"
+
+# Attributes every LogRecord has; anything else on a record came from `extra=` and goes into the JSON line.
+_STANDARD_RECORD_FIELDS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+_configure_lock = threading.Lock()
+
+
+def get_logger(component: str) -> logging.Logger:
+    """
+    Logger for one module, e.g. get_logger("risk_engine") -> "hfacs.risk_engine".
+    Names are fixed strings rather than __name__ because the same module is imported both as
+    `src.data_analysis...` and `data_analysis...` depending on the entry point.
+    """
+    return logging.getLogger(f"{ROOT_LOGGER_NAME}.{component}")
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per record: timestamp, level, logger, message, plus any `extra=` fields."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _STANDARD_RECORD_FIELDS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def configure_logging(level=None, json_path: str = None, console: bool = True) -> logging.Logger:
+    """
+    (Re)configures the "hfacs" logger tree. Safe to call more than once; handlers are replaced.
+
+    Args:
+        level: Level name or number. Defaults to $HFACS_LOG_LEVEL, else INFO.
+        json_path: (Optional) Also write JSON lines to this file. Defaults to $HFACS_LOG_FILE.
+        console: Write human-readable lines to stderr.
+    """
+    level = level or os.environ.get(LOG_LEVEL_ENV, "INFO")
+    json_path = json_path or os.environ.get(LOG_JSON_FILE_ENV)
+    root = logging.getLogger(ROOT_LOGGER_NAME)
+    with _configure_lock:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+            handler.close()
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+        root.propagate = False
+        if console:
+            console_handler = logging.StreamHandler(sys.stderr)
+            console_handler.setFormatter(logging.Formatter(CONSOLE_FORMAT, datefmt="%H:%M:%S"))
+            root.addHandler(console_handler)
+        if json_path:
+            os.makedirs(os.path.dirname(os.path.abspath(json_path)), exist_ok=True)
+            file_handler = logging.FileHandler(json_path, encoding="utf-8")
+            file_handler.setFormatter(JsonLinesFormatter())
+            root.addHandler(file_handler)
+    return root
+
+
+def add_logging_arguments(parser):
+    """Adds --log_level / --log_json to an argparse parser (pair with configure_logging_from_args)."""
+    parser.add_argument("--log_level", type=str, default=None,
+                        help=f"DEBUG, INFO, WARNING or ERROR (default: ${LOG_LEVEL_ENV} or INFO).")
+    parser.add_argument("--log_json", type=str, default=None, help="(Optional) Also write JSON-lines logs to this file.")
+    return parser
+
+
+def configure_logging_from_args(args) -> logging.Logger:
+    return configure_logging(level=args.log_level, json_path=args.log_json)
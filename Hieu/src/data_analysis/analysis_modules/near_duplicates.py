@@ -0,0 +1,139 @@
+# file: analysis_modules/near_duplicates.py (v1.0 - MinHash/LSH near-duplicate summaries)
+
+import re
+import threading
+import zlib
+from typing import Dict, Hashable, List, Optional, Tuple
+
+import numpy as np
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_NUMBER_PATTERN = re.compile(r"\d+(?:[.,]\d+)*")
+_NON_WORD_PATTERN = re.compile(r"[^a-z#\s]+")
+
+
+def normalize_summary(text: str) -> str:
+    """Lower-cases, masks numbers (dates, death tolls, flight numbers) and drops punctuation."""
+    text = _NUMBER_PATTERN.sub("#", str(text).lower())
+    return " ".join(_NON_WORD_PATTERN.sub(" ", text).split())
+
+
+def shingle_hashes(text: str, shingle_size: int = 3) -> np.ndarray:
+    """Stable 32-bit hashes of the word n-grams of a normalized summary."""
+    words = normalize_summary(text).split()
+    if len(words) <= shingle_size:
+        shingles = {" ".join(words)}
+    else:
+        shingles = {" ".join(words[i:i + shingle_size]) for i in range(len(words) - shingle_size + 1)}
+    return np.fromiter((zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles))
+
+
+def lsh_bands(threshold: float, num_perm: int, min_recall: float = 0.99) -> Tuple[int, int]:
+    """
+    (bands, rows) with bands * rows <= num_perm: the most rows per band (fewest false candidates)
+    that still make a pair with similarity `threshold` a candidate with probability >= min_recall.
+    """
+    for rows in range(num_perm, 0, -1):
+        bands = num_perm // rows
+        if 1.0 - (1.0 - threshold ** rows) ** bands >= min_recall:
+            return bands, rows
+    return num_perm, 1
+
+
+class NearDuplicateIndex:
+    """
+    Incremental MinHash + LSH index that groups near-identical accident summaries.
+
+    Summaries are added in order; each one either joins the most similar existing representative
+    (estimated Jaccard similarity of word shingles >= `threshold`) or becomes a new representative.
+    Only representatives go into the LSH buckets, so every member is directly similar to its
+    representative, and the label of the representative can be reused for the member.
+    """
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, shingle_size: int = 3, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.bands, self.rows = lsh_bands(threshold, num_perm)
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, 1 << 32, size=num_perm, dtype=np.uint64)
+        self._buckets: List[Dict[bytes, List[Hashable]]] = [{} for _ in range(self.bands)]
+        self._signatures: Dict[Hashable, np.ndarray] = {}
+        self._assignments: Dict[Hashable, Tuple[Hashable, float]] = {}
+        self._lock = threading.Lock()
+
+    def signature(self, text: str) -> np.ndarray:
+        """MinHash signature: per permutation, the minimum of (a * h + b) mod p over all shingle hashes."""
+        hashes = shingle_hashes(text, self.shingle_size)
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return (permuted & _MAX_HASH).min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+    @staticmethod
+    def similarity(signature_a: np.ndarray, signature_b: np.ndarray) -> float:
+        """Estimated Jaccard similarity of the two shingle sets."""
+        return float(np.mean(signature_a == signature_b))
+
+    def add(self, key: Hashable, text: str) -> Tuple[Hashable, float]:
+        """
+        Indexes one summary.
+
+        Returns:
+            tuple: (representative_key, similarity); (key, 1.0) when the summary starts a new cluster.
+        """
+        with self._lock:
+            if key in self._assignments:
+                return self._assignments[key]
+        signature = self.signature(text)
+        band_keys = self._band_keys(signature)
+        with self._lock:
+            candidates = dict.fromkeys(rep for band, band_key in zip(self._buckets, band_keys)
+                                       for rep in band.get(band_key, ()))
+            best_rep, best_similarity = None, 0.0
+            for rep in candidates:
+                score = self.similarity(signature, self._signatures[rep])
+                if score > best_similarity:
+                    best_rep, best_similarity = rep, score
+            if best_rep is not None and best_similarity >= self.threshold:
+                assignment = (best_rep, round(best_similarity, 4))
+            else:
+                assignment = (key, 1.0)
+                self._signatures[key] = signature
+                for band, band_key in zip(self._buckets, band_keys):
+                    band.setdefault(band_key, []).append(key)
+            self._assignments[key] = assignment
+            return assignment
+
+    def representative(self, key: Hashable) -> Optional[Hashable]:
+        assignment = self._assignments.get(key)
+        return assignment[0] if assignment else None
+
+    def clusters(self) -> Dict[Hashable, List[Tuple[Hashable, float]]]:
+        """representative -> [(member, similarity), ...] for every cluster with more than one member."""
+        groups: Dict[Hashable, List[Tuple[Hashable, float]]] = {}
+        for key, (rep, score) in self._assignments.items():
+            if key != rep:
+                groups.setdefault(rep, []).append((key, score))
+        return groups
+
+    def stats(self) -> dict:
+        indexed = len(self._assignments)
+        return {
+            "indexed": indexed,
+            "representatives": len(self._signatures),
+            "duplicates": indexed - len(self._signatures),
+            "bands": self.bands,
+            "rows": self.rows,
+        }
+
+    def __len__(self):
+        return len(self._assignments)
+
+
+def cluster_summaries(texts: Dict[Hashable, str], **index_options) -> Dict[Hashable, Tuple[Hashable, float]]:
+    """One-shot helper: key -> (representative_key, similarity) for a dict of summaries, in dict order."""
+    index = NearDuplicateIndex(**index_options)
+    return {key: index.add(key, text) for key, text in texts.items()}
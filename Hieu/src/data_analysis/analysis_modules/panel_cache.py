@@ -0,0 +1,77 @@
+# file: analysis_modules/panel_cache.py (v1.1 - Leveled logging instead of prints)
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Optional
+
+from .logging_utils import get_logger
+
+logger = get_logger("panel_cache")
+
+
+def evidence_fingerprint(*parts: Any) -> str:
+    """
+    Stable SHA-256 over everything that determines an LLM classification:
+    the evidence text plus the prompt templates that will see it.
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ClassificationCache:
+    """
+    In-memory LRU cache of classification results keyed by evidence fingerprint,
+    optionally persisted to a JSON file so repeated batch runs don't pay for the same LLM work twice.
+    Only JSON-serializable results should be stored.
+    """
+    def __init__(self, cache_path: Optional[str] = None, max_entries: int = 10000):
+        self.cache_path = cache_path
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if cache_path and os.path.exists(cache_path):
+            try:
+                with open(cache_path, 'r', encoding='utf-8') as f:
+                    self._entries.update(json.load(f))
+                logger.info("Loaded %d cached classification results from %s", len(self._entries), cache_path)
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning("Ignoring unreadable classification cache %s: %s", cache_path, e)
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        """Writes the cache file atomically (no-op for memory-only caches)."""
+        if not self.cache_path:
+            return
+        with self._lock:
+            snapshot = dict(self._entries)
+        os.makedirs(os.path.dirname(os.path.abspath(self.cache_path)), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f)
+        os.replace(tmp_path, self.cache_path)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def __len__(self):
+        return len(self._entries)
@@ -3,20 +3,24 @@ import pandas as pd
 import os
 from datetime import datetime # New import
 
+from .downsampling import downsample_series, pixel_budget
+
 def plot_telemetry_and_report(telemetry_data: pd.DataFrame, report: dict, output_dir: str, scenario_name: str):
     """
     Plots telemetry data and includes the final risk report as text on the plot.
     """
     fig, ax = plt.subplots(figsize=(14, 8))
 
-    # Plot telemetry data (example: flap angles)
-    ax.plot(telemetry_data['timestamp'], telemetry_data['left_flap_angle_deg'], label='Left Flap Angle', color='blue')
+    # Plot telemetry data (example: flap angles), reduced to the pixel budget of the axes
+    max_points = pixel_budget(14, dpi=fig.dpi)
+    timestamps = telemetry_data['timestamp']
+    ax.plot(*downsample_series(timestamps, telemetry_data['left_flap_angle_deg'], max_points), label='Left Flap Angle', color='blue')
     
     # Conditionally plot right flap angle or faulty sensor output
     if scenario_name == 'sensor_failure':
-        ax.plot(telemetry_data['timestamp'], telemetry_data['right_flap_sensor_faulty_output_deg'], label='Right Flap Sensor (Faulty)', color='red', linestyle='--')
+        ax.plot(*downsample_series(timestamps, telemetry_data['right_flap_sensor_faulty_output_deg'], max_points), label='Right Flap Sensor (Faulty)', color='red', linestyle='--')
     else:
-        ax.plot(telemetry_data['timestamp'], telemetry_data['right_flap_angle_deg'], label='Right Flap Angle', color='red', linestyle='--')
+        ax.plot(*downsample_series(timestamps, telemetry_data['right_flap_angle_deg'], max_points), label='Right Flap Angle', color='red', linestyle='--')
 
     # Add anomaly trigger line if available in report
     # Assuming 'what_happened' contains timestamp like "Detected at Xs"
@@ -0,0 +1,114 @@
+# file: analysis_modules/prompt_roles.py (v1.0 - Role-scoped prompt inputs)
+
+import argparse
+
+from .hfacs_analyzer import HFACS_RUBRIC, ALL_EVIDENCE_TAGS
+from .vertex_client import estimate_tokens
+
+HFACS_LEVELS = [
+    "Level 1: Unsafe Acts",
+    "Level 2: Preconditions for Unsafe Acts",
+    "Level 3: Unsafe Supervision",
+    "Level 4: Organizational Influences",
+]
+EVIDENCE_SECTIONS = ("narrative", "maintenance", "context")
+
+# Which HFACS levels each panel role may tag, and which evidence sections its prompt needs.
+# Mirrors the EXCLUSION RULE (GENERAL) of each specialist prompt.
+ROLE_SCOPES = {
+    "general_analyst": {"levels": HFACS_LEVELS, "sections": EVIDENCE_SECTIONS},
+    "tech_ops_specialist": {"levels": HFACS_LEVELS[:2], "sections": ("narrative", "context")},
+    "maint_org_specialist": {"levels": HFACS_LEVELS[2:], "sections": EVIDENCE_SECTIONS},
+}
+
+
+def role_evidence_tags(role: str) -> list:
+    """Tags of HFACS_RUBRIC the role is allowed to return, in rubric order."""
+    levels = set(ROLE_SCOPES[role]["levels"])
+    return [tag for tag in ALL_EVIDENCE_TAGS if HFACS_RUBRIC[tag][0] in levels]
+
+
+def format_evidence_sections(narrative, maint_logs, context, sections=EVIDENCE_SECTIONS) -> str:
+    """Formats the combined evidence text, keeping only the requested sections."""
+    parts = []
+    if "narrative" in sections:
+        narrative_text = ""
+        if narrative and 'transcript' in narrative:
+            for entry in narrative['transcript']:
+                if 'speaker' in entry:
+                    narrative_text += f"- {entry['speaker']}: {entry['dialogue']}\n"
+                elif 'sound' in entry:
+                    narrative_text += f"- (Sound: {entry['sound']})\n"
+        parts.append(f"NARRATIVE REPORT (CVR):\n{narrative_text}\n")
+    if "maintenance" in sections:
+        logs_text = ""
+        if maint_logs:
+            for log in maint_logs:
+                logs_text += f"- {log['entry_date']}: {log['report']} | Action: {log['action']}\n"
+        parts.append(f"MAINTENANCE LOGS:\n{logs_text}\n")
+    if "context" in sections:
+        context_text = ""
+        if context:
+            for key, value in context.items():
+                context_text += f"- {key.replace('_', ' ').title()}: {value}\n"
+        parts.append(f"CONTEXT DATA:\n{context_text}")
+    return "".join(parts)
+
+
+def build_role_context(role: str, narrative, maint_logs, context) -> dict:
+    """Prompt context ({combined_text}, {ALL_EVIDENCE_TAGS}) scoped to one panel role."""
+    return {
+        'combined_text': format_evidence_sections(narrative, maint_logs, context, ROLE_SCOPES[role]["sections"]),
+        'ALL_EVIDENCE_TAGS': ', '.join(role_evidence_tags(role)),
+    }
+
+
+def prompt_token_report(analyzers: dict, narrative, maint_logs, context) -> dict:
+    """
+    Estimated prompt tokens per role, scoped vs. unscoped (full tag list and all sections).
+
+    Args:
+        analyzers (dict): role -> object with a `prompt_template` (e.g. HFACSAnalyzer).
+    """
+    full_context = {
+        'combined_text': format_evidence_sections(narrative, maint_logs, context),
+        'ALL_EVIDENCE_TAGS': ', '.join(ALL_EVIDENCE_TAGS),
+    }
+    report = {}
+    for role, analyzer in analyzers.items():
+        scoped = analyzer.prompt_template.format(**build_role_context(role, narrative, maint_logs, context))
+        unscoped = analyzer.prompt_template.format(**full_context)
+        report[role] = {"scoped_tokens": estimate_tokens(scoped), "unscoped_tokens": estimate_tokens(unscoped)}
+    return report
+
+
+def main():
+    """
+    Prints the estimated per-role prompt size for a scenario, with and without role scoping.
+    """
+    import os
+    from types import SimpleNamespace
+    from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+    from src.data_simulation.data_input_simulator.document_generator import DocumentGenerator
+    from .vertex_client import load_prompt
+
+    parser = argparse.ArgumentParser(description="Estimate per-role prompt tokens for the expert panel.")
+    parser.add_argument('--scenario', type=str, default='flap_jam', help='Scenario whose documents are used.')
+    args = parser.parse_args()
+
+    project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+    prompts_dir = os.path.join(project_root, "config", "prompts", "prompts")
+    analyzers = {role: SimpleNamespace(prompt_template=load_prompt(os.path.join(prompts_dir, f"{role}_prompt.txt")))
+                 for role in ROLE_SCOPES}
+    documents = DocumentGenerator(ScenarioLoader().load(args.scenario)).generate_all_documents()
+    report = prompt_token_report(analyzers, documents['narrative_report'], documents['maintenance_logs'],
+                                 documents['context_data'])
+
+    print(f"--- Estimated prompt tokens per role ('{args.scenario}') ---")
+    for role, counts in report.items():
+        saved = counts['unscoped_tokens'] - counts['scoped_tokens']
+        print(f"{role}: {counts['scoped_tokens']} tokens (unscoped {counts['unscoped_tokens']}, saved {saved})")
+
+
+if __name__ == '__main__':
+    main()
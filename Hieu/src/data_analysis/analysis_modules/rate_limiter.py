@@ -0,0 +1,234 @@
+# file: analysis_modules/rate_limiter.py (v1.2 - Hedged requests draw from the same quota)
+
+import os
+import threading
+import time
+from multiprocessing.managers import BaseManager
+
+# Default quota for the Gemini endpoint; override with the environment variables below or configure_rate_limiter().
+DEFAULT_REQUESTS_PER_MINUTE = int(os.environ.get("HFACS_REQUESTS_PER_MINUTE", 60))
+DEFAULT_TOKENS_PER_MINUTE = int(os.environ.get("HFACS_TOKENS_PER_MINUTE", 250000))
+COORDINATOR_ADDRESS_ENV = "HFACS_RATE_LIMITER_ADDRESS"  # "host:port" of a running coordinator
+COORDINATOR_AUTHKEY = b"hfacs-rate-limiter"
+
+
+class TokenBucketLimiter:
+    """
+    Two token buckets (requests/min and tokens/min) refilled continuously.
+
+    Callers reserve capacity before each request; the bucket may go negative, in which case the
+    caller is told how long to wait, so concurrent callers queue up fairly without holding a lock
+    while sleeping. The effective rate adapts AIMD-style: every 429 halves it, every success
+    nudges it back up towards the configured quota. `clock` is injectable for tests.
+    """
+    def __init__(self, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+                 min_fraction: float = 0.1, increase_step: float = 0.02, decrease_factor: float = 0.5,
+                 cooldown_seconds: float = 2.0, clock=time.monotonic):
+        self._clock = clock
+        self.requests_per_minute = float(requests_per_minute)
+        self.tokens_per_minute = float(tokens_per_minute)
+        self.min_fraction = min_fraction
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.cooldown_seconds = cooldown_seconds
+        self._fraction = 1.0  # share of the configured quota currently used
+        self._request_level = self.requests_per_minute
+        self._token_level = self.tokens_per_minute
+        self._last_refill = clock()
+        self._last_decrease = float("-inf")
+        self._lock = threading.Lock()
+        self.total_wait_seconds = 0.0
+        self.rate_limited_count = 0
+        self.hedged_requests = 0
+        self.skipped_hedges = 0
+
+    def _refill(self, now: float):
+        elapsed = now - self._last_refill
+        self._last_refill = now
+        self._request_level = min(self.requests_per_minute,
+                                  self._request_level + elapsed * self.requests_per_minute * self._fraction / 60.0)
+        self._token_level = min(self.tokens_per_minute,
+                                self._token_level + elapsed * self.tokens_per_minute * self._fraction / 60.0)
+
+    def reserve(self, tokens: int = 0) -> float:
+        """Takes one request and `tokens` tokens; returns the seconds the caller must wait before sending."""
+        with self._lock:
+            now = self._clock()
+            self._refill(now)
+            self._request_level -= 1
+            self._token_level -= min(tokens, self.tokens_per_minute)  # a single huge prompt must still pass
+            request_wait = max(0.0, -self._request_level) * 60.0 / (self.requests_per_minute * self._fraction)
+            token_wait = max(0.0, -self._token_level) * 60.0 / (self.tokens_per_minute * self._fraction)
+            wait = max(request_wait, token_wait)
+            self.total_wait_seconds += wait
+            return wait
+
+    def reserve_hedge(self, tokens: int = 0) -> bool:
+        """
+        Takes one request and `tokens` tokens for a hedged duplicate only if both are free right now;
+        a hedge never queues behind (or pushes back) first attempts.
+        """
+        with self._lock:
+            self._refill(self._clock())
+            tokens = min(tokens, self.tokens_per_minute)
+            if self._request_level < 1 or self._token_level < tokens:
+                self.skipped_hedges += 1
+                return False
+            self._request_level -= 1
+            self._token_level -= tokens
+            self.hedged_requests += 1
+            return True
+
+    def acquire(self, tokens: int = 0) -> float:
+        """Blocking form of reserve()."""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def on_success(self):
+        with self._lock:
+            self._fraction = min(1.0, self._fraction + self.increase_step)
+
+    def on_rate_limited(self):
+        """A 429 means the real quota is lower than assumed: back off multiplicatively (once per burst)."""
+        with self._lock:
+            now = self._clock()
+            self.rate_limited_count += 1
+            if now - self._last_decrease < self.cooldown_seconds:
+                return
+            self._last_decrease = now
+            self._refill(now)
+            self._fraction = max(self.min_fraction, self._fraction * self.decrease_factor)
+            self._request_level = min(self._request_level, 0.0)
+
+    def reconfigure(self, requests_per_minute: float, tokens_per_minute: float, **kwargs):
+        """
+        Changes the quota (and any other constructor knob) in place, so analyzers already holding
+        this limiter follow it. The adaptive share is kept unless the quota itself changes.
+        """
+        with self._lock:
+            self._refill(self._clock())
+            if (float(requests_per_minute), float(tokens_per_minute)) != (self.requests_per_minute, self.tokens_per_minute):
+                self._fraction = 1.0
+            self.requests_per_minute = float(requests_per_minute)
+            self.tokens_per_minute = float(tokens_per_minute)
+            self._request_level = min(self._request_level, self.requests_per_minute)
+            self._token_level = min(self._token_level, self.tokens_per_minute)
+            for key, value in kwargs.items():
+                if key not in ("min_fraction", "increase_step", "decrease_factor", "cooldown_seconds"):
+                    raise TypeError(f"TokenBucketLimiter.reconfigure() got an unexpected keyword argument '{key}'")
+                setattr(self, key, value)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "requests_per_minute": round(self.requests_per_minute * self._fraction, 2),
+                "tokens_per_minute": round(self.tokens_per_minute * self._fraction),
+                "total_wait_seconds": round(self.total_wait_seconds, 2),
+                "rate_limited_count": self.rate_limited_count,
+                "hedged_requests": self.hedged_requests,
+                "skipped_hedges": self.skipped_hedges,
+            }
+
+
+class _LimiterClient:
+    """Wraps a coordinator proxy so waiting happens in the calling process, not in the coordinator."""
+    def __init__(self, proxy):
+        self._proxy = proxy
+
+    def reserve(self, tokens: int = 0) -> float:
+        return self._proxy.reserve(tokens)
+
+    def reserve_hedge(self, tokens: int = 0) -> bool:
+        return self._proxy.reserve_hedge(tokens)
+
+    def acquire(self, tokens: int = 0) -> float:
+        wait = self._proxy.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def on_success(self):
+        self._proxy.on_success()
+
+    def on_rate_limited(self):
+        self._proxy.on_rate_limited()
+
+    def reconfigure(self, requests_per_minute: float, tokens_per_minute: float, **kwargs):
+        self._proxy.reconfigure(requests_per_minute, tokens_per_minute, **kwargs)
+
+    def stats(self) -> dict:
+        return self._proxy.stats()
+
+
+class _LimiterManager(BaseManager):
+    pass
+
+
+_coordinator_limiter = None
+
+
+def _coordinator_init(requests_per_minute: float, tokens_per_minute: float):
+    # Runs inside the coordinator process (also under the "spawn" start method used on Windows).
+    global _coordinator_limiter
+    _coordinator_limiter = TokenBucketLimiter(requests_per_minute, tokens_per_minute)
+
+
+def _coordinator_get_limiter():
+    return _coordinator_limiter
+
+
+_LimiterManager.register("get_limiter", callable=_coordinator_get_limiter)
+
+_process_limiter = None
+_process_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """
+    The limiter every HFACSAnalyzer in this process draws from. Connects to the coordinator
+    named by HFACS_RATE_LIMITER_ADDRESS when set, otherwise uses an in-process limiter.
+    """
+    global _process_limiter
+    with _process_lock:
+        if _process_limiter is None:
+            address = os.environ.get(COORDINATOR_ADDRESS_ENV)
+            _process_limiter = connect_rate_limiter(address) if address else TokenBucketLimiter()
+        return _process_limiter
+
+
+def configure_rate_limiter(requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                           tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE, **kwargs):
+    """
+    Sets the quota of the process-wide limiter in place, so analyzers built earlier follow it.
+    With HFACS_RATE_LIMITER_ADDRESS set, this reconfigures the shared coordinator's limiter.
+    """
+    limiter = get_rate_limiter()
+    limiter.reconfigure(requests_per_minute, tokens_per_minute, **kwargs)
+    return limiter
+
+
+def start_rate_limiter_coordinator(requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                                   tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+                                   address=("127.0.0.1", 0)):
+    """
+    Starts a local coordinator process holding one limiter for every worker process.
+    Export its address (see COORDINATOR_ADDRESS_ENV) before starting workers.
+
+    Returns:
+        tuple: (manager, "host:port"); call manager.shutdown() when the run is done.
+    """
+    manager = _LimiterManager(address=address, authkey=COORDINATOR_AUTHKEY)
+    manager.start(_coordinator_init, (requests_per_minute, tokens_per_minute))
+    host, port = manager.address
+    return manager, f"{host}:{port}"
+
+
+def connect_rate_limiter(address: str) -> _LimiterClient:
+    """Connects to a coordinator started with start_rate_limiter_coordinator()."""
+    host, port = address.rsplit(":", 1)
+    manager = _LimiterManager(address=(host, int(port)), authkey=COORDINATOR_AUTHKEY)
+    manager.connect()
+    return _LimiterClient(manager.get_limiter())
@@ -0,0 +1,246 @@
+# file: analysis_modules/report_renderer.py (v1.3 - In-process fallback when a worker dies)
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+from .logging_utils import get_logger
+from .tracing import traced
+
+logger = get_logger("report_renderer")
+
+# Colors shared by every chart so the batch report reads consistently.
+METRIC_COLORS = {"precision": "skyblue", "recall": "lightcoral", "f1_score": "lightgreen"}
+ERROR_COLORS = {"tp": "seagreen", "fp": "orange", "fn": "red"}
+
+
+class ChartJob:
+    """
+    A single chart to render: the renderer name, a plain-data payload and the output path.
+    Payloads only contain lists/dicts/numbers so jobs pickle cheaply into worker processes.
+    """
+    def __init__(self, kind: str, payload: dict, output_path: str):
+        if kind not in CHART_RENDERERS:
+            raise ValueError(f"Unknown chart kind '{kind}'. Available: {sorted(CHART_RENDERERS)}")
+        self.kind = kind
+        self.payload = payload
+        self.output_path = output_path
+
+    def __repr__(self):
+        return f"ChartJob(kind={self.kind!r}, output_path={self.output_path!r})"
+
+
+def _new_figure(figsize) -> Figure:
+    """Creates a Figure bound to its own Agg canvas, without touching pyplot's global state."""
+    fig = Figure(figsize=figsize)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def _annotate_bars(ax, rects, fmt: str = "{:.2f}"):
+    for rect in rects:
+        height = rect.get_height()
+        ax.annotate(fmt.format(height),
+                    xy=(rect.get_x() + rect.get_width() / 2, height),
+                    xytext=(0, 3),  # 3 points vertical offset
+                    textcoords="offset points",
+                    ha='center', va='bottom')
+
+
+def _render_overall_metrics(payload: dict) -> Figure:
+    """Bar chart of overall Precision, Recall and F1-Score."""
+    labels = ["Precision", "Recall", "F1-Score"]
+    values = [payload["precision"], payload["recall"], payload["f1_score"]]
+
+    fig = _new_figure((8, 6))
+    ax = fig.add_subplot()
+    bars = ax.bar(labels, values, color=[METRIC_COLORS["precision"], METRIC_COLORS["recall"], METRIC_COLORS["f1_score"]])
+    ax.set_ylim(0, 1)
+    ax.set_title(f"Overall HFACS Analysis Performance Metrics (N_runs={payload['num_runs']})", y=1.05)
+    ax.set_ylabel("Score")
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    for bar in bars:
+        yval = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width() / 2, yval + 0.02, round(yval, 2), ha='center', va='bottom')
+    return fig
+
+
+def _render_hfacs_radar(payload: dict) -> Figure:
+    """Radar chart of Precision, Recall and F1-Score for each HFACS level."""
+    levels = payload["levels"]
+    angles = np.linspace(0, 2 * np.pi, len(levels), endpoint=False).tolist()
+    angles += angles[:1]
+
+    fig = _new_figure((12, 8))
+    ax = fig.add_subplot(polar=True)
+    for metric, label in (("precision", "Precision"), ("recall", "Recall"), ("f1_score", "F1-Score")):
+        scores = list(payload[metric]) + list(payload[metric][:1])
+        ax.plot(angles, scores, linewidth=2, linestyle='solid', label=label, color=METRIC_COLORS[metric])
+        ax.fill(angles, scores, color=METRIC_COLORS[metric], alpha=0.25)
+
+    ax.set_theta_offset(np.pi / 2)
+    ax.set_theta_direction(-1)
+    ax.set_xticks(angles[:-1])
+    ax.set_xticklabels([level.replace("Level ", "L").replace(": ", "\n").replace(" for Unsafe Acts", "") for level in levels])
+    ax.set_ylim(0, 1.0)
+    ax.set_yticks(np.arange(0, 1.1, 0.2))
+    ax.set_yticklabels([f'{x:.1f}' for x in np.arange(0, 1.1, 0.2)], color="gray", size=8)
+    ax.set_title(f"HFACS Level-wise Performance Radar Chart (N_runs={payload['num_runs']})", y=1.08)
+    ax.legend(loc='upper right', bbox_to_anchor=(1.3, 1.1))
+    ax.grid(True)
+    return fig
+
+
+def _render_grouped_prf1(payload: dict) -> Figure:
+    """Grouped Precision/Recall/F1 bars for a list of categories (scenarios, tags, ...)."""
+    names = payload["names"]
+    x = np.arange(len(names))
+    width = 0.25
+
+    fig = _new_figure((max(8, 1.2 * len(names) + 4), 7))
+    ax = fig.add_subplot()
+    for offset, metric, label in ((-width, "precision", "Precision"), (0, "recall", "Recall"), (width, "f1_score", "F1-Score")):
+        rects = ax.bar(x + offset, payload[metric], width, label=label, color=METRIC_COLORS[metric])
+        _annotate_bars(ax, rects)
+
+    ax.set_ylabel('Score')
+    ax.set_title(payload["title"], y=1.05)
+    ax.set_xticks(x)
+    ax.set_xticklabels(names, rotation=45, ha="right")
+    ax.set_ylim(0, 1)
+    ax.legend()
+    ax.grid(axis='y', linestyle='--', alpha=0.7)
+    return fig
+
+
+def _render_tag_errors(payload: dict) -> Figure:
+    """Horizontal stacked FP/FN bars for the tags with the most errors."""
+    tags = payload["tags"]
+    fp_values = np.asarray(payload["fp"])
+    fn_values = np.asarray(payload["fn"])
+    total_values = fp_values + fn_values
+    y_pos = np.arange(len(tags))
+
+    fig = _new_figure((10, max(6, len(tags) * 0.6)))
+    ax = fig.add_subplot()
+    ax.barh(y_pos, fp_values, height=0.6, label='False Positives', color=ERROR_COLORS["fp"])
+    ax.barh(y_pos, fn_values, height=0.6, left=fp_values, label='False Negatives', color=ERROR_COLORS["fn"])
+    ax.set_xlabel('Number of Errors')
+    ax.set_title(payload["title"], y=1.02)
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels(tags)
+    max_total = total_values.max() if len(total_values) else 1
+    ax.set_xlim(0, max_total * 1.1)
+    ax.legend()
+    ax.grid(axis='x', linestyle='--', alpha=0.7)
+    for i, total in enumerate(total_values):
+        ax.text(total + (max_total * 0.02), y_pos[i], str(int(total)), va='center', ha='left', fontsize=9)
+    return fig
+
+
+def _render_confusion_breakdown(payload: dict) -> Figure:
+    """
+    Drill-down chart: stacked TP/FP/FN counts per category.
+    Used both for one scenario (categories = tags) and for one tag (categories = scenarios).
+    """
+    names = payload["names"]
+    y_pos = np.arange(len(names))
+    left = np.zeros(len(names))
+
+    fig = _new_figure((10, max(4, len(names) * 0.5 + 2)))
+    ax = fig.add_subplot()
+    for key, label in (("tp", "True Positives"), ("fp", "False Positives"), ("fn", "False Negatives")):
+        values = np.asarray(payload[key], dtype=float)
+        ax.barh(y_pos, values, height=0.6, left=left, label=label, color=ERROR_COLORS[key])
+        left += values
+    ax.set_xlabel('Count')
+    ax.set_title(payload["title"], y=1.02)
+    ax.set_yticks(y_pos)
+    ax.set_yticklabels(names)
+    ax.set_xlim(0, max(left.max() if len(left) else 0, 1) * 1.1)
+    ax.legend(loc='lower right')
+    ax.grid(axis='x', linestyle='--', alpha=0.7)
+    return fig
+
+
+# Registry of renderers; a ChartJob names one of these keys.
+CHART_RENDERERS: Dict[str, Callable[[dict], Figure]] = {
+    "overall_metrics": _render_overall_metrics,
+    "hfacs_radar": _render_hfacs_radar,
+    "grouped_prf1": _render_grouped_prf1,
+    "tag_errors": _render_tag_errors,
+    "confusion_breakdown": _render_confusion_breakdown,
+}
+
+
+def render_chart(job: ChartJob) -> str:
+    """
+    Renders one job to disk. Runs inside worker processes, so it must only depend on the job itself.
+    """
+    fig = CHART_RENDERERS[job.kind](job.payload)
+    fig.tight_layout()
+    os.makedirs(os.path.dirname(job.output_path) or ".", exist_ok=True)
+    fig.savefig(job.output_path)
+    return job.output_path
+
+
+@traced("plot.render_charts")
+def render_charts(jobs: List[ChartJob], max_workers: Optional[int] = None) -> List[str]:
+    """
+    Renders all jobs, in a process pool when max_workers != 1.
+    Falls back to rendering in-process if the pool cannot be started (e.g. restricted sandboxes)
+    or breaks because a worker died; jobs that already finished, or failed on their own, are
+    not rendered again.
+
+    Returns:
+        list[str]: Paths of the charts that were written successfully.
+    """
+    if not jobs:
+        return []
+    if max_workers is None:
+        max_workers = min(len(jobs), os.cpu_count() or 1)
+
+    if max_workers <= 1 or len(jobs) == 1:
+        return _render_inline(jobs)
+
+    written = []
+    finished = set()  # ids of jobs written or failed inside the pool
+    try:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(render_chart, job): job for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    written.append(future.result())
+                    logger.debug("Chart saved to: %s", job.output_path)
+                except BrokenProcessPool:
+                    raise
+                except Exception as e:
+                    logger.error("Failed to render %s: %s", job, e)
+                finished.add(id(job))
+    except (OSError, BrokenProcessPool) as e:
+        logger.warning("Process pool unavailable (%s); rendering the remaining charts in-process.", e)
+        written.extend(_render_inline([job for job in jobs if id(job) not in finished]))
+    return written
+
+
+def _render_inline(jobs: List[ChartJob]) -> List[str]:
+    written = []
+    for job in jobs:
+        try:
+            written.append(render_chart(job))
+            logger.debug("Chart saved to: %s", job.output_path)
+        except Exception as e:
+            logger.error("Failed to render %s: %s", job, e)
+    return written
+
+
+def safe_filename(name: str) -> str:
+    """Turns a scenario or tag name into something usable inside a file name."""
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', name).strip('_') or "unnamed"
@@ -0,0 +1,202 @@
+# file: analysis_modules/resilience.py (v1.2 - Hedges take a rate limiter token first)
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import numpy as np
+from google.api_core.exceptions import DeadlineExceeded, PermissionDenied, InvalidArgument, ResourceExhausted
+
+from .rate_limiter import get_rate_limiter
+
+# Errors that say nothing about backend health (bad request / bad credentials) never trip the breaker.
+NON_HEALTH_ERRORS = (PermissionDenied, InvalidArgument)
+# A 429 is neither: the backend is up, we are over quota. The shared rate limiter backs off instead.
+QUOTA_ERRORS = (ResourceExhausted,)
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling the backend while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker over a sliding window of recent calls.
+
+    CLOSED:    calls pass; opens when the failure rate of the last `window` calls
+               (at least `min_calls` of them) reaches `failure_threshold`.
+    OPEN:      calls fail fast with CircuitOpenError for `reset_timeout` seconds.
+    HALF_OPEN: a single probe call is let through; success closes the circuit, failure re-opens it.
+    """
+    CLOSED, OPEN, HALF_OPEN = "CLOSED", "OPEN", "HALF_OPEN"
+
+    def __init__(self, failure_threshold: float = 0.5, window: int = 20, min_calls: int = 5,
+                 reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.reset_timeout = reset_timeout
+        self._outcomes = deque(maxlen=window)
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self.rejected_calls = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """Raises CircuitOpenError when the call must not reach the backend."""
+        state = self.state
+        with self._lock:
+            if state == self.OPEN or (state == self.HALF_OPEN and self._probe_in_flight):
+                self.rejected_calls += 1
+                raise CircuitOpenError(f"Model backend circuit is {state}; failing fast.")
+            if state == self.HALF_OPEN:
+                self._probe_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self._outcomes.append(True)
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._outcomes.clear()
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._outcomes.append(False)
+            failures = self._outcomes.count(False)
+            if self._state == self.HALF_OPEN or (
+                    len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_threshold):
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def record_ignored(self):
+        """The call says nothing about backend health; only frees the half-open probe slot."""
+        with self._lock:
+            self._probe_in_flight = False
+
+
+class LatencyTracker:
+    """Sliding window of successful call latencies."""
+    def __init__(self, window: int = 200):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float, min_samples: int = 20):
+        """Returns the q-th percentile, or None until enough samples were seen."""
+        with self._lock:
+            if len(self._samples) < min_samples:
+                return None
+            return float(np.percentile(self._samples, q))
+
+
+class ResilientModel:
+    """
+    Wraps any object with generate_content() (the shared GenerativeModel, or a stub backend)
+    with a circuit breaker, an optional overall deadline and optional request hedging: when
+    a call is still running after the observed p95 latency, a duplicate is sent and the first
+    reply wins. The duplicate is only sent if the rate limiter (the process-wide one unless
+    `rate_limiter` is given) has a request and the prompt's tokens free right now.
+    """
+    def __init__(self, model, breaker: CircuitBreaker = None, hedge: bool = False,
+                 hedge_percentile: float = 95.0, min_hedge_delay: float = 0.05,
+                 timeout: float = None, max_workers: int = 16, rate_limiter=None):
+        self.model = model
+        self.breaker = breaker or CircuitBreaker()
+        self._rate_limiter = rate_limiter
+        self.latency = LatencyTracker()
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.min_hedge_delay = min_hedge_delay
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model-call") \
+            if (hedge or timeout) else None
+        self.hedged_calls = 0
+        self.skipped_hedges = 0
+
+    @property
+    def rate_limiter(self):
+        return self._rate_limiter or get_rate_limiter()
+
+    @staticmethod
+    def _prompt_tokens(args, kwargs) -> int:
+        from .vertex_client import estimate_tokens  # vertex_client imports this module
+        prompt = args[0] if args else kwargs.get("contents", "")
+        return estimate_tokens(prompt) if isinstance(prompt, str) else 0
+
+    def _timed_call(self, args, kwargs):
+        start = time.perf_counter()
+        result = self.model.generate_content(*args, **kwargs)
+        return result, time.perf_counter() - start
+
+    def _call_with_hedging(self, args, kwargs):
+        deadline = None if self.timeout is None else time.monotonic() + self.timeout
+        futures = [self._executor.submit(self._timed_call, args, kwargs)]
+        hedge_delay = self.latency.percentile(self.hedge_percentile) if self.hedge else None
+        if hedge_delay is not None:
+            hedge_delay = max(hedge_delay, self.min_hedge_delay)
+            if deadline is not None:
+                hedge_delay = min(hedge_delay, max(0.0, deadline - time.monotonic()))
+            done, _ = wait(futures, timeout=hedge_delay)
+            if not done:
+                if self.rate_limiter.reserve_hedge(self._prompt_tokens(args, kwargs)):
+                    self.hedged_calls += 1
+                    futures.append(self._executor.submit(self._timed_call, args, kwargs))
+                else:
+                    self.skipped_hedges += 1  # no spare quota: keep waiting on the first call
+
+        errors = []
+        pending = set(futures)
+        while pending:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break  # deadline reached; abandoned calls finish in the background
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+                errors.append(future.exception())
+        if errors and not pending:
+            raise errors[0]
+        raise DeadlineExceeded(f"Model call exceeded the {self.timeout}s deadline.")
+
+    def generate_content(self, *args, **kwargs):
+        self.breaker.before_call()
+        try:
+            if self._executor is None:
+                result, elapsed = self._timed_call(args, kwargs)
+            else:
+                result, elapsed = self._call_with_hedging(args, kwargs)
+        except NON_HEALTH_ERRORS:
+            self.breaker.record_success()  # the backend answered; the request itself was wrong
+            raise
+        except QUOTA_ERRORS:
+            self.breaker.record_ignored()
+            raise
+        except Exception:
+            self.breaker.record_failure()
+            raise
+        self.breaker.record_success()
+        self.latency.record(elapsed)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "circuit_state": self.breaker.state,
+            "rejected_calls": self.breaker.rejected_calls,
+            "hedged_calls": self.hedged_calls,
+            "skipped_hedges": self.skipped_hedges,
+            "p95_latency_s": self.latency.percentile(95.0, min_samples=1),
+        }
@@ -1,16 +1,20 @@
-# file: analysis_modules/risk_engine.py (v1.0)
+# file: analysis_modules/risk_engine.py (v1.8 - Tracing spans across the S-D-E-A chain)
 import os
-print(f"DEBUG: Loading risk_engine.py from: {os.path.abspath(__file__)}")
-
+import logging
 import sys
 import argparse
 from datetime import datetime
 import json
+import threading
 
 # Import các module cần thiết
 from data_simulation.data_input_simulator.main_simulator import ScenarioSimulator
 from .anomaly_detector import AnomalyDetector
-from .hfacs_analyzer import HFACSAnalyzer, ALL_EVIDENCE_TAGS
+from .hfacs_analyzer import HFACSAnalyzer, score_evidence_tags
+from .panel_cache import ClassificationCache, evidence_fingerprint
+from .prompt_roles import build_role_context, format_evidence_sections, estimate_tokens
+from .logging_utils import get_logger, configure_logging
+from .tracing import span
 
 # --- Logic tự nhận biết đường dẫn để import các module khác ---
 # Đảm bảo rằng script này có thể được chạy độc lập
@@ -19,18 +23,45 @@ _PROJECT_ROOT = os.path.abspath(os.path.join(_CURRENT_DIR, '..', '..', '..'))
 if _PROJECT_ROOT not in sys.path:
     sys.path.insert(0, _PROJECT_ROOT)
 
+logger = get_logger("risk_engine")
+logger.debug("Loading risk_engine.py from: %s", os.path.abspath(__file__))
+
+_STATS_LOCK = threading.Lock()  # analyze_text may be called from worker threads
+PANEL_SPECIALIST_ROLES = ("general_analyst", "tech_ops_specialist", "maint_org_specialist")
+PANEL_ROLE_LABELS = {
+    "general_analyst": "General Analyst",
+    "tech_ops_specialist": "Tech/Ops Specialist",
+    "maint_org_specialist": "Maint/Org Specialist",
+}
+FAST_CLASSIFIER_LABEL = "Fast Classifier"
+
 class RiskTriageEngine:
     """
     Orchestrates the analysis workflow using a panel of AI experts.
     It coordinates the AnomalyDetector and multiple HFACSAnalyzer instances
     to produce a consolidated risk assessment.
     """
-    def __init__(self, project_id: str, location: str, credentials_path: str):
+    def __init__(self, project_id: str, location: str, credentials_path: str,
+                 result_cache: ClassificationCache = None, use_cache: bool = True, model=None,
+                 fast_classifier=None, fast_min_confidence: float = 0.95):
         """
         Initializes the Risk Triage Engine and its sub-analysis modules.
+
+        Args:
+            result_cache (ClassificationCache): (Optional) Shared/persistent cache of panel results.
+            use_cache (bool): Reuse panel results for identical evidence instead of calling the LLMs again.
+            model: (Optional) Backend shared by all four analyzers instead of Vertex AI
+                   (e.g. a ResilientModel around stub_backend.FaultInjectingBackend).
+            fast_classifier (FastHFACSClassifier): (Optional) Local model consulted before the panel;
+                   the panel only runs when its confidence is below `fast_min_confidence`.
         """
-        print("Initializing Risk Triage Engine with HFACS Expert Panel...")
+        logger.info("Initializing Risk Triage Engine with HFACS Expert Panel...")
         self.anomaly_detector = AnomalyDetector()
+        self.result_cache = (result_cache if result_cache is not None else ClassificationCache()) if use_cache else None
+        self.prompt_token_stats = {}
+        self.fast_classifier = fast_classifier
+        self.fast_min_confidence = fast_min_confidence
+        self.fast_path_stats = {"local": 0, "panel": 0}
 
         # Initialize four HFACSAnalyzer instances, each with a distinct role and prompt
         try:
@@ -41,28 +72,32 @@ class RiskTriageEngine:
                 location=location,
                 credentials_path=credentials_path,
                 prompt_path="config/prompts/prompts/general_analyst_prompt.txt",
-                project_root=_PROJECT_ROOT # Pass project root
+                project_root=_PROJECT_ROOT, # Pass project root
+                model=model
             )
             self.tech_ops_specialist = HFACSAnalyzer(
                 project_id=project_id,
                 location=location,
                 credentials_path=credentials_path,
                 prompt_path="config/prompts/prompts/tech_ops_specialist_prompt.txt",
-                project_root=_PROJECT_ROOT # Pass project root
+                project_root=_PROJECT_ROOT, # Pass project root
+                model=model
             )
             self.maint_org_specialist = HFACSAnalyzer(
                 project_id=project_id,
                 location=location,
                 credentials_path=credentials_path,
                 prompt_path="config/prompts/prompts/maint_org_specialist_prompt.txt",
-                project_root=_PROJECT_ROOT # Pass project root
+                project_root=_PROJECT_ROOT, # Pass project root
+                model=model
             )
             self.final_adjudicator = HFACSAnalyzer(
                 project_id=project_id,
                 location=location,
                 credentials_path=credentials_path,
                 prompt_path="config/prompts/prompts/adjudicator_prompt.txt",
-                project_root=_PROJECT_ROOT # Pass project root
+                project_root=_PROJECT_ROOT, # Pass project root
+                model=model
             )
         except Exception as e:
             # Catch potential errors during initialization (e.g., file not found)
@@ -78,73 +113,40 @@ class RiskTriageEngine:
             raise ConnectionError("One or more HFACSAnalyzer models failed to initialize. "
                                   "Check API credentials, paths, and permissions.")
         
-        print("Risk Triage Engine initialized successfully.")
+        logger.info("Risk Triage Engine initialized successfully.")
 
     def _format_hfacs_input(self, narrative, maint_logs, context):
         """Helper to format the combined text for analysis."""
-        narrative_text = ""
-        if narrative and 'transcript' in narrative:
-            for entry in narrative['transcript']:
-                if 'speaker' in entry:
-                    narrative_text += f"- {entry['speaker']}: {entry['dialogue']}\n"
-                elif 'sound' in entry:
-                    narrative_text += f"- (Sound: {entry['sound']})\n"
-        
-        logs_text = ""
-        if maint_logs:
-            for log in maint_logs:
-                logs_text += f"- {log['entry_date']}: {log['report']} | Action: {log['action']}\n"
-
-        context_text = ""
-        if context:
-            for key, value in context.items():
-                context_text += f"- {key.replace('_', ' ').title()}: {value}\n"
-        
-        return (
-            f"NARRATIVE REPORT (CVR):\n{narrative_text}\n"
-            f"MAINTENANCE LOGS:\n{logs_text}\n"
-            f"CONTEXT DATA:\n{context_text}"
+        return format_evidence_sections(narrative, maint_logs, context)
+
+    def _record_prompt_tokens(self, role: str, analyzer: HFACSAnalyzer, prompt_context: dict):
+        """Accumulates the estimated input tokens each panel role is sent."""
+        try:
+            tokens = estimate_tokens(analyzer.prompt_template.format(**prompt_context))
+        except (KeyError, IndexError):
+            return
+        with _STATS_LOCK:
+            stats = self.prompt_token_stats.setdefault(role, {"calls": 0, "tokens": 0})
+            stats["calls"] += 1
+            stats["tokens"] += tokens
+        logger.debug("[%s] ~%d prompt tokens", role, tokens)
+
+    def _panel_fingerprint(self, role_contexts: dict, original_evidence_string: str) -> str:
+        """Cache key: the evidence plus every prompt that sees it, so editing a prompt invalidates old results."""
+        return evidence_fingerprint(
+            role_contexts,
+            original_evidence_string,
+            [analyst.prompt_template for analyst in (self.general_analyst, self.tech_ops_specialist,
+                                                     self.maint_org_specialist, self.final_adjudicator)]
         )
 
-    def analyze_flight(self, simulation_data: dict):
+    def _prepare_panel_inputs(self, simulation_data: dict):
         """
-        Executes the full S-D-E-A analysis chain using the multi-agent panel.
+        Step A: builds the adjudicator's original evidence and each specialist's scoped prompt context.
+
+        Returns:
+            tuple: (original_evidence_string, role_contexts, cache_key)
         """
-        print("\n" + "="*80)
-        print(f"=== STARTING RISK ANALYSIS FOR SCENARIO: {simulation_data['scenario_name']} ===")
-        print("="*80)
-
-        # --- SENSE & DETECT ---
-        print("\n[PHASE 1: SENSE & DETECT]")
-        print("Running Anomaly Detector on telemetry data...")
-        detected_anomalies = self.anomaly_detector.detect(simulation_data['telemetry'])
-
-        # --- TRIAGE & EXPLAIN ---
-        print("\n[PHASE 2: TRIAGE & EXPLAIN]")
-        if not detected_anomalies:
-            print("Conclusion: No anomalies detected. Flight profile appears normal.")
-            report = {
-                "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                "scenario": simulation_data['scenario_name'],
-                "what_happened": "No anomalies detected.",
-                "hfacs_root_cause": "No Fault",
-                "confidence": "100%",
-                "reasoning": "",
-                "intermediate_findings": {}
-            }
-            level_scores = {"Level 1: Unsafe Acts": 0, "Level 2: Preconditions for Unsafe Acts": 0, "Level 3: Unsafe Supervision": 0, "Level 4: Organizational Influences": 0}
-            print("\n--- FINAL RISK REPORT ---")
-            print(f"Scenario: {report['scenario']}")
-            print(f"What Happened: {report['what_happened']}")
-            print(f"HFACS Root Cause: {report['hfacs_root_cause']}")
-            print(f"Confidence: {report['confidence']}")
-            print("--- END OF REPORT ---")
-            print("="*80)
-            return report, level_scores
-
-        print("ALERT! Anomaly detected. Triggering deep analysis with AI Expert Panel...")
-
-        # Step A: Prepare Combined Reports (original_evidence)
         narrative_report = simulation_data.get('narrative_report', {})
         maintenance_logs = simulation_data.get('maintenance_logs', [])
         
@@ -161,53 +163,188 @@ class RiskTriageEngine:
             for log in maintenance_logs:
                 original_evidence_string += f"- {log['entry_date']}: {log['report']} | Action: {log['action']}\n"
 
-        # The input for the specialists includes all context
-        combined_reports_input = self._format_hfacs_input(
-            narrative_report,
-            maintenance_logs,
-            simulation_data.get('context_data', {})
-        )
-        
-        # Step B: Run Specialized Analysts
-        print("\n[Step B: Running Specialized Analysts...]")
-        
-        # Prepare common context for specialists
-        common_specialist_context = {
-            'combined_text': combined_reports_input,
-            'ALL_EVIDENCE_TAGS': ', '.join(ALL_EVIDENCE_TAGS) # Provide all possible tags
+        # Each specialist only sees its own tag vocabulary and the evidence sections it is allowed to use.
+        context_data = simulation_data.get('context_data', {})
+        role_contexts = {
+            role: build_role_context(role, narrative_report, maintenance_logs, context_data)
+            for role in PANEL_SPECIALIST_ROLES
         }
+        cache_key = self._panel_fingerprint(role_contexts, original_evidence_string) if self.result_cache is not None else None
+        return original_evidence_string, role_contexts, cache_key
 
-        _, _, _, general_tags_dict = self.general_analyst.analyze(common_specialist_context)
-        general_tags = [tag for tags in general_tags_dict.values() for tag in tags]
-        print(f" -> General Analyst found: {general_tags}")
+    def _cached_panel_result(self, cache_key):
+        if cache_key is None:
+            return None
+        cached = self.result_cache.get(cache_key)
+        if cached is None:
+            return None
+        logger.debug("[Panel cache] Reusing expert panel result for identical evidence (%s).", cache_key[:12])
+        return (cached['final_level'], cached['final_conf'], cached['final_level_scores'],
+                cached['final_reasoning'], cached['specialist_findings'])
 
-        _, _, _, tech_ops_tags_dict = self.tech_ops_specialist.analyze(common_specialist_context)
-        tech_ops_tags = [tag for tags in tech_ops_tags_dict.values() for tag in tags]
-        print(f" -> Tech/Ops Specialist found: {tech_ops_tags}")
+    def _store_panel_result(self, cache_key, levels: list, result: tuple, evidence: str = None):
+        """
+        Caches a panel result unless any stage of it failed (API_Error). The evidence is stored
+        with it so saved caches double as training data for the fast pre-classifier.
+        """
+        if cache_key is None or any(str(level).startswith("API_Error") for level in levels):
+            return
+        final_level, final_conf, final_level_scores, final_reasoning, specialist_findings_dict = result
+        self.result_cache.put(cache_key, {
+            "final_level": final_level,
+            "final_conf": final_conf,
+            "final_level_scores": final_level_scores,
+            "final_reasoning": final_reasoning,
+            "specialist_findings": specialist_findings_dict,
+            "evidence": evidence,
+        })
 
-        _, _, _, maint_org_tags_dict = self.maint_org_specialist.analyze(common_specialist_context)
-        maint_org_tags = [tag for tags in maint_org_tags_dict.values() for tag in tags]
-        print(f" -> Maint/Org Specialist found: {maint_org_tags}")
+    def _fast_result(self, original_evidence_string: str):
+        """
+        Asks the local pre-classifier first. Returns a panel-shaped result tuple when it is confident,
+        otherwise None (the panel must run). Local results are not cached, so the cache only ever
+        holds panel labels to train on.
+        """
+        if self.fast_classifier is None:
+            return None
+        tags, confidence = self.fast_classifier.predict(original_evidence_string)
+        with _STATS_LOCK:
+            self.fast_path_stats["local" if confidence >= self.fast_min_confidence else "panel"] += 1
+        if confidence < self.fast_min_confidence:
+            return None
+        final_level, final_conf, final_level_scores, _ = score_evidence_tags(tags)
+        logger.debug("[Fast classifier] %.2f confident in %s; skipping the expert panel.", confidence, tags or 'NONE')
+        return final_level, final_conf, final_level_scores, tags, {FAST_CLASSIFIER_LABEL: tags}
 
-        # Step C: Format Specialist Findings for Adjudicator
-        specialist_findings_dict = {
-            "General Analyst": general_tags,
-            "Tech/Ops Specialist": tech_ops_tags,
-            "Maint/Org Specialist": maint_org_tags
+    def _specialists(self):
+        return {
+            "general_analyst": self.general_analyst,
+            "tech_ops_specialist": self.tech_ops_specialist,
+            "maint_org_specialist": self.maint_org_specialist,
         }
-        specialist_findings_json_string = json.dumps(specialist_findings_dict, indent=4)
+
+    def _run_expert_panel(self, simulation_data: dict):
+        """
+        Runs the specialists and the adjudicator on the flight's documents (the only LLM stage).
+        Results are cached by evidence fingerprint; failed (API_Error) results are never cached.
+
+        Returns:
+            tuple: (final_level, final_conf, final_level_scores, final_reasoning, specialist_findings_dict)
+        """
+        with span("panel.prepare_inputs"):
+            original_evidence_string, role_contexts, cache_key = self._prepare_panel_inputs(simulation_data)
+        cached = self._cached_panel_result(cache_key)
+        if cached is not None:
+            return cached
+        with span("panel.fast_classifier"):
+            local = self._fast_result(original_evidence_string)
+        if local is not None:
+            return local
+        
+        # Step B: Run Specialized Analysts
+        logger.debug("[Step B: Running Specialized Analysts...]")
+        specialist_levels, specialist_findings_dict = [], {}
+        for role, analyst in self._specialists().items():
+            self._record_prompt_tokens(role, analyst, role_contexts[role])
+            with span(f"panel.{role}"):
+                level, _, _, tags_dict = analyst.analyze(role_contexts[role])
+            tags = [tag for tags in tags_dict.values() for tag in tags]
+            logger.debug(" -> %s found: %s", PANEL_ROLE_LABELS[role], tags)
+            specialist_levels.append(level)
+            # Step C: Format Specialist Findings for Adjudicator
+            specialist_findings_dict[PANEL_ROLE_LABELS[role]] = tags
 
         # Step D: Run Final Adjudicator
-        print("\n[Step D: Running Final Adjudicator...]")
+        logger.debug("[Step D: Running Final Adjudicator...]")
         adjudicator_context = {
             'original_evidence': original_evidence_string,
-            'specialist_findings_json': specialist_findings_json_string
+            'specialist_findings_json': json.dumps(specialist_findings_dict, indent=4)
         }
-        final_level, final_conf, final_level_scores, final_reasoning_dict = self.final_adjudicator.analyze(adjudicator_context)
+        self._record_prompt_tokens("adjudicator", self.final_adjudicator, adjudicator_context)
+        with span("panel.adjudicator"):
+            final_level, final_conf, final_level_scores, final_reasoning_dict = self.final_adjudicator.analyze(adjudicator_context)
         final_reasoning = [tag for tags in final_reasoning_dict.values() for tag in tags]
 
+        result = (final_level, final_conf, final_level_scores, final_reasoning, specialist_findings_dict)
+        self._store_panel_result(cache_key, specialist_levels + [final_level], result, original_evidence_string)
+        return result
+
+    def _run_expert_panel_batch(self, flights: dict, **batch_options):
+        """
+        Batched counterpart of _run_expert_panel: each panel stage packs many flights into one
+        request via HFACSAnalyzer.analyze_batch, so K flights cost ~4 requests instead of 4*K.
+
+        Args:
+            flights (dict): flight_id -> simulation_data.
+            **batch_options: Forwarded to analyze_batch (max_prompt_tokens, max_output_tokens).
+
+        Returns:
+            dict: flight_id -> the tuple _run_expert_panel returns.
+        """
+        results, inputs = {}, {}
+        for flight_id, simulation_data in flights.items():
+            prepared = self._prepare_panel_inputs(simulation_data)
+            cached = self._cached_panel_result(prepared[2])
+            if cached is None:
+                cached = self._fast_result(prepared[0])
+            if cached is not None:
+                results[flight_id] = cached
+            else:
+                inputs[flight_id] = prepared
+        if not inputs:
+            return results
+
+        logger.info("[Step B: Running Specialized Analysts on %d flights (batched)...]", len(inputs))
+        stage_levels = {flight_id: [] for flight_id in inputs}
+        findings = {flight_id: {} for flight_id in inputs}
+        for role, analyst in self._specialists().items():
+            contexts = {flight_id: prepared[1][role] for flight_id, prepared in inputs.items()}
+            for context in contexts.values():
+                self._record_prompt_tokens(role, analyst, context)
+            with span(f"panel_batch.{role}", flights=len(contexts)):
+                analyzed = analyst.analyze_batch(contexts, **batch_options)
+            for flight_id, (level, _, _, tags_dict) in analyzed.items():
+                stage_levels[flight_id].append(level)
+                findings[flight_id][PANEL_ROLE_LABELS[role]] = [tag for tags in tags_dict.values() for tag in tags]
+
+        logger.info("[Step D: Running Final Adjudicator on %d flights (batched)...]", len(inputs))
+        adjudicator_contexts = {
+            flight_id: {
+                'original_evidence': prepared[0],
+                'specialist_findings_json': json.dumps(findings[flight_id], indent=4)
+            }
+            for flight_id, prepared in inputs.items()
+        }
+        for context in adjudicator_contexts.values():
+            self._record_prompt_tokens("adjudicator", self.final_adjudicator, context)
+        with span("panel_batch.adjudicator", flights=len(adjudicator_contexts)):
+            adjudicated = self.final_adjudicator.analyze_batch(adjudicator_contexts, **batch_options)
+        for flight_id, (final_level, final_conf, final_level_scores, final_reasoning_dict) in adjudicated.items():
+            final_reasoning = [tag for tags in final_reasoning_dict.values() for tag in tags]
+            result = (final_level, final_conf, final_level_scores, final_reasoning, findings[flight_id])
+            self._store_panel_result(inputs[flight_id][2], stage_levels[flight_id] + [final_level], result,
+                                     inputs[flight_id][0])
+            results[flight_id] = result
+        return results
+
+    def _no_anomaly_report(self, simulation_data: dict):
+        report = {
+            "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            "scenario": simulation_data['scenario_name'],
+            "what_happened": "No anomalies detected.",
+            "hfacs_root_cause": "No Fault",
+            "confidence": "100%",
+            "reasoning": "",
+            "intermediate_findings": {}
+        }
+        level_scores = {"Level 1: Unsafe Acts": 0, "Level 2: Preconditions for Unsafe Acts": 0, "Level 3: Unsafe Supervision": 0, "Level 4: Organizational Influences": 0}
+        logger.info("Final risk report | scenario=%s | %s | root cause: %s (%s)", report['scenario'],
+                    report['what_happened'], report['hfacs_root_cause'], report['confidence'])
+        return report, level_scores
+
+    def _panel_report(self, simulation_data: dict, panel_result: tuple):
+        final_level, final_conf, final_level_scores, final_reasoning, specialist_findings_dict = panel_result
         # Update Final Report
-        print("\n--- FINAL RISK REPORT ---")
         report = {
             "timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
             "scenario": simulation_data['scenario_name'],
@@ -218,15 +355,94 @@ class RiskTriageEngine:
             "intermediate_findings": specialist_findings_dict
         }
 
-        print(f"Scenario: {report['scenario']}")
-        print(f"What Happened: {report['what_happened']}")
-        print(f"HFACS Level (Final): {report['hfacs_level']}")
-        print(f"Confidence (Final): {report['confidence']}")
-        print(f"Reasoning (Final Tags): {report['reasoning']}")
-        print("\n--- Intermediate Specialist Findings ---")
-        print(json.dumps(report['intermediate_findings'], indent=2))
+        logger.info("Final risk report | scenario=%s | %s | level: %s (%s) | tags: %s", report['scenario'],
+                    report['what_happened'], report['hfacs_level'], report['confidence'], report['reasoning'])
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Intermediate specialist findings:\n%s", json.dumps(report['intermediate_findings'], indent=2))
         return report, final_level_scores
 
+    def analyze_flight(self, simulation_data: dict):
+        """
+        Executes the full S-D-E-A analysis chain using the multi-agent panel.
+        """
+        logger.debug("=== STARTING RISK ANALYSIS FOR SCENARIO: %s ===", simulation_data['scenario_name'])
+        with span("analyze_flight", scenario=simulation_data['scenario_name']):
+            # --- SENSE & DETECT ---
+            logger.debug("[PHASE 1: SENSE & DETECT] Running Anomaly Detector on telemetry data...")
+            detected_anomalies = self.anomaly_detector.detect(simulation_data['telemetry'])
+
+            # --- TRIAGE & EXPLAIN ---
+            logger.debug("[PHASE 2: TRIAGE & EXPLAIN]")
+            if not detected_anomalies:
+                logger.debug("Conclusion: No anomalies detected. Flight profile appears normal.")
+                return self._no_anomaly_report(simulation_data)
+
+            logger.info("Anomaly detected in '%s'. Triggering deep analysis with AI Expert Panel...", simulation_data['scenario_name'])
+            with span("explain.expert_panel"):
+                panel_result = self._run_expert_panel(simulation_data)
+            # --- ASSESS ---
+            with span("assess.report"):
+                return self._panel_report(simulation_data, panel_result)
+
+    def analyze_flights(self, simulation_data_list: list, **batch_options) -> list:
+        """
+        Batch counterpart of analyze_flight for evaluation runs: detection runs per flight, then all
+        anomalous flights go through the expert panel together in multi-flight requests.
+
+        Returns:
+            list: (report, level_scores) per flight, in input order.
+        """
+        logger.info("=== STARTING BATCHED RISK ANALYSIS FOR %d FLIGHTS ===", len(simulation_data_list))
+        anomalous = {}
+        for index, simulation_data in enumerate(simulation_data_list):
+            if self.anomaly_detector.detect(simulation_data['telemetry']):
+                anomalous[f"F{index:04d}"] = simulation_data
+        logger.info("%d/%d flights flagged by the Anomaly Detector.", len(anomalous), len(simulation_data_list))
+
+        with span("explain.expert_panel_batch", flights=len(anomalous)):
+            panel_results = self._run_expert_panel_batch(anomalous, **batch_options) if anomalous else {}
+        outcomes = []
+        for index, simulation_data in enumerate(simulation_data_list):
+            flight_id = f"F{index:04d}"
+            if flight_id in panel_results:
+                outcomes.append(self._panel_report(simulation_data, panel_results[flight_id]))
+            else:
+                outcomes.append(self._no_anomaly_report(simulation_data))
+        return outcomes
+
+    @staticmethod
+    def _text_as_flight(summary_text: str, context: dict = None) -> dict:
+        """Wraps a free-text report (e.g. an accident summary) in the document layout the panel expects."""
+        return {
+            'narrative_report': {"transcript": [{"speaker": "Summary", "dialogue": summary_text}]},
+            'maintenance_logs': [],
+            'context_data': context or {},
+        }
+
+    @staticmethod
+    def _text_result(panel_result: tuple) -> dict:
+        final_level, final_conf, _, final_reasoning, specialist_findings_dict = panel_result
+        return {
+            "hfacs_level": final_level,
+            "hfacs_confidence": final_conf,
+            "hfacs_reasoning": ", ".join(final_reasoning) if final_reasoning else "NONE",
+            "intermediate_findings": specialist_findings_dict
+        }
+
+    def analyze_text(self, summary_text: str, context: dict = None) -> dict:
+        """
+        Runs the expert panel on a free-text report, bypassing anomaly detection.
+        Thread-safe: the panel cache, the rate limiter and the model handle are all shared.
+        """
+        return self._text_result(self._run_expert_panel(self._text_as_flight(summary_text, context)))
+
+    def analyze_texts(self, texts: dict, contexts: dict = None, **batch_options) -> dict:
+        """Batched analyze_text: record_id -> summary text in, record_id -> result dict out."""
+        contexts = contexts or {}
+        flights = {record_id: self._text_as_flight(text, contexts.get(record_id)) for record_id, text in texts.items()}
+        return {record_id: self._text_result(result)
+                for record_id, result in self._run_expert_panel_batch(flights, **batch_options).items()}
+
 
 def main():
     """
@@ -245,6 +461,7 @@ def main():
     CREDENTIALS_PATH = os.path.join(PROJECT_ROOT, "config", "secrets", "gcloud_credentials.json")
     
     args = parser.parse_args()
+    configure_logging()
 
     try:
         # --- BƯỚC 1: TẠO DỮ LIỆU MÔ PHỎNG ---
@@ -0,0 +1,84 @@
+# file: analysis_modules/run_catalog.py (v1.0 - Append-only index of analysis runs)
+
+import csv
+import hashlib
+import os
+import threading
+import uuid
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import pandas as pd
+
+from .logging_utils import get_logger
+
+logger = get_logger("run_catalog")
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+DEFAULT_CATALOG_PATH = os.path.join(_PROJECT_ROOT, "outputs", "project_outputs", "run_catalog.csv")
+CATALOG_COLUMNS = ["run_id", "kind", "created_at", "source", "source_fingerprint", "channel_map", "rows",
+                   "duration_s", "anomalies", "output_path", "notes"]
+
+
+def source_fingerprint(path: str) -> str:
+    """
+    Identifies an input file by path, size and modification time. Hashing the content of
+    multi-GB recordings would cost as much as ingesting them.
+    """
+    stat = os.stat(path)
+    payload = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def encode_anomalies(anomalies: Iterable[tuple]) -> str:
+    """[(name, timestamp), ...] as "NAME@timestamp|NAME@timestamp"."""
+    return "|".join(f"{name}@{timestamp}" for name, timestamp in anomalies)
+
+
+def decode_anomalies(text: str) -> List[tuple]:
+    if not text:
+        return []
+    return [(name, int(timestamp)) for name, timestamp in (item.rsplit("@", 1) for item in text.split("|"))]
+
+
+class RunCatalog:
+    """
+    One CSV row per analysis run (batch evaluations, ingested recordings), appended as runs
+    finish so the catalog never has to be rewritten or held in memory while writing.
+    """
+    def __init__(self, path: str = DEFAULT_CATALOG_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, **fields) -> dict:
+        """Adds a run; run_id and created_at are filled in when not given. Returns the stored row."""
+        unknown = set(fields) - set(CATALOG_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown catalog fields: {sorted(unknown)}")
+        row = {column: "" for column in CATALOG_COLUMNS}
+        row.update({"run_id": uuid.uuid4().hex[:12], "created_at": datetime.now().isoformat(timespec="seconds")})
+        row.update({key: value for key, value in fields.items() if value is not None})
+        if isinstance(row["anomalies"], (list, tuple)):
+            row["anomalies"] = encode_anomalies(row["anomalies"])
+        with self._lock:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            new_file = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            with open(self.path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.DictWriter(f, fieldnames=CATALOG_COLUMNS)
+                if new_file:
+                    writer.writeheader()
+                writer.writerow(row)
+        logger.debug("Catalogued %s run %s (%s)", row["kind"], row["run_id"], row["source"])
+        return row
+
+    def entries(self, kind: Optional[str] = None) -> pd.DataFrame:
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=CATALOG_COLUMNS)
+        df = pd.read_csv(self.path, dtype=str, keep_default_na=False)
+        return df[df["kind"] == kind] if kind is not None else df
+
+    def find(self, fingerprint: str, kind: Optional[str] = None) -> Optional[dict]:
+        """The latest run recorded for a source fingerprint, or None."""
+        df = self.entries(kind)
+        matches = df[df["source_fingerprint"] == fingerprint]
+        return matches.iloc[-1].to_dict() if not matches.empty else None
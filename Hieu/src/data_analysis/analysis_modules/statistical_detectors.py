@@ -0,0 +1,238 @@
+# file: analysis_modules/statistical_detectors.py (v1.1 - Shared block-scanning base for streaming detectors)
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .logging_utils import get_logger
+
+logger = get_logger("statistical_detectors")
+
+# Channels that hold steady in normal flight, with the smallest standard deviation assumed for
+# each (about the sensor resolution) so that channels recorded as constants still get a scale.
+DEFAULT_STAT_CHANNELS = {
+    'engine_1_vibration_n1': 0.01,
+    'engine_1_egt_degc': 5.0,
+    'green_hydraulic_pressure_psi': 50.0,
+    'cabin_altitude_ft': 100.0,
+    'left_flap_motor_current': 0.5,
+}
+DEFAULT_REFERENCE_S = 30.0
+MIN_REFERENCE_SAMPLES = 10
+MEDIAN_STANDARD_ERROR = 1.2533  # standard error of a normal sample's median, x sigma / sqrt(n)
+MAD_RELATIVE_ERROR = 1.1664     # relative standard error of the MAD estimate of sigma, / sqrt(n)
+
+
+class StreamingDetector:
+    """
+    start() / update() / finish() / detect() skeleton shared by the streaming detectors (the
+    change detectors below and envelope_index.EnvelopeDetector). start() returns the flight's
+    state with its "columns" and an empty "first"; _alarms() gives the (samples x columns) alarm
+    matrix of one block. Each channel reports its first alarm as (f"{method}:{channel}", timestamp).
+    """
+    method = "DETECTOR"
+
+    def start(self, df: pd.DataFrame) -> dict:
+        raise NotImplementedError
+
+    def update(self, block: pd.DataFrame, state: dict):
+        """Scans the next block, recording each channel's first alarm in the state."""
+        columns = state["columns"]
+        if not columns or block.empty:
+            return
+        timestamps = block['timestamp'].to_numpy()
+        alarms, context = self._alarms(block, timestamps, state)
+        fired = alarms.any(axis=0)
+        if not fired.any():
+            return
+        first_rows = alarms.argmax(axis=0)
+        for position in np.flatnonzero(fired):
+            column = columns[position]
+            if column not in state["first"]:
+                row = first_rows[position]
+                state["first"][column] = int(timestamps[row])
+                self._log_alarm(column, position, row, context, state)
+
+    def finish(self, state: dict) -> List[tuple]:
+        return [(f"{self.method}:{column}", state["first"][column]) for column in state["columns"] if column in state["first"]]
+
+    def detect(self, df: pd.DataFrame) -> List[tuple]:
+        state = self.start(df)
+        self.update(df, state)
+        return self.finish(state)
+
+    def _alarms(self, block: pd.DataFrame, timestamps: np.ndarray, state: dict) -> Tuple[np.ndarray, object]:
+        """(samples x columns) alarm matrix of the block, plus whatever _log_alarm() needs to describe a row."""
+        raise NotImplementedError
+
+    def _log_alarm(self, column: str, position: int, row: int, context, state: dict):
+        pass
+
+
+class StatisticalDetector(StreamingDetector):
+    """
+    Base class for change detectors that scan several channels at once. Every channel is
+    standardized against the flight's reference window (median and MAD of the first
+    `reference_s` seconds, assumed nominal), then a subclass scans the (samples x channels)
+    matrix with one vectorized recurrence. Monitoring starts after the reference window. Each
+    channel reports its first alarm as (f"{method}:{channel}", timestamp), the same shape as the
+    AnomalyDetector rules.
+
+    The reference centre and deviation are estimates too (standard errors of about 1.25 / sqrt(n)
+    deviations and 1.17 / sqrt(n) relative), so the deviation is taken `margin_se` standard
+    errors high and the drift detectors widen their allowance by `margin_se` standard errors of
+    the centre (state "margin"). Short references trade sensitivity for fewer false alarms.
+
+    State carries across blocks (see StreamingDetector): start() on the first block, update() per
+    block, finish() at the end; detect() does all three on a whole flight.
+    """
+    method = "STAT"
+
+    def __init__(self, channels: Optional[Dict[str, float]] = None, reference_s: float = DEFAULT_REFERENCE_S,
+                 margin_se: float = 3.0):
+        self.channels = dict(channels or DEFAULT_STAT_CHANNELS)
+        self.reference_s = reference_s
+        self.margin_se = margin_se
+
+    def start(self, df: pd.DataFrame) -> dict:
+        """Scan state for a flight; the reference window comes from `df` (the first block in streaming use)."""
+        columns = [column for column in self.channels if column in df.columns]
+        times = df['timestamp'].to_numpy(dtype=np.float64)
+        count = int(np.searchsorted(times, times[0] + self.reference_s)) if len(times) else 0
+        if count >= MIN_REFERENCE_SAMPLES:
+            monitor_from = times[0] + self.reference_s
+        else:
+            count = min(MIN_REFERENCE_SAMPLES, len(times))
+            monitor_from = times[min(MIN_REFERENCE_SAMPLES, len(times) - 1)] if len(times) else 0.0
+        reference = df[columns].iloc[:count].to_numpy(dtype=np.float64)
+        median = np.nanmedian if np.isnan(reference).any() else np.median
+        center = median(reference, axis=0) if len(reference) else np.zeros(len(columns))
+        mad = median(np.abs(reference - center), axis=0) if len(reference) else np.zeros(len(columns))
+        min_sigma = np.array([self.channels[column] for column in columns])
+        root_n = np.sqrt(max(len(reference), 1))
+        state = {
+            "columns": columns,
+            "center": np.nan_to_num(center),
+            "scale": np.maximum(np.nan_to_num(1.4826 * mad) * (1 + self.margin_se * MAD_RELATIVE_ERROR / root_n), min_sigma),
+            "monitor_from": monitor_from,
+            "margin": self.margin_se * MEDIAN_STANDARD_ERROR / root_n,
+            "first": {},
+        }
+        state.update(self._initial_state(len(columns)))
+        return state
+
+    def _alarms(self, block: pd.DataFrame, timestamps: np.ndarray, state: dict) -> Tuple[np.ndarray, object]:
+        z = np.nan_to_num((block[state["columns"]].to_numpy(dtype=np.float64) - state["center"]) / state["scale"])
+        warmup = timestamps < state["monitor_from"]
+        z[warmup] = 0.0  # the reference window is the nominal level by definition
+        return self._scan(z, state) & ~warmup[:, None], None
+
+    def _log_alarm(self, column: str, position: int, row: int, context, state: dict):
+        logger.debug("[STAT CHECK PASSED] %s on %s at timestamp: %ss", self.method, column, state["first"][column])
+
+    def _initial_state(self, num_channels: int) -> dict:
+        return {}
+
+    def _scan(self, z: np.ndarray, state: dict) -> np.ndarray:
+        raise NotImplementedError
+
+
+class EWMADetector(StatisticalDetector):
+    """
+    EWMA control chart on the standardized residuals: E_t = lam * z_t + (1 - lam) * E_{t-1},
+    alarm when |E_t| exceeds limit * sqrt(lam / (2 - lam)) (limit x the asymptotic EWMA standard
+    deviation) plus the reference margin.
+    A small lam averages over many samples, so slow creep shows up well before any fixed threshold.
+    """
+    method = "EWMA_DRIFT"
+
+    def __init__(self, lam: float = 0.05, limit: float = 5.0, **kwargs):
+        super().__init__(**kwargs)
+        if not 0 < lam <= 1:
+            raise ValueError("lam must be in (0, 1].")
+        self.lam = lam
+        self.limit = limit
+
+    def _initial_state(self, num_channels: int) -> dict:
+        return {"ewma": np.zeros(num_channels)}
+
+    def _scan(self, z: np.ndarray, state: dict) -> np.ndarray:
+        # The previous level goes in as row 0 so the compiled ewm recursion continues from it.
+        seeded = pd.DataFrame(np.vstack([state["ewma"], z]))
+        ewma = seeded.ewm(alpha=self.lam, adjust=False).mean().to_numpy()[1:]
+        state["ewma"] = ewma[-1]
+        return np.abs(ewma) > self.limit * np.sqrt(self.lam / (2 - self.lam)) + state["margin"]
+
+
+class CUSUMDetector(StatisticalDetector):
+    """
+    Two-sided CUSUM: S_t = max(0, S_{t-1} + z_t - k) for upward shifts and the mirror image for
+    downward ones, alarm when either exceeds h; k is widened by the reference margin. The max(0, .) recursion has the closed form
+    S_t = C_t - min(0, min_{j<=t} C_j) with C the running sum, so it is a cumsum plus a running minimum.
+    """
+    method = "CUSUM_SHIFT"
+
+    def __init__(self, k: float = 0.5, h: float = 12.0, **kwargs):
+        super().__init__(**kwargs)
+        self.k = k
+        self.h = h
+
+    def _initial_state(self, num_channels: int) -> dict:
+        return {"upper": np.zeros(num_channels), "lower": np.zeros(num_channels)}
+
+    @staticmethod
+    def _one_sided(increments: np.ndarray, start: np.ndarray) -> np.ndarray:
+        running = start + np.cumsum(increments, axis=0)
+        return running - np.minimum(np.minimum.accumulate(running, axis=0), 0.0)
+
+    def _scan(self, z: np.ndarray, state: dict) -> np.ndarray:
+        allowance = self.k + state["margin"]
+        upper = self._one_sided(z - allowance, state["upper"])
+        lower = self._one_sided(-z - allowance, state["lower"])
+        state["upper"], state["lower"] = upper[-1], lower[-1]
+        return (upper > self.h) | (lower > self.h)
+
+
+class RollingZScoreDetector(StatisticalDetector):
+    """
+    Each sample against the mean and spread of the `window` samples before it, from running sums
+    of z and z**2. The spread is floored at the reference deviation so steady channels do not
+    alarm on rounding noise. Catches steps and spikes relative to the recent level.
+    """
+    method = "ZSCORE_SPIKE"
+
+    def __init__(self, window: int = 60, threshold: float = 8.0, min_samples: int = 10, **kwargs):
+        super().__init__(**kwargs)
+        if window < 2:
+            raise ValueError("window must be at least 2 samples.")
+        self.window = window
+        self.threshold = threshold
+        self.min_samples = min(min_samples, window)
+
+    def _initial_state(self, num_channels: int) -> dict:
+        return {"history": np.zeros((0, num_channels))}
+
+    def _scan(self, z: np.ndarray, state: dict) -> np.ndarray:
+        history = state["history"]
+        values = np.vstack([history, z]) if len(history) else z
+        start, total = len(history), len(values)
+        sums = np.zeros((total + 1, values.shape[1]))
+        squares = np.zeros_like(sums)
+        np.cumsum(values, axis=0, out=sums[1:])
+        np.cumsum(values * values, axis=0, out=squares[1:])
+        # Window [max(i - window, 0), i) for each new row i: the low ends repeat 0 until i reaches window.
+        lows = np.maximum(np.arange(start, total) - self.window, 0)
+        counts = (np.arange(start, total) - lows)[:, None]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = (sums[start:total] - sums[lows]) / counts
+            variance = (squares[start:total] - squares[lows]) / counts - mean * mean
+            spread = np.maximum(np.sqrt(np.maximum(variance, 0.0)), 1.0)
+            score = (values[start:] - mean) / spread
+        state["history"] = values[-self.window:]
+        return (counts >= self.min_samples) & (np.abs(score) > self.threshold)
+
+
+def default_statistical_detectors(channels: Optional[Dict[str, float]] = None) -> List[StatisticalDetector]:
+    """One detector of each kind with the default tuning, over `channels` (DEFAULT_STAT_CHANNELS when None)."""
+    return [EWMADetector(channels=channels), CUSUMDetector(channels=channels), RollingZScoreDetector(channels=channels)]
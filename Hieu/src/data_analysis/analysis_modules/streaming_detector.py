@@ -0,0 +1,119 @@
+# file: analysis_modules/streaming_detector.py (v1.2 - Statistical detectors carried across blocks)
+
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .anomaly_detector import AnomalyDetector
+from .logging_utils import get_logger
+from .tracing import span
+
+logger = get_logger("streaming_detector")
+
+FLAP_STUCK_WINDOW_S = 4
+FLAP_STUCK_MIN_CHANGE_DEG = 0.5
+
+
+class StreamingAnomalyDetector:
+    """
+    Runs the AnomalyDetector rules over a flight delivered as consecutive blocks (e.g. from
+    TelemetryGenerator.iter_blocks or iter_columnar_blocks), keeping only per-rule state between
+    blocks. finish() returns the same list, in the same order, as AnomalyDetector.detect on the
+    whole flight.
+
+    The pointwise rules report their first hit, so each runs per block until it fires. FLAP_STUCK
+    compares a lever change with the next 4 s of flap angles; those windows can straddle a block
+    boundary, so open windows are carried over until a later sample closes them.
+
+    `rules` restricts detection to some rule names (e.g. those a recorded file has channels for).
+    The detector's statistical detectors, if any, take their reference window from the first
+    block and carry their scan state from block to block.
+    """
+    def __init__(self, detector: Optional[AnomalyDetector] = None, rules: Optional[Iterable[str]] = None):
+        self.detector = detector or AnomalyDetector()
+        self.rules = set(rules) if rules is not None else set(self.detector.rule_checks())
+        self.reset()
+
+    def reset(self):
+        self.rows = 0
+        self._first = {}          # anomaly name -> first detection timestamp
+        self._previous_lever = None
+        self._open_windows = []   # [start_time, initial_angle, max_change, seen] per pending lever change
+        self._stat_states = None
+
+    def update(self, block: pd.DataFrame):
+        """Feeds the next block of the flight (blocks must arrive in time order)."""
+        with span("detect.block", rows=len(block)):
+            for name, check_func in self.detector.rule_checks().items():
+                if name == "FLAP_STUCK" or name in self._first or name not in self.rules:
+                    continue
+                is_detected, timestamp = check_func(block)
+                if is_detected:
+                    self._first[name] = timestamp
+            if "FLAP_STUCK" in self.rules and "FLAP_STUCK" not in self._first:
+                self._update_flap_stuck(block)
+            if self._stat_states is None:
+                self._stat_states = [detector.start(block) for detector in self.detector.statistical_detectors]
+            for detector, state in zip(self.detector.statistical_detectors, self._stat_states):
+                detector.update(block, state)
+        self.rows += len(block)
+
+    def _update_flap_stuck(self, block: pd.DataFrame):
+        if block.empty:
+            return
+        times = block['timestamp'].to_numpy()
+        lever = block['flap_lever_position'].to_numpy().astype(np.float64)
+        angles = block['left_flap_angle_deg'].to_numpy()
+        previous = np.nan if self._previous_lever is None else self._previous_lever
+        change = np.diff(lever, prepend=previous)
+        self._previous_lever = lever[-1]
+        for index in np.flatnonzero((change > 0) & (lever > 0)):
+            self._open_windows.append([times[index], angles[index], None, False])
+
+        still_open = []
+        for window in self._open_windows:
+            start_time, initial_angle = window[0], window[1]
+            inside = (times > start_time) & (times <= start_time + FLAP_STUCK_WINDOW_S)
+            if inside.any():
+                change_max = np.abs(angles[inside] - initial_angle).max()
+                window[2] = change_max if window[2] is None else max(window[2], change_max)
+                window[3] = True
+            if times[-1] >= start_time + FLAP_STUCK_WINDOW_S:
+                # Later samples are all past the window, so it is complete.
+                if self._close_window(window):
+                    self._open_windows = []
+                    return
+            else:
+                still_open.append(window)
+        self._open_windows = still_open
+
+    def _close_window(self, window: list) -> bool:
+        start_time, _, max_change, seen = window
+        if seen and max_change < FLAP_STUCK_MIN_CHANGE_DEG:
+            self._first["FLAP_STUCK"] = int(start_time)
+            logger.debug("[RULE CHECK PASSED] Flap stuck/unresponsive DETECTED at timestamp: %ss", int(start_time))
+            return True
+        return False
+
+    def finish(self) -> List[tuple]:
+        """Closes the windows still open at the end of the flight and returns [(anomaly name, timestamp)]."""
+        if "FLAP_STUCK" in self.rules and "FLAP_STUCK" not in self._first:
+            for window in self._open_windows:
+                if self._close_window(window):
+                    break
+        self._open_windows = []
+        detected = [(name, self._first[name]) for name in self.detector.rule_checks() if name in self._first]
+        for detector, state in zip(self.detector.statistical_detectors, self._stat_states or []):
+            detected.extend(detector.finish(state))
+        if not detected:
+            logger.debug("No anomalies detected based on the current rules.")
+        return detected
+
+    def detect_blocks(self, blocks: Iterable[pd.DataFrame]) -> List[tuple]:
+        """Runs a whole flight given as an iterable of blocks."""
+        self.reset()
+        with span("detect.stream"):
+            for block in blocks:
+                self.update(block)
+            return self.finish()
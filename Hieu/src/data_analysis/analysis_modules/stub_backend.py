@@ -0,0 +1,92 @@
+# file: analysis_modules/stub_backend.py (v1.1 - Ignore the batch instructions' placeholder marker)
+
+import json
+import re
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+from google.api_core.exceptions import ResourceExhausted, ServiceUnavailable
+
+from .hfacs_analyzer import ALL_EVIDENCE_TAGS
+
+_FLIGHT_MARKER = re.compile(r"=== FLIGHT ([^\s<]\S*) ===")  # not the "<id>" placeholder in BATCH_INSTRUCTIONS
+_TAG_PATTERN = re.compile(r"\b(L[1-4]_[A-Z_]+)\b")
+
+
+def echo_tags_responder(prompt: str, max_tags: int = 3) -> list:
+    """
+    Default answer: the first known tags that appear in the evidence part of the prompt
+    (after the last "Combined Reports"/"ORIGINAL EVIDENCE" header), so results are deterministic.
+    """
+    evidence = prompt
+    for header in ("Combined Reports to analyze:", "--- ORIGINAL EVIDENCE ---", "Report to analyze:"):
+        if header in evidence:
+            evidence = evidence.rsplit(header, 1)[-1]
+    tags = [t for t in dict.fromkeys(_TAG_PATTERN.findall(evidence)) if t in ALL_EVIDENCE_TAGS]
+    return tags[:max_tags]
+
+
+class FaultInjectingBackend:
+    """
+    Drop-in replacement for GenerativeModel.generate_content() for tests and benchmarks.
+
+    Latency is lognormal around `latency_s`; a `slow_rate` share of calls take `slow_latency_s`
+    instead (tail latency), and an `error_rate` share raise ServiceUnavailable (or
+    ResourceExhausted for `rate_limit_rate`). `degrade()` changes these knobs mid-run.
+    JSON-mode (batched) requests get a JSON array with one entry per "=== FLIGHT <id> ===" block.
+    """
+    def __init__(self, latency_s: float = 0.02, jitter: float = 0.3, slow_rate: float = 0.0,
+                 slow_latency_s: float = 1.0, error_rate: float = 0.0, rate_limit_rate: float = 0.0,
+                 responder=echo_tags_responder, seed: int = 0):
+        self.latency_s = latency_s
+        self.jitter = jitter
+        self.slow_rate = slow_rate
+        self.slow_latency_s = slow_latency_s
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.responder = responder
+        self._rng = np.random.default_rng(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+
+    def degrade(self, **knobs):
+        """e.g. degrade(error_rate=0.8) or degrade(slow_rate=0.2, slow_latency_s=3.0)."""
+        for key, value in knobs.items():
+            if not hasattr(self, key):
+                raise AttributeError(f"FaultInjectingBackend has no knob '{key}'")
+            setattr(self, key, value)
+
+    def _draw(self):
+        with self._lock:
+            self.calls += 1
+            u_error, u_slow = self._rng.random(2)
+            latency = self.latency_s * float(self._rng.lognormal(0.0, self.jitter))
+        if u_slow < self.slow_rate:
+            latency = self.slow_latency_s
+        return u_error, latency
+
+    def generate_content(self, prompt, generation_config=None, **_):
+        u_error, latency = self._draw()
+        time.sleep(latency)
+        if u_error < self.rate_limit_rate:
+            self.failures += 1
+            raise ResourceExhausted("Stub backend: quota exceeded.")
+        if u_error < self.rate_limit_rate + self.error_rate:
+            self.failures += 1
+            raise ServiceUnavailable("Stub backend: injected failure.")
+
+        parts = _FLIGHT_MARKER.split(prompt)  # [preamble, id1, block1, id2, block2, ...]
+        if generation_config is not None and len(parts) > 1:
+            blocks = {}
+            for flight_id, block in zip(parts[1::2], parts[2::2]):
+                blocks[flight_id] = blocks.get(flight_id, "") + block
+            text = json.dumps([{"flight_id": flight_id, "tags": self.responder(block)}
+                               for flight_id, block in blocks.items()])
+        else:
+            tags = self.responder(prompt)
+            text = ", ".join(tags) if tags else "NONE"
+        candidate = SimpleNamespace(finish_reason=SimpleNamespace(name="STOP"), safety_ratings=[])
+        return SimpleNamespace(text=text, candidates=[candidate])
@@ -0,0 +1,197 @@
+# file: analysis_modules/tracing.py (v1.0 - Pipeline tracing spans)
+
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+TRACING_ENV = "HFACS_TRACE"  # "1" enables the process-wide tracer at import time
+
+
+class Tracer:
+    """
+    Collects timed spans as Chrome trace "complete" events (ph="X"). Spans nest per thread,
+    so the trace viewer shows each flight's stages stacked under the stage that opened them.
+    Disabled tracers hand out one shared no-op context manager, so instrumented code costs a
+    function call and an attribute check.
+    """
+    def __init__(self, enabled: bool = False, max_spans: int = 1_000_000):
+        self.enabled = enabled
+        self.max_spans = max_spans
+        self.dropped = 0
+        self._spans: List[dict] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._origin_ns = time.perf_counter_ns()
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def _record(self, name: str, category: str, args: dict):
+        stack = self._stack()
+        stack.append(name)
+        start_ns = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            end_ns = time.perf_counter_ns()
+            stack.pop()
+            event = {
+                "name": name,
+                "cat": category,
+                "ph": "X",
+                "ts": (start_ns - self._origin_ns) / 1000.0,  # microseconds, as the trace format expects
+                "dur": (end_ns - start_ns) / 1000.0,
+                "pid": os.getpid(),
+                "tid": threading.get_ident(),
+                "args": dict(args, parent=stack[-1]) if stack else args,
+            }
+            with self._lock:
+                if len(self._spans) < self.max_spans:
+                    self._spans.append(event)
+                else:
+                    self.dropped += 1
+
+    def span(self, name: str, category: str = "pipeline", **args):
+        """Context manager timing one stage. Keyword args end up in the event's "args"."""
+        if not self.enabled:
+            return _NULL_SPAN
+        return self._record(name, category, args)
+
+    def spans(self) -> List[dict]:
+        with self._lock:
+            return list(self._spans)
+
+    def reset(self):
+        with self._lock:
+            self._spans.clear()
+            self.dropped = 0
+        self._origin_ns = time.perf_counter_ns()
+
+    def export_chrome_trace(self, path: str) -> str:
+        """Writes the spans as Chrome trace-event JSON (open in chrome://tracing or Perfetto)."""
+        events = self.spans()
+        thread_names = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": f"thread-{i}"}}
+            for i, (pid, tid) in enumerate(sorted({(e["pid"], e["tid"]) for e in events}))
+        ]
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": thread_names + events, "displayTimeUnit": "ms",
+                       "otherData": {"dropped_spans": self.dropped}}, f, default=str)
+        return path
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Duration statistics per span name (milliseconds): count, total, mean, p50, p95, max,
+        plus self_ms (total minus time spent in child spans), sorted by total time.
+        """
+        events = self.spans()
+        columns = ["span", "count", "total_ms", "self_ms", "mean_ms", "p50_ms", "p95_ms", "max_ms"]
+        if not events:
+            return pd.DataFrame(columns=columns)
+        frame = pd.DataFrame({
+            "span": [e["name"] for e in events],
+            "parent": [e["args"].get("parent") for e in events],
+            "dur_ms": [e["dur"] / 1000.0 for e in events],
+        })
+        grouped = frame.groupby("span")["dur_ms"]
+        table = pd.DataFrame({
+            "count": grouped.size(),
+            "total_ms": grouped.sum(),
+            "mean_ms": grouped.mean(),
+            "p50_ms": grouped.quantile(0.5),
+            "p95_ms": grouped.quantile(0.95),
+            "max_ms": grouped.max(),
+        })
+        child_time = frame.dropna(subset=["parent"]).groupby("parent")["dur_ms"].sum()
+        table["self_ms"] = table["total_ms"] - child_time.reindex(table.index).fillna(0.0)
+        table = table.reset_index().sort_values("total_ms", ascending=False)
+        return table[columns].round(3).reset_index(drop=True)
+
+    def write_summary(self, path: str) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.summary().to_csv(path, index=False)
+        return path
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _shared_tracer():
+    # Entry points import this module as both `src.data_analysis...` and `data_analysis...`;
+    # whichever copy loads second reuses the first one's tracer so all spans land in one place.
+    for alias in _MODULE_ALIASES:
+        module = sys.modules.get(alias)
+        tracer = getattr(module, "_tracer", None)
+        if tracer is not None:  # the other copy's Tracer class, so no isinstance() check
+            return tracer
+    return Tracer(enabled=os.environ.get(TRACING_ENV, "") not in ("", "0"))
+
+
+_MODULE_ALIASES = ("src.data_analysis.analysis_modules.tracing", "data_analysis.analysis_modules.tracing")
+_tracer = _shared_tracer()
+
+
+def get_tracer() -> Tracer:
+    """The tracer every instrumented module in this process records into."""
+    return _tracer
+
+
+def enable_tracing(enabled: bool = True, reset: bool = True) -> Tracer:
+    """Turns the process-wide tracer on (or off), optionally dropping spans recorded so far."""
+    if reset:
+        _tracer.reset()
+    _tracer.enabled = enabled
+    return _tracer
+
+
+def span(name: str, category: str = "pipeline", **args):
+    """Shorthand for get_tracer().span(...)."""
+    if not _tracer.enabled:
+        return _NULL_SPAN
+    return _tracer._record(name, category, args)
+
+
+def traced(name: Optional[str] = None, category: str = "pipeline"):
+    """Decorator form of span(); the span is named after the function unless `name` is given."""
+    def decorate(func):
+        span_name = name or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def write_run_trace(output_dir: str, run_label: str) -> Dict[str, str]:
+    """
+    Writes trace_<run_label>.json and span_summary_<run_label>.csv next to a run's other outputs.
+
+    Returns:
+        dict: {"trace": path, "summary": path}
+    """
+    return {
+        "trace": _tracer.export_chrome_trace(os.path.join(output_dir, f"trace_{run_label}.json")),
+        "summary": _tracer.write_summary(os.path.join(output_dir, f"span_summary_{run_label}.csv")),
+    }
@@ -0,0 +1,108 @@
+# file: analysis_modules/vertex_client.py (v1.3 - Shorter default call deadline)
+
+import os
+import threading
+from functools import lru_cache
+
+# Thư viện chuyên dụng cho Vertex AI và xác thực Service Account
+import vertexai
+from vertexai.generative_models import (
+    GenerativeModel,
+    GenerationConfig,
+    SafetySetting,
+    HarmCategory,
+    HarmBlockThreshold
+)
+from google.oauth2 import service_account
+
+from .resilience import ResilientModel
+from .logging_utils import get_logger
+
+logger = get_logger("vertex_client")
+
+DEFAULT_MODEL_NAME = "gemini-2.5-flash-lite"
+DEFAULT_MAX_OUTPUT_TOKENS = 2048
+# Request hedging duplicates slow calls (costs extra tokens), so it is opt-in.
+HEDGE_REQUESTS = os.environ.get("HFACS_HEDGE_REQUESTS", "0") == "1"
+# A call still running after this is abandoned and retried once, so one analyzer stage waits at most twice this long.
+CALL_TIMEOUT_SECONDS = float(os.environ.get("HFACS_CALL_TIMEOUT_SECONDS", 30))
+
+_init_lock = threading.Lock()
+_initialized_target = None  # (project_id, location, credentials_path) passed to vertexai.init
+_models = {}
+_prompts = {}
+
+
+@lru_cache(maxsize=None)
+def get_credentials(credentials_path: str):
+    """Loads a service-account file once per process."""
+    return service_account.Credentials.from_service_account_file(credentials_path)
+
+
+def init_vertex(project_id: str, location: str, credentials_path: str):
+    """
+    Calls vertexai.init at most once per (project, location, credentials). vertexai keeps its
+    clients (and their gRPC channels) in global state, so every model built afterwards shares them.
+    """
+    global _initialized_target
+    target = (project_id, location, os.path.abspath(credentials_path))
+    with _init_lock:
+        if _initialized_target == target:
+            return
+        if _initialized_target is not None:
+            logger.warning("Re-initializing Vertex AI for project '%s' (%s); "
+                           "models built for the previous project are dropped.", project_id, location)
+            _models.clear()
+        vertexai.init(project=project_id, location=location, credentials=get_credentials(credentials_path))
+        _initialized_target = target
+
+
+def get_model(project_id: str, location: str, credentials_path: str,
+              model_name: str = DEFAULT_MODEL_NAME, max_output_tokens: int = DEFAULT_MAX_OUTPUT_TOKENS,
+              hedge: bool = HEDGE_REQUESTS) -> ResilientModel:
+    """
+    Returns the shared model handle for this configuration. Analyzer roles differ only
+    by prompt template, so all of them use the same handle (and the same circuit breaker).
+    """
+    init_vertex(project_id, location, credentials_path)
+    key = (model_name, max_output_tokens, hedge)
+    with _init_lock:
+        model = _models.get(key)
+        if model is None:
+            safety_settings = [SafetySetting(category=c, threshold=HarmBlockThreshold.BLOCK_NONE) for c in HarmCategory]
+            generation_config = GenerationConfig(temperature=0.0, max_output_tokens=max_output_tokens)
+            model = ResilientModel(
+                GenerativeModel(model_name, safety_settings=safety_settings, generation_config=generation_config),
+                hedge=hedge,
+                timeout=CALL_TIMEOUT_SECONDS
+            )
+            _models[key] = model
+        return model
+
+
+def load_prompt(prompt_path: str) -> str:
+    """Reads a prompt template, re-reading it only when the file changes on disk."""
+    stat = os.stat(prompt_path)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    cached = _prompts.get(prompt_path)
+    if cached is not None and cached[0] == signature:
+        return cached[1]
+    with open(prompt_path, 'r', encoding='utf-8') as f:
+        template = f.read()
+    _prompts[prompt_path] = (signature, template)
+    return template
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough input-token estimate (~4 characters per token for English prompts); no API call."""
+    return (len(text) + 3) // 4
+
+
+def reset():
+    """Drops the shared session (e.g. after rotating credentials)."""
+    global _initialized_target
+    with _init_lock:
+        _initialized_target = None
+        _models.clear()
+        _prompts.clear()
+    get_credentials.cache_clear()
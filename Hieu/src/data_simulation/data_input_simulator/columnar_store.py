@@ -0,0 +1,141 @@
+# file: data_input_simulator/columnar_store.py (v1.0 - Append-only columnar telemetry files)
+
+import json
+import os
+from typing import Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_simulation.data_input_simulator.telemetry_schema import apply_schema, validate_schema
+
+MANIFEST_NAME = "manifest.json"
+DEFAULT_READ_BLOCK_SIZE = 65_536
+
+
+class ColumnarTelemetryWriter:
+    """
+    Writes telemetry blocks to a directory with one raw binary file per channel plus a
+    manifest.json (row count, dtypes, categories). Each write() appends to the channel files,
+    so a flight of any length is written with one block in memory. Categorical channels are
+    stored as int32 codes into categories collected across blocks.
+
+    Usage:
+        with ColumnarTelemetryWriter(path) as writer:
+            for block in generator.iter_blocks():
+                writer.write(block)
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        self._dtypes = {}       # column -> numpy dtype of the stored values
+        self._categories = {}   # categorical column -> categories in code order
+        self._codes = {}        # categorical column -> {category: code}
+        self._files = {}
+        os.makedirs(path, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+    def _file(self, column: str):
+        handle = self._files.get(column)
+        if handle is None:
+            handle = self._files[column] = open(os.path.join(self.path, f"{column}.bin"), "wb")
+        return handle
+
+    def _category_codes(self, column: str, values: pd.Series) -> np.ndarray:
+        lookup = self._codes.setdefault(column, {})
+        categories = self._categories.setdefault(column, [])
+        for category in values.cat.categories:
+            if category not in lookup:
+                lookup[category] = len(categories)
+                categories.append(category)
+        # Block codes -> file codes; the appended -1 keeps missing values missing.
+        remap = np.array([lookup[category] for category in values.cat.categories] + [-1], dtype=np.int32)
+        return remap[values.cat.codes.to_numpy()]
+
+    def write(self, block: pd.DataFrame):
+        """Appends one block. Its channels are cast to the telemetry schema first if needed."""
+        if validate_schema(block):
+            block = apply_schema(block)
+        if self._dtypes and list(block.columns) != list(self._dtypes):
+            raise ValueError(f"Block columns {list(block.columns)} differ from the first block's {list(self._dtypes)}.")
+        for column in block.columns:
+            values = block[column]
+            if isinstance(values.dtype, pd.CategoricalDtype):
+                array = self._category_codes(column, values)
+            else:
+                # Later blocks are stored in the first block's dtype (e.g. a float64 time axis).
+                array = values.to_numpy().astype(self._dtypes.get(column, values.dtype), copy=False)
+            self._dtypes.setdefault(column, array.dtype)
+            self._file(column).write(np.ascontiguousarray(array).tobytes())
+        self.rows += len(block)
+
+    def close(self) -> str:
+        """Closes the channel files and writes the manifest. Returns the manifest path."""
+        for handle in self._files.values():
+            handle.close()
+        self._files.clear()
+        manifest = {
+            "rows": self.rows,
+            "columns": [{"name": column, "dtype": dtype.str, "file": f"{column}.bin",
+                         "categories": self._categories.get(column)}
+                        for column, dtype in self._dtypes.items()],
+        }
+        manifest_path = os.path.join(self.path, MANIFEST_NAME)
+        with open(manifest_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+        return manifest_path
+
+
+def write_columnar(blocks: Iterable[pd.DataFrame], path: str) -> int:
+    """Writes an iterable of blocks; returns the number of rows written."""
+    with ColumnarTelemetryWriter(path) as writer:
+        for block in blocks:
+            writer.write(block)
+    return writer.rows
+
+
+def read_manifest(path: str) -> dict:
+    with open(os.path.join(path, MANIFEST_NAME), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _memmaps(path: str, manifest: dict, columns: Optional[List[str]]) -> dict:
+    entries = [entry for entry in manifest["columns"] if columns is None or entry["name"] in columns]
+    maps = {}
+    for entry in entries:
+        file_path = os.path.join(path, entry["file"])
+        if manifest["rows"] == 0:
+            maps[entry["name"]] = (np.empty(0, dtype=entry["dtype"]), entry["categories"])
+        else:
+            maps[entry["name"]] = (np.memmap(file_path, dtype=entry["dtype"], mode="r", shape=(manifest["rows"],)),
+                                   entry["categories"])
+    return maps
+
+
+def _frame(maps: dict, start: int, stop: int) -> pd.DataFrame:
+    data = {}
+    for name, (values, categories) in maps.items():
+        chunk = np.array(values[start:stop])  # copy out of the memory map
+        data[name] = pd.Categorical.from_codes(chunk, categories=categories) if categories is not None else chunk
+    return pd.DataFrame(data, index=pd.RangeIndex(start, stop))
+
+
+def iter_columnar_blocks(path: str, block_size: int = DEFAULT_READ_BLOCK_SIZE,
+                         columns: Optional[List[str]] = None) -> Iterator[pd.DataFrame]:
+    """Reads a columnar flight back block by block through memory maps (only one block is resident)."""
+    manifest = read_manifest(path)
+    maps = _memmaps(path, manifest, columns)
+    for start in range(0, manifest["rows"], block_size):
+        yield _frame(maps, start, min(start + block_size, manifest["rows"]))
+
+
+def read_columnar(path: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """The whole flight (or some of its channels) as one DataFrame."""
+    manifest = read_manifest(path)
+    return _frame(_memmaps(path, manifest, columns), 0, manifest["rows"])
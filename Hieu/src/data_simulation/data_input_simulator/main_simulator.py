@@ -1,4 +1,4 @@
-# file: data_input_simulator/main_simulator.py (v1.3 - Simplified, relies on PYTHONPATH)
+# file: data_input_simulator/main_simulator.py (v1.9 - Telemetry saved through the telemetry schema)
 
 import os
 import argparse
@@ -6,8 +6,6 @@ import json
 import random
 import sys # Added import sys
 
-print("DEBUG: main_simulator.py started.") # Added this line to check execution
-
 # *** ĐÃ XÓA: Toàn bộ logic sys.path đã được gỡ bỏ. ***
 # Script này giờ đây phụ thuộc vào việc PYTHONPATH được thiết lập đúng bởi file batch.
 
@@ -15,7 +13,14 @@ from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoa
 from src.data_simulation.data_input_simulator.telemetry_generator import TelemetryGenerator, plot_scenario_telemetry
 from src.data_simulation.data_input_simulator.document_generator import DocumentGenerator
 from src.data_simulation.data_input_simulator.ground_truth_generator import GroundTruthGenerator
+from src.data_simulation.data_input_simulator.telemetry_schema import save_telemetry, memory_report
 from src.data_analysis.analysis_modules.hfacs_analyzer import HFACSAnalyzer, HFACS_RUBRIC # New import
+from src.data_analysis.analysis_modules.panel_cache import ClassificationCache, evidence_fingerprint
+from src.data_analysis.analysis_modules.logging_utils import get_logger, configure_logging
+from src.data_analysis.analysis_modules.tracing import span
+
+logger = get_logger("main_simulator")
+logger.debug("main_simulator.py started.")
 
 # Add project root to sys.path for module imports
 _CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -25,32 +30,19 @@ if _PROJECT_ROOT not in sys.path:
 
 # Câu lệnh import chuẩn, sẽ hoạt động khi PYTHONPATH được thiết lập đúng.
 
-class ScenarioSimulator:
-    """
-    Module "nhạc trưởng" điều phối toàn bộ quá trình mô phỏng.
+def classify_documents(hfacs_analyzer: HFACSAnalyzer, document_data: dict, cache: ClassificationCache = None):
     """
-    def __init__(self, scenario_name: str, hfacs_analyzer: HFACSAnalyzer):
-        self.scenario_name = scenario_name
-        self.config = None
-        self.simulation_data = {}
-        self.loader = ScenarioLoader()
-        self.hfacs_analyzer = hfacs_analyzer
+    Classifies a flight's documents with a single HFACSAnalyzer call.
 
-    def run(self):
-        print(f"--- [START] Running simulation for scenario: '{self.scenario_name}' ---")
-        self.config = self.loader.load(self.scenario_name)
-        telemetry_gen = TelemetryGenerator(self.config)
-        doc_gen = DocumentGenerator(self.config)
-        truth_gen = GroundTruthGenerator(self.config)
-        print("\n[1/4] Generating Telemetry Data...")
-        telemetry_data = telemetry_gen.generate()
-        print("\n[2/4] Generating Document Data...")
-        document_data = doc_gen.generate_all_documents()
+    Args:
+        hfacs_analyzer (HFACSAnalyzer): Initialized analyzer.
+        document_data (dict): Output of DocumentGenerator.generate_all_documents().
+        cache (ClassificationCache): (Optional) Results are reused for identical documents + prompt.
 
-        # Perform HFACS classification on the narrative report
-        narrative_report_text = document_data["narrative_report"]
-        print("\n[2.5/4] Classifying Narrative Report with HFACS...")
-        combined_text = f"""Narrative Report:
+    Returns:
+        tuple: (hfacs_level, hfacs_confidence, hfacs_reasoning)
+    """
+    combined_text = f"""Narrative Report:
 {document_data['narrative_report']}
 
 Maintenance Logs:
@@ -59,199 +51,81 @@ Maintenance Logs:
 Context Data:
 {document_data['context_data']}"""
 
-        hfacs_level, hfacs_confidence, level_scores, level_evidence_tags = self.hfacs_analyzer.analyze(
-            {
-                "combined_text": combined_text,
-                "ALL_EVIDENCE_TAGS": ", ".join(HFACS_RUBRIC.keys())
-            }
-        )
-        score_breakdown_parts = []
-        level_names = ["Unsafe Acts", "Preconditions for Unsafe Acts", "Unsafe Supervision", "Organizational Influences"]
-        for i, name in enumerate(level_names):
-            level_key = f"Level {i+1}: {name}"
-            score = level_scores.get(level_key, 0)
-            score_breakdown_parts.append(f"L{i+1}({score})")
-
-        score_breakdown = "/".join(score_breakdown_parts)
-        hfacs_reasoning = f"{score_breakdown} | Evidence: {level_evidence_tags.get(hfacs_level, [])}"
-
-        print(f"  -> Classified as: {hfacs_level} (Confidence: {hfacs_confidence}%)")
-        print(f"  -> Reasoning: {hfacs_reasoning}")
-
-        print("\n[3/4] Generating Ground Truth Data...")
-        ground_truth_data = truth_gen.generate()
-        self.simulation_data = {
-            "telemetry": telemetry_data,
-            "maintenance_logs": document_data["maintenance_logs"],
-            "narrative_report": document_data["narrative_report"],
-            "context_data": document_data["context_data"],
-            "ground_truth": ground_truth_data,
-            "scenario_name": self.scenario_name,
-            "hfacs_level": hfacs_level,
-            "hfacs_confidence": hfacs_confidence,
-            "hfacs_reasoning": hfacs_reasoning
+    cache_key = None
+    if cache is not None:
+        cache_key = evidence_fingerprint(combined_text, hfacs_analyzer.prompt_template)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return cached['hfacs_level'], cached['hfacs_confidence'], cached['hfacs_reasoning']
+
+    hfacs_level, hfacs_confidence, level_scores, level_evidence_tags = hfacs_analyzer.analyze(
+        {
+            "combined_text": combined_text,
+            "ALL_EVIDENCE_TAGS": ", ".join(HFACS_RUBRIC.keys())
         }
-        print("\n[4/4] Assembling final data package...")
-        print("--- [COMPLETE] Simulation finished successfully. ---")
-    
-    def get_data(self) -> dict:
-        return self.simulation_data
-
-    def save_outputs(self, output_dir: str):
-        print(f"DEBUG: Entering save_outputs. output_dir: '{output_dir}'")
-        if not self.simulation_data:
-            print("Error: No simulation data to save. Please run the simulation first.")
-            return
-        print(f"\n--- Saving simulation outputs to '{output_dir}' ---")
-        os.makedirs(output_dir, exist_ok=True)
-        telemetry_path = os.path.join(output_dir, 'telemetry.csv')
-        try:
-            self.simulation_data['telemetry'].to_csv(telemetry_path, index=False)
-        except Exception as e:
-            print(f"ERROR: Failed to save telemetry to {telemetry_path}: {e}")
-
-        for key, data in self.simulation_data.items():
-            if key != 'telemetry':
-                file_path = os.path.join(output_dir, f'{key}.json')
-                try:
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        json.dump(data, f, indent=4)
-                except Exception as e:
-                    print(f"ERROR: Failed to save {key} to {file_path}: {e}")
-        
-        print(f"--- All simulation outputs saved to '{output_dir}' ---")
-
-def main():
-    # ... (Nội dung hàm main giữ nguyên) ...
-    print("DEBUG: main() function started.") # Added this line
-    parser = argparse.ArgumentParser(description="Data Input Simulator for Aviation Safety Scenarios.")
-    parser.add_argument('--scenario', type=str, required=True, help='Name of the scenario to run (e.g., "flap_jam") or "random" to pick one automatically.')
-    parser.add_argument('--output', type=str, default=None, help='(Optional) Directory path to save the output files.')
-    parser.add_argument('--project_id', type=str, required=True, help='GCP Project ID for Vertex AI.')
-    parser.add_argument('--location', type=str, default='us-central1', help='GCP Location for Vertex AI.')
-    parser.add_argument('--credentials', type=str, required=True, help='Path to GCP credentials JSON file.')
-    parser.add_argument('--prompt_path', type=str, required=True, help='Path to the prompt file for HFACS analysis.')
-    args = parser.parse_args()
-    print(f"DEBUG: args.output received: '{args.output}'") # Added this line
-
-    # Handle "random" scenario selection
-    if args.scenario == "random":
-        print("Random mode selected. Picking a scenario...")
-        loader = ScenarioLoader() # Create an instance of ScenarioLoader
-        available_scenarios = loader.list_scenarios() # Call the new method
-        if not available_scenarios:
-            print("[ERROR] No scenarios found in the 'scenarios/' directory. Exiting.")
-            return
-        chosen_scenario = random.choice(available_scenarios) # Pick one randomly
-        print(f"Randomly chosen scenario: '{chosen_scenario}'")
-        args.scenario = chosen_scenario # Update args.scenario for the rest of the logic
-
-    try:
-        hfacs_analyzer = HFACSAnalyzer(
-            project_id=args.project_id,
-            location=args.location,
-            credentials_path=args.credentials,
-                prompt_path=args.prompt_path, # Use the path from the command-line argument
-                project_root=_PROJECT_ROOT # Pass project root
-        )
-        if not hfacs_analyzer.model:
-            print("[ERROR] HFACSAnalyzer could not be initialized. Exiting.")
-            return
-
-        simulator = ScenarioSimulator(scenario_name=args.scenario, hfacs_analyzer=hfacs_analyzer)
-        simulator.run()
-
-        # Get the simulation data after running
-        simulation_results = simulator.get_data()
-
-        # Call plot_scenario_telemetry to generate the chart
-        plot_scenario_telemetry(
-            telemetry_data=simulation_results["telemetry"],
-            scenario_name=simulation_results["scenario_name"],
-            scenario_config=simulator.config, # simulator.config holds the scenario config
-            output_dir=_PROJECT_ROOT, # Pass the main project root
-            hfacs_level=simulation_results["hfacs_level"],
-            hfacs_confidence=simulation_results["hfacs_confidence"],
-            hfacs_reasoning=simulation_results["hfacs_reasoning"]
-        )
-
-        if args.output:
-            print(f"DEBUG: Attempting to save outputs to {args.output} and generate plots.")
-            simulator.save_outputs(output_dir=args.output)
-    except FileNotFoundError as e:
-        print(f"\n[ERROR] Could not find scenario file: {e}")
-    except Exception as e:
-        print(f"\n[ERROR] An unexpected error occurred: {e}")
-        import traceback
-        traceback.print_exc() # Print full traceback for debugging
+    )
+    score_breakdown_parts = []
+    level_names = ["Unsafe Acts", "Preconditions for Unsafe Acts", "Unsafe Supervision", "Organizational Influences"]
+    for i, name in enumerate(level_names):
+        level_key = f"Level {i+1}: {name}"
+        score = level_scores.get(level_key, 0)
+        score_breakdown_parts.append(f"L{i+1}({score})")
 
-if __name__ == '__main__':
-    main()
+    score_breakdown = "/".join(score_breakdown_parts)
+    hfacs_reasoning = f"{score_breakdown} | Evidence: {level_evidence_tags.get(hfacs_level, [])}"
 
+    if cache_key is not None and not str(hfacs_level).startswith("API_Error"):
+        cache.put(cache_key, {"hfacs_level": hfacs_level, "hfacs_confidence": hfacs_confidence,
+                              "hfacs_reasoning": hfacs_reasoning})
+    return hfacs_level, hfacs_confidence, hfacs_reasoning
 
-# Add project root to sys.path for module imports
-_CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
-_PROJECT_ROOT = os.path.dirname(_CURRENT_DIR)
-if _PROJECT_ROOT not in sys.path:
-    sys.path.insert(0, _PROJECT_ROOT)
-
-# Câu lệnh import chuẩn, sẽ hoạt động khi PYTHONPATH được thiết lập đúng.
 
 class ScenarioSimulator:
     """
     Module "nhạc trưởng" điều phối toàn bộ quá trình mô phỏng.
+    Simulation is pure data generation; HFACS classification only runs when an analyzer is given.
     """
-    def __init__(self, scenario_name: str, hfacs_analyzer: HFACSAnalyzer):
+    def __init__(self, scenario_name: str, hfacs_analyzer: HFACSAnalyzer = None, scenario_config: dict = None,
+                 classification_cache: ClassificationCache = None, **telemetry_options):
+        """
+        Args:
+            scenario_name (str): Tên kịch bản (file name without .json).
+            hfacs_analyzer (HFACSAnalyzer): (Optional) Analyzer used to classify the generated documents.
+                                            When None, run() makes no LLM call.
+            scenario_config (dict): (Optional) A ready-made config, e.g. a variant from
+                                    ScenarioExpander. When given, nothing is loaded from disk.
+            classification_cache (ClassificationCache): (Optional) Cache for classify().
+            **telemetry_options: (Optional) total_flight_seconds / data_frequency_hz for TelemetryGenerator.
+        """
         self.scenario_name = scenario_name
-        self.config = None
+        self.config = scenario_config
         self.simulation_data = {}
         self.loader = ScenarioLoader()
         self.hfacs_analyzer = hfacs_analyzer
+        self.classification_cache = classification_cache
+        self.telemetry_options = telemetry_options
 
     def run(self):
-        print(f"--- [START] Running simulation for scenario: '{self.scenario_name}' ---")
-        self.config = self.loader.load(self.scenario_name)
-        telemetry_gen = TelemetryGenerator(self.config)
+        with span("simulate", scenario=self.scenario_name):
+            self._run()
+
+    def _run(self):
+        logger.info("--- [START] Running simulation for scenario: '%s' ---", self.scenario_name)
+        if self.config is None:
+            with span("simulate.load_scenario"):
+                self.config = self.loader.load(self.scenario_name)
+        telemetry_gen = TelemetryGenerator(self.config, **self.telemetry_options)
         doc_gen = DocumentGenerator(self.config)
         truth_gen = GroundTruthGenerator(self.config)
-        print("\n[1/4] Generating Telemetry Data...")
+        logger.debug("[1/4] Generating Telemetry Data...")
         telemetry_data = telemetry_gen.generate()
-        print("\n[2/4] Generating Document Data...")
-        document_data = doc_gen.generate_all_documents()
+        logger.debug("[2/4] Generating Document Data...")
+        with span("simulate.documents"):
+            document_data = doc_gen.generate_all_documents()
 
-        # Perform HFACS classification on the narrative report
-        narrative_report_text = document_data["narrative_report"]
-        print("\n[2.5/4] Classifying Narrative Report with HFACS...")
-        combined_text = f"""Narrative Report:
-{document_data['narrative_report']}
-
-Maintenance Logs:
-{document_data['maintenance_logs']}
-
-Context Data:
-{document_data['context_data']}"""
-
-        hfacs_level, hfacs_confidence, level_scores, level_evidence_tags = self.hfacs_analyzer.analyze(
-            {
-                "combined_text": combined_text,
-                "ALL_EVIDENCE_TAGS": ", ".join(HFACS_RUBRIC.keys())
-            }
-        )
-        score_breakdown_parts = []
-        level_names = ["Unsafe Acts", "Preconditions for Unsafe Acts", "Unsafe Supervision", "Organizational Influences"]
-        for i, name in enumerate(level_names):
-            level_key = f"Level {i+1}: {name}"
-            score = level_scores.get(level_key, 0)
-            score_breakdown_parts.append(f"L{i+1}({score})")
-
-        score_breakdown = "/".join(score_breakdown_parts)
-        hfacs_reasoning = f"{score_breakdown} | Evidence: {level_evidence_tags.get(hfacs_level, [])}"
-
-        print(f"  -> Classified as: {hfacs_level} (Confidence: {hfacs_confidence}%)")
-        print(f"  -> Reasoning: {hfacs_reasoning}")
-
-        print("\n[3/4] Generating Ground Truth Data...")
-        ground_truth_data = truth_gen.generate()
+        logger.debug("[3/4] Generating Ground Truth Data...")
+        with span("simulate.ground_truth"):
+            ground_truth_data = truth_gen.generate()
         self.simulation_data = {
             "telemetry": telemetry_data,
             "maintenance_logs": document_data["maintenance_logs"],
@@ -259,28 +133,56 @@ Context Data:
             "context_data": document_data["context_data"],
             "ground_truth": ground_truth_data,
             "scenario_name": self.scenario_name,
+        }
+        if self.config.get("variant_id"):
+            # Expanded scenarios carry the sampled parameters so results can be traced back.
+            self.simulation_data["variant_id"] = self.config["variant_id"]
+            self.simulation_data["variant_parameters"] = self.config["variant_parameters"]
+        if self.hfacs_analyzer is not None:
+            self.classify()
+        logger.debug("[4/4] Assembling final data package...")
+        logger.debug("--- [COMPLETE] Simulation finished successfully. ---")
+
+    def classify(self, hfacs_analyzer: HFACSAnalyzer = None):
+        """
+        Classifies the generated documents (one LLM call, or none on a cache hit) and stores
+        hfacs_level / hfacs_confidence / hfacs_reasoning in the simulation data.
+        """
+        analyzer = hfacs_analyzer or self.hfacs_analyzer
+        if analyzer is None:
+            raise ValueError("classify() needs an HFACSAnalyzer.")
+        if not self.simulation_data:
+            raise RuntimeError("No simulation data to classify. Please run the simulation first.")
+        logger.debug("[HFACS] Classifying Narrative Report with HFACS...")
+        with span("simulate.classify"):
+            hfacs_level, hfacs_confidence, hfacs_reasoning = classify_documents(
+                analyzer, self.simulation_data, cache=self.classification_cache
+            )
+        logger.info("Classified as: %s (Confidence: %s%%) | Reasoning: %s", hfacs_level, hfacs_confidence, hfacs_reasoning)
+        self.simulation_data.update({
             "hfacs_level": hfacs_level,
             "hfacs_confidence": hfacs_confidence,
             "hfacs_reasoning": hfacs_reasoning
-        }
-        print("\n[4/4] Assembling final data package...")
-        print("--- [COMPLETE] Simulation finished successfully. ---")
+        })
+        return hfacs_level, hfacs_confidence, hfacs_reasoning
     
     def get_data(self) -> dict:
         return self.simulation_data
 
     def save_outputs(self, output_dir: str):
-        print(f"DEBUG: Entering save_outputs. output_dir: '{output_dir}'")
+        logger.debug("Entering save_outputs. output_dir: '%s'", output_dir)
         if not self.simulation_data:
-            print("Error: No simulation data to save. Please run the simulation first.")
+            logger.error("No simulation data to save. Please run the simulation first.")
             return
-        print(f"\n--- Saving simulation outputs to '{output_dir}' ---")
+        logger.debug("Saving simulation outputs to '%s'", output_dir)
         os.makedirs(output_dir, exist_ok=True)
         telemetry_path = os.path.join(output_dir, 'telemetry.csv')
         try:
-            self.simulation_data['telemetry'].to_csv(telemetry_path, index=False)
+            save_telemetry(self.simulation_data['telemetry'], telemetry_path)
+            logger.debug("Telemetry: %d bytes in memory for %d samples.",
+                         memory_report(self.simulation_data['telemetry'])["bytes"], len(self.simulation_data['telemetry']))
         except Exception as e:
-            print(f"ERROR: Failed to save telemetry to {telemetry_path}: {e}")
+            logger.error("Failed to save telemetry to %s: %s", telemetry_path, e)
 
         for key, data in self.simulation_data.items():
             if key != 'telemetry':
@@ -289,22 +191,22 @@ Context Data:
                     with open(file_path, 'w', encoding='utf-8') as f:
                         json.dump(data, f, indent=4)
                 except Exception as e:
-                    print(f"ERROR: Failed to save {key} to {file_path}: {e}")
+                    logger.error("Failed to save %s to %s: %s", key, file_path, e)
         
-        print(f"--- All simulation outputs saved to '{output_dir}' ---")
+        logger.info("All simulation outputs saved to '%s'", output_dir)
 
 def main():
     # ... (Nội dung hàm main giữ nguyên) ...
-    print("DEBUG: main() function started.") # Added this line
     parser = argparse.ArgumentParser(description="Data Input Simulator for Aviation Safety Scenarios.")
     parser.add_argument('--scenario', type=str, required=True, help='Name of the scenario to run (e.g., "flap_jam") or "random" to pick one automatically.')
     parser.add_argument('--output', type=str, default=None, help='(Optional) Directory path to save the output files.')
-    parser.add_argument('--project_id', type=str, required=True, help='GCP Project ID for Vertex AI.')
+    parser.add_argument('--project_id', type=str, default=None, help='(Optional) GCP Project ID for Vertex AI. Without it, no HFACS classification is run.')
     parser.add_argument('--location', type=str, default='us-central1', help='GCP Location for Vertex AI.')
-    parser.add_argument('--credentials', type=str, required=True, help='Path to GCP credentials JSON file.')
-    parser.add_argument('--prompt_path', type=str, required=True, help='Path to the prompt file for HFACS analysis.')
+    parser.add_argument('--credentials', type=str, default=None, help='Path to GCP credentials JSON file (required with --project_id).')
+    parser.add_argument('--prompt_path', type=str, default=None, help='Path to the prompt file for HFACS analysis (required with --project_id).')
     args = parser.parse_args()
-    print(f"DEBUG: args.output received: '{args.output}'") # Added this line
+    configure_logging()
+    logger.debug("args.output received: '%s'", args.output)
 
     # Handle "random" scenario selection
     if args.scenario == "random":
@@ -318,17 +220,22 @@ def main():
         print(f"Randomly chosen scenario: '{chosen_scenario}'")
         args.scenario = chosen_scenario # Update args.scenario for the rest of the logic
 
+    if args.project_id and not (args.credentials and args.prompt_path):
+        parser.error("--credentials and --prompt_path are required when --project_id is given.")
+
     try:
-        hfacs_analyzer = HFACSAnalyzer(
-            project_id=args.project_id,
-            location=args.location,
-            credentials_path=args.credentials,
+        hfacs_analyzer = None
+        if args.project_id:
+            hfacs_analyzer = HFACSAnalyzer(
+                project_id=args.project_id,
+                location=args.location,
+                credentials_path=args.credentials,
                 prompt_path=args.prompt_path, # Use the path from the command-line argument
                 project_root=_PROJECT_ROOT # Pass project root
-        )
-        if not hfacs_analyzer.model:
-            print("[ERROR] HFACSAnalyzer could not be initialized. Exiting.")
-            return
+            )
+            if not hfacs_analyzer.model:
+                print("[ERROR] HFACSAnalyzer could not be initialized. Exiting.")
+                return
 
         simulator = ScenarioSimulator(scenario_name=args.scenario, hfacs_analyzer=hfacs_analyzer)
         simulator.run()
@@ -342,13 +249,13 @@ def main():
             scenario_name=simulation_results["scenario_name"],
             scenario_config=simulator.config, # simulator.config holds the scenario config
             output_dir=_PROJECT_ROOT, # Pass the main project root
-            hfacs_level=simulation_results["hfacs_level"],
-            hfacs_confidence=simulation_results["hfacs_confidence"],
-            hfacs_reasoning=simulation_results["hfacs_reasoning"]
+            hfacs_level=simulation_results.get("hfacs_level"),
+            hfacs_confidence=simulation_results.get("hfacs_confidence"),
+            hfacs_reasoning=simulation_results.get("hfacs_reasoning")
         )
 
         if args.output:
-            print(f"DEBUG: Attempting to save outputs to {args.output} and generate plots.")
+            logger.debug("Attempting to save outputs to %s and generate plots.", args.output)
             simulator.save_outputs(output_dir=args.output)
     except FileNotFoundError as e:
         print(f"\n[ERROR] Could not find scenario file: {e}")
@@ -358,4 +265,4 @@ def main():
         traceback.print_exc() # Print full traceback for debugging
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,293 @@
+# file: data_input_simulator/scenario_expander.py (v1.1 - Formatted derived values, expression rules and overrides)
+
+import argparse
+import copy
+import json
+import os
+from itertools import count, islice
+from typing import Any, Dict, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader, validate_scenario_structure
+from src.data_simulation.data_input_simulator.trigger_dsl import TriggerContext, compile_event_triggers, compile_trigger
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+DEFAULT_TEMPLATES_DIR = os.path.join(_PROJECT_ROOT, 'config', 'scenarios', 'templates')
+
+SUPPORTED_DISTRIBUTIONS = ("constant", "uniform", "normal", "randint", "choice", "derived")
+RULE_OPERATORS = {
+    "<": lambda a, b: a < b,
+    "<=": lambda a, b: a <= b,
+    ">": lambda a, b: a > b,
+    ">=": lambda a, b: a >= b,
+    "==": lambda a, b: a == b,
+    "!=": lambda a, b: a != b,
+    "in": lambda a, b: a in b,
+}
+
+
+def _split_path(path: str) -> List:
+    """'telemetry_events.0.parameters.x' -> ['telemetry_events', 0, 'parameters', 'x']"""
+    return [int(part) if part.isdigit() else part for part in path.split('.')]
+
+
+def _get_path(config, path: str):
+    node = config
+    for key in _split_path(path):
+        node = node[key]
+    return node
+
+
+def _set_path(config: dict, path: str, value):
+    """
+    Sets a dotted path on a shallow copy chain: only the containers along the path are copied,
+    everything else stays shared with the (frozen) base scenario. Missing dict keys are created.
+    """
+    keys = _split_path(path)
+    node = config
+    for key in keys[:-1]:
+        child = node[key] if (isinstance(node, list) or key in node) else {}
+        child = list(child) if isinstance(child, list) else dict(child)
+        node[key] = child
+        node = child
+    node[keys[-1]] = value
+
+
+def _to_python(value):
+    """NumPy scalars -> plain Python so variants stay JSON serializable."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (list, tuple)):
+        return [_to_python(v) for v in value]
+    return value
+
+
+def _condition_holds(condition: dict, values: Dict[str, Any]) -> bool:
+    """
+    Evaluates a ground-truth rule condition: either {parameter, op, value}, or a trigger-language
+    comparison over several parameters, e.g.
+        {"expression": "delay + 120000 / rate >= 95", "variables": {"delay": "<path>", "rate": "<path>"}}
+    """
+    if 'expression' in condition:
+        frame = pd.DataFrame({name: [values[path]] for name, path in condition['variables'].items()})
+        frame['timestamp'] = 0.0
+        trigger = compile_trigger(condition['expression'], channels=condition['variables'])
+        return bool(trigger.mask(TriggerContext(frame, {}))[0])
+    return RULE_OPERATORS[condition['op']](values[condition['parameter']], condition['value'])
+
+
+class ScenarioTemplate:
+    """
+    A scenario family: a base scenario plus parameter distributions (keyed by dotted paths into
+    the scenario JSON) and ground-truth rules that keep the labels consistent with the sampled values.
+    Derived parameters may carry a 'format' (e.g. "T+{:g}s") to template text such as narrative
+    timestamps; rules may 'set' any path (e.g. drop transcript lines of an event that cannot happen).
+    """
+    def __init__(self, spec: dict, loader: Optional[ScenarioLoader] = None):
+        for key in ('template_name', 'base_scenario', 'parameters'):
+            if key not in spec:
+                raise ValueError(f"Scenario template '{spec.get('template_name')}' is missing required key: '{key}'")
+        self.spec = spec
+        self.name = spec['template_name']
+        self.loader = loader or ScenarioLoader()
+        self.base = self.loader.load(spec['base_scenario'])
+        self.parameters: Dict[str, dict] = spec['parameters']
+        self.ground_truth_rules: List[dict] = spec.get('ground_truth_rules', [])
+        self._validate()
+
+    @classmethod
+    def from_file(cls, template_name_or_path: str, loader: Optional[ScenarioLoader] = None) -> "ScenarioTemplate":
+        path = template_name_or_path
+        if not os.path.isfile(path):
+            path = os.path.join(DEFAULT_TEMPLATES_DIR, f"{template_name_or_path}.json")
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Scenario template not found: {template_name_or_path}")
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(json.load(f), loader)
+
+    def _validate(self):
+        for path, dist in self.parameters.items():
+            kind = dist.get('distribution')
+            if kind not in SUPPORTED_DISTRIBUTIONS:
+                raise ValueError(f"Template '{self.name}': unknown distribution '{kind}' for '{path}'. "
+                                 f"Supported: {SUPPORTED_DISTRIBUTIONS}")
+            if kind == 'derived' and dist.get('from') not in self.parameters:
+                raise ValueError(f"Template '{self.name}': derived parameter '{path}' must reference another template parameter.")
+            # The parent container has to exist in the base scenario (e.g. the event index).
+            parent = _split_path(path)[:-1]
+            node = self.base
+            for key in parent:
+                if isinstance(node, list):
+                    if not isinstance(key, int) or key >= len(node):
+                        raise ValueError(f"Template '{self.name}': path '{path}' does not exist in '{self.spec['base_scenario']}'.")
+                    node = node[key]
+                elif isinstance(node, dict):
+                    node = node.get(key, {})
+        for rule in self.ground_truth_rules:
+            condition = rule.get('when', {})
+            if 'expression' in condition:
+                unknown = [path for path in condition.get('variables', {}).values() if path not in self.parameters]
+                if unknown or not condition.get('variables'):
+                    raise ValueError(f"Template '{self.name}': ground-truth rule variables must name template parameters, got {unknown or 'none'}.")
+                try:
+                    compile_trigger(condition['expression'], channels=condition['variables'])
+                except ValueError as e:
+                    raise ValueError(f"Template '{self.name}': ground-truth rule expression: {e}")
+                continue
+            if condition.get('parameter') not in self.parameters:
+                raise ValueError(f"Template '{self.name}': ground-truth rule references unknown parameter '{condition.get('parameter')}'.")
+            if condition.get('op') not in RULE_OPERATORS:
+                raise ValueError(f"Template '{self.name}': unsupported rule operator '{condition.get('op')}'.")
+
+    def sample_parameters(self, rng: np.random.Generator) -> Dict[str, Any]:
+        """Draws one value per template parameter. Derived parameters are resolved after the others."""
+        values = {}
+        for path, dist in self.parameters.items():
+            kind = dist['distribution']
+            if kind == 'derived':
+                continue
+            if kind == 'constant':
+                value = dist['value']
+            elif kind == 'uniform':
+                value = rng.uniform(dist['low'], dist['high'])
+            elif kind == 'normal':
+                value = rng.normal(dist['mean'], dist['std'])
+                value = float(np.clip(value, dist.get('min', -np.inf), dist.get('max', np.inf)))
+            elif kind == 'randint':
+                value = int(rng.integers(dist['low'], dist['high'], endpoint=True))
+            else:  # choice
+                options = dist['values']
+                value = options[int(rng.choice(len(options), p=dist.get('weights')))]
+            if 'round' in dist and isinstance(value, (float, np.floating)):
+                value = round(float(value), dist['round'])
+            values[path] = _to_python(value)
+
+        for path, dist in self.parameters.items():
+            if dist['distribution'] == 'derived':
+                value = values[dist['from']] * dist.get('scale', 1.0) + dist.get('offset', 0.0)
+                if 'round' in dist:
+                    value = round(float(value), dist['round'])
+                if 'format' in dist:
+                    value = dist['format'].format(value)
+                values[path] = _to_python(value)
+        return values
+
+    def _apply_ground_truth_rules(self, variant: dict, values: Dict[str, Any]) -> dict:
+        """Applies the matching rules to the variant (its 'set' overrides) and returns its new ground truth."""
+        ground_truth = dict(variant['ground_truth'])
+        hfacs = dict(ground_truth.get('hfacs_analysis', {}))
+        tags = list(hfacs.get('evidence_tags', []))
+        for rule in self.ground_truth_rules:
+            if not _condition_holds(rule['when'], values):
+                continue
+            for path, value in rule.get('set', {}).items():
+                _set_path(variant, path, copy.deepcopy(value))
+            tags = [t for t in tags if t not in rule.get('remove_evidence_tags', [])]
+            tags.extend(t for t in rule.get('add_evidence_tags', []) if t not in tags)
+            if 'winning_level' in rule:
+                hfacs['winning_level'] = rule['winning_level']
+            if 'is_anomaly' in rule:
+                ground_truth['is_anomaly'] = rule['is_anomaly']
+        hfacs['evidence_tags'] = tags
+        ground_truth['hfacs_analysis'] = hfacs
+        return ground_truth
+
+    def build_variant(self, index: int, seed: int = 0) -> dict:
+        """
+        Builds variant number `index`. Variants are independent of each other (seeded by
+        (seed, index)), so any variant can be rebuilt on its own.
+        """
+        rng = np.random.default_rng([seed, index])
+        values = self.sample_parameters(rng)
+        variant = dict(self.base)
+        for path, value in values.items():
+            _set_path(variant, path, value)
+        variant['ground_truth'] = self._apply_ground_truth_rules(variant, values)
+        variant['variant_of'] = self.spec['base_scenario']
+        variant['variant_id'] = f"{self.name}__{index:06d}"
+        variant['variant_parameters'] = values
+        validate_scenario_structure(variant)
+        compile_event_triggers(variant['telemetry_events'])  # memoized; fails early on a bad sampled trigger
+        return variant
+
+
+class ScenarioExpander:
+    """
+    Lazily expands one or more templates into concrete scenario configs.
+    Nothing is materialized: iter_variants() is a generator, so thousands of variants
+    can stream straight into telemetry generation and detection.
+    """
+    def __init__(self, templates: List[ScenarioTemplate], seed: int = 0):
+        if not templates:
+            raise ValueError("ScenarioExpander needs at least one template.")
+        self.templates = templates
+        self.seed = seed
+
+    @classmethod
+    def from_names(cls, template_names: List[str], seed: int = 0, loader: Optional[ScenarioLoader] = None) -> "ScenarioExpander":
+        loader = loader or ScenarioLoader()
+        return cls([ScenarioTemplate.from_file(name, loader) for name in template_names], seed)
+
+    def iter_variants(self, limit: Optional[int] = None) -> Iterator[dict]:
+        """Yields variants round-robin over the templates; endless when limit is None."""
+        stream = (self.templates[i % len(self.templates)].build_variant(i // len(self.templates), self.seed)
+                  for i in count())
+        return islice(stream, limit) if limit is not None else stream
+
+
+def list_templates(templates_dir: str = DEFAULT_TEMPLATES_DIR) -> List[str]:
+    if not os.path.isdir(templates_dir):
+        return []
+    return sorted(os.path.splitext(f)[0] for f in os.listdir(templates_dir) if f.endswith('.json'))
+
+
+def main():
+    """
+    Streams variants of one or more templates through telemetry generation and anomaly detection,
+    and prints how often each base scenario was detected.
+    """
+    from src.data_simulation.data_input_simulator.telemetry_generator import TelemetryGenerator
+    from src.data_analysis.analysis_modules.anomaly_detector import AnomalyDetector
+
+    parser = argparse.ArgumentParser(description="Expand scenario templates into concrete variants.")
+    parser.add_argument('--template', type=str, nargs='+', default=None, help='Template name(s); defaults to all templates.')
+    parser.add_argument('--count', type=int, default=100, help='Number of variants to stream.')
+    parser.add_argument('--seed', type=int, default=0, help='Expansion seed.')
+    parser.add_argument('--output', type=str, default=None, help='(Optional) JSONL file to write the variant configs to.')
+    parser.add_argument('--no_detect', action='store_true', help='Only expand (and optionally write) variants.')
+    args = parser.parse_args()
+
+    template_names = args.template or list_templates()
+    if not template_names:
+        print(f"[ERROR] No templates found in {DEFAULT_TEMPLATES_DIR}.")
+        return
+    expander = ScenarioExpander.from_names(template_names, seed=args.seed)
+    detector = None if args.no_detect else AnomalyDetector()
+
+    detected_counts: Dict[str, List[int]] = {}
+    out = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        for variant in expander.iter_variants(args.count):
+            if out:
+                out.write(json.dumps(variant) + "\n")
+            if detector is None:
+                continue
+            telemetry = TelemetryGenerator(variant).generate()
+            anomalies = detector.detect(telemetry)
+            stats = detected_counts.setdefault(variant['variant_of'], [0, 0])
+            stats[0] += bool(anomalies) == bool(variant['ground_truth']['is_anomaly'])
+            stats[1] += 1
+    finally:
+        if out:
+            out.close()
+
+    if detected_counts:
+        print("\n--- Detection agreement with ground truth per base scenario ---")
+        for name, (agree, total) in sorted(detected_counts.items()):
+            print(f"{name}: {agree}/{total} ({agree / total:.0%})")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,30 +1,267 @@
-# file: data_input_simulator/scenario_loader.py (v1.2 - Accepts base_path)
+# file: data_input_simulator/scenario_loader.py (v1.4 - Leveled logging instead of prints)
 
 import json
 import os
+import threading
+from typing import Dict, Optional, Tuple
+
+from src.data_simulation.data_input_simulator.trigger_dsl import compile_event_triggers
+from src.data_analysis.analysis_modules.logging_utils import get_logger
+
+logger = get_logger("scenario_loader")
+
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
+DEFAULT_SCENARIOS_DIR = os.path.join(_PROJECT_ROOT, 'config', 'scenarios', 'scenarios')
+
+REQUIRED_SCENARIO_KEYS = [
+    'scenario_name',
+    'telemetry_events',
+    'maintenance_logs',
+    'narrative_report',
+    'context_data',
+    'ground_truth'
+]
+
+
+class FrozenDict(dict):
+    """
+    Read-only dict returned by the registry. It is still a real dict (json.dumps, isinstance
+    checks and str() behave as before), but any mutation raises TypeError because the same
+    object is shared by every caller in the process. Use thaw() (or copy.deepcopy) to get a
+    private, mutable copy.
+    """
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Scenario configs from the registry are read-only; use thaw(config) to get a mutable copy.")
+
+    __setitem__ = __delitem__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+    __ior__ = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __copy__(self):
+        return dict(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+class FrozenList(list):
+    """Read-only list counterpart of FrozenDict."""
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Scenario configs from the registry are read-only; use thaw(config) to get a mutable copy.")
+
+    __setitem__ = __delitem__ = __iadd__ = __imul__ = _readonly
+    append = extend = insert = pop = remove = clear = sort = reverse = _readonly
+
+    def __reduce__(self):
+        return (FrozenList, (list(self),))
+
+    def __copy__(self):
+        return list(self)
+
+    def __deepcopy__(self, memo):
+        return thaw(self)
+
+
+def freeze(obj):
+    """Recursively converts parsed JSON into FrozenDict / FrozenList."""
+    if isinstance(obj, dict):
+        return FrozenDict((key, freeze(value)) for key, value in obj.items())
+    if isinstance(obj, list):
+        return FrozenList(freeze(value) for value in obj)
+    return obj
+
+
+def thaw(obj):
+    """Returns a mutable deep copy (plain dict / list) of a frozen scenario config."""
+    if isinstance(obj, dict):
+        return {key: thaw(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [thaw(value) for value in obj]
+    return obj
+
+
+def validate_scenario_structure(data: dict):
+    """
+    Kiểm tra xem kịch bản có chứa các trường bắt buộc hay không.
+    """
+    for key in REQUIRED_SCENARIO_KEYS:
+        if key not in data:
+            raise ValueError(f"Scenario '{data.get('scenario_name')}' is missing required key: '{key}'")
+
+
+class ScenarioRegistry:
+    """
+    Process-wide cache of parsed, validated and frozen scenario files.
+
+    Each file is parsed once and re-parsed only when its mtime or size changes, so
+    constructing many ScenarioLoader objects (one per simulator, dashboard run or batch
+    iteration) costs one os.stat per load instead of a full read/parse/validate.
+    """
+    def __init__(self, scenarios_dir: str):
+        if not os.path.isdir(scenarios_dir):
+            raise FileNotFoundError(
+                f"Scenarios directory not found at the expected path: {scenarios_dir}\n"
+                f"Please ensure the 'scenarios' directory exists in the same directory as scenario_loader.py."
+            )
+        self.scenarios_dir = scenarios_dir
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Tuple[Tuple[int, int], FrozenDict]] = {}  # name -> (file signature, config)
+        self._listing: Optional[Tuple[int, Tuple[str, ...]]] = None     # (dir mtime, names)
+        self._index: Optional[Tuple[tuple, dict, dict]] = None            # (signatures, by_phase, by_level)
+
+    def _file_path(self, scenario_name: str) -> str:
+        return os.path.join(self.scenarios_dir, f"{scenario_name}.json")
+
+    @staticmethod
+    def _signature(file_path: str) -> Tuple[int, int]:
+        stat = os.stat(file_path)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def get(self, scenario_name: str) -> FrozenDict:
+        """
+        Returns the frozen config of a scenario, parsing it only on first use or after it changed on disk.
+
+        Raises:
+            FileNotFoundError: Nếu file kịch bản không tồn tại.
+            json.JSONDecodeError: Nếu file không phải là JSON hợp lệ.
+            ValueError: Nếu file JSON thiếu các trường bắt buộc.
+        """
+        file_path = self._file_path(scenario_name)
+        try:
+            signature = self._signature(file_path)
+        except FileNotFoundError:
+            with self._lock:
+                self._entries.pop(scenario_name, None)
+            raise FileNotFoundError(f"Scenario file not found: {file_path}")
+
+        cached = self._entries.get(scenario_name)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        with self._lock:
+            cached = self._entries.get(scenario_name)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+            config = self._parse(file_path)
+            self._entries[scenario_name] = (signature, config)
+            return config
+
+    def _parse(self, file_path: str) -> FrozenDict:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise json.JSONDecodeError(f"Error decoding JSON from {file_path}: {e.msg}", e.doc, e.pos)
+        validate_scenario_structure(data)
+        config = freeze(data)
+        # Triggers are parsed and compiled here, so a bad trigger fails at load time and
+        # every generator run reuses the compiled predicates.
+        try:
+            config.compiled_triggers = compile_event_triggers(config['telemetry_events'])
+        except ValueError as e:
+            raise ValueError(f"Scenario '{data.get('scenario_name')}' ({file_path}): {e}")
+        logger.debug("Successfully loaded and parsed scenario: '%s'", data.get('scenario_name'))
+        return config
+
+    def names(self) -> Tuple[str, ...]:
+        """
+        Sorted scenario names (without .json). The listing is cached until the directory mtime changes.
+        """
+        dir_mtime = os.stat(self.scenarios_dir).st_mtime_ns
+        listing = self._listing
+        if listing is not None and listing[0] == dir_mtime:
+            return listing[1]
+        with self._lock:
+            names = tuple(sorted(os.path.splitext(f)[0] for f in os.listdir(self.scenarios_dir) if f.endswith('.json')))
+            self._listing = (dir_mtime, names)
+            # Forget scenarios whose file disappeared.
+            for stale in set(self._entries) - set(names):
+                del self._entries[stale]
+            return names
+
+    def _build_index(self) -> Tuple[dict, dict]:
+        """
+        Loads every scenario (cheap when cached) and (re)builds the phase / level index
+        whenever any file signature changed.
+        """
+        names = self.names()
+        configs = {name: self.get(name) for name in names}
+        signatures = tuple((name, self._entries[name][0]) for name in names)
+        index = self._index
+        if index is not None and index[0] == signatures:
+            return index[1], index[2]
+
+        by_phase: Dict[str, list] = {}
+        by_level: Dict[str, list] = {}
+        for name, config in configs.items():
+            phases = set(config.get('valid_flight_phases', []))
+            for event in config.get('telemetry_events', []):
+                phases.update(event.get('valid_flight_phases', []))
+            for phase in phases:
+                by_phase.setdefault(phase, []).append(name)
+            level = config['ground_truth'].get('hfacs_analysis', {}).get('winning_level')
+            if level:
+                by_level.setdefault(level, []).append(name)
+
+        by_phase = {phase: tuple(sorted(n)) for phase, n in by_phase.items()}
+        by_level = {level: tuple(sorted(n)) for level, n in by_level.items()}
+        with self._lock:
+            self._index = (signatures, by_phase, by_level)
+        return by_phase, by_level
+
+    def by_phase(self, phase: Optional[str] = None):
+        """Scenario names valid in a flight phase, or the whole phase -> names index when phase is None."""
+        index = self._build_index()[0]
+        return dict(index) if phase is None else index.get(phase, ())
+
+    def by_level(self, level: Optional[str] = None):
+        """Scenario names whose ground-truth winning level matches, or the whole level -> names index."""
+        index = self._build_index()[1]
+        return dict(index) if level is None else index.get(level, ())
+
+    def invalidate(self, scenario_name: Optional[str] = None):
+        """Drops one cached scenario (or everything) so the next access re-reads from disk."""
+        with self._lock:
+            if scenario_name is None:
+                self._entries.clear()
+                self._listing = None
+            else:
+                self._entries.pop(scenario_name, None)
+            self._index = None
+
+
+_REGISTRIES: Dict[str, ScenarioRegistry] = {}
+_REGISTRIES_LOCK = threading.Lock()
+
+
+def get_scenario_registry(scenarios_dir: Optional[str] = None) -> ScenarioRegistry:
+    """Returns the process-wide registry for a scenarios directory (the project default if omitted)."""
+    scenarios_dir = os.path.abspath(scenarios_dir or DEFAULT_SCENARIOS_DIR)
+    registry = _REGISTRIES.get(scenarios_dir)
+    if registry is None:
+        with _REGISTRIES_LOCK:
+            registry = _REGISTRIES.get(scenarios_dir)
+            if registry is None:
+                registry = ScenarioRegistry(scenarios_dir)
+                _REGISTRIES[scenarios_dir] = registry
+                logger.debug("ScenarioLoader initialized. Reading scenarios from: %s", scenarios_dir)
+    return registry
+
 
 class ScenarioLoader:
     """
     Chịu trách nhiệm đọc và xác thực các file kịch bản từ thư mục scenarios/.
+    Thin facade over the shared ScenarioRegistry, so it is cheap to construct anywhere.
     """
-    def __init__(self):
+    def __init__(self, scenarios_dir: Optional[str] = None):
         """
         Khởi tạo loader. Tự động tìm thư mục 'scenarios' dựa trên vị trí của file này.
         """
-        # Lấy đường dẫn đến thư mục chứa file này (data_input_simulator)
-        _PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', '..'))
-        
-        # Xây dựng đường dẫn đến thư mục scenarios
-        self.scenarios_dir = os.path.join(_PROJECT_ROOT, 'config', 'scenarios', 'scenarios')
-        
-        if not os.path.isdir(self.scenarios_dir):
-            raise FileNotFoundError(
-                f"Scenarios directory not found at the expected path: {self.scenarios_dir}\n"
-                f"Please ensure the 'scenarios' directory exists in the same directory as scenario_loader.py."
-            )
-            
-        print(f"ScenarioLoader initialized. Reading scenarios from: {self.scenarios_dir}")
-
+        self.registry = get_scenario_registry(scenarios_dir)
+        self.scenarios_dir = self.registry.scenarios_dir
 
     def load(self, scenario_name: str):
         """
@@ -35,54 +272,36 @@ class ScenarioLoader:
                                  Không cần đuôi .json.
 
         Returns:
-            dict: Một dictionary chứa toàn bộ nội dung của file JSON.
-            
+            FrozenDict: Read-only dictionary chứa toàn bộ nội dung của file JSON,
+                        shared with every other caller. Use thaw() before modifying it.
+
         Raises:
             FileNotFoundError: Nếu file kịch bản không tồn tại.
             json.JSONDecodeError: Nếu file không phải là JSON hợp lệ.
             ValueError: Nếu file JSON thiếu các trường bắt buộc.
         """
-        file_path = os.path.join(self.scenarios_dir, f"{scenario_name}.json")
-        
-        if not os.path.exists(file_path):
-            raise FileNotFoundError(f"Scenario file not found: {file_path}")
-
-        with open(file_path, 'r', encoding='utf-8') as f:
-            try:
-                data = json.load(f)
-                self._validate_scenario_structure(data) # Kiểm tra cấu trúc
-                print(f"Successfully loaded and parsed scenario: '{data.get('scenario_name')}'")
-                return data
-            except json.JSONDecodeError as e:
-                raise json.JSONDecodeError(f"Error decoding JSON from {file_path}: {e.msg}", e.doc, e.pos)
+        return self.registry.get(scenario_name)
 
     def list_scenarios(self) -> list[str]:
         """
         Scans the scenarios/ directory and returns a list of all available scenario names
         (without the .json extension).
         """
-        scenarios = []
-        for filename in os.listdir(self.scenarios_dir):
-            if filename.endswith('.json'):
-                scenarios.append(os.path.splitext(filename)[0])
-        return sorted(scenarios) # Return sorted list for consistent behavior
+        return list(self.registry.names()) # Sorted for consistent behavior
+
+    def scenarios_by_phase(self, phase: str) -> list[str]:
+        """Names of the scenarios whose events can occur in the given flight phase (e.g. 'CRUISE')."""
+        return list(self.registry.by_phase(phase))
+
+    def scenarios_by_level(self, level: str) -> list[str]:
+        """Names of the scenarios whose ground-truth winning level is `level`."""
+        return list(self.registry.by_level(level))
 
     def _validate_scenario_structure(self, data: dict):
         """
         (Private method) Kiểm tra xem kịch bản có chứa các trường bắt buộc hay không.
         """
-        required_keys = [
-            'scenario_name', 
-            'telemetry_events', 
-            'maintenance_logs',
-            'narrative_report',
-            'context_data',
-            'ground_truth'
-        ]
-        for key in required_keys:
-            if key not in data:
-                raise ValueError(f"Scenario '{data.get('scenario_name')}' is missing required key: '{key}'")
-        # print("Scenario structure validated successfully.") # Có thể bỏ comment nếu muốn log chi tiết hơn
+        validate_scenario_structure(data)
 
 
 # --- Ví dụ cách sử dụng (để test) ---
@@ -91,7 +310,7 @@ if __name__ == '__main__':
 
     try:
         loader = ScenarioLoader()
-        
+
         if len(sys.argv) > 1:
             scenario_name_from_arg = sys.argv[1]
             print(f"Attempting to load scenario from command line argument: {scenario_name_from_arg}")
@@ -106,6 +325,12 @@ if __name__ == '__main__':
             print(f"Name: {flap_jam_scenario['scenario_name']}")
             print(f"Ground Truth Tags: {flap_jam_scenario['ground_truth']['hfacs_analysis']['evidence_tags']}")
 
+        print("\n--- Scenario Index ---")
+        for phase, names in loader.registry.by_phase().items():
+            print(f"Phase {phase}: {', '.join(names)}")
+        for level, names in loader.registry.by_level().items():
+            print(f"{level}: {', '.join(names)}")
+
     except Exception as e:
         print("\n--- AN ERROR OCCURRED ---")
-        print(e)
\ No newline at end of file
+        print(e)
@@ -1,216 +1,590 @@
-# file: data_input_simulator/telemetry_generator.py (v1.8 - Extended Flight)
+# file: data_input_simulator/telemetry_generator.py (v2.8 - One phase table for triggers, envelopes and the dashboard)
 
 import pandas as pd
 import numpy as np
 import os
+from bisect import bisect_right
+from functools import lru_cache
+from typing import Iterator, List, Optional
 import matplotlib.pyplot as plt
 
+from src.data_analysis.analysis_modules.downsampling import downsample_series, pixel_budget
+from src.data_simulation.data_input_simulator.trigger_dsl import TriggerContext, compile_event_triggers
+from src.data_simulation.data_input_simulator.telemetry_schema import alerts_column, cast_channel
+from src.data_analysis.analysis_modules.logging_utils import get_logger
+from src.data_analysis.analysis_modules.tracing import span, traced
+
+logger = get_logger("telemetry_generator")
+
+DEFAULT_FLIGHT_SECONDS = 135  # Increased from 120 to 135
+DEFAULT_FREQUENCY_HZ = 1
+CRUISE_START_SECONDS = 20
+CRUISE_END_SECONDS = 90
+MIN_FLIGHT_SECONDS = DEFAULT_FLIGHT_SECONDS - (CRUISE_END_SECONDS - CRUISE_START_SECONDS) + 1
+DEFAULT_BLOCK_SIZE = 65_536  # samples per block in chunked mode
+# Reference-timeline flap schedule: (lever start s, lever end s, lever position, target angle deg)
+FLAP_SCHEDULE = [(95, 100, 1, 10.0), (100, 105, 2, 15.0), (105, 110, 3, 22.0), (110, 120, 4, 27.0)]
+# Consecutive flight phases on the reference timeline: (name as the dashboard shows it, start s,
+# phase() names in trigger expressions covering it). Each phase runs to the next start, the last
+# to the end of the flight; a trigger phase spans every row that lists it.
+PHASE_TABLE = [
+    ("TAXI/TAKEOFF", 0, ("TAKEOFF", "TAKEOFF_CLIMB")),
+    ("CLIMB", 5, ("CLIMB", "TAKEOFF_CLIMB")),
+    ("CRUISE", 20, ("CRUISE",)),
+    ("DESCENT", 90, ("APPROACH", "DESCENT", "APPROACH_LANDING")),
+    ("FINAL APPROACH", 115, ("APPROACH", "DESCENT", "APPROACH_LANDING")),
+    ("LANDED / ROLLOUT", 125, ("LANDED",)),
+]
+FLIGHT_PHASES = [(name, start) for name, start, _ in PHASE_TABLE]
+
+
+def _linspace_at(start: float, stop: float, num: int, k) -> np.ndarray:
+    """Elements k of np.linspace(start, stop, num), computed with the same floating-point steps."""
+    k = np.asarray(k, dtype=np.float64)
+    div = num - 1
+    delta = np.float64(stop) - np.float64(start)
+    if div > 0:
+        step = delta / div
+        values = (k / div) * delta if step == 0 else k * step
+    else:
+        values = k * delta
+    values = values + start
+    if num > 1:
+        values[k == div] = stop
+    return values
+
 class TelemetryGenerator:
     """
     Chịu trách nhiệm tạo ra dữ liệu telemetry (time-series) cho một chuyến bay.
+
+    The profile is laid out for a 135 s flight; other lengths only lengthen or shorten the
+    cruise, so climb, flap deployment and landing keep their durations. data_frequency_hz > 1
+    adds samples between whole seconds.
     """
-    def __init__(self, scenario_config: dict):
+    def __init__(self, scenario_config: dict, total_flight_seconds: int = DEFAULT_FLIGHT_SECONDS,
+                 data_frequency_hz: int = DEFAULT_FREQUENCY_HZ):
+        if total_flight_seconds < MIN_FLIGHT_SECONDS or data_frequency_hz <= 0:
+            raise ValueError(f"total_flight_seconds must be at least {MIN_FLIGHT_SECONDS} and data_frequency_hz positive.")
         self.config = scenario_config
-        self.total_flight_seconds = 135  # Increased from 120 to 135
-        self.data_frequency_hz = 1
+        self.total_flight_seconds = total_flight_seconds
+        self.data_frequency_hz = data_frequency_hz
+
+    def _t(self, seconds: float) -> float:
+        """A time on the reference 135 s timeline, mapped onto this flight's length."""
+        if seconds <= CRUISE_START_SECONDS:
+            return seconds
+        return seconds + (self.total_flight_seconds - DEFAULT_FLIGHT_SECONDS)
+
+    def _num_points(self) -> int:
+        return int(self.total_flight_seconds * self.data_frequency_hz)
+
+    def _timestamps(self, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Sample times of indices [start, stop) (the whole flight by default)."""
+        stop = self._num_points() if stop is None else stop
+        if self.data_frequency_hz == 1:
+            return np.arange(start, stop)  # whole seconds stay integers
+        return np.arange(start, stop) / self.data_frequency_hz
+
+    def _first_index(self, seconds: float, strict: bool = False) -> int:
+        """
+        First sample index whose time is >= seconds (> with strict=True), or the number of samples.
+        Uses the same arithmetic as _timestamps(), so index ranges match the timestamp masks exactly.
+        """
+        num_points = self._num_points()
+        reached = (lambda value: value > seconds) if strict else (lambda value: value >= seconds)
+        index = int(min(max(np.ceil(seconds * self.data_frequency_hz), 0), num_points))
+        while index > 0 and reached(self._timestamps(index - 1, index)[0]):
+            index -= 1
+        while index < num_points and not reached(self._timestamps(index, index + 1)[0]):
+            index += 1
+        return index
+
+    def get_phase_windows(self) -> dict:
+        """
+        Flight phase windows [start, end) in seconds, used by phase() in trigger expressions,
+        derived from PHASE_TABLE. They match the altitude profile built in _create_normal_flight_profile.
+        """
+        starts = [self._t(start) for _, start in FLIGHT_PHASES] + [self.total_flight_seconds]
+        windows = {}
+        for row, (_, _, trigger_names) in enumerate(PHASE_TABLE):
+            for name in trigger_names:
+                windows[name] = (windows.get(name, (starts[row],))[0], starts[row + 1])
+        return windows
+
+    def get_phase_starts(self) -> np.ndarray:
+        """Start times (s) of the FLIGHT_PHASES on this flight's timeline; each phase runs to the next start."""
+        return np.array([self._t(start) for _, start in FLIGHT_PHASES], dtype=np.float64)
 
     def generate(self) -> pd.DataFrame:
-        normal_profile = self._create_normal_flight_profile()
-        final_data = self._inject_events(normal_profile)
-        return final_data
+        with span("telemetry.profile"):
+            overlay = ChannelOverlay(baseline_profile(self.total_flight_seconds, self.data_frequency_hz))
+            self._add_noise(overlay)
+        with span("telemetry.inject_events"):
+            self._inject_events(overlay)
+        with span("telemetry.apply_schema"):
+            return overlay.to_frame()
+
+    def iter_blocks(self, block_size: int = DEFAULT_BLOCK_SIZE, seed: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Chunked mode: the flight as consecutive DataFrames of at most block_size samples (index =
+        sample number), so peak memory follows the block size rather than the flight length.
+
+        Deterministic channels and event effects match generate() sample for sample. The noise
+        channels come from per-block generators derived from `seed` (drawn from np.random when
+        None), and pick_random triggers choose by reservoir sampling, so those two differ from
+        a generate() run with the same global seed. Events are located in streaming passes
+        before the first block is yielded, carrying each trigger's lookback across blocks.
+
+        Raises:
+            ValueError: For a non-positive block size, a pick_random nested inside a larger
+                expression, or a trigger looking back further than one block.
+        """
+        if block_size <= 0:
+            raise ValueError("block_size must be positive.")
+        if seed is None:
+            seed = int(np.random.randint(2 ** 31))
+        events = self.config.get('telemetry_events', [])
+        triggers = (getattr(self.config, 'compiled_triggers', None) or compile_event_triggers(events)) if events else ()
+        for trigger in triggers:
+            if not trigger.blockwise:
+                raise ValueError(f"Trigger '{trigger.source}' nests pick_random(); chunked mode needs it outermost.")
+            if trigger.lookback_samples(self.data_frequency_hz) > block_size:
+                raise ValueError(f"Trigger '{trigger.source}' looks back further than block_size={block_size} samples.")
+
+        with span("telemetry.resolve_events", events=len(events)):
+            plans = self._resolve_events_blockwise(events, triggers, block_size, seed)
+        for offset, overlay in self._blocks(block_size, seed, plans):
+            self._apply_alerts(overlay, plans, offset)
+            frame = overlay.to_frame()
+            frame.index = pd.RangeIndex(offset, offset + len(frame))
+            yield frame
+
+    def _add_noise(self, overlay: "ChannelOverlay", rng=None):
+        # Drawn in the same order as before the baseline was cached, so seeded runs are unchanged.
+        rng = rng if rng is not None else np.random
+        num_points = len(overlay)
+        overlay['roll_angle_deg'] = rng.normal(0, 0.1, num_points)
+        overlay['engine_1_vibration_n1'] = rng.normal(0.1, 0.02, num_points)
 
     def _create_normal_flight_profile(self) -> pd.DataFrame:
-        print("Creating normal flight profile...")
-        num_points = self.total_flight_seconds * self.data_frequency_hz
-        timestamps = np.arange(num_points)
-        
+        """One flight without events, as a DataFrame in the schema dtypes."""
+        overlay = ChannelOverlay(baseline_profile(self.total_flight_seconds, self.data_frequency_hz))
+        self._add_noise(overlay)
+        return overlay.to_frame()
+
+    def _flap_schedule(self) -> list:
+        """
+        FLAP_SCHEDULE as index ranges: (lever_lo, lever_hi, deploy_lo, deploy_hi, position, angle,
+        start_angle). A deployment ramps from the angle the previous ones left at deploy_lo - 1.
+        """
+        items = []
+        for start_s, end_s, position, angle in FLAP_SCHEDULE:
+            start_ts, end_ts = self._t(start_s), self._t(end_s)
+            lever_lo, lever_hi = self._first_index(start_ts), self._first_index(end_ts)
+            deploy_lo, deploy_hi = lever_lo, self._first_index(end_ts, strict=True)
+            start_angle = 0.0
+            if deploy_hi > deploy_lo and deploy_lo > 0:
+                for item in reversed(items):
+                    if item[2] <= deploy_lo - 1 < item[3]:
+                        start_angle = _linspace_at(item[6], item[5], item[3] - item[2], [deploy_lo - 1 - item[2]])[0]
+                        break
+            items.append((lever_lo, lever_hi, deploy_lo, deploy_hi, position, angle, start_angle))
+        return items
+
+    def _baseline_channels(self, start: int = 0, stop: Optional[int] = None) -> dict:
+        """
+        The deterministic (noise-free, event-free) channels of samples [start, stop); see
+        baseline_profile() for the cached whole-flight copy. Ramps are evaluated per index, so
+        any window costs memory proportional to its own length.
+        """
+        logger.debug("Creating normal flight profile...")
+        stop = self._num_points() if stop is None else stop
+        first = max(start - 1, 0)  # one sample in front for rate_of_climb_fpm's difference
+        timestamps = self._timestamps(first, stop)
+        index = np.arange(first, stop)
+        num_points = len(index)
+        t = self._t
+
         altitude = np.zeros(num_points)
-        climb_phase = (timestamps >= 5) & (timestamps < 20)
-        cruise_phase = (timestamps >= 20) & (timestamps < 90)
-        descent_phase = (timestamps >= 90) & (timestamps < 125) # Descent to touchdown
-        landed_phase = (timestamps >= 125) # On ground
-        
-        altitude[climb_phase] = np.linspace(0, 35000, np.sum(climb_phase))
+        climb_lo, climb_hi = self._first_index(t(5)), self._first_index(t(20))
+        descent_lo, descent_hi = self._first_index(t(90)), self._first_index(t(125))
+        climb_phase = (index >= climb_lo) & (index < climb_hi)
+        cruise_phase = (timestamps >= t(20)) & (timestamps < t(90))
+        descent_phase = (index >= descent_lo) & (index < descent_hi) # Descent to touchdown
+        landed_phase = (timestamps >= t(125)) # On ground
+
+        altitude[climb_phase] = _linspace_at(0, 35000, climb_hi - climb_lo, index[climb_phase] - climb_lo)
         altitude[cruise_phase] = 35000
-        altitude[descent_phase] = np.linspace(35000, 0, np.sum(descent_phase))
+        altitude[descent_phase] = _linspace_at(35000, 0, descent_hi - descent_lo, index[descent_phase] - descent_lo)
         altitude[landed_phase] = 0 # Stay at 0 altitude after landing
+        altitude = altitude.astype(int)
 
         flap_lever_position = np.zeros(num_points, dtype=int)
         left_flap_angle_deg = np.zeros(num_points)
         right_flap_angle_deg = np.zeros(num_points)
 
-        # Flap schedule adjusted for the new timeline
-        flap_schedule = [(95, 100, 1, 10.0), (100, 105, 2, 15.0), (105, 110, 3, 22.0), (110, 120, 4, 27.0)]
-
-        for start_ts, end_ts, target_pos, target_angle in flap_schedule:
-            lever_indices = (timestamps >= start_ts) & (timestamps < end_ts)
-            flap_lever_position[lever_indices] = target_pos
-            deployment_indices = (timestamps >= start_ts) & (timestamps <= end_ts)
-            if np.sum(deployment_indices) > 0:
-                start_angle = left_flap_angle_deg[deployment_indices.argmax() - 1] if deployment_indices.argmax() > 0 else 0.0
-                current_angles = np.linspace(start_angle, target_angle, np.sum(deployment_indices))
+        for lever_lo, lever_hi, deploy_lo, deploy_hi, target_pos, target_angle, start_angle in self._flap_schedule():
+            flap_lever_position[(index >= lever_lo) & (index < lever_hi)] = target_pos
+            deployment_indices = (index >= deploy_lo) & (index < deploy_hi)
+            if deployment_indices.any():
+                current_angles = _linspace_at(start_angle, target_angle, deploy_hi - deploy_lo, index[deployment_indices] - deploy_lo)
                 left_flap_angle_deg[deployment_indices] = current_angles
                 right_flap_angle_deg[deployment_indices] = current_angles
 
-        last_target_angle = flap_schedule[-1][3]
-        left_flap_angle_deg[timestamps >= flap_schedule[-1][1]] = last_target_angle
-        right_flap_angle_deg[timestamps >= flap_schedule[-1][1]] = last_target_angle
-
-        df = pd.DataFrame({
-            'timestamp': timestamps,
-            'altitude_ft': altitude.astype(int),
-            'airspeed_kts': self._simulate_airspeed(timestamps, flap_lever_position),
-            'roll_angle_deg': np.random.normal(0, 0.1, num_points),
-            'flap_lever_position': flap_lever_position,
-            'left_flap_angle_deg': left_flap_angle_deg,
-            'right_flap_angle_deg': right_flap_angle_deg,
+        last_end_ts, last_target_angle = t(FLAP_SCHEDULE[-1][1]), FLAP_SCHEDULE[-1][3]
+        left_flap_angle_deg[timestamps >= last_end_ts] = last_target_angle
+        right_flap_angle_deg[timestamps >= last_end_ts] = last_target_angle
+
+        vertical_g_force = np.full(num_points, 1.0)
+        vertical_g_force[landed_phase] = 1.2 # Touchdown G-force spike
+        vertical_g_force[timestamps > t(125) + 1] = 1.0 # Back to normal G one second after touchdown
+
+        if start == 0:
+            rate_of_climb_fpm = np.diff(altitude, prepend=0) / np.diff(timestamps, prepend=1) * 60
+        else:
+            rate_of_climb_fpm = np.diff(altitude) / np.diff(timestamps) * 60
+        keep = slice(start - first, None)
+        num_points = len(index) - (start - first)
+
+        # Column order is the order of the telemetry CSV; the noise channels are filled per run.
+        return {
+            'timestamp': timestamps[keep],
+            'altitude_ft': altitude[keep],
+            'airspeed_kts': self._simulate_airspeed(timestamps[keep], flap_lever_position[keep]),
+            'roll_angle_deg': None,
+            'flap_lever_position': flap_lever_position[keep],
+            'left_flap_angle_deg': left_flap_angle_deg[keep],
+            'right_flap_angle_deg': right_flap_angle_deg[keep],
             'green_hydraulic_pressure_psi': np.full(num_points, 3000.0),
             'autopilot_status': np.ones(num_points, dtype=int),
             'ptu_status': np.zeros(num_points, dtype=int),
-            'right_flap_sensor_normal_output_deg': np.zeros(num_points),
-            'right_flap_sensor_faulty_output_deg': np.zeros(num_points),
-            'left_flap_sensor_faulty_output_deg': np.zeros(num_points),
-            'asymmetry_sensor_delta_deg': np.zeros(num_points),
-            'vertical_g_force': np.full(num_points, 1.0),
+            'right_flap_sensor_normal_output_deg': right_flap_angle_deg[keep].copy(),
+            'right_flap_sensor_faulty_output_deg': right_flap_angle_deg[keep].copy(),
+            'left_flap_sensor_faulty_output_deg': left_flap_angle_deg[keep].copy(),
+            'asymmetry_sensor_delta_deg': np.abs(left_flap_angle_deg[keep] - right_flap_angle_deg[keep]),
+            'vertical_g_force': vertical_g_force[keep],
             'left_flap_motor_current': np.full(num_points, 10.0),
             'cabin_altitude_ft': np.full(num_points, 8000.0),
-            'rate_of_climb_fpm': np.zeros(num_points),
-            'engine_1_vibration_n1': np.random.normal(0.1, 0.02, num_points),
+            'rate_of_climb_fpm': rate_of_climb_fpm,
+            'engine_1_vibration_n1': None,
             'engine_1_egt_degc': np.full(num_points, 450.0),
-            'ecam_alerts': [[] for _ in range(num_points)]
-        })
-        
-        df.loc[landed_phase, 'vertical_g_force'] = 1.2 # Touchdown G-force spike
-        df.loc[timestamps > 126, 'vertical_g_force'] = 1.0 # Back to normal G
-
-        df['right_flap_sensor_normal_output_deg'] = df['right_flap_angle_deg'].copy()
-        df['right_flap_sensor_faulty_output_deg'] = df['right_flap_angle_deg'].copy()
-        df['left_flap_sensor_faulty_output_deg'] = df['left_flap_angle_deg'].copy()
-        df['asymmetry_sensor_delta_deg'] = abs(df['left_flap_angle_deg'] - df['right_flap_angle_deg'])
-        df['rate_of_climb_fpm'] = np.diff(df['altitude_ft'], prepend=0) / np.diff(df['timestamp'], prepend=1) * 60
-
-        return df
+            'ecam_alerts': alerts_column(num_points),
+        }
 
     def _simulate_airspeed(self, timestamps: np.ndarray, flap_lever_position: np.ndarray) -> np.ndarray:
-        airspeed = np.zeros_like(timestamps, dtype=float)
-        climb_phase_end_ts = 20
-        cruise_phase_end_ts = 90
-        approach_phase_start_ts = 90
-        touchdown_ts = 125
-        full_stop_ts = 135
+        climb_phase_end_ts = self._t(20)
+        cruise_phase_end_ts = self._t(90)
+        approach_phase_start_ts = self._t(90)
+        touchdown_ts = self._t(125)
+        full_stop_ts = self._t(135)
 
         cruise_speed = 280
         landing_speed = 140
 
-        for i, ts in enumerate(timestamps):
-            if ts < climb_phase_end_ts:
-                airspeed[i] = np.interp(ts, [0, climb_phase_end_ts], [0, cruise_speed])
-            elif ts < cruise_phase_end_ts:
-                airspeed[i] = cruise_speed
-            elif ts >= approach_phase_start_ts and ts < touchdown_ts:
-                airspeed[i] = np.interp(ts, [approach_phase_start_ts, touchdown_ts], [cruise_speed, landing_speed])
-            elif ts >= touchdown_ts and ts <= full_stop_ts:
-                airspeed[i] = np.interp(ts, [touchdown_ts, full_stop_ts], [landing_speed, 0])
-        
+        # One np.interp per phase over the whole array instead of one call per sample.
+        airspeed = np.select(
+            [timestamps < climb_phase_end_ts,
+             timestamps < cruise_phase_end_ts,
+             (timestamps >= approach_phase_start_ts) & (timestamps < touchdown_ts),
+             (timestamps >= touchdown_ts) & (timestamps <= full_stop_ts)],
+            [np.interp(timestamps, [0, climb_phase_end_ts], [0, cruise_speed]),
+             np.full(len(timestamps), float(cruise_speed)),
+             np.interp(timestamps, [approach_phase_start_ts, touchdown_ts], [cruise_speed, landing_speed]),
+             np.interp(timestamps, [touchdown_ts, full_stop_ts], [landing_speed, 0])],
+            default=0.0,
+        )
+
         airspeed[airspeed < 0] = 0
         return airspeed.astype(int)
 
-    def _inject_events(self, df: pd.DataFrame) -> pd.DataFrame:
+    def _inject_events(self, channels: "ChannelOverlay"):
+        """Applies the scenario's telemetry_events to a whole flight; only the channels an event writes are copied."""
         events = self.config.get('telemetry_events', [])
         if not events:
-            return df
-
-        for event in events:
-            start_index = -1
-            trigger_condition = event.get('trigger_condition')
-
-            if trigger_condition.startswith("flap_lever_position moves to"):
-                target_pos = int(trigger_condition.split(' to ')[1])
-                trigger_indices = df.index[df['flap_lever_position'] == target_pos]
-                if not trigger_indices.empty:
-                    start_index = trigger_indices[0]
-            elif trigger_condition == "random_time_in_phase":
-                valid_phases = event.get('valid_flight_phases', ['CRUISE'])
-                if 'CLIMB' in valid_phases:
-                    start_index = np.random.randint(5, 20)
-                elif 'CRUISE' in valid_phases:
-                    start_index = np.random.randint(25, 85)
-                else: # Default to approach
-                    start_index = np.random.randint(95, 115)
-            elif trigger_condition == "cabin_altitude_exceeds_10000":
-                trigger_indices = df.index[df['cabin_altitude_ft'] > 10000]
-                if not trigger_indices.empty:
-                    start_index = trigger_indices[0]
-            
-            if start_index == -1:
-                print(f"  -> Warning: Trigger '{trigger_condition}' not met for event. Skipping.")
+            return
+
+        # Triggers are compiled once per scenario; configs from the registry carry them already.
+        compiled_triggers = getattr(self.config, 'compiled_triggers', None) or compile_event_triggers(events)
+        phase_windows = self.get_phase_windows()
+        plans, carry = [], {}
+
+        for event, trigger in zip(events, compiled_triggers):
+            # A fresh context per event: earlier events may have modified the channels this one watches.
+            context = TriggerContext(channels, phase_windows, sample_rate_hz=self.data_frequency_hz)
+            plan = self._event_plan(event, trigger, trigger.first_index(context))
+            if plan is None:
                 continue
+            self._capture_anchors(channels, plan, 0)
+            self._apply_event(channels, plan, 0, carry)
+            plans.append(plan)
+        self._apply_alerts(channels, plans, 0)
+
+    def _event_plan(self, event: dict, trigger, start_index: int) -> Optional[dict]:
+        """Where one event fires and what it does; None (with a warning) when its trigger never holds."""
+        if start_index == -1:
+            logger.warning("Trigger '%s' not met for event. Skipping.", trigger.source)
+            return None
+        logger.debug("Trigger '%s' met at t=%ss. Applying event.", trigger.source, self._timestamps(start_index, start_index + 1)[0])
+
+        params = event.get('parameters', {})
+        delay = params.get('pilot_reaction_time_seconds', {}).get('delay', 0)
+        effect_start_index = min(start_index + int(delay * self.data_frequency_hz), self._num_points() - 1)
+
+        alerts = []  # (sample index, alerts) in the order they are raised
+        if 'ecam_alerts' in params:
+            alerts.append((start_index, list(params['ecam_alerts'])))
+        action = params.get('aircraft_action')
+        if isinstance(action, dict) and action.get('perform_engine_fire_procedure'):
+            alerts.append((effect_start_index, ["ENG 1 FIRE -> PULL/AGENT"]))
+
+        # Channel values read at the effect start (before this event writes them).
+        anchors = {}
+        if 'green_hydraulic_pressure' in params:
+            anchors['green_hydraulic_pressure_psi'] = effect_start_index
+        if 'cabin_altitude_ft' in params and 'rate_of_climb_fpm' in params['cabin_altitude_ft']:
+            anchors['cabin_altitude_ft'] = max(effect_start_index - 1, 0)
+        if isinstance(action, dict) and action.get('initiate_emergency_descent'):
+            anchors['altitude_ft'] = effect_start_index
+        return {"parameters": params, "start_index": start_index, "effect_start_index": effect_start_index,
+                "alerts": alerts, "anchor_indices": anchors, "anchors": {}}
+
+    def _capture_anchors(self, channels, plan: dict, offset: int) -> bool:
+        """Records the plan's anchor values found in this block; True once all are known."""
+        for name, index in plan["anchor_indices"].items():
+            if name not in plan["anchors"] and offset <= index < offset + len(channels):
+                plan["anchors"][name] = channels[name][index - offset]
+        return len(plan["anchors"]) == len(plan["anchor_indices"])
+
+    @staticmethod
+    def _write(channels, name: str, offset: int, start: int, stop: int, values):
+        """Writes global samples [start, stop) of a channel, clipped to the block starting at offset."""
+        lo, hi = max(start, offset), min(stop, offset + len(channels))
+        if lo >= hi:
+            return
+        target = channels.writable(name)
+        if np.ndim(values):
+            target[lo - offset:hi - offset] = values[lo - start:hi - start]
+        else:
+            target[lo - offset:hi - offset] = values
+
+    def _apply_event(self, channels, plan: dict, offset: int, carry: dict):
+        """
+        Applies one event's effects to a block of samples starting at `offset` (0 and the whole
+        flight in generate()). `carry` holds running values (cabin altitude) between blocks.
+        """
+        params, e = plan["parameters"], plan["effect_start_index"]
+        end_of_flight = self._num_points()
+        write = lambda name, start, stop, values: self._write(channels, name, offset, start, stop, values)
+
+        # --- Scenario-specific event injection logic ---
+
+        # Hydraulic Failure: Green Hydraulic Pressure Decay
+        if 'green_hydraulic_pressure' in params:
+            decay_duration = params['green_hydraulic_pressure']['decay_to_zero_seconds']
+            end_index = int(min(e + decay_duration * self.data_frequency_hz, end_of_flight - 1))
+            start_pressure = plan["anchors"]['green_hydraulic_pressure_psi']
+            write('green_hydraulic_pressure_psi', e, end_index + 1, np.linspace(start_pressure, 0, end_index - e + 1))
+            write('green_hydraulic_pressure_psi', end_index + 1, end_of_flight, 0.0)
+
+        # Engine Maintenance Policy: Engine Spike
+        if 'engine_1_vibration_n1' in params:
+            write('engine_1_vibration_n1', e, end_of_flight, params['engine_1_vibration_n1']['spike_to_value'])
+        if 'engine_1_egt_degc' in params:
+            write('engine_1_egt_degc', e, end_of_flight, params['engine_1_egt_degc']['spike_to_value'])
+
+        # Pressurization Misjudgment: Cabin Altitude Increase
+        if 'cabin_altitude_ft' in params and 'rate_of_climb_fpm' in params['cabin_altitude_ft']:
+            rate_fpm = params['cabin_altitude_ft']['rate_of_climb_fpm']
+            rate_fps = rate_fpm / 60.0 / self.data_frequency_hz # Adjust for data frequency
+            lo = max(e, offset)
+            hi = offset + len(channels)
+            if lo < hi:
+                # Same left-to-right running sum as adding rate_fps sample by sample, continued across blocks.
+                steps = np.full(hi - lo + 1, rate_fps)
+                steps[0] = carry.get(id(plan), plan["anchors"]['cabin_altitude_ft'])
+                running = np.add.accumulate(steps)[1:]
+                channels.writable('cabin_altitude_ft')[lo - offset:] = running
+                carry[id(plan)] = running[-1]
+
+        # Sensor Failure: Faulty Flap Sensor Stuck
+        if 'right_flap_sensor_faulty_output' in params:
+            # The physical flap angle continues to change normally, but the faulty sensor output is stuck
+            write('right_flap_sensor_faulty_output_deg', e, end_of_flight, params['right_flap_sensor_faulty_output']['stuck_at_value'])
+
+        # Existing aircraft action logic (emergency descent; the engine fire procedure is an alert)
+        action = params.get('aircraft_action')
+        if isinstance(action, dict) and action.get('initiate_emergency_descent'):
+            target_alt = action.get('target_altitude_ft', 10000)
+            descent_duration = 30
+            end_index = min(e + descent_duration * self.data_frequency_hz, end_of_flight - 1)
+            start_alt = plan["anchors"]['altitude_ft']
+            # altitude_ft is an integer channel; round so descents starting mid-approach stay integral
+            write('altitude_ft', e, end_index + 1, np.rint(np.linspace(start_alt, target_alt, end_index - e + 1)).astype(int))
+            write('altitude_ft', end_index + 1, end_of_flight, target_alt)
+
+        # Existing flap motor current and flap jam logic
+        if 'left_flap_motor_current' in params and params['left_flap_motor_current'].get('spike_and_fail'):
+            write('left_flap_motor_current', e, e + 1, 25.0)
+            write('left_flap_motor_current', e + 1, end_of_flight, 0.0)
+
+        if 'left_flap_angle' in params and 'jam_at_value' in params['left_flap_angle']:
+            write('left_flap_angle_deg', e, end_of_flight, params['left_flap_angle']['jam_at_value'])
+
+    @staticmethod
+    def _apply_alerts(channels, plans: List[dict], offset: int):
+        alerts = {}  # block position -> ECAM alerts raised there
+        for plan in plans:
+            for index, raised in plan["alerts"]:
+                if offset <= index < offset + len(channels):
+                    alerts.setdefault(index - offset, []).extend(raised)
+        if alerts:
+            channels['ecam_alerts'] = alerts_column(len(channels), alerts)
+
+    # --- Chunked mode ---
+
+    def _blocks(self, block_size: int, seed: int, plans: List[dict]):
+        """Yields (offset, overlay) for consecutive blocks with `plans` applied (alerts excluded)."""
+        carry = {}
+        for offset in range(0, self._num_points(), block_size):
+            stop = min(offset + block_size, self._num_points())
+            overlay = ChannelOverlay(BaselineProfile(self._baseline_channels(offset, stop)))
+            self._add_noise(overlay, np.random.default_rng([seed, 0, offset]))
+            for plan in plans:
+                self._apply_event(overlay, plan, offset, carry)
+            yield offset, overlay
+
+    def _resolve_events_blockwise(self, events, triggers, block_size: int, seed: int) -> List[dict]:
+        """
+        Event plans for chunked mode. Each event gets one streaming pass over the flight with
+        the earlier events applied, as generate() evaluates triggers on the frame modified so far,
+        and, if its anchors lie past the trigger, a second pass that stops once they are read.
+        """
+        phase_windows = self.get_phase_windows()
+        plans = []
+        for number, (event, trigger) in enumerate(zip(events, triggers)):
+            lookback = trigger.lookback_samples(self.data_frequency_hz)
+            rng = np.random.default_rng([seed, 1, number])
+            start_index, candidates, previous = -1, 0, None
+            for offset, overlay in self._blocks(block_size, seed, plans):
+                window = _BlockWindow(previous, overlay, lookback)
+                context = TriggerContext(window, phase_windows, sample_rate_hz=self.data_frequency_hz, rng=rng)
+                previous = overlay
+                if trigger.random_inner is not None:
+                    # Reservoir sampling: every candidate of the flight ends up equally likely.
+                    hits = np.flatnonzero(trigger.random_inner(context)[window.carry:])
+                    candidates += len(hits)
+                    if len(hits) and rng.random() < len(hits) / candidates:
+                        start_index = offset + int(hits[rng.integers(len(hits))])
+                    continue
+                mask = trigger.mask(context)[window.carry:]
+                if mask.any():
+                    start_index = offset + int(mask.argmax())
+                    break
+            plan = self._event_plan(event, trigger, start_index)
+            if plan is None:
+                continue
+            if plan["anchor_indices"]:
+                for offset, overlay in self._blocks(block_size, seed, plans):
+                    if self._capture_anchors(overlay, plan, offset):
+                        break
+            plans.append(plan)
+        return plans
+
+
+class _BlockWindow:
+    """One block's channels with up to `carry` samples of the previous block in front, for trigger lookback."""
+    def __init__(self, previous: Optional["ChannelOverlay"], current: "ChannelOverlay", carry: int):
+        self.carry = min(carry, len(previous)) if previous is not None else 0
+        self._previous = previous
+        self._current = current
+        self.columns = current.columns
+
+    def __len__(self) -> int:
+        return self.carry + len(self._current)
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        values = np.asarray(self._current[name])
+        if not self.carry:
+            return values
+        return np.concatenate([np.asarray(self._previous[name])[-self.carry:], values])
+
+
+class ChannelOverlay:
+    """
+    Copy-on-write view over a cached baseline: reads fall through to the shared read-only
+    arrays, writable(name) copies one channel the first time an event modifies it, and
+    assigned channels (noise, alerts) replace the baseline ones. Only the channels a run
+    touches are materialized before to_frame() builds the telemetry DataFrame.
+    """
+    def __init__(self, baseline: "BaselineProfile"):
+        self._baseline = baseline
+        self._own = {}
+
+    @property
+    def columns(self) -> list:
+        return list(self._baseline.channels)
+
+    def __len__(self) -> int:
+        return self._baseline.num_points
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        values = self._own.get(name)
+        return values if values is not None else self._baseline.channels[name]
+
+    def __setitem__(self, name: str, values):
+        self._own[name] = values
+
+    def writable(self, name: str) -> np.ndarray:
+        if name not in self._own:
+            self._own[name] = self._baseline.channels[name].copy()
+        return self._own[name]
+
+    def touched(self) -> set:
+        return set(self._own)
+
+    def to_frame(self) -> pd.DataFrame:
+        """The flight in the schema dtypes; untouched channels reuse the baseline's pre-cast arrays."""
+        return pd.DataFrame({
+            name: cast_channel(name, self._own[name]) if name in self._own else self._baseline.schema_channels[name]
+            for name in self._baseline.channels
+        })
+
+
+class BaselineProfile:
+    """The noise-free, event-free channels of one (flight length, sample rate), kept read-only for sharing."""
+    def __init__(self, channels: dict):
+        self.channels = {}
+        self.schema_channels = {}
+        for name, values in channels.items():
+            if isinstance(values, np.ndarray):
+                values.flags.writeable = False
+            self.channels[name] = values
+            if values is not None:
+                self.schema_channels[name] = cast_channel(name, values)
+        self.num_points = len(channels['timestamp'])
+
+
+@lru_cache(maxsize=32)
+def baseline_profile(total_flight_seconds: int = DEFAULT_FLIGHT_SECONDS,
+                     data_frequency_hz: int = DEFAULT_FREQUENCY_HZ) -> BaselineProfile:
+    """Memoized baseline; every TelemetryGenerator with the same length and rate overlays the same arrays."""
+    generator = TelemetryGenerator({}, total_flight_seconds, data_frequency_hz)
+    return BaselineProfile(generator._baseline_channels())
+
+
+@lru_cache(maxsize=32)
+def _phase_starts(total_flight_seconds: int) -> tuple:
+    return tuple(TelemetryGenerator({}, total_flight_seconds).get_phase_starts())
+
+
+def flight_phase_at(timestamp: float, total_flight_seconds: int = DEFAULT_FLIGHT_SECONDS) -> str:
+    """The FLIGHT_PHASES name at `timestamp` (as the dashboard shows it); "SHUTDOWN" once the flight is over."""
+    if timestamp >= total_flight_seconds:
+        return "SHUTDOWN"
+    return FLIGHT_PHASES[max(bisect_right(_phase_starts(total_flight_seconds), timestamp) - 1, 0)][0]
 
-            ts = df.loc[start_index, 'timestamp']
-            print(f"  -> Trigger '{trigger_condition}' met at t={ts}s. Applying event.")
-
-            params = event.get('parameters', {})
-            delay = params.get('pilot_reaction_time_seconds', {}).get('delay', 0)
-            effect_start_index = min(start_index + int(delay), len(df) - 1)
-
-            if 'ecam_alerts' in params:
-                df.loc[start_index, 'ecam_alerts'].extend(params['ecam_alerts'])
-
-            # --- Scenario-specific event injection logic ---
-
-            # Hydraulic Failure: Green Hydraulic Pressure Decay
-            if 'green_hydraulic_pressure' in params:
-                decay_duration = params['green_hydraulic_pressure']['decay_to_zero_seconds']
-                end_index = min(effect_start_index + decay_duration * self.data_frequency_hz, len(df) - 1)
-                start_pressure = df.loc[effect_start_index, 'green_hydraulic_pressure_psi']
-                decay_values = np.linspace(start_pressure, 0, end_index - effect_start_index + 1)
-                df.loc[effect_start_index:end_index, 'green_hydraulic_pressure_psi'] = decay_values
-                if end_index < len(df) - 1:
-                    df.loc[end_index + 1:, 'green_hydraulic_pressure_psi'] = 0.0
-
-            # Engine Maintenance Policy: Engine Spike
-            if 'engine_1_vibration_n1' in params:
-                df.loc[effect_start_index:, 'engine_1_vibration_n1'] = params['engine_1_vibration_n1']['spike_to_value']
-            if 'engine_1_egt_degc' in params:
-                df.loc[effect_start_index:, 'engine_1_egt_degc'] = params['engine_1_egt_degc']['spike_to_value']
-
-            # Pressurization Misjudgment: Cabin Altitude Increase
-            if 'cabin_altitude_ft' in params and 'rate_of_climb_fpm' in params['cabin_altitude_ft']:
-                rate_fpm = params['cabin_altitude_ft']['rate_of_climb_fpm']
-                rate_fps = rate_fpm / 60.0 / self.data_frequency_hz # Adjust for data frequency
-                for i in range(effect_start_index, len(df)):
-                    df.loc[i, 'cabin_altitude_ft'] = df.loc[i-1, 'cabin_altitude_ft'] + rate_fps
-
-            # Sensor Failure: Faulty Flap Sensor Stuck
-            if 'right_flap_sensor_faulty_output' in params:
-                stuck_value = params['right_flap_sensor_faulty_output']['stuck_at_value']
-                # The physical flap angle continues to change normally, but the faulty sensor output is stuck
-                df.loc[effect_start_index:, 'right_flap_sensor_faulty_output_deg'] = stuck_value
-
-            # Existing aircraft action logic (emergency descent, engine fire procedure)
-            if 'aircraft_action' in params and isinstance(params['aircraft_action'], dict):
-                if params['aircraft_action'].get('initiate_emergency_descent'):
-                    target_alt = params['aircraft_action'].get('target_altitude_ft', 10000)
-                    descent_duration = 30
-                    end_index = min(effect_start_index + descent_duration, len(df) - 1)
-                    start_alt = df.loc[effect_start_index, 'altitude_ft']
-                    descent_values = np.linspace(start_alt, target_alt, end_index - effect_start_index + 1)
-                    df.loc[effect_start_index:end_index, 'altitude_ft'] = descent_values
-                    if end_index < len(df) -1:
-                        df.loc[end_index + 1:, 'altitude_ft'] = target_alt
-                if params['aircraft_action'].get('perform_engine_fire_procedure'):
-                     df.loc[effect_start_index, 'ecam_alerts'].append("ENG 1 FIRE -> PULL/AGENT")
-
-            # Existing flap motor current and flap jam logic
-            if 'left_flap_motor_current' in params and params['left_flap_motor_current'].get('spike_and_fail'):
-                df.loc[effect_start_index, 'left_flap_motor_current'] = 25.0
-                df.loc[effect_start_index + 1:, 'left_flap_motor_current'] = 0.0
-
-            if 'left_flap_angle' in params and 'jam_at_value' in params['left_flap_angle']:
-                df.loc[effect_start_index:, 'left_flap_angle_deg'] = params['left_flap_angle']['jam_at_value']
-
-        return df
 
+@traced("plot.scenario_telemetry")
 def plot_scenario_telemetry(telemetry_data: pd.DataFrame, scenario_name: str, scenario_config: dict, output_dir: str,
                             hfacs_level: str = None, hfacs_confidence: int = None, hfacs_reasoning: str = None):
     """
@@ -241,15 +615,18 @@ def plot_scenario_telemetry(telemetry_data: pd.DataFrame, scenario_name: str, sc
     fig, ax1 = plt.subplots(figsize=(15, 10)) # Increased width and height
     ax2 = ax1.twinx()
     lines = []
+    # Long flights are reduced to what the axes can actually show; short ones are drawn untouched.
+    max_points = pixel_budget(15, dpi=fig.dpi)
 
     for param in params_to_plot:
         if param in telemetry_data.columns:
+            x_values, y_values = downsample_series(telemetry_data['timestamp'], telemetry_data[param], max_points)
             if param == 'airspeed_kts':
-                line, = ax2.plot(telemetry_data['timestamp'], telemetry_data[param], label=param.replace('_', ' ').title(), color='darkblue', linestyle='--')
+                line, = ax2.plot(x_values, y_values, label=param.replace('_', ' ').title(), color='darkblue', linestyle='--')
                 ax2.set_ylabel('Airspeed (kts)', color='darkblue')
                 ax2.tick_params(axis='y', labelcolor='darkblue')
             else:
-                line, = ax1.plot(telemetry_data['timestamp'], telemetry_data[param], label=param.replace('_', ' ').title())
+                line, = ax1.plot(x_values, y_values, label=param.replace('_', ' ').title())
                 ax1.set_ylabel('Value')
             lines.append(line)
 
@@ -272,9 +649,9 @@ def plot_scenario_telemetry(telemetry_data: pd.DataFrame, scenario_name: str, sc
     try:
         plt.tight_layout(rect=[0, 0, 0.8, 0.9]) # Adjust plot area to make space for text
         plt.savefig(chart_path)
-        print(f"  -> Saved plot to: {chart_path}")
+        logger.info("Saved plot to: %s", chart_path)
     except Exception as e:
-        print(f"  -> ERROR saving plot: {e}")
+        logger.error("ERROR saving plot: %s", e)
     finally:
         plt.close()
 
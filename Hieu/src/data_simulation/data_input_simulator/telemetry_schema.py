@@ -0,0 +1,148 @@
+# file: data_input_simulator/telemetry_schema.py (v1.1 - cast_channel for single channels)
+
+import ast
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+ALERT_SEPARATOR = "|"
+
+# Storage dtype of every telemetry channel. Analog channels are float32 (well inside sensor
+# resolution), discrete ones the smallest integer type that holds their range, and the ECAM
+# alerts a categorical of "|"-joined alert strings ("" when no alert is active).
+TELEMETRY_SCHEMA = {
+    'altitude_ft': 'int32',
+    'airspeed_kts': 'int16',
+    'roll_angle_deg': 'float32',
+    'flap_lever_position': 'int8',  # 0-4
+    'left_flap_angle_deg': 'float32',
+    'right_flap_angle_deg': 'float32',
+    'green_hydraulic_pressure_psi': 'float32',
+    'autopilot_status': 'int8',  # 0/1; int8 rather than bool so CSVs keep their 0/1 values
+    'ptu_status': 'int8',
+    'right_flap_sensor_normal_output_deg': 'float32',
+    'right_flap_sensor_faulty_output_deg': 'float32',
+    'left_flap_sensor_faulty_output_deg': 'float32',
+    'asymmetry_sensor_delta_deg': 'float32',
+    'vertical_g_force': 'float32',
+    'left_flap_motor_current': 'float32',
+    'cabin_altitude_ft': 'float32',
+    'rate_of_climb_fpm': 'float32',
+    'engine_1_vibration_n1': 'float32',
+    'engine_1_egt_degc': 'float32',
+    'ecam_alerts': 'category',
+}
+
+
+def timestamp_dtype(timestamps) -> str:
+    """Whole-second time axes are int32; sub-second ones stay float64 so long flights keep exact sample times."""
+    return 'int32' if pd.api.types.is_integer_dtype(np.asarray(timestamps).dtype) else 'float64'
+
+
+def encode_alerts(alerts) -> str:
+    """One sample's alerts (a list, a legacy "['A', 'B']" string, or a joined string) as a joined string."""
+    if isinstance(alerts, (list, tuple)):
+        return ALERT_SEPARATOR.join(str(alert) for alert in alerts)
+    if alerts is None or (isinstance(alerts, float) and np.isnan(alerts)):
+        return ""
+    text = str(alerts)
+    if text.startswith("["):  # CSVs written before the schema stored str(list)
+        try:
+            return ALERT_SEPARATOR.join(str(alert) for alert in ast.literal_eval(text))
+        except (ValueError, SyntaxError):
+            pass
+    return text
+
+
+def split_alerts(value) -> List[str]:
+    """The alerts of one encoded sample as a list."""
+    text = encode_alerts(value)
+    return text.split(ALERT_SEPARATOR) if text else []
+
+
+def alerts_column(num_points: int, alerts_by_index: Optional[Dict[int, List[str]]] = None) -> pd.Categorical:
+    """
+    A categorical ecam_alerts column built from the few samples that carry alerts
+    ({position: [alert, ...]}); every other sample gets "".
+    """
+    encoded = {index: encode_alerts(alerts) for index, alerts in (alerts_by_index or {}).items()}
+    categories = [""] + sorted(set(encoded.values()) - {""})
+    codes = np.zeros(num_points, dtype=np.int8 if len(categories) < 128 else np.int32)
+    lookup = {text: code for code, text in enumerate(categories)}
+    for index, text in encoded.items():
+        codes[index] = lookup[text]
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+def cast_channel(column: str, values):
+    """One channel (Series, array or Categorical) in its schema dtype; channels outside the schema pass through."""
+    if column == 'timestamp':
+        return np.asarray(values).astype(timestamp_dtype(values), copy=False)
+    dtype = TELEMETRY_SCHEMA.get(column)
+    if dtype is None or str(values.dtype) == dtype:
+        return values
+    if dtype == 'category':
+        return pd.Categorical([encode_alerts(value) for value in values])
+    array = np.asarray(values)
+    if np.dtype(dtype).kind == 'i':
+        info = np.iinfo(dtype)
+        array = np.rint(array)
+        if len(array) and (array.min() < info.min or array.max() > info.max):
+            raise ValueError(f"Channel '{column}' has values outside the range of {dtype}.")
+    return array.astype(dtype)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    A copy of the frame with its telemetry channels cast to TELEMETRY_SCHEMA. Columns outside
+    the schema are kept as they are. The frame is rebuilt in one go rather than cast column by
+    column, which on short flights costs more than the casts themselves.
+
+    Raises:
+        ValueError: If a discrete channel holds values its declared dtype cannot represent.
+    """
+    return pd.DataFrame({column: cast_channel(column, df[column]) for column in df.columns}, index=df.index)
+
+
+def validate_schema(df: pd.DataFrame) -> List[str]:
+    """Channels whose dtype differs from TELEMETRY_SCHEMA (empty when the frame conforms)."""
+    return [column for column, dtype in TELEMETRY_SCHEMA.items()
+            if column in df.columns and str(df[column].dtype) != dtype]
+
+
+def memory_report(df: pd.DataFrame) -> dict:
+    """
+    In-memory size of one flight's telemetry.
+
+    Returns:
+        dict: {"bytes": total, "samples": rows, "bytes_per_sample": total / rows,
+               "channels": {column: bytes}} (deep sizes, index included in the total)
+    """
+    usage = df.memory_usage(deep=True)
+    total = int(usage.sum())
+    return {
+        "bytes": total,
+        "samples": len(df),
+        "bytes_per_sample": total / len(df) if len(df) else 0.0,
+        "channels": {column: int(size) for column, size in usage.items() if column != 'Index'},
+    }
+
+
+def bytes_per_flight(frames: Iterable[pd.DataFrame]) -> float:
+    """Mean deep memory size of several flights' telemetry frames."""
+    sizes = [memory_report(df)["bytes"] for df in frames]
+    return float(np.mean(sizes)) if sizes else 0.0
+
+
+def save_telemetry(df: pd.DataFrame, path: str) -> str:
+    """Writes telemetry as CSV after casting it to the schema (float32 channels print at float32 precision)."""
+    apply_schema(df).to_csv(path, index=False)
+    return path
+
+
+def load_telemetry(path: str) -> pd.DataFrame:
+    """Reads a telemetry CSV straight into the schema dtypes; also accepts CSVs saved before the schema."""
+    numeric = {column: dtype for column, dtype in TELEMETRY_SCHEMA.items() if dtype != 'category'}
+    df = pd.read_csv(path, dtype=numeric, converters={'ecam_alerts': encode_alerts})
+    return apply_schema(df)
@@ -0,0 +1,426 @@
+# file: data_input_simulator/trigger_dsl.py (v1.3 - Channel names checked against the telemetry schema at compile time)
+"""
+Small expression language for telemetry event triggers.
+
+Examples:
+    flap_lever_position == 3
+    cabin_altitude_ft > 10000 AND phase(CRUISE)
+    rises(green_hydraulic_pressure_psi < 1500)
+    abs(left_flap_angle_deg - right_flap_angle_deg) > 2 OR changes(autopilot_status)
+    delay(flap_lever_position == 2, 3)
+    pick_random(phase(CRUISE, 5, 5))
+    window(30, 60) AND NOT phase(CLIMB)
+
+An expression is parsed once and compiled into a function that maps a TriggerContext
+(the telemetry frame as NumPy arrays) to a boolean mask over all samples; the event
+fires at the first True sample. Everything is vectorized, so evaluation is O(N).
+Compiled triggers also record how far back they look (delay() and edge functions), so
+the chunked generator can evaluate them block by block with that many carried samples.
+Scenario event triggers are checked against TELEMETRY_SCHEMA when compiled, so a misspelled
+channel fails when the scenario is loaded rather than when a flight is generated.
+
+Functions:
+    phase(NAME[, trim_start_s, trim_end_s])  samples inside a flight phase window
+    window(start_s, end_s)                   samples with start_s <= t < end_s
+    rises(x) / falls(x) / changes(x)         edges: of a channel's value, or of a condition
+    delay(cond, seconds)                     cond shifted later in time
+    pick_random(cond)                        one uniformly random sample where cond holds
+    abs(value)                               absolute value inside comparisons
+"""
+
+import re
+from functools import lru_cache
+from typing import Callable, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.data_simulation.data_input_simulator.telemetry_schema import TELEMETRY_SCHEMA
+
+# Channels an event trigger may reference: every schema channel plus the time axis.
+TRIGGER_CHANNELS = frozenset(TELEMETRY_SCHEMA) | {'timestamp'}
+
+# Old hard-coded trigger strings, kept working by translating them to expressions.
+# The random windows match what the generator used before (randint(5,20), (25,85), (95,115)).
+_LEGACY_MOVES_TO = re.compile(r"^\s*(\w+)\s+moves\s+to\s+(-?\d+(?:\.\d+)?)\s*$")
+_LEGACY_EXCEEDS = re.compile(r"^\s*(\w+)_exceeds_(\d+(?:\.\d+)?)\s*$")
+
+
+def translate_legacy_trigger(trigger: str, valid_flight_phases=None) -> str:
+    """
+    Maps the legacy trigger strings onto the expression language:
+        "flap_lever_position moves to 3"  -> "flap_lever_position == 3"
+        "cabin_altitude_exceeds_10000"     -> "cabin_altitude_ft > 10000"
+        "random_time_in_phase"             -> "pick_random(phase(...))" using the event's phases
+    Anything else is returned unchanged.
+    """
+    match = _LEGACY_MOVES_TO.match(trigger)
+    if match:
+        return f"{match.group(1)} == {match.group(2)}"
+    match = _LEGACY_EXCEEDS.match(trigger)
+    if match:
+        channel = match.group(1)
+        if channel == 'cabin_altitude':
+            channel = 'cabin_altitude_ft'
+        return f"{channel} > {match.group(2)}"
+    if trigger.strip() == "random_time_in_phase":
+        phases = list(valid_flight_phases or ['CRUISE'])
+        if 'CLIMB' in phases:
+            return "pick_random(phase(CLIMB))"
+        if 'CRUISE' in phases:
+            return "pick_random(phase(CRUISE, 5, 5))"
+        return "pick_random(phase(APPROACH, 5, 10))"  # Default to approach
+    return trigger
+
+
+class TriggerContext:
+    """
+    Everything a compiled trigger may look at: telemetry channels as NumPy arrays,
+    the time axis, flight phase windows (seconds) and the random source for pick_random.
+    `df` is a DataFrame or anything with `columns`, len() and per-channel indexing.
+    """
+    def __init__(self, df: pd.DataFrame, phase_windows: Dict[str, Tuple[float, float]],
+                 sample_rate_hz: float = 1.0, rng=None, time_column: str = 'timestamp'):
+        self.df = df
+        self.time = np.asarray(df[time_column])
+        self.n = len(df)
+        self.phase_windows = phase_windows
+        self.sample_rate_hz = sample_rate_hz
+        self.rng = rng if rng is not None else np.random
+        self._channels = {}
+
+    def channel(self, name: str) -> np.ndarray:
+        values = self._channels.get(name)
+        if values is None:
+            if name not in self.df.columns:
+                raise ValueError(f"Trigger references unknown telemetry channel '{name}'.")
+            values = np.asarray(self.df[name])
+            self._channels[name] = values
+        return values
+
+
+# --- Tokenizer ---------------------------------------------------------------
+
+_TOKEN_RE = re.compile(r"\s*(?:(\d+\.\d*|\.\d+|\d+)|([A-Za-z_][A-Za-z0-9_]*)|(<=|>=|==|!=|<|>|\+|-|\*|/|\(|\)|,))")
+_KEYWORDS = {'and': 'AND', 'or': 'OR', 'not': 'NOT'}
+
+
+def _tokenize(text: str):
+    tokens = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if not match or match.end() == pos:
+            raise ValueError(f"Unexpected character in trigger '{text}' at position {pos}: '{text[pos:pos + 10]}'")
+        number, name, op = match.groups()
+        if number is not None:
+            tokens.append(('NUM', float(number)))
+        elif name is not None:
+            keyword = _KEYWORDS.get(name.lower())
+            tokens.append((keyword, name) if keyword else ('NAME', name))
+        else:
+            tokens.append(('OP', op))
+        pos = match.end()
+    tokens.append(('END', 'end of expression'))
+    return tokens
+
+
+# --- Parser / compiler ---------------------------------------------------------
+# Value nodes compile to fn(ctx) -> ndarray (or scalar); condition nodes to fn(ctx) -> bool ndarray.
+
+_COMPARATORS = {
+    '<': np.less, '<=': np.less_equal, '>': np.greater,
+    '>=': np.greater_equal, '==': np.equal, '!=': np.not_equal,
+}
+_ARITHMETIC = {'+': np.add, '-': np.subtract, '*': np.multiply, '/': np.divide}
+_CONDITION_FUNCS = ('phase', 'window', 'rises', 'falls', 'changes', 'delay', 'pick_random')
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+        self.lookback_s = 0.0      # summed delay() seconds
+        self.edges = 0             # rises/falls/changes calls, one sample of lookback each
+        self.random_inner = {}     # pick_random mask function -> its inner condition
+        self.channels = set()      # channel names the expression reads
+
+    def error(self, message: str):
+        raise ValueError(f"Invalid trigger '{self.text}': {message}")
+
+    def peek(self):
+        return self.tokens[self.pos]
+
+    def take(self, kind=None, value=None):
+        token = self.tokens[self.pos]
+        if (kind and token[0] != kind) or (value is not None and token[1] != value):
+            self.error(f"expected {value or kind}, found '{token[1]}'")
+        self.pos += 1
+        return token
+
+    def accept(self, kind, value=None):
+        token = self.peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.pos += 1
+            return True
+        return False
+
+    def parse(self):
+        node = self.condition()
+        if self.peek()[0] != 'END':
+            self.error(f"unexpected '{self.peek()[1]}'")
+        return node
+
+    def compile(self) -> "_CompiledExpression":
+        node = self.parse()
+        return _CompiledExpression(node, self.lookback_s, self.edges, len(self.random_inner),
+                                   self.random_inner.get(node), frozenset(self.channels))
+
+    # condition := and_expr ('OR' and_expr)*
+    def condition(self):
+        node = self.and_expr()
+        while self.accept('OR'):
+            left, right = node, self.and_expr()
+            node = (lambda l, r: lambda ctx: l(ctx) | r(ctx))(left, right)
+        return node
+
+    def and_expr(self):
+        node = self.not_expr()
+        while self.accept('AND'):
+            left, right = node, self.not_expr()
+            node = (lambda l, r: lambda ctx: l(ctx) & r(ctx))(left, right)
+        return node
+
+    def not_expr(self):
+        if self.accept('NOT'):
+            inner = self.not_expr()
+            return lambda ctx: ~inner(ctx)
+        return self.atom()
+
+    def atom(self):
+        token = self.peek()
+        # Parenthesised condition, unless it is the start of an arithmetic operand like "(a - b) > 2".
+        if token == ('OP', '('):
+            saved = self.pos
+            self.take()
+            try:
+                inner = self.condition()
+                self.take('OP', ')')
+                if self.peek()[0] == 'OP' and self.peek()[1] in _COMPARATORS:
+                    raise ValueError("comparison follows")
+                return inner
+            except ValueError:
+                self.pos = saved
+        if token[0] == 'NAME' and token[1] in _CONDITION_FUNCS and self.tokens[self.pos + 1] == ('OP', '('):
+            return self.condition_function()
+        return self.comparison()
+
+    def comparison(self):
+        left = self.value()
+        token = self.peek()
+        if token[0] != 'OP' or token[1] not in _COMPARATORS:
+            self.error("expected a comparison such as 'channel > value'")
+        self.take()
+        right = self.value()
+        op = _COMPARATORS[token[1]]
+        return lambda ctx: np.asarray(op(left(ctx), right(ctx)), dtype=bool) & np.ones(ctx.n, dtype=bool)
+
+    # value := term (('+'|'-') term)* ; term := factor (('*'|'/') factor)*
+    def value(self):
+        node = self.term()
+        while self.peek()[0] == 'OP' and self.peek()[1] in ('+', '-'):
+            op = _ARITHMETIC[self.take()[1]]
+            left, right = node, self.term()
+            node = (lambda o, l, r: lambda ctx: o(l(ctx), r(ctx)))(op, left, right)
+        return node
+
+    def term(self):
+        node = self.factor()
+        while self.peek()[0] == 'OP' and self.peek()[1] in ('*', '/'):
+            op = _ARITHMETIC[self.take()[1]]
+            left, right = node, self.factor()
+            node = (lambda o, l, r: lambda ctx: o(l(ctx), r(ctx)))(op, left, right)
+        return node
+
+    def factor(self):
+        token = self.peek()
+        if token[0] == 'NUM':
+            self.take()
+            number = token[1]
+            return lambda ctx: number
+        if token == ('OP', '-'):
+            self.take()
+            inner = self.factor()
+            return lambda ctx: -inner(ctx)
+        if token == ('OP', '('):
+            self.take()
+            inner = self.value()
+            self.take('OP', ')')
+            return inner
+        if token[0] == 'NAME':
+            self.take()
+            if token[1] == 'abs' and self.accept('OP', '('):
+                inner = self.value()
+                self.take('OP', ')')
+                return lambda ctx: np.abs(inner(ctx))
+            name = token[1]
+            self.channels.add(name)
+            return lambda ctx: ctx.channel(name)
+        self.error(f"unexpected '{token[1]}'")
+
+    def number(self) -> float:
+        negative = self.accept('OP', '-')
+        value = self.take('NUM')[1]
+        return -value if negative else value
+
+    def condition_function(self):
+        name = self.take('NAME')[1]
+        self.take('OP', '(')
+
+        if name == 'phase':
+            phase_name = self.take('NAME')[1].upper()
+            trim_start = trim_end = 0.0
+            if self.accept('OP', ','):
+                trim_start = self.number()
+                self.take('OP', ',')
+                trim_end = self.number()
+            self.take('OP', ')')
+
+            def phase_mask(ctx, phase_name=phase_name, trim_start=trim_start, trim_end=trim_end):
+                if phase_name not in ctx.phase_windows:
+                    raise ValueError(f"Unknown flight phase '{phase_name}'. Known: {sorted(ctx.phase_windows)}")
+                start, end = ctx.phase_windows[phase_name]
+                return (ctx.time >= start + trim_start) & (ctx.time < end - trim_end)
+            return phase_mask
+
+        if name == 'window':
+            start = self.number()
+            self.take('OP', ',')
+            end = self.number()
+            self.take('OP', ')')
+            return lambda ctx: (ctx.time >= start) & (ctx.time < end)
+
+        if name in ('rises', 'falls', 'changes'):
+            # A bare channel name means "the channel's value"; anything else is a condition.
+            is_channel = (self.peek()[0] == 'NAME' and self.tokens[self.pos + 1] == ('OP', ')'))
+            inner = self.factor() if is_channel else self.condition()
+            self.take('OP', ')')
+
+            self.edges += 1
+
+            def edge_mask(ctx, inner=inner, kind=name, is_channel=is_channel):
+                values = np.asarray(inner(ctx), dtype=np.float64 if is_channel else np.int8)
+                diff = np.diff(values, prepend=values[:1])
+                if kind == 'rises':
+                    return diff > 0
+                if kind == 'falls':
+                    return diff < 0
+                return diff != 0
+            return edge_mask
+
+        if name == 'delay':
+            inner = self.condition()
+            self.take('OP', ',')
+            seconds = self.number()
+            self.take('OP', ')')
+            self.lookback_s += max(seconds, 0.0)
+
+            def delay_mask(ctx, inner=inner, seconds=seconds):
+                mask = inner(ctx)
+                shift = int(round(seconds * ctx.sample_rate_hz))
+                if shift <= 0:
+                    return mask
+                shifted = np.zeros_like(mask)
+                shifted[shift:] = mask[:-shift] if shift < len(mask) else False
+                return shifted
+            return delay_mask
+
+        # pick_random
+        inner = self.condition()
+        self.take('OP', ')')
+
+        def pick_random_mask(ctx, inner=inner):
+            candidates = np.flatnonzero(inner(ctx))
+            mask = np.zeros(ctx.n, dtype=bool)
+            if len(candidates):
+                mask[candidates[ctx.rng.randint(len(candidates))]] = True
+            return mask
+        self.random_inner[pick_random_mask] = inner
+        return pick_random_mask
+
+
+class _CompiledExpression(NamedTuple):
+    predicate: Callable
+    lookback_s: float
+    edges: int
+    random_picks: int
+    random_inner: Optional[Callable]  # set when the whole expression is pick_random(inner)
+    channels: frozenset
+
+
+class CompiledTrigger:
+    """A parsed trigger expression, ready to be evaluated against any telemetry frame."""
+    def __init__(self, source: str, expression: str, compiled: "_CompiledExpression"):
+        self.source = source          # what the scenario file says
+        self.expression = expression  # after legacy translation
+        self._predicate = compiled.predicate
+        self.lookback_s = compiled.lookback_s
+        self.edges = compiled.edges
+        self.random_picks = compiled.random_picks
+        self.random_inner = compiled.random_inner
+        self.channels = compiled.channels
+
+    def mask(self, ctx: TriggerContext) -> np.ndarray:
+        return self._predicate(ctx)
+
+    def first_index(self, ctx: TriggerContext) -> int:
+        """Index of the first sample where the trigger holds, or -1 if it never does."""
+        mask = self.mask(ctx)
+        if not mask.any():
+            return -1
+        return int(mask.argmax())
+
+    def lookback_samples(self, sample_rate_hz: float) -> int:
+        """Samples before a block that must be carried for the block's mask to equal the whole-flight mask."""
+        return int(np.ceil(self.lookback_s * sample_rate_hz)) + self.edges
+
+    @property
+    def blockwise(self) -> bool:
+        """True unless pick_random is nested inside the expression (it needs every candidate at once)."""
+        return self.random_picks == 0 or (self.random_picks == 1 and self.random_inner is not None)
+
+    def __repr__(self):
+        return f"CompiledTrigger({self.expression!r})"
+
+
+@lru_cache(maxsize=1024)
+def _compile_expression(expression: str) -> _CompiledExpression:
+    return _Parser(expression).compile()
+
+
+def compile_trigger(trigger: str, valid_flight_phases=None, channels=None) -> CompiledTrigger:
+    """
+    Parses and compiles a trigger (legacy strings included). Compilation is memoized per expression.
+    When `channels` is given, every channel the expression reads must be one of them.
+
+    Raises:
+        ValueError: if the trigger is not a valid expression or reads an unknown channel.
+    """
+    if not isinstance(trigger, str) or not trigger.strip():
+        raise ValueError(f"Trigger condition must be a non-empty string, got {trigger!r}.")
+    phases = tuple(valid_flight_phases) if valid_flight_phases else None
+    expression = translate_legacy_trigger(trigger, phases)
+    compiled = _compile_expression(expression)
+    if channels is not None:
+        unknown = sorted(compiled.channels - set(channels))
+        if unknown:
+            raise ValueError(f"Invalid trigger '{expression}': unknown telemetry channel(s) {unknown}.")
+    return CompiledTrigger(trigger, expression, compiled)
+
+
+def compile_event_triggers(events, channels=TRIGGER_CHANNELS) -> Tuple[CompiledTrigger, ...]:
+    """Compiles the trigger of every telemetry event of a scenario (in order), checking its channels."""
+    return tuple(compile_trigger(event.get('trigger_condition'), event.get('valid_flight_phases'), channels)
+                 for event in events)
@@ -0,0 +1,69 @@
+import os
+import sys
+import argparse
+import time
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# --- Path Management ---
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+for _path in (_PROJECT_ROOT, os.path.join(_PROJECT_ROOT, 'src')):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+from src.data_simulation.data_input_simulator.telemetry_generator import (
+    TelemetryGenerator, CRUISE_START_SECONDS, DEFAULT_FLIGHT_SECONDS, FLIGHT_PHASES
+)
+from src.data_analysis.analysis_modules.envelope_index import DEFAULT_INDEX_PATH, build_envelope_index
+from src.data_analysis.analysis_modules.logging_utils import get_logger, add_logging_arguments, configure_logging_from_args
+
+logger = get_logger("build_envelope_index")
+
+
+def simulate_fleet(scenario: str, num_flights: int, total_flight_seconds: int, sample_rates: List[int],
+                   seed: int = 0) -> Iterator[Tuple[pd.DataFrame, np.ndarray]]:
+    """
+    Yields (telemetry, phase starts) for num_flights seeded runs of one scenario, taking the
+    sample rates in turn: the ramps' per-sample rates of change depend on the sample rate, so
+    the envelopes should cover every rate the detector will see.
+    """
+    config = dict(ScenarioLoader().load(scenario))
+    generators = [TelemetryGenerator(config, total_flight_seconds, hz) for hz in sample_rates]
+    np.random.seed(seed)
+    for number in range(num_flights):
+        if number and number % 500 == 0:
+            logger.info("Simulated %d/%d flights", number, num_flights)
+        generator = generators[number % len(generators)]
+        yield generator.generate(), generator.get_phase_starts()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Precompute per-phase channel envelopes from a fleet of simulated flights.")
+    parser.add_argument("--scenario", type=str, default="normal_flight", help="Scenario to simulate.")
+    parser.add_argument("--flights", type=int, default=2000, help="Number of flights to simulate.")
+    parser.add_argument("--seconds", type=int, default=DEFAULT_FLIGHT_SECONDS, help="Flight length in seconds.")
+    parser.add_argument("--hz", type=str, default="1,4,10", help="Comma separated sample rates, used in turn.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the noise channels.")
+    parser.add_argument("--output", type=str, default=DEFAULT_INDEX_PATH, help="Index file (.npz).")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging_from_args(args)
+
+    sample_rates = [int(hz) for hz in args.hz.split(",")]
+    started = time.perf_counter()
+    index = build_envelope_index(
+        simulate_fleet(args.scenario, args.flights, args.seconds, sample_rates, args.seed),
+        FLIGHT_PHASES, DEFAULT_FLIGHT_SECONDS, CRUISE_START_SECONDS,
+        info={"scenario": args.scenario, "flight_seconds": args.seconds, "sample_rates_hz": sample_rates, "seed": args.seed},
+    )
+    index.save(args.output)
+    print(f"Envelope index: {len(index.phases)} phases x {len(index.channels)} channels x {len(index.percentiles)} percentiles "
+          f"from {index.info['flights']} flights ({time.perf_counter() - started:.1f}s)")
+    print(f"Written to {args.output} ({os.path.getsize(args.output) / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
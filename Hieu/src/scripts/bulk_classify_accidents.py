@@ -0,0 +1,299 @@
+import os
+import sys
+import argparse
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List
+
+import pandas as pd
+from tqdm import tqdm
+
+# --- Path Management ---
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+_REPO_ROOT = os.path.dirname(_PROJECT_ROOT)
+for _path in (_PROJECT_ROOT, os.path.join(_PROJECT_ROOT, 'src')):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from src.data_analysis.analysis_modules.risk_engine import RiskTriageEngine, FAST_CLASSIFIER_LABEL
+from src.data_analysis.analysis_modules.panel_cache import ClassificationCache
+from src.data_analysis.analysis_modules.near_duplicates import NearDuplicateIndex
+from src.data_analysis.analysis_modules.fast_classifier import FastHFACSClassifier
+from src.data_analysis.analysis_modules.rate_limiter import configure_rate_limiter, DEFAULT_REQUESTS_PER_MINUTE, DEFAULT_TOKENS_PER_MINUTE
+from src.data_analysis.analysis_modules.vertex_client import estimate_tokens
+from src.data_analysis.analysis_modules.logging_utils import add_logging_arguments, configure_logging_from_args
+
+# --- Global Configuration ---
+PROJECT_ID = "aviation-classifier-sa"
+LOCATION = "us-central1"
+CREDENTIALS_PATH = os.path.join(_PROJECT_ROOT, "config", "secrets", "gcloud_credentials.json")
+DEFAULT_INPUTS = [
+    os.path.join(_REPO_ROOT, "NewData1.csv"),
+    os.path.join(_REPO_ROOT, "Airplane_Crashes_and_Fatalities_Since_1908_20190820105639.csv.zip"),
+]
+DEFAULT_OUTPUT_DIR = os.path.join(_PROJECT_ROOT, "outputs", "project_outputs", "accident_classification")
+CONTEXT_COLUMNS = ["Date", "Location", "Operator", "AC Type", "Route"]
+OUTPUT_COLUMNS = ["record_id", "source", "row", "Date", "Operator", "AC Type", "hfacs_level",
+                  "hfacs_confidence", "hfacs_reasoning", "general_analyst", "tech_ops_specialist", "maint_org_specialist",
+                  "classified_by", "duplicate_of", "similarity"]
+# Summaries per panel request. At the default quota (60 req/min, 250k tokens/min) 5,000 records take
+# ~5.5 h one by one (4 requests each), ~28 min at 25 per request and ~23 min at 50 (token-bound);
+# with a 1M tokens/min quota, 50 per request finishes in ~7 min. See panel_records_per_minute().
+DEFAULT_PANEL_BATCH_SIZE = 50
+# Per-record prompt tokens beyond the shared templates (evidence sections, tag lists and the answer
+# allowance across the four stages), measured on NewData1.csv with the stub backend.
+PANEL_TOKENS_PER_RECORD = 900
+LABEL_COLUMNS = ["hfacs_level", "hfacs_confidence", "hfacs_reasoning", "general_analyst", "tech_ops_specialist",
+                 "maint_org_specialist", "classified_by"]
+
+
+def _source_name(path: str) -> str:
+    name = os.path.basename(path)
+    for suffix in (".zip", ".csv"):
+        if name.endswith(suffix):
+            name = name[:-len(suffix)]
+    return name
+
+
+def iter_accident_chunks(path: str, chunksize: int) -> Iterator[pd.DataFrame]:
+    """
+    Streams an accidents CSV (plain or zipped; pandas infers the compression) in chunks.
+    Each chunk gets stable `record_id` / `row` columns so runs can be resumed.
+    """
+    source = _source_name(path)
+    for chunk in pd.read_csv(path, chunksize=chunksize, dtype=str, keep_default_na=False, encoding='utf-8'):
+        chunk = chunk.copy()
+        chunk["row"] = chunk.index
+        chunk["record_id"] = [f"{source}:{row}" for row in chunk.index]
+        chunk["source"] = source
+        yield chunk
+
+
+def load_completed_rows(output_path: str) -> Dict[str, dict]:
+    """Rows already committed to the output file (the resume checkpoint), by record_id."""
+    if not os.path.exists(output_path):
+        return {}
+    completed = {}
+    for chunk in pd.read_csv(output_path, chunksize=50000, dtype=str, keep_default_na=False):
+        completed.update((row["record_id"], row) for row in chunk.to_dict("records"))
+    return completed
+
+
+def _result_row(record: dict, result: dict) -> dict:
+    findings = result.get("intermediate_findings", {})
+    return {
+        "record_id": record["record_id"],
+        "source": record["source"],
+        "row": record["row"],
+        "Date": record.get("Date", ""),
+        "Operator": record.get("Operator", ""),
+        "AC Type": record.get("AC Type", ""),
+        "hfacs_level": result["hfacs_level"],
+        "hfacs_confidence": result["hfacs_confidence"],
+        "hfacs_reasoning": result["hfacs_reasoning"],
+        "general_analyst": ", ".join(findings.get("General Analyst", [])),
+        "tech_ops_specialist": ", ".join(findings.get("Tech/Ops Specialist", [])),
+        "maint_org_specialist": ", ".join(findings.get("Maint/Org Specialist", [])),
+        "classified_by": ("local" if FAST_CLASSIFIER_LABEL in findings else "panel") if findings else "",
+        "duplicate_of": "",
+        "similarity": "",
+    }
+
+
+def _duplicate_row(record: dict, representative_row: dict, similarity: float) -> dict:
+    """Reuses the representative's labels for a near-duplicate summary."""
+    row = {key: record.get(key, "") for key in ("record_id", "source", "row", "Date", "Operator", "AC Type")}
+    row.update({key: representative_row[key] for key in LABEL_COLUMNS})
+    row["duplicate_of"] = representative_row["record_id"]
+    row["similarity"] = similarity
+    return row
+
+
+def panel_records_per_minute(risk_engine: RiskTriageEngine, panel_batch_size: int, requests_per_minute: float,
+                             tokens_per_minute: float) -> float:
+    """
+    Records per minute the model quota allows: each panel batch costs one request per stage and
+    the stage templates once, so the request bound grows with the batch size and the token bound
+    approaches tokens_per_minute / PANEL_TOKENS_PER_RECORD.
+    """
+    stages = [risk_engine.general_analyst, risk_engine.tech_ops_specialist, risk_engine.maint_org_specialist,
+              risk_engine.final_adjudicator]
+    template_tokens = sum(estimate_tokens(stage.prompt_template) for stage in stages)
+    tokens_per_record = template_tokens / panel_batch_size + PANEL_TOKENS_PER_RECORD
+    return min(requests_per_minute * panel_batch_size / len(stages), tokens_per_minute / tokens_per_record)
+
+
+def classify_records(risk_engine: RiskTriageEngine, records: List[dict], executor: ThreadPoolExecutor,
+                     panel_batch_size: int) -> List[dict]:
+    """Runs the expert panel on one chunk of records, concurrently (per record) or in multi-record requests."""
+    with_summary = [r for r in records if r.get("Summary", "").strip()]
+    results: Dict[str, dict] = {
+        r["record_id"]: {"hfacs_level": "No Summary", "hfacs_confidence": 0, "hfacs_reasoning": "NONE"}
+        for r in records if not r.get("Summary", "").strip()
+    }
+    contexts = {r["record_id"]: {c: r[c] for c in CONTEXT_COLUMNS if r.get(c)} for r in with_summary}
+
+    if panel_batch_size > 1:
+        groups = [with_summary[i:i + panel_batch_size] for i in range(0, len(with_summary), panel_batch_size)]
+        futures = [executor.submit(risk_engine.analyze_texts,
+                                   {r["record_id"]: r["Summary"] for r in group},
+                                   {r["record_id"]: contexts[r["record_id"]] for r in group})
+                   for group in groups]
+        for future in futures:
+            results.update(future.result())
+    else:
+        futures = {r["record_id"]: executor.submit(risk_engine.analyze_text, r["Summary"], contexts[r["record_id"]])
+                   for r in with_summary}
+        results.update({record_id: future.result() for record_id, future in futures.items()})
+
+    return [_result_row(r, results[r["record_id"]]) for r in records]
+
+
+def classify_file(risk_engine: RiskTriageEngine, input_path: str, output_dir: str, chunksize: int, workers: int,
+                  panel_batch_size: int, resume: bool, limit: int = None, dedupe_index: NearDuplicateIndex = None,
+                  labelled_rows: Dict[str, dict] = None) -> dict:
+    """
+    Classifies one accidents file. Results are appended (and flushed) after every chunk, so an
+    interrupted run loses at most one chunk; API errors are not committed and get retried on resume.
+
+    With a `dedupe_index`, only the first summary of each near-duplicate cluster goes to the panel;
+    the others copy its labels (with `duplicate_of` / `similarity` recorded). `labelled_rows` holds
+    the representatives' rows and should be shared across the files of one run.
+    """
+    output_path = os.path.join(output_dir, f"{_source_name(input_path)}_classified.csv")
+    completed = load_completed_rows(output_path) if resume else {}
+    if not resume and os.path.exists(output_path):
+        os.remove(output_path)
+    labelled_rows = {} if labelled_rows is None else labelled_rows
+    labelled_rows.update(completed)
+    print(f"\n--- Classifying '{input_path}' -> '{output_path}' ({len(completed)} records already done) ---")
+
+    counts = {"classified": 0, "skipped": len(completed), "errors": 0, "duplicates": 0}
+    write_header = not os.path.exists(output_path)
+    with open(output_path, "a", newline="", encoding="utf-8") as out, \
+            ThreadPoolExecutor(max_workers=workers, thread_name_prefix="panel") as executor:
+        writer = csv.DictWriter(out, fieldnames=OUTPUT_COLUMNS)
+        if write_header:
+            writer.writeheader()
+        progress = tqdm(desc=_source_name(input_path), unit="records")
+        for chunk in iter_accident_chunks(input_path, chunksize):
+            records = chunk.to_dict("records")
+            if dedupe_index is not None:
+                # Completed records are re-indexed too, so a resumed run forms the same clusters.
+                for r in records:
+                    if r["record_id"] in completed and r.get("Summary", "").strip():
+                        dedupe_index.add(r["record_id"], r["Summary"])
+            records = [r for r in records if r["record_id"] not in completed]
+            if limit is not None:
+                records = records[:max(0, limit - counts["classified"] - counts["errors"])]
+            if not records:
+                progress.update(len(chunk))
+                if limit is not None and counts["classified"] + counts["errors"] >= limit:
+                    break
+                continue
+
+            assignments = {}
+            if dedupe_index is not None:
+                assignments = {r["record_id"]: dedupe_index.add(r["record_id"], r["Summary"])
+                               for r in records if r.get("Summary", "").strip()}
+            to_classify = [r for r in records if assignments.get(r["record_id"], (r["record_id"],))[0] == r["record_id"]]
+            classified = classify_records(risk_engine, to_classify, executor, panel_batch_size)
+            labelled_rows.update((row["record_id"], row) for row in classified)
+
+            rows = []
+            for r in records:
+                representative, similarity = assignments.get(r["record_id"], (r["record_id"], 1.0))
+                if representative == r["record_id"]:
+                    rows.append(labelled_rows[r["record_id"]])
+                elif representative in labelled_rows:
+                    rows.append(_duplicate_row(r, labelled_rows[representative], similarity))
+                    counts["duplicates"] += 1
+                # else: the representative failed in an earlier chunk; retried with it on the next run
+            good_rows = [row for row in rows if not str(row["hfacs_level"]).startswith("API_Error")]
+            writer.writerows(good_rows)
+            out.flush()
+            os.fsync(out.fileno())
+            counts["classified"] += len(good_rows)
+            counts["errors"] += len(records) - len(good_rows)
+            progress.update(len(chunk))
+        progress.close()
+    counts["output_path"] = output_path
+    return counts
+
+
+def main():
+    """
+    Streams the historical accidents datasets through the HFACS expert panel.
+    """
+    parser = argparse.ArgumentParser(description="Bulk HFACS classification of historical accident summaries.")
+    parser.add_argument("--input", type=str, nargs='+', default=DEFAULT_INPUTS, help="Accident CSV file(s), plain or .zip.")
+    parser.add_argument("--output_dir", type=str, default=DEFAULT_OUTPUT_DIR, help="Directory for the classified CSVs.")
+    parser.add_argument("--chunksize", type=int, default=400, help="Rows read (and committed) per chunk.")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent expert panel calls.")
+    parser.add_argument("--panel_batch_size", type=int, default=DEFAULT_PANEL_BATCH_SIZE,
+                        help="Summaries packed into each panel request (1 sends them one by one, 4 requests per record).")
+    parser.add_argument("--limit", type=int, default=None, help="(Optional) Classify at most this many new records per file.")
+    parser.add_argument("--no_resume", action="store_true", help="Start over instead of skipping records already in the output.")
+    parser.add_argument("--panel_cache_file", type=str, default=os.path.join(DEFAULT_OUTPUT_DIR, "panel_cache.json"),
+                        help="JSON file that persists expert panel results across runs.")
+    parser.add_argument("--requests_per_minute", type=int, default=DEFAULT_REQUESTS_PER_MINUTE, help="Model request quota.")
+    parser.add_argument("--tokens_per_minute", type=int, default=DEFAULT_TOKENS_PER_MINUTE, help="Model token quota.")
+    parser.add_argument("--dedupe_threshold", type=float, default=0.85,
+                        help="Similarity above which near-duplicate summaries reuse one panel result (0 disables).")
+    parser.add_argument("--fast_model", type=str, default=None,
+                        help="(Optional) Local pre-classifier (.npz from fast_classifier.py); the panel only sees low-confidence summaries.")
+    parser.add_argument("--fast_min_confidence", type=float, default=0.95, help="Confidence the pre-classifier needs to skip the panel.")
+    parser.add_argument("--stub_backend", action="store_true", help="Dry run against the local stub backend (no GCP calls).")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging_from_args(args)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    rate_limiter = configure_rate_limiter(args.requests_per_minute, args.tokens_per_minute)
+    panel_cache = ClassificationCache(args.panel_cache_file)
+    model = None
+    if args.stub_backend:
+        from src.data_analysis.analysis_modules.resilience import ResilientModel
+        from src.data_analysis.analysis_modules.stub_backend import FaultInjectingBackend
+        model = ResilientModel(FaultInjectingBackend())
+    risk_engine = RiskTriageEngine(
+        project_id=PROJECT_ID,
+        location=LOCATION,
+        credentials_path=CREDENTIALS_PATH,
+        result_cache=panel_cache,
+        model=model,
+        fast_classifier=FastHFACSClassifier.load(args.fast_model) if args.fast_model else None,
+        fast_min_confidence=args.fast_min_confidence
+    )
+
+    dedupe_index = NearDuplicateIndex(threshold=args.dedupe_threshold) if args.dedupe_threshold > 0 else None
+    records_per_minute = panel_records_per_minute(risk_engine, args.panel_batch_size, args.requests_per_minute,
+                                                  args.tokens_per_minute)
+    print(f"Quota of {args.requests_per_minute} req/min and {args.tokens_per_minute} tokens/min: ~{records_per_minute:.0f} "
+          f"records/min through the panel at {args.panel_batch_size} per request (~{5000 / records_per_minute:.0f} min "
+          f"per 5,000 records before cache hits and near-duplicates).")
+    labelled_rows = {}
+
+    start = time.perf_counter()
+    try:
+        for input_path in args.input:
+            counts = classify_file(risk_engine, input_path, args.output_dir, args.chunksize, args.workers,
+                                   args.panel_batch_size, resume=not args.no_resume, limit=args.limit,
+                                   dedupe_index=dedupe_index, labelled_rows=labelled_rows)
+            print(f"Classified {counts['classified']} records ({counts['duplicates']} as near-duplicates, "
+                  f"{counts['skipped']} already done, {counts['errors']} API errors left for the next run) "
+                  f"-> {counts['output_path']}")
+    finally:
+        panel_cache.save()
+    if dedupe_index is not None:
+        print(f"Near-duplicate index: {dedupe_index.stats()}")
+    if risk_engine.fast_classifier is not None:
+        print(f"Fast pre-classifier: {risk_engine.fast_path_stats}")
+    limiter_stats = rate_limiter.stats()
+    print(f"\nFinished in {time.perf_counter() - start:.1f}s. Rate limiter waited {limiter_stats['total_wait_seconds']}s, "
+          f"{limiter_stats['rate_limited_count']} rate-limit responses.")
+
+
+if __name__ == "__main__":
+    main()
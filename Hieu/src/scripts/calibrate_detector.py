@@ -0,0 +1,106 @@
+import os
+import sys
+import argparse
+import time
+from datetime import datetime
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import pandas as pd
+
+# --- Path Management ---
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+for _path in (_PROJECT_ROOT, os.path.join(_PROJECT_ROOT, 'src')):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from src.data_analysis.analysis_modules.detector_calibration import (
+    DEFAULT_NUM_THRESHOLDS, LabeledFlightSet, calibrate, default_thresholds
+)
+from src.data_analysis.analysis_modules.logging_utils import get_logger, add_logging_arguments, configure_logging_from_args
+
+logger = get_logger("calibrate_detector")
+
+DEFAULT_OUTPUT_DIR = os.path.join(_PROJECT_ROOT, "outputs", "project_outputs", "calibration")
+
+
+def plot_calibration(result: dict, output_path: str):
+    """ROC, precision-recall and current-threshold delay distribution, one row per rule with flights of both kinds."""
+    summary = result["summary"]
+    rules = summary.loc[(summary["positives"] > 0) & (summary["negatives"] > 0), "rule"].tolist()
+    if not rules:
+        logger.warning("No rule has both positive and negative flights; nothing to plot.")
+        return None
+    fig, axes = plt.subplots(len(rules), 3, figsize=(15, 3.5 * len(rules)), squeeze=False)
+    for row, rule in zip(axes, rules):
+        curve = result["curves"][result["curves"]["rule"] == rule].sort_values(["fpr", "tpr"])
+        info = summary[summary["rule"] == rule].iloc[0]
+        row[0].plot(curve["fpr"], curve["tpr"], marker='.', color='blue')
+        row[0].plot([info["current_fpr"]], [info["current_tpr"]], 'o', color='red', label=f"current {info['current_threshold']:g} {info['unit']}")
+        row[0].set_title(f"{rule} ROC (AUC {info['roc_auc']:.3f})")
+        row[0].set_xlabel("False positive rate")
+        row[0].set_ylabel("True positive rate")
+        row[0].legend(loc='lower right')
+        row[0].set_xlim(-0.02, 1.02)
+        row[0].set_ylim(-0.02, 1.02)
+        curve = curve.sort_values("recall")
+        row[1].plot(curve["recall"], curve["precision"], marker='.', color='purple')
+        row[1].set_title(f"{rule} precision-recall")
+        row[1].set_xlabel("Recall")
+        row[1].set_ylabel("Precision")
+        row[1].set_xlim(-0.02, 1.02)
+        row[1].set_ylim(-0.02, 1.02)
+        delays = result["delays"].loc[result["delays"]["rule"] == rule, "delay_s"]
+        row[2].hist(delays, bins=30, color='green')
+        row[2].set_title(f"{rule} detection delay at {info['current_threshold']:g} {info['unit']}")
+        row[2].set_xlabel("Seconds from onset to first alarm")
+        for ax in row:
+            ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(output_path)
+    plt.close(fig)
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sweep the anomaly rules' thresholds over a labeled simulated flight set.")
+    parser.add_argument("--scenarios", type=str, default=None, help="Comma separated scenarios (default: all).")
+    parser.add_argument("--flights_per_scenario", type=int, default=50, help="Seeded flights of each scenario.")
+    parser.add_argument("--variants", type=int, default=50, help="Variants of each scenario template.")
+    parser.add_argument("--seconds", type=int, default=600, help="Flight length in seconds.")
+    parser.add_argument("--hz", type=int, default=1, help="Sample rate.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the flights and template variants.")
+    parser.add_argument("--rules", type=str, default=None, help="Comma separated rules to sweep (default: all thresholded rules).")
+    parser.add_argument("--num_thresholds", type=int, default=DEFAULT_NUM_THRESHOLDS, help="Grid points per rule.")
+    parser.add_argument("--output_dir", type=str, default=DEFAULT_OUTPUT_DIR, help="Directory for the CSVs and the chart.")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging_from_args(args)
+
+    started = time.perf_counter()
+    flight_set = LabeledFlightSet.simulate(args.scenarios.split(",") if args.scenarios else None, args.flights_per_scenario,
+                                           args.variants, args.seconds, args.hz, args.seed)
+    simulated = time.perf_counter()
+    rules = args.rules.split(",") if args.rules else list(flight_set.sweeps)
+    grids = {rule: default_thresholds(flight_set.scores(rule), flight_set.sweeps[rule], args.num_thresholds) for rule in rules}
+    result = calibrate(flight_set, rules, grids)
+    swept = time.perf_counter()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+    for key in ("curves", "summary", "delays", "flights"):
+        result[key].to_csv(os.path.join(args.output_dir, f"calibration_{key}_{timestamp}.csv"), index=False)
+    chart = plot_calibration(result, os.path.join(args.output_dir, f"calibration_chart_{timestamp}.png"))
+
+    print(f"{len(flight_set)} labeled flights simulated in {simulated - started:.1f}s; "
+          f"{len(result['curves'])} thresholds over {len(rules)} rules swept in {swept - simulated:.2f}s")
+    columns = ["rule", "positives", "negatives", "roc_auc", "current_threshold", "current_tpr", "current_fpr",
+               "current_delay_median_s", "best_f1_threshold", "best_f1"]
+    with pd.option_context('display.width', 200, 'display.max_columns', None):
+        print(result["summary"][columns].to_string(index=False))
+    print(f"Results: {args.output_dir}" + (f" (chart {os.path.basename(chart)})" if chart else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+import os
+import sys
+import argparse
+import time
+import tracemalloc
+from datetime import datetime
+
+# --- Path Management ---
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+for _path in (_PROJECT_ROOT, os.path.join(_PROJECT_ROOT, 'src')):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+from src.data_simulation.data_input_simulator.telemetry_generator import TelemetryGenerator, DEFAULT_BLOCK_SIZE
+from src.data_simulation.data_input_simulator.columnar_store import ColumnarTelemetryWriter
+from src.data_analysis.analysis_modules.anomaly_detector import AnomalyDetector
+from src.data_analysis.analysis_modules.statistical_detectors import default_statistical_detectors
+from src.data_analysis.analysis_modules.envelope_index import EnvelopeDetector
+from src.data_analysis.analysis_modules.streaming_detector import StreamingAnomalyDetector
+from src.data_analysis.analysis_modules.logging_utils import get_logger, add_logging_arguments, configure_logging_from_args
+
+logger = get_logger("chunked_flight")
+
+DEFAULT_OUTPUT_DIR = os.path.join(_PROJECT_ROOT, "outputs", "project_outputs", "chunked_flights")
+
+
+def run_chunked_flight(scenario: str, total_flight_seconds: int, data_frequency_hz: int,
+                       block_size: int, output_dir: str, seed: int = 0, statistical: bool = False,
+                       envelope: bool = False) -> dict:
+    """
+    Generates one flight block by block, appending each block to a columnar store and feeding it
+    to the streaming detector; no step holds more than one block of telemetry.
+
+    Returns:
+        dict: {"rows", "blocks", "anomalies", "bytes_on_disk", "output_dir", "seconds"}
+    """
+    config = dict(ScenarioLoader().load(scenario))
+    generator = TelemetryGenerator(config, total_flight_seconds, data_frequency_hz)
+    extra = default_statistical_detectors() if statistical else []
+    if envelope:
+        extra.append(EnvelopeDetector(flight_seconds=total_flight_seconds))
+    detector = StreamingAnomalyDetector(AnomalyDetector(extra))
+    started = time.perf_counter()
+    blocks = 0
+    with ColumnarTelemetryWriter(output_dir) as writer:
+        for block in generator.iter_blocks(block_size, seed=seed):
+            writer.write(block)
+            detector.update(block)
+            blocks += 1
+    anomalies = detector.finish()
+    bytes_on_disk = sum(os.path.getsize(os.path.join(output_dir, name)) for name in os.listdir(output_dir))
+    return {
+        "rows": writer.rows,
+        "blocks": blocks,
+        "anomalies": anomalies,
+        "bytes_on_disk": bytes_on_disk,
+        "output_dir": output_dir,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate and screen a long flight in fixed-size blocks.")
+    parser.add_argument("--scenario", type=str, default="normal_flight", help="Scenario to simulate.")
+    parser.add_argument("--hours", type=float, default=2.0, help="Flight length in hours.")
+    parser.add_argument("--hz", type=int, default=10, help="Sample rate.")
+    parser.add_argument("--block_size", type=int, default=DEFAULT_BLOCK_SIZE, help="Samples per block.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the noise channels and pick_random triggers.")
+    parser.add_argument("--output_dir", type=str, default=None, help="Directory for the columnar telemetry.")
+    parser.add_argument("--measure_memory", action="store_true", help="Report peak Python memory (tracemalloc; slower).")
+    parser.add_argument("--statistical", action="store_true", help="Also run the EWMA/CUSUM/z-score change detectors.")
+    parser.add_argument("--envelope", action="store_true", help="Also check the per-phase fleet envelopes (config/envelopes).")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging_from_args(args)
+
+    output_dir = args.output_dir or os.path.join(
+        DEFAULT_OUTPUT_DIR, f"{args.scenario}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+    if args.measure_memory:
+        tracemalloc.start()
+    result = run_chunked_flight(args.scenario, int(args.hours * 3600), args.hz, args.block_size, output_dir, args.seed,
+                                args.statistical, args.envelope)
+    peak = tracemalloc.get_traced_memory()[1] if args.measure_memory else None
+    if args.measure_memory:
+        tracemalloc.stop()
+
+    print(f"Scenario: {args.scenario} ({result['rows']} samples in {result['blocks']} blocks, {result['seconds']:.1f}s)")
+    print(f"Detected anomalies: {result['anomalies'] or 'none'}")
+    print(f"Columnar telemetry: {result['output_dir']} ({result['bytes_on_disk'] / 2 ** 20:.1f} MiB)")
+    if peak is not None:
+        print(f"Peak traced memory: {peak / 2 ** 20:.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
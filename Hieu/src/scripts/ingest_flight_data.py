@@ -0,0 +1,75 @@
+import os
+import sys
+import argparse
+from typing import List
+
+# --- Path Management ---
+_PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+for _path in (_PROJECT_ROOT, os.path.join(_PROJECT_ROOT, 'src')):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from src.data_analysis.analysis_modules.flight_data_ingest import (
+    ChannelMap, DEFAULT_CHUNK_ROWS, PARQUET_SUFFIXES, ingest_flight_file
+)
+from src.data_analysis.analysis_modules.run_catalog import DEFAULT_CATALOG_PATH, RunCatalog, source_fingerprint
+from src.data_analysis.analysis_modules.statistical_detectors import default_statistical_detectors
+from src.data_analysis.analysis_modules.logging_utils import get_logger, add_logging_arguments, configure_logging_from_args
+
+logger = get_logger("ingest_flight_data")
+
+DEFAULT_STORE_DIR = os.path.join(_PROJECT_ROOT, "outputs", "project_outputs", "ingested_flights")
+RECORDING_SUFFIXES = (".csv", ".csv.gz", ".zip") + PARQUET_SUFFIXES
+
+
+def find_recordings(paths: List[str]) -> List[str]:
+    """Files given directly, plus the CSV/Parquet recordings under any directories given."""
+    found = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                found.extend(os.path.join(root, name) for name in sorted(files) if name.lower().endswith(RECORDING_SUFFIXES))
+        else:
+            found.append(path)
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream recorded flight data through the anomaly rules and catalog the runs.")
+    parser.add_argument("paths", nargs='+', help="Recording files (CSV, CSV.gz, Parquet) or directories of them.")
+    parser.add_argument("--channel_map", type=str, default="identity",
+                        help="Channel map name in config/channel_maps, or a path to a map JSON file.")
+    parser.add_argument("--chunk_rows", type=int, default=DEFAULT_CHUNK_ROWS, help="Samples parsed per chunk.")
+    parser.add_argument("--catalog", type=str, default=DEFAULT_CATALOG_PATH, help="Run catalog CSV.")
+    parser.add_argument("--store", action="store_true", help="Also write each flight's mapped telemetry as a columnar store.")
+    parser.add_argument("--store_dir", type=str, default=DEFAULT_STORE_DIR, help="Parent directory for --store.")
+    parser.add_argument("--force", action="store_true", help="Ingest files the catalog already lists, unchanged.")
+    parser.add_argument("--statistical", action="store_true", help="Also run the EWMA/CUSUM/z-score change detectors.")
+    add_logging_arguments(parser)
+    args = parser.parse_args()
+    configure_logging_from_args(args)
+
+    channel_map = ChannelMap.load(args.channel_map)
+    catalog = RunCatalog(args.catalog)
+    recordings = find_recordings(args.paths)
+    print(f"Ingesting {len(recordings)} recording(s) with channel map '{channel_map.name}'")
+    for path in recordings:
+        fingerprint = source_fingerprint(path)
+        previous = None if args.force else catalog.find(fingerprint, kind="ingest")
+        if previous is not None:
+            print(f"  {path}: unchanged since run {previous['run_id']}, skipped (anomalies: {previous['anomalies'] or 'none'})")
+            continue
+        store_dir = os.path.join(args.store_dir, fingerprint) if args.store else None
+        try:
+            result = ingest_flight_file(path, channel_map, args.chunk_rows, catalog=catalog, store_dir=store_dir,
+                                        statistical_detectors=default_statistical_detectors() if args.statistical else None)
+        except (ValueError, ImportError) as e:
+            logger.error("Could not ingest %s: %s", path, e)
+            continue
+        print(f"  {path}: {result['rows']} samples, {result['mb_per_s']:.1f} MiB/s, "
+              f"anomalies {result['anomalies'] or 'none'} (run {result['run_id']})")
+    print(f"Run catalog: {args.catalog}")
+
+
+if __name__ == "__main__":
+    main()
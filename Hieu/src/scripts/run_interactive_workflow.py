@@ -3,7 +3,6 @@ import sys
 import subprocess
 import time
 import json # Added for saving JSON output
-import pandas as pd # Added for reading telemetry data
 
 # --- Pre-computation and Imports ---
 # Add project root to Python path to ensure modules are found
@@ -19,6 +18,7 @@ from tests.test_hfacs_analyzer import (
 )
 from src.data_simulation.data_input_simulator.telemetry_generator import plot_scenario_telemetry
 from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader # Needed to load scenario config for plotting
+from src.data_simulation.data_input_simulator.telemetry_schema import load_telemetry
 
 # --- Configuration ---
 SCENARIOS_DIR = os.path.join(PROJECT_ROOT, "config", "scenarios", "scenarios")
@@ -157,7 +157,7 @@ def run_full_workflow_for_scenario(scenario_name: str, risk_engine: RiskTriageEn
             # Load telemetry data
             simulation_output_dir = os.path.join(PROJECT_ROOT, "project_outputs", "simulation_runs", scenario_name)
             telemetry_path = os.path.join(simulation_output_dir, 'telemetry.csv')
-            telemetry_data = pd.read_csv(telemetry_path)
+            telemetry_data = load_telemetry(telemetry_path)
 
             # Load scenario config
             loader = ScenarioLoader()
@@ -4,7 +4,7 @@ import time
 import random
 import webbrowser
 from threading import Thread, Event, Timer
-from flask import Flask, render_template, request, send_from_directory
+from flask import Flask, render_template, request, send_from_directory, jsonify
 from flask_socketio import SocketIO
 
 # --- Matplotlib Backend Configuration ---
@@ -23,164 +23,98 @@ from src.data_simulation.data_input_simulator.telemetry_generator import Telemet
 from src.data_simulation.data_input_simulator.document_generator import DocumentGenerator
 from src.data_simulation.data_input_simulator.ground_truth_generator import GroundTruthGenerator
 from src.data_analysis.analysis_modules.anomaly_detector import AnomalyDetector
-from src.data_analysis.analysis_modules.hfacs_analyzer import HFACSAnalyzer, HFACS_RUBRIC
+from src.data_simulation.data_input_simulator.main_simulator import classify_documents
+from src.data_analysis.analysis_modules.hfacs_analyzer import HFACSAnalyzer
+from src.data_analysis.analysis_modules.panel_cache import ClassificationCache
+from src.data_analysis.analysis_modules.downsampling import downsampled_payload, DEFAULT_MAX_POINTS, DOWNSAMPLING_METHODS
+from src.data_analysis.analysis_modules.logging_utils import get_logger, configure_logging
+from src.web_dashboard.dashboard_frames import iter_dashboard_frames
+
+logger = get_logger("web_dashboard")
 
 # --- Flask App Setup ---
 app = Flask(__name__)
-print("DEBUG: Flask app created.")
+logger.debug("Flask app created.")
 socketio = SocketIO(app, async_mode='eventlet')
-print("DEBUG: SocketIO initialized.")
+logger.debug("SocketIO initialized.")
 thread = None
 thread_stop_event = Event()
+# Telemetry of the flight currently being replayed, served decimated by /api/telemetry.
+current_telemetry = {"scenario_name": None, "frame": None}
+# Replaying the same scenario does not re-classify identical documents.
+classification_cache = ClassificationCache()
+
+# --- GCP Configuration (Replace with your actual values) ---
+GCP_PROJECT_ID = "aviation-classifier-sa"  # Replace with your GCP Project ID
+GCP_LOCATION = "us-central1"
+GCP_CREDENTIALS_PATH = os.path.join(_PROJECT_ROOT, 'config', 'secrets', 'gcloud_credentials.json')
+HFACS_PROMPT_PATH = os.path.join(_PROJECT_ROOT, 'config', 'prompts', 'prompts', 'hfacs_analyzer_prompt.txt')
+_hfacs_analyzer = None
+
+
+def get_hfacs_analyzer() -> HFACSAnalyzer:
+    """Builds the dashboard's analyzer on first use and reuses it for every later simulation."""
+    global _hfacs_analyzer
+    if _hfacs_analyzer is None or not _hfacs_analyzer.model:
+        _hfacs_analyzer = HFACSAnalyzer(
+            project_id=GCP_PROJECT_ID,
+            location=GCP_LOCATION,
+            credentials_path=GCP_CREDENTIALS_PATH,
+            prompt_path=HFACS_PROMPT_PATH,
+            project_root=_PROJECT_ROOT
+        )
+    return _hfacs_analyzer
 
-# --- Expert Upgrade Config ---
-ANOMALY_PRIORITY_MAP = {
-    "GREEN_HYDRAULIC_LOSS": "HIGH",
-    "FLAP_STUCK": "HIGH",
-    "G_FORCE_ANOMALY": "HIGH",
-    "CRITICAL_ECAM_ALERT": "HIGH",
-    "DEFAULT": "MEDIUM"
-}
-
-ANOMALY_FRIENDLY_NAMES = {
-    "GREEN_HYDRAULIC_LOSS": "Green Hydraulic System Loss",
-    "FLAP_STUCK": "Flap Stuck/Unresponsive",
-    "G_FORCE_ANOMALY": "Unusual G-Force Detected",
-    "CRITICAL_ECAM_ALERT": "Critical ECAM Alert",
-    "FLAP_ASYMMETRY": "Flap Asymmetry",
-    "MOTOR_CURRENT_FAILURE": "Flap Motor Current Failure",
-    "SENSOR_FAILURE": "Sensor Failure",
-    "ENGINE_VIBRATION_EXCEEDANCE": "Engine Vibration Exceedance",
-    "ENGINE_EGT_EXCEEDANCE": "Engine EGT Exceedance",
-    "CABIN_ALTITUDE_EXCEEDANCE": "Cabin Altitude Exceedance",
-    "G_FORCE_EXCEEDANCE": "G-Force Exceedance",
-}
-
-ANOMALY_PROCEDURES = {
-    "GREEN_HYDRAULIC_LOSS": [
-        "1. Notify Flight Crew of System Loss.",
-        "2. Advise on available alternate airports.",
-        "3. Coordinate with Maintenance Control."
-    ],
-    "FLAP_STUCK": [
-        "1. Notify Flight Crew of Flap Malfunction.",
-        "2. Advise on flapless landing procedures.",
-        "3. Prepare for emergency services on arrival."
-    ],
-    "G_FORCE_ANOMALY": [
-        "1. Notify Flight Crew of G-Force Exceedance.",
-        "2. Advise on smooth flight path adjustments.",
-        "3. Log event for post-flight inspection."
-    ],
-    "CRITICAL_ECAM_ALERT": [
-        "1. Acknowledge ECAM alert with Flight Crew.",
-        "2. Monitor system parameters closely.",
-        "3. Prepare for relevant emergency procedures."
-    ],
-    "DEFAULT": [
-        "1. Monitor system parameters.",
-        "2. Await further instructions from Flight Crew."
-    ]
-}
-
-# G-Force monitoring thresholds
-MAX_G_FORCE_THRESHOLD = 1.5
-MIN_G_FORCE_THRESHOLD = 0.5
-
-# --- Simulation Logic (v4.0 - Full Expert Integration) ---
-def get_flight_phase(timestamp: float) -> str:
-    if timestamp < 5: return "TAXI/TAKEOFF"
-    elif timestamp < 20: return "CLIMB"
-    elif timestamp < 90: return "CRUISE"
-    elif timestamp < 115: return "DESCENT"
-    elif timestamp < 125: return "FINAL APPROACH"
-    elif timestamp < 135: return "LANDED / ROLLOUT"
-    else: return "SHUTDOWN"
-
+# --- Simulation Logic (v4.0 - Full Expert Integration; frame building lives in dashboard_frames.py) ---
 def run_simulation():
     speed_multiplier = 2.0
     flight_id = "VN-A688"
 
-    scenarios_path = os.path.join(_PROJECT_ROOT, 'config', 'scenarios', 'scenarios')
-    print(f"DEBUG: Scenarios path: {scenarios_path}")
+    # The loader is backed by the shared scenario registry, so repeated runs don't re-parse the files.
+    loader = ScenarioLoader()
     try:
-        all_scenarios = [f.replace('.json', '') for f in os.listdir(scenarios_path) if f.endswith('.json') and f != 'normal_flight.json']
-        print(f"DEBUG: Found scenarios: {all_scenarios}")
+        all_scenarios = [name for name in loader.list_scenarios() if name != 'normal_flight']
+        logger.debug("Found scenarios: %s", all_scenarios)
         scenario_name = random.choice(all_scenarios)
+        config = loader.load(scenario_name)
     except Exception as e:
-        print(f"DEBUG: Scenario loading failed with error: {e}")
+        logger.error("Scenario loading failed with error: %s", e)
         socketio.emit('update', {'error': f"Scenario loading failed: {e}"})
         return
 
-    loader = ScenarioLoader()
-    config = loader.load(scenario_name)
-    print(f"DEBUG: Scenario config loaded for: {scenario_name}")
+    logger.debug("Scenario config loaded for: %s", scenario_name)
     telemetry_gen = TelemetryGenerator(config)
     full_telemetry_df = telemetry_gen.generate()
-    print(f"DEBUG: Telemetry generated. Shape: {full_telemetry_df.shape}")
+    logger.debug("Telemetry generated. Shape: %s", full_telemetry_df.shape)
+    current_telemetry["scenario_name"] = scenario_name
+    current_telemetry["frame"] = full_telemetry_df
     anomaly_detector = AnomalyDetector()
     all_anomalies = anomaly_detector.detect(full_telemetry_df.copy())
 
-    # Generate and save the telemetry plot for the current scenario
-    # --- GCP Configuration (Replace with your actual values) ---
-    GCP_PROJECT_ID = "aviation-classifier-sa"  # Replace with your GCP Project ID
-    GCP_LOCATION = "us-central1"
-    GCP_CREDENTIALS_PATH = os.path.join(_PROJECT_ROOT, 'config', 'secrets', 'gcloud_credentials.json')
-    HFACS_PROMPT_PATH = os.path.join(_PROJECT_ROOT, 'config', 'prompts', 'prompts', 'hfacs_analyzer_prompt.txt')
-
     try:
-        hfacs_analyzer = HFACSAnalyzer(
-            project_id=GCP_PROJECT_ID,
-            location=GCP_LOCATION,
-            credentials_path=GCP_CREDENTIALS_PATH,
-            prompt_path=HFACS_PROMPT_PATH,
-            project_root=_PROJECT_ROOT
-        )
+        hfacs_analyzer = get_hfacs_analyzer()
         if not hfacs_analyzer.model:
-            print("[ERROR] HFACSAnalyzer could not be initialized. Check GCP credentials and project settings.")
+            logger.error("HFACSAnalyzer could not be initialized. Check GCP credentials and project settings.")
             socketio.emit('update', {'error': "HFACSAnalyzer initialization failed."})
             return
     except Exception as e:
-        print(f"[ERROR] HFACSAnalyzer initialization failed: {e}")
+        logger.error("HFACSAnalyzer initialization failed: %s", e)
         socketio.emit('update', {'error': f"HFACSAnalyzer initialization failed: {e}"})
         return
 
     doc_gen = DocumentGenerator(config)
     ground_truth_gen = GroundTruthGenerator(config)
 
-    print("\n[2/4] Generating Document Data...")
+    logger.info("[2/4] Generating Document Data...")
     document_data = doc_gen.generate_all_documents()
 
-    # Perform HFACS classification on the narrative report
-    narrative_report_text = document_data["narrative_report"]
-    print("\n[2.5/4] Classifying Narrative Report with HFACS...")
-    combined_text = f"""Narrative Report:
-{document_data['narrative_report']}
-
-Maintenance Logs:
-{document_data['maintenance_logs']}
-
-Context Data:
-{document_data['context_data']}"""
-
-    hfacs_level, hfacs_confidence, level_scores, level_evidence_tags = hfacs_analyzer.analyze(
-        {
-            "combined_text": combined_text,
-            "ALL_EVIDENCE_TAGS": ", ".join(HFACS_RUBRIC.keys())
-        }
+    # Perform HFACS classification on the generated documents (cached per document set)
+    logger.info("[2.5/4] Classifying Narrative Report with HFACS...")
+    hfacs_level, hfacs_confidence, hfacs_reasoning = classify_documents(
+        hfacs_analyzer, document_data, cache=classification_cache
     )
-    score_breakdown_parts = []
-    level_names = ["Unsafe Acts", "Preconditions for Unsafe Acts", "Unsafe Supervision", "Organizational Influences"]
-    for i, name in enumerate(level_names):
-        level_key = f"Level {i+1}: {name}"
-        score = level_scores.get(level_key, 0)
-        score_breakdown_parts.append(f"L{i+1}({score})")
 
-    score_breakdown = "/".join(score_breakdown_parts)
-    hfacs_reasoning = f"{score_breakdown} | Evidence: {level_evidence_tags.get(hfacs_level, [])}"
-
-    print(f"  -> Classified as: {hfacs_level} (Confidence: {hfacs_confidence}%)")
-    print(f"  -> Reasoning: {hfacs_reasoning}")
+    logger.info("Classified as: %s (Confidence: %s%%) | Reasoning: %s", hfacs_level, hfacs_confidence, hfacs_reasoning)
 
     # Generate and save the telemetry plot for the current scenario
     plot_scenario_telemetry(
@@ -200,11 +134,11 @@ Context Data:
         'hfacs_reasoning': hfacs_reasoning
     })
 
-    print("\n[3/4] Generating Ground Truth Data...")
+    logger.info("[3/4] Generating Ground Truth Data...")
     ground_truth_data = ground_truth_gen.generate()
     # You can choose to save ground_truth_data or emit it if needed
-    print("\n[4/4] Assembling final data package...")
-    print("--- [COMPLETE] Simulation finished successfully. ---")
+    logger.info("[4/4] Assembling final data package...")
+    logger.info("--- [COMPLETE] Simulation finished successfully. ---")
 
     socketio.emit('scenario_loaded', {'scenario_name': scenario_name.replace('_', ' ').title()})
     socketio.emit('simulation_metadata', {
@@ -214,96 +148,9 @@ Context Data:
     })
     time.sleep(1)
 
-    triggered_anomalies = []
-    flight_status = "GREEN"
-    g_force_exceedance_logged = False
-
-    for index, row in full_telemetry_df.iterrows():
+    for data in iter_dashboard_frames(full_telemetry_df, all_anomalies, scenario_name, flight_id):
         if thread_stop_event.is_set(): break
-
-        current_time = int(row['timestamp'])
-        current_g_force = round(row['vertical_g_force'], 2)
-
-        data = {
-            "timestamp": current_time,
-            "phase": get_flight_phase(current_time),
-            "altitude": int(row['altitude_ft']),
-            "airspeed": int(row['airspeed_kts']),
-            "g_force": current_g_force,
-            "occ_messages": [],
-            "efb_messages": [],
-            "procedures": []
-        }
-
-        # Check for G-Force Exceedance
-        if (current_g_force > MAX_G_FORCE_THRESHOLD or current_g_force < MIN_G_FORCE_THRESHOLD) and not g_force_exceedance_logged:
-            g_force_exceedance_logged = True # Log only once per exceedance event
-            anomaly_name = "G_FORCE_EXCEEDANCE"
-            priority = ANOMALY_PRIORITY_MAP.get(anomaly_name, "MEDIUM")
-            if priority == "HIGH": flight_status = "RED"
-            elif flight_status != "RED": flight_status = "YELLOW"
-            
-            chart_name = scenario_name if "normal" not in scenario_name else "normal_flight"
-            chart_url = f"/outputs/project_outputs/analysis_charts/telemetry_chart_{chart_name}.png"
-
-            data['anomaly_details'] = {
-                "name": anomaly_name,
-                "friendly_name": ANOMALY_FRIENDLY_NAMES.get(anomaly_name, anomaly_name.replace('_', ' ')),
-                "timestamp": current_time,
-                "altitude": data['altitude'],
-                "airspeed": data['airspeed'],
-                "g_force": data['g_force'],
-                "priority": priority,
-                "chart_url": chart_url
-            }
-            data['procedures'].extend(ANOMALY_PROCEDURES.get(anomaly_name, ANOMALY_PROCEDURES["DEFAULT"]))
-
-        newly_triggered = [a for a in all_anomalies if a[1] == current_time and a not in triggered_anomalies]
-        if newly_triggered:
-            triggered_anomalies.extend(newly_triggered)
-            anomaly_name = newly_triggered[0][0]
-            priority = ANOMALY_PRIORITY_MAP.get(anomaly_name, "MEDIUM")
-            
-            if priority == "HIGH": flight_status = "RED"
-            elif flight_status != "RED": flight_status = "YELLOW"
-
-            chart_name = scenario_name if "normal" not in scenario_name else "normal_flight"
-            chart_url = f"/outputs/project_outputs/analysis_charts/telemetry_chart_{chart_name}.png"
-
-            data['anomaly_details'] = {
-                "name": anomaly_name,
-                "friendly_name": ANOMALY_FRIENDLY_NAMES.get(anomaly_name, anomaly_name.replace('_', ' ')),
-                "timestamp": current_time,
-                "altitude": data['altitude'],
-                "airspeed": data['airspeed'],
-                "g_force": data['g_force'],
-                "priority": priority,
-                "chart_url": chart_url
-            }
-            data['procedures'].extend(ANOMALY_PROCEDURES.get(anomaly_name, ANOMALY_PROCEDURES["DEFAULT"]))
-
-        data['flight_status'] = flight_status
-
-        if triggered_anomalies:
-            for anomaly_name, ts in triggered_anomalies:
-                priority = ANOMALY_PRIORITY_MAP.get(anomaly_name, "MEDIUM")
-                prefix = "CRITICAL ALERT" if priority == "HIGH" else "ALERT"
-                data['occ_messages'].append(f"[{flight_id} | OCC] {prefix}: {ANOMALY_FRIENDLY_NAMES.get(anomaly_name, anomaly_name.replace('_', ' '))} at {ts}s. Engineering review required.")
-                efb_map = {
-                    "FLAP_ASYMMETRY": "[ECAM] F/CTL FLAP SYS FAULT",
-                    "GREEN_HYDRAULIC_LOSS": "[ECAM] HYD G SYS LO PR",
-                    "SENSOR_FAILURE": "[ECAM] F/CTL FLAP/SLAT FAULT",
-                    "G_FORCE_ANOMALY": "[WARNING] UNUSUAL G-LOAD DETECTED",
-                    "MOTOR_CURRENT_FAILURE": "[ECAM] L FLAP MOTOR FAULT",
-                    "FLAP_STUCK": "[ECAM] F/CTL FLAPS LOCKED"
-                }
-                data['efb_messages'].append(efb_map.get(anomaly_name, f"[ALERT] {anomaly_name}"))
-            data['efb_messages'].append("[ACTION] Refer to QRH")
-        else:
-            data['occ_messages'].append(f"[{flight_id} | OCC] All systems nominal.")
-            data['efb_messages'].append("[STATUS] SYSTEMS NORMAL")
-
-        print(f"DEBUG: Emitting data for timestamp: {current_time}")
+        logger.debug("Emitting data for timestamp: %s", data['timestamp'])
         socketio.emit('update', data)
         socketio.sleep(1 / speed_multiplier)
 
@@ -319,6 +166,41 @@ def send_output_files(path):
     outputs_dir = os.path.join(_PROJECT_ROOT, 'outputs')
     return send_from_directory(outputs_dir, path)
 
+@app.route('/api/telemetry')
+def telemetry_series():
+    """
+    Decimated telemetry of the current flight for zoomable charts.
+    Query args: channels (comma separated), start/end (seconds), points (budget), method (lttb|minmax).
+    """
+    frame = current_telemetry["frame"]
+    if frame is None:
+        return jsonify({"error": "No simulation has been run yet."}), 404
+
+    channels = request.args.get('channels')
+    method = request.args.get('method', 'lttb')
+    if method not in DOWNSAMPLING_METHODS:
+        return jsonify({"error": f"Unknown method '{method}'."}), 400
+    try:
+        points = min(max(int(request.args.get('points', DEFAULT_MAX_POINTS)), 3), 20000)
+        start = request.args.get('start', type=float)
+        end = request.args.get('end', type=float)
+    except ValueError:
+        return jsonify({"error": "points must be an integer."}), 400
+
+    x_range = None
+    if start is not None or end is not None:
+        x_range = (start if start is not None else float('-inf'), end if end is not None else float('inf'))
+
+    payload = downsampled_payload(
+        frame,
+        columns=channels.split(',') if channels else None,
+        n_out=points,
+        method=method,
+        x_range=x_range
+    )
+    payload["scenario_name"] = current_telemetry["scenario_name"]
+    return jsonify(payload)
+
 @socketio.on('connect')
 def connect(auth=None):
     global thread
@@ -328,7 +210,7 @@ def connect(auth=None):
 @socketio.on('start_simulation')
 def start_simulation_event():
     global thread
-    print("Received start_simulation event. Starting new simulation thread.")
+    logger.info("Received start_simulation event. Starting new simulation thread.")
     # Stop any existing simulation thread
     if thread is not None and thread.is_alive():
         thread_stop_event.set()
@@ -340,12 +222,13 @@ def start_simulation_event():
 
 @socketio.on('disconnect')
 def disconnect():
-    print('Client disconnected', request.sid)
+    logger.info("Client disconnected %s", request.sid)
 
 def open_browser():
     webbrowser.open_new_tab("http://127.0.0.1:5003")
 
 if __name__ == '__main__':
-    print("--- Starting Live Dashboard Web Server ---")
+    configure_logging()
+    logger.info("--- Starting Live Dashboard Web Server ---")
     Timer(1, open_browser).start()
     socketio.run(app, host='127.0.0.1', port=5003, debug=True)
\ No newline at end of file
@@ -0,0 +1,162 @@
+# file: web_dashboard/dashboard_frames.py (v1.2 - Flight phases from the telemetry generator's phase table)
+
+from typing import Iterator, List, Tuple
+
+import pandas as pd
+
+from src.data_simulation.data_input_simulator.telemetry_generator import flight_phase_at
+
+# --- Expert Upgrade Config ---
+ANOMALY_PRIORITY_MAP = {
+    "GREEN_HYDRAULIC_LOSS": "HIGH",
+    "FLAP_STUCK": "HIGH",
+    "G_FORCE_ANOMALY": "HIGH",
+    "CRITICAL_ECAM_ALERT": "HIGH",
+    "DEFAULT": "MEDIUM"
+}
+
+ANOMALY_FRIENDLY_NAMES = {
+    "GREEN_HYDRAULIC_LOSS": "Green Hydraulic System Loss",
+    "FLAP_STUCK": "Flap Stuck/Unresponsive",
+    "G_FORCE_ANOMALY": "Unusual G-Force Detected",
+    "CRITICAL_ECAM_ALERT": "Critical ECAM Alert",
+    "FLAP_ASYMMETRY": "Flap Asymmetry",
+    "MOTOR_CURRENT_FAILURE": "Flap Motor Current Failure",
+    "SENSOR_FAILURE": "Sensor Failure",
+    "ENGINE_VIBRATION_EXCEEDANCE": "Engine Vibration Exceedance",
+    "ENGINE_EGT_EXCEEDANCE": "Engine EGT Exceedance",
+    "CABIN_ALTITUDE_EXCEEDANCE": "Cabin Altitude Exceedance",
+    "G_FORCE_EXCEEDANCE": "G-Force Exceedance",
+}
+
+ANOMALY_PROCEDURES = {
+    "GREEN_HYDRAULIC_LOSS": [
+        "1. Notify Flight Crew of System Loss.",
+        "2. Advise on available alternate airports.",
+        "3. Coordinate with Maintenance Control."
+    ],
+    "FLAP_STUCK": [
+        "1. Notify Flight Crew of Flap Malfunction.",
+        "2. Advise on flapless landing procedures.",
+        "3. Prepare for emergency services on arrival."
+    ],
+    "G_FORCE_ANOMALY": [
+        "1. Notify Flight Crew of G-Force Exceedance.",
+        "2. Advise on smooth flight path adjustments.",
+        "3. Log event for post-flight inspection."
+    ],
+    "CRITICAL_ECAM_ALERT": [
+        "1. Acknowledge ECAM alert with Flight Crew.",
+        "2. Monitor system parameters closely.",
+        "3. Prepare for relevant emergency procedures."
+    ],
+    "DEFAULT": [
+        "1. Monitor system parameters.",
+        "2. Await further instructions from Flight Crew."
+    ]
+}
+
+# G-Force monitoring thresholds
+MAX_G_FORCE_THRESHOLD = 1.5
+MIN_G_FORCE_THRESHOLD = 0.5
+
+# --- Simulation Logic (v4.0 - Full Expert Integration) ---
+def get_flight_phase(timestamp: float) -> str:
+    """Phase name on the reference flight, from telemetry_generator.PHASE_TABLE."""
+    return flight_phase_at(timestamp)
+
+
+def iter_dashboard_frames(telemetry_df: pd.DataFrame, all_anomalies: List[Tuple[str, int]],
+                          scenario_name: str, flight_id: str) -> Iterator[dict]:
+    """
+    Builds the per-second 'update' payloads of the live dashboard (flight data, OCC/EFB messages,
+    procedures, anomaly details). Kept free of Flask/Socket.IO so it can be benchmarked on its own.
+    """
+    triggered_anomalies = []
+    flight_status = "GREEN"
+    g_force_exceedance_logged = False
+
+    for index, row in telemetry_df.iterrows():
+        current_time = int(row['timestamp'])
+        current_g_force = round(float(row['vertical_g_force']), 2)  # float32 channel; payloads must be JSON floats
+
+        data = {
+            "timestamp": current_time,
+            "phase": get_flight_phase(current_time),
+            "altitude": int(row['altitude_ft']),
+            "airspeed": int(row['airspeed_kts']),
+            "g_force": current_g_force,
+            "occ_messages": [],
+            "efb_messages": [],
+            "procedures": []
+        }
+
+        # Check for G-Force Exceedance
+        if (current_g_force > MAX_G_FORCE_THRESHOLD or current_g_force < MIN_G_FORCE_THRESHOLD) and not g_force_exceedance_logged:
+            g_force_exceedance_logged = True # Log only once per exceedance event
+            anomaly_name = "G_FORCE_EXCEEDANCE"
+            priority = ANOMALY_PRIORITY_MAP.get(anomaly_name, "MEDIUM")
+            if priority == "HIGH": flight_status = "RED"
+            elif flight_status != "RED": flight_status = "YELLOW"
+            
+            chart_name = scenario_name if "normal" not in scenario_name else "normal_flight"
+            chart_url = f"/outputs/project_outputs/analysis_charts/telemetry_chart_{chart_name}.png"
+
+            data['anomaly_details'] = {
+                "name": anomaly_name,
+                "friendly_name": ANOMALY_FRIENDLY_NAMES.get(anomaly_name, anomaly_name.replace('_', ' ')),
+                "timestamp": current_time,
+                "altitude": data['altitude'],
+                "airspeed": data['airspeed'],
+                "g_force": data['g_force'],
+                "priority": priority,
+                "chart_url": chart_url
+            }
+            data['procedures'].extend(ANOMALY_PROCEDURES.get(anomaly_name, ANOMALY_PROCEDURES["DEFAULT"]))
+
+        newly_triggered = [a for a in all_anomalies if a[1] == current_time and a not in triggered_anomalies]
+        if newly_triggered:
+            triggered_anomalies.extend(newly_triggered)
+            anomaly_name = newly_triggered[0][0]
+            priority = ANOMALY_PRIORITY_MAP.get(anomaly_name, "MEDIUM")
+            
+            if priority == "HIGH": flight_status = "RED"
+            elif flight_status != "RED": flight_status = "YELLOW"
+
+            chart_name = scenario_name if "normal" not in scenario_name else "normal_flight"
+            chart_url = f"/outputs/project_outputs/analysis_charts/telemetry_chart_{chart_name}.png"
+
+            data['anomaly_details'] = {
+                "name": anomaly_name,
+                "friendly_name": ANOMALY_FRIENDLY_NAMES.get(anomaly_name, anomaly_name.replace('_', ' ')),
+                "timestamp": current_time,
+                "altitude": data['altitude'],
+                "airspeed": data['airspeed'],
+                "g_force": data['g_force'],
+                "priority": priority,
+                "chart_url": chart_url
+            }
+            data['procedures'].extend(ANOMALY_PROCEDURES.get(anomaly_name, ANOMALY_PROCEDURES["DEFAULT"]))
+
+        data['flight_status'] = flight_status
+
+        if triggered_anomalies:
+            for anomaly_name, ts in triggered_anomalies:
+                priority = ANOMALY_PRIORITY_MAP.get(anomaly_name, "MEDIUM")
+                prefix = "CRITICAL ALERT" if priority == "HIGH" else "ALERT"
+                data['occ_messages'].append(f"[{flight_id} | OCC] {prefix}: {ANOMALY_FRIENDLY_NAMES.get(anomaly_name, anomaly_name.replace('_', ' '))} at {ts}s. Engineering review required.")
+                efb_map = {
+                    "FLAP_ASYMMETRY": "[ECAM] F/CTL FLAP SYS FAULT",
+                    "GREEN_HYDRAULIC_LOSS": "[ECAM] HYD G SYS LO PR",
+                    "SENSOR_FAILURE": "[ECAM] F/CTL FLAP/SLAT FAULT",
+                    "G_FORCE_ANOMALY": "[WARNING] UNUSUAL G-LOAD DETECTED",
+                    "MOTOR_CURRENT_FAILURE": "[ECAM] L FLAP MOTOR FAULT",
+                    "FLAP_STUCK": "[ECAM] F/CTL FLAPS LOCKED"
+                }
+                data['efb_messages'].append(efb_map.get(anomaly_name, f"[ALERT] {anomaly_name}"))
+            data['efb_messages'].append("[ACTION] Refer to QRH")
+        else:
+            data['occ_messages'].append(f"[{flight_id} | OCC] All systems nominal.")
+            data['efb_messages'].append("[STATUS] SYSTEMS NORMAL")
+
+        yield data
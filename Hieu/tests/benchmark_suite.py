@@ -0,0 +1,229 @@
+# benchmark_suite.py
+# Timing benchmarks for the telemetry generator, the anomaly detector (rules alone, with the
+# statistical detectors and with the fleet envelopes), the risk engine (against the deterministic stub backend, no GCP calls)
+# and the dashboard frame loop, over parametrized sizes.
+# Writes a JSON report (generator cases also record the frame's bytes per flight) and compares each
+# case's median against benchmark_thresholds.json.
+#
+# Run from the project root:
+#   python tests/benchmark_suite.py                    # full grid, compare with the stored baseline
+#   python tests/benchmark_suite.py --quick            # smallest sizes only
+#   python tests/benchmark_suite.py --update_baseline  # store this machine's medians as the new baseline
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.anomaly_detector import AnomalyDetector
+from data_analysis.analysis_modules.statistical_detectors import default_statistical_detectors
+from data_analysis.analysis_modules.envelope_index import EnvelopeDetector, EnvelopeIndex
+from data_analysis.analysis_modules.rate_limiter import configure_rate_limiter
+from data_analysis.analysis_modules.resilience import ResilientModel
+from data_analysis.analysis_modules.risk_engine import RiskTriageEngine
+from data_analysis.analysis_modules.stub_backend import FaultInjectingBackend
+from src.data_simulation.data_input_simulator.main_simulator import ScenarioSimulator
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+from src.data_simulation.data_input_simulator.telemetry_generator import TelemetryGenerator
+from src.data_simulation.data_input_simulator.telemetry_schema import memory_report
+from src.web_dashboard.dashboard_frames import iter_dashboard_frames
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_thresholds.json")
+REPORT_DIR = os.path.join(PROJECT_ROOT, "outputs", "project_outputs", "benchmarks")
+DEFAULT_TOLERANCE = 2.0  # a case regresses when its median exceeds baseline * tolerance
+
+# Event-bearing scenarios whose telemetry_events are combined into synthetic multi-event flights.
+EVENT_SOURCES = ["flap_jam", "hydraulic_failure", "sensor_failure", "pressurization_misjudgment",
+                 "engine_maintenance_policy", "mechanical_asymmetry"]
+
+FULL_GRID = {
+    "flight_seconds": [135, 1350],
+    "sample_rate_hz": [1, 10],
+    "num_events": [1, 4],
+    "num_flights": [1, 8],
+}
+QUICK_GRID = {key: values[:1] for key, values in FULL_GRID.items()}
+
+
+def _event_config(loader: ScenarioLoader, num_events: int) -> dict:
+    """A scenario whose telemetry_events are the first `num_events` events of EVENT_SOURCES."""
+    events = [event for name in EVENT_SOURCES for event in loader.load(name)['telemetry_events']]
+    return {"scenario_name": f"benchmark_{num_events}_events", "telemetry_events": [dict(e) for e in events[:num_events]]}
+
+
+def _telemetry(loader, flight_seconds, sample_rate_hz, num_events):
+    np.random.seed(0)
+    return TelemetryGenerator(_event_config(loader, num_events), flight_seconds, sample_rate_hz).generate()
+
+
+def _cases(grid: dict, loader: ScenarioLoader):
+    """Yields (group, params, units, unit_name, setup) where setup() returns the callable to time."""
+    sizes = list(itertools.product(grid["flight_seconds"], grid["sample_rate_hz"]))
+
+    for (seconds, hz), events in itertools.product(sizes, grid["num_events"]):
+        config = _event_config(loader, events)
+        params = {"flight_seconds": seconds, "sample_rate_hz": hz, "num_events": events}
+        yield ("generator", params, seconds * hz, "samples",
+               lambda c=config, s=seconds, h=hz: (lambda: TelemetryGenerator(c, s, h).generate()))
+
+    for (seconds, hz), events in itertools.product(sizes, grid["num_events"]):
+        params = {"flight_seconds": seconds, "sample_rate_hz": hz, "num_events": events}
+
+        def setup_detector(s=seconds, h=hz, e=events):
+            telemetry, detector = _telemetry(loader, s, h, e), AnomalyDetector()
+            return lambda: detector.detect(telemetry)
+        yield "detector", params, seconds * hz, "samples", setup_detector
+
+    for seconds, hz in sizes:
+        params = {"flight_seconds": seconds, "sample_rate_hz": hz}
+
+        def setup_statistical(s=seconds, h=hz):
+            telemetry, detector = _telemetry(loader, s, h, 1), AnomalyDetector(default_statistical_detectors())
+            return lambda: detector.detect(telemetry)
+        yield "detector_statistical", params, seconds * hz, "samples", setup_statistical
+
+    index = EnvelopeIndex.load()
+    for seconds, hz in sizes:
+        params = {"flight_seconds": seconds, "sample_rate_hz": hz}
+
+        def setup_envelope(s=seconds, h=hz):
+            telemetry, detector = _telemetry(loader, s, h, 1), AnomalyDetector([EnvelopeDetector(index)])
+            return lambda: detector.detect(telemetry)
+        yield "detector_envelope", params, seconds * hz, "samples", setup_envelope
+
+    for flights in grid["num_flights"]:
+        params = {"num_flights": flights}
+
+        def setup_engine(n=flights):
+            engine = RiskTriageEngine("stub", "local", "", use_cache=False,
+                                      model=ResilientModel(FaultInjectingBackend(latency_s=0.0, seed=0)))
+            names = [EVENT_SOURCES[i % len(EVENT_SOURCES)] for i in range(n)]
+            flights_data = []
+            for name in names:
+                np.random.seed(0)
+                simulator = ScenarioSimulator(scenario_name=name)
+                simulator.run()
+                flights_data.append(simulator.get_data())
+            return lambda: [engine.analyze_flight(data) for data in flights_data]
+        yield "risk_engine", params, flights, "flights", setup_engine
+
+    for seconds, hz in sizes:
+        params = {"flight_seconds": seconds, "sample_rate_hz": hz}
+
+        def setup_dashboard(s=seconds, h=hz):
+            telemetry = _telemetry(loader, s, h, 1)
+            anomalies = AnomalyDetector().detect(telemetry.copy())
+            return lambda: sum(1 for _ in iter_dashboard_frames(telemetry, anomalies, "benchmark", "VN-A688"))
+        yield "dashboard_frames", params, seconds * hz, "frames", setup_dashboard
+
+
+def case_id(group: str, params: dict) -> str:
+    return f"{group}[{','.join(f'{k}={v}' for k, v in params.items())}]"
+
+
+def run_case(func, repeats: int, min_time_s: float) -> list:
+    """Times func() at least `repeats` times (and at least `min_time_s` in total) after one warm-up call."""
+    func()
+    timings = []
+    started = time.perf_counter()
+    while len(timings) < repeats or (time.perf_counter() - started < min_time_s and len(timings) < 50):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def load_thresholds(path: str = THRESHOLDS_PATH) -> dict:
+    if not os.path.exists(path):
+        return {"tolerance": DEFAULT_TOLERANCE, "cases": {}}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks with regression thresholds.")
+    parser.add_argument("--quick", action="store_true", help="Only the smallest size of every parameter.")
+    parser.add_argument("--repeats", type=int, default=5, help="Timed runs per case (after one warm-up run).")
+    parser.add_argument("--min_time", type=float, default=0.2, help="Keep repeating a case until this many seconds passed.")
+    parser.add_argument("--only", type=str, default=None, help="Comma separated groups to run (generator, detector, detector_statistical, detector_envelope, risk_engine, dashboard_frames).")
+    parser.add_argument("--thresholds", type=str, default=THRESHOLDS_PATH, help="Baseline medians and tolerance (JSON).")
+    parser.add_argument("--tolerance", type=float, default=None, help="Override the tolerance stored with the baseline.")
+    parser.add_argument("--update_baseline", action="store_true", help="Write this run's medians as the new baseline.")
+    parser.add_argument("--report", type=str, default=None, help="Report path (default: outputs/project_outputs/benchmarks/).")
+    args = parser.parse_args()
+
+    # The stub answers instantly; keep the shared rate limiter from pacing the engine benchmark.
+    configure_rate_limiter(requests_per_minute=10 ** 9, tokens_per_minute=10 ** 12)
+    thresholds = load_thresholds(args.thresholds)
+    tolerance = args.tolerance or thresholds.get("tolerance", DEFAULT_TOLERANCE)
+    groups = set(args.only.split(",")) if args.only else None
+    loader = ScenarioLoader()
+
+    results = []
+    for group, params, units, unit_name, setup in _cases(QUICK_GRID if args.quick else FULL_GRID, loader):
+        if groups and group not in groups:
+            continue
+        name = case_id(group, params)
+        timings = run_case(setup(), args.repeats, args.min_time)
+        median = statistics.median(timings)
+        baseline = thresholds["cases"].get(name)
+        if baseline is None:
+            status = "NEW"
+        else:
+            status = "PASSED" if median <= baseline * tolerance else "FAILED"
+        results.append({
+            "case": name, "group": group, "params": params, "status": status,
+            "runs": len(timings), "median_s": median, "min_s": min(timings), "max_s": max(timings),
+            "units": units, "unit": unit_name, "us_per_unit": median / units * 1e6,
+            "baseline_s": baseline, "threshold_s": baseline * tolerance if baseline is not None else None,
+        })
+        if group == "generator":
+            # Memory of the generated frame, so dtype changes show up next to the timings.
+            results[-1]["bytes_per_flight"] = memory_report(_telemetry(loader, params["flight_seconds"],
+                                                                       params["sample_rate_hz"], params["num_events"]))["bytes"]
+        memory = f"  {results[-1]['bytes_per_flight'] / 1024:9.1f} KiB/flight" if "bytes_per_flight" in results[-1] else ""
+        print(f"{name:<78} {status:<7} median {median * 1000:9.2f} ms  ({median / units * 1e6:8.2f} us/{unit_name[:-1]}){memory}")
+
+    report = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "tolerance": tolerance,
+        "quick": args.quick,
+        "cases": results,
+        "regressions": [r["case"] for r in results if r["status"] == "FAILED"],
+    }
+    report_path = args.report or os.path.join(REPORT_DIR, f"benchmark_report_{datetime.now():%Y%m%d_%H%M%S}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(report_path)), exist_ok=True)
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nReport saved to: {report_path}")
+
+    if args.update_baseline:
+        thresholds["tolerance"] = tolerance
+        thresholds["cases"].update({r["case"]: round(r["median_s"], 6) for r in results})
+        with open(args.thresholds, 'w', encoding='utf-8') as f:
+            json.dump(thresholds, f, indent=2, sort_keys=True)
+        print(f"Baseline updated: {args.thresholds}")
+
+    checked = [r for r in results if r["status"] != "NEW"]
+    print(f"\n{len(checked) - len(report['regressions'])}/{len(checked)} benchmarks within {tolerance}x of baseline"
+          f" ({len(results) - len(checked)} without a baseline).")
+    if report["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+# test_baseline_profile.py
+# Checks the memoized baseline flight profile: one shared read-only copy per (length, rate),
+# event overlays that copy only the channels they write, and seeded runs that stay reproducible.
+# Run from the project root: python tests/test_baseline_profile.py
+
+import os
+import sys
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+from src.data_simulation.data_input_simulator.telemetry_generator import (
+    ChannelOverlay, TelemetryGenerator, baseline_profile
+)
+
+
+def test_baseline_shared_and_read_only() -> tuple[str, str]:
+    first, second = baseline_profile(600, 4), baseline_profile(600, 4)
+    pressure = first.channels['green_hydraulic_pressure_psi']
+    try:
+        pressure[0] = 0.0
+        writable = True
+    except ValueError:
+        writable = False
+    ok = first is second and baseline_profile(600, 2) is not first and not writable
+    return ("PASSED" if ok else "FAILED"), f"shared: {first is second}, writable: {writable}"
+
+
+def test_overlay_copies_only_event_channels() -> tuple[str, str]:
+    config = dict(ScenarioLoader().load("hydraulic_failure"))
+    generator = TelemetryGenerator(config)
+    overlay = ChannelOverlay(baseline_profile())
+    generator._add_noise(overlay)
+    generator._inject_events(overlay)
+    expected = {'roll_angle_deg', 'engine_1_vibration_n1', 'green_hydraulic_pressure_psi', 'ecam_alerts'}
+    untouched = np.all(baseline_profile().channels['green_hydraulic_pressure_psi'] == 3000.0)
+    ok = overlay.touched() == expected and untouched and overlay['green_hydraulic_pressure_psi'][-1] == 0.0
+    return ("PASSED" if ok else "FAILED"), f"materialized {sorted(overlay.touched())}, baseline intact: {untouched}"
+
+
+def test_seeded_runs_reproducible() -> tuple[str, str]:
+    config = dict(ScenarioLoader().load("pressurization_misjudgment"))
+    frames = []
+    for _ in range(2):
+        np.random.seed(7)
+        frames.append(TelemetryGenerator(config, 600, 4).generate())
+    np.random.seed(8)
+    other = TelemetryGenerator(config, 600, 4).generate()
+    ok = frames[0].equals(frames[1]) and not frames[0].equals(other)
+    return ("PASSED" if ok else "FAILED"), f"same seed equal: {frames[0].equals(frames[1])}"
+
+
+def main():
+    tests = [test_baseline_shared_and_read_only, test_overlay_copies_only_event_channels, test_seeded_runs_reproducible]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<45} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} baseline profile checks passed.")
+
+
+if __name__ == '__main__':
+    main()
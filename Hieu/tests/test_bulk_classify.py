@@ -0,0 +1,171 @@
+# test_bulk_classify.py
+# Checks the resumable bulk accident classifier on a small generated CSV with the local stub
+# backend (no GCP access needed): a run interrupted mid-chunk leaves only whole, fsync'd chunks
+# on disk, API errors are never committed and get retried on resume, near-duplicates copy their
+# representative's labels, and the resumed output matches an uninterrupted run record for record.
+# Run from the project root: python tests/test_bulk_classify.py
+
+import contextlib
+import csv
+import io
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from google.api_core.exceptions import ServiceUnavailable
+
+# Imported under the same package path as the script, so configure_rate_limiter() reaches its limiter.
+from src.data_analysis.analysis_modules.hfacs_analyzer import ALL_EVIDENCE_TAGS
+from src.data_analysis.analysis_modules.logging_utils import configure_logging
+from src.data_analysis.analysis_modules.near_duplicates import NearDuplicateIndex
+from src.data_analysis.analysis_modules.rate_limiter import configure_rate_limiter
+from src.data_analysis.analysis_modules.stub_backend import FaultInjectingBackend
+from src.scripts import bulk_classify_accidents as bulk
+
+ROWS, CHUNKSIZE, PANEL_BATCH_SIZE = 60, 10, 4
+FAILING_ROWS = (7, 23)                        # the backend errors on these until it is "fixed"
+DUPLICATE_OF = {12: 11, 33: 23, 41: 5}        # row -> row it restates (different numbers only)
+EMPTY_ROWS = (50,)
+FAILURE_MARKER = "GROUNDED-BY-TEST"
+
+
+class FlakyBackend(FaultInjectingBackend):
+    """Stub backend that fails requests covering marked summaries and can raise Ctrl-C after N calls."""
+    def __init__(self, interrupt_after: int = None, failing: bool = True):
+        super().__init__(latency_s=0.0, jitter=0.0)
+        self.interrupt_after = interrupt_after
+        self.failing = failing
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        if self.interrupt_after is not None and self.calls >= self.interrupt_after:
+            raise KeyboardInterrupt
+        if self.failing and FAILURE_MARKER in prompt:
+            self.calls += 1
+            raise ServiceUnavailable("Stub backend: marked summary.")
+        return super().generate_content(prompt, generation_config=generation_config, **kwargs)
+
+
+def _write_accidents_csv(path: str):
+    rng = np.random.default_rng(4)
+    vocabulary = ["".join(rng.choice(list("abcdefghijklmnopqrstuvwxyz"), size=6)) for _ in range(400)]
+    summaries = {}
+    for row in range(ROWS):
+        words = list(rng.choice(vocabulary, size=24))
+        tags = list(rng.choice(ALL_EVIDENCE_TAGS, size=int(rng.integers(0, 3)), replace=False))
+        summaries[row] = f"{' '.join(words)}. {row + 3} killed. Findings: {', '.join(tags) or 'none'}."
+    for row, original in DUPLICATE_OF.items():
+        summaries[row] = summaries[original].replace(f"{original + 3} killed", f"{row + 100} killed")
+    for row in FAILING_ROWS:
+        summaries[row] += f" {FAILURE_MARKER}"
+    for row in EMPTY_ROWS:
+        summaries[row] = ""
+    pd.DataFrame({"Date": [f"01/{row % 28 + 1:02d}/1970" for row in range(ROWS)],
+                  "Location": "Nowhere", "Operator": [f"Operator {row % 5}" for row in range(ROWS)],
+                  "AC Type": "Douglas DC-3", "Route": "", "Summary": [summaries[row] for row in range(ROWS)]}).to_csv(path, index=False)
+
+
+def _run(input_path: str, output_dir: str, backend, resume: bool = True) -> dict:
+    """One run of the script as a fresh process would do it: new engine, new near-duplicate index."""
+    engine = bulk.RiskTriageEngine("demo-project", "us-central1", None, model=backend)
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        return bulk.classify_file(engine, input_path, output_dir, CHUNKSIZE, workers=4,
+                                  panel_batch_size=PANEL_BATCH_SIZE, resume=resume,
+                                  dedupe_index=NearDuplicateIndex())
+
+
+def _output_rows(output_dir: str) -> list:
+    path = os.path.join(output_dir, "accidents_classified.csv")
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_interrupt_and_resume() -> tuple[str, str]:
+    fsynced_rows = []
+    real_fsync = bulk.os.fsync
+
+    def recording_fsync(fd):
+        real_fsync(fd)
+        fsynced_rows.append(len(_output_rows(output_dir)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path, output_dir = os.path.join(tmp, "accidents.csv"), os.path.join(tmp, "interrupted")
+        clean_dir = os.path.join(tmp, "clean")
+        os.makedirs(output_dir)
+        os.makedirs(clean_dir)
+        _write_accidents_csv(input_path)
+        bulk.os.fsync = recording_fsync
+        try:
+            interrupted = False
+            try:
+                _run(input_path, output_dir, FlakyBackend(interrupt_after=60))
+            except KeyboardInterrupt:
+                interrupted = True
+            after_interrupt = len(_output_rows(output_dir))
+            committed_on_interrupt = fsynced_rows[-1] if fsynced_rows else 0
+            resumed = _run(input_path, output_dir, FlakyBackend())
+            after_resume = {row["record_id"] for row in _output_rows(output_dir)}
+            fixed = _run(input_path, output_dir, FlakyBackend(failing=False))
+        finally:
+            bulk.os.fsync = real_fsync
+        rows = _output_rows(output_dir)
+        _run(input_path, clean_dir, FlakyBackend(failing=False), resume=False)
+        clean = {row["record_id"]: row for row in _output_rows(clean_dir)}
+
+    ids = [row["record_id"] for row in rows]
+    expected_ids = {f"accidents:{row}" for row in range(ROWS)}
+    held_back = {f"accidents:{row}" for row in FAILING_ROWS + (33,)}   # 33 restates a failing row
+    by_id = {row["record_id"]: row for row in rows}
+    labels_differ = [record_id for record_id in ids
+                     if any(by_id[record_id][c] != clean[record_id][c] for c in bulk.LABEL_COLUMNS + ["duplicate_of"])]
+    ok = (interrupted and 0 < after_interrupt == committed_on_interrupt < ROWS
+          and resumed["errors"] == len(held_back) and after_resume == expected_ids - held_back
+          and fixed["classified"] == len(held_back) and fixed["skipped"] == ROWS - len(held_back)
+          and len(ids) == len(set(ids)) and set(ids) == expected_ids and not labels_differ
+          and not any(row["hfacs_level"].startswith("API_Error") for row in rows))
+    message = (f"{after_interrupt} rows on disk after Ctrl-C (last fsync: {committed_on_interrupt}), "
+               f"{resumed['errors']} API errors held back, {len(ids)} rows / {len(set(ids))} ids after the fix, "
+               f"differing from a clean run: {labels_differ}")
+    return ("PASSED" if ok else "FAILED"), message
+
+
+def test_near_duplicates_copy_labels() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp:
+        input_path = os.path.join(tmp, "accidents.csv")
+        _write_accidents_csv(input_path)
+        backend = FlakyBackend(failing=False)
+        counts = _run(input_path, tmp, backend, resume=False)
+        rows = {row["record_id"]: row for row in _output_rows(tmp)}
+    wrong = []
+    for row, original in DUPLICATE_OF.items():
+        duplicate, representative = rows[f"accidents:{row}"], rows[f"accidents:{original}"]
+        if (duplicate["duplicate_of"] != representative["record_id"] or float(duplicate["similarity"]) < 0.85
+                or any(duplicate[c] != representative[c] for c in bulk.LABEL_COLUMNS)):
+            wrong.append(row)
+    others = [r for r in rows.values() if r["duplicate_of"] and int(r["row"]) not in DUPLICATE_OF]
+    empty_ok = all(rows[f"accidents:{row}"]["hfacs_level"] == "No Summary" for row in EMPTY_ROWS)
+    ok = not wrong and not others and empty_ok and counts["duplicates"] == len(DUPLICATE_OF) and len(rows) == ROWS
+    return ("PASSED" if ok else "FAILED"), f"{counts['duplicates']} near-duplicates labelled from their representative, wrong: {wrong}, {backend.calls} model calls"
+
+
+def main():
+    configure_logging(level="CRITICAL")  # the injected API errors are expected here
+    configure_rate_limiter(10 ** 6, 10 ** 9)
+    tests = [test_interrupt_and_resume, test_near_duplicates_copy_labels]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} bulk classification checks passed.")
+
+
+if __name__ == '__main__':
+    main()
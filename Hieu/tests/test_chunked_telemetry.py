@@ -0,0 +1,110 @@
+# test_chunked_telemetry.py
+# Checks chunked mode: blocks that line up with whole-flight generation, the streaming detector
+# against the whole-flight detector, the columnar store round trip, and the bounded peak memory.
+# Run from the project root: python tests/test_chunked_telemetry.py
+
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.anomaly_detector import AnomalyDetector
+from data_analysis.analysis_modules.streaming_detector import StreamingAnomalyDetector
+from src.data_simulation.data_input_simulator.columnar_store import (
+    iter_columnar_blocks, read_columnar, write_columnar
+)
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+from src.data_simulation.data_input_simulator.telemetry_generator import TelemetryGenerator
+
+NOISE_CHANNELS = ['roll_angle_deg', 'engine_1_vibration_n1']
+
+
+def _as_strings(df: pd.DataFrame) -> pd.DataFrame:
+    # Each block has its own alert categories, so compare the alert text.
+    return df.astype({'ecam_alerts': str})
+
+
+def test_blocks_match_generate() -> tuple[str, str]:
+    config = {'telemetry_events': [
+        {'trigger_condition': 'delay(rises(flap_lever_position), 3)',
+         'parameters': {'green_hydraulic_pressure': {'decay_to_zero_seconds': 5}, 'ecam_alerts': ['HYD G SYS LO PR']}},
+        {'trigger_condition': 'changes(green_hydraulic_pressure_psi < 1500)',
+         'parameters': {'cabin_altitude_ft': {'rate_of_climb_fpm': 3000}, 'aircraft_action': {'initiate_emergency_descent': True}}},
+    ]}
+    mismatched = []
+    for block_size in (13, 256, 5000):
+        np.random.seed(0)
+        whole = TelemetryGenerator(config, 900, 4).generate().drop(columns=NOISE_CHANNELS)
+        blocks = list(TelemetryGenerator(config, 900, 4).iter_blocks(block_size, seed=0))
+        chunked = pd.concat(blocks).drop(columns=NOISE_CHANNELS)
+        if not _as_strings(chunked).equals(_as_strings(whole)) or max(len(b) for b in blocks) > block_size:
+            mismatched.append(block_size)
+    return ("PASSED" if not mismatched else "FAILED"), f"block sizes differing from generate(): {mismatched}"
+
+
+def test_streaming_detector_matches() -> tuple[str, str]:
+    loader = ScenarioLoader()
+    differing = []
+    for name in loader.list_scenarios():
+        blocks = list(TelemetryGenerator(dict(loader.load(name)), 600, 4).iter_blocks(97, seed=1))
+        if StreamingAnomalyDetector().detect_blocks(blocks) != AnomalyDetector().detect(pd.concat(blocks)):
+            differing.append(name)
+    return ("PASSED" if not differing else "FAILED"), f"scenarios with different detections: {differing}"
+
+
+def test_columnar_round_trip() -> tuple[str, str]:
+    config = dict(ScenarioLoader().load("engine_maintenance_policy"))
+    blocks = list(TelemetryGenerator(config, 600, 4).iter_blocks(500, seed=2))
+    with tempfile.TemporaryDirectory() as tmp:
+        rows = write_columnar(blocks, tmp)
+        loaded = read_columnar(tmp)
+        reread = [len(block) for block in iter_columnar_blocks(tmp, 1000)]
+    same = _as_strings(loaded).equals(_as_strings(pd.concat(blocks)))
+    ok = same and rows == 2400 and reread == [1000, 1000, 400] and str(loaded['altitude_ft'].dtype) == 'int32'
+    return ("PASSED" if ok else "FAILED"), f"{rows} rows, equal after reload: {same}, re-read blocks {reread}"
+
+
+def _peak_bytes(run) -> int:
+    tracemalloc.start()
+    try:
+        run()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_peak_memory_bounded() -> tuple[str, str]:
+    config = dict(ScenarioLoader().load("hydraulic_failure"))
+    seconds, hz = 3 * 3600, 10
+
+    def whole():
+        AnomalyDetector().detect(TelemetryGenerator(config, seconds, hz).generate())
+
+    def chunked():
+        StreamingAnomalyDetector().detect_blocks(TelemetryGenerator(config, seconds, hz).iter_blocks(8192, seed=0))
+
+    whole_peak, chunked_peak = _peak_bytes(whole), _peak_bytes(chunked)
+    ok = chunked_peak * 4 < whole_peak
+    return ("PASSED" if ok else "FAILED"), f"peak {chunked_peak / 2 ** 20:.1f} MiB chunked vs {whole_peak / 2 ** 20:.1f} MiB whole"
+
+
+def main():
+    tests = [test_blocks_match_generate, test_streaming_detector_matches, test_columnar_round_trip, test_peak_memory_bounded]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} chunked telemetry checks passed.")
+
+
+if __name__ == '__main__':
+    main()
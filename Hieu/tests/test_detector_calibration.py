@@ -0,0 +1,96 @@
+# test_detector_calibration.py
+# Checks the rule threshold sweep: the broadcast first-alarm search against a plain loop, the
+# current thresholds reproducing AnomalyDetector's detections, and ROC/PR/delay outcomes on a
+# small labeled flight set; the simulator modules are loaded once, so the scenario registry is shared.
+# Run from the project root: python tests/test_detector_calibration.py
+
+import os
+import sys
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.anomaly_detector import AnomalyDetector
+from data_analysis.analysis_modules.detector_calibration import (
+    LabeledFlightSet, calibrate, first_alarm_indices, rule_sweeps, sweep_rule
+)
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+from src.data_simulation.data_input_simulator.telemetry_generator import TelemetryGenerator, baseline_profile
+
+
+def test_one_simulator_copy() -> tuple[str, str]:
+    # Imported without the src. prefix, the simulator modules would load a second time with their own registry.
+    duplicates = sorted(name for name in sys.modules if name.startswith("data_simulation."))
+    return ("PASSED" if not duplicates else "FAILED"), f"simulator modules loaded a second time: {duplicates}"
+
+
+def test_broadcast_matches_loop() -> tuple[str, str]:
+    rng = np.random.default_rng(0)
+    scores = rng.normal(0, 1, (7, 50)).astype(np.float32)
+    scores[rng.random(scores.shape) < 0.2] = np.nan
+    thresholds = np.linspace(-3, 3, 13)
+    tests = {">": np.greater, "<": np.less, "<=": np.less_equal}
+    differing = []
+    for op, compare in tests.items():
+        found = first_alarm_indices(scores, thresholds, op)
+        for flight in range(len(scores)):
+            for position, threshold in enumerate(thresholds):
+                hits = np.flatnonzero(compare(scores[flight], np.float32(threshold)))
+                expected = hits[0] if len(hits) else scores.shape[1]
+                if found[flight, position] != expected:
+                    differing.append((op, flight, threshold))
+    return ("PASSED" if not differing else "FAILED"), f"cells differing from the loop: {differing[:5]}"
+
+
+def test_current_thresholds_match_detector() -> tuple[str, str]:
+    loader, sweeps, differing = ScenarioLoader(), rule_sweeps(), []
+    np.random.seed(2)
+    for name in loader.list_scenarios():
+        for hz in (1, 4):
+            df = TelemetryGenerator(dict(loader.load(name)), 600, hz).generate()
+            flight_set = LabeledFlightSet(sweeps)
+            flight_set.add(df, name, True, baseline_profile(600, hz).schema_channels)
+            swept = {}
+            for rule, sweep in sweeps.items():
+                index = first_alarm_indices(flight_set.scores(rule), [sweep.current], sweep.op)[0, 0]
+                if index < len(df):
+                    swept[rule] = int(df['timestamp'].iloc[index])
+            detected = {rule: timestamp for rule, timestamp in AnomalyDetector().detect(df) if rule in sweeps}
+            if swept != detected:
+                differing.append((name, hz))
+    return ("PASSED" if not differing else "FAILED"), f"flights where the sweep differs from the detector: {differing}"
+
+
+def test_roc_and_delays() -> tuple[str, str]:
+    flight_set = LabeledFlightSet.simulate(["hydraulic_failure", "normal_flight", "sensor_failure"], flights_per_scenario=6,
+                                           variants_per_template=4, total_flight_seconds=300)
+    result = calibrate(flight_set, ["GREEN_HYDRAULIC_LOSS"], {"GREEN_HYDRAULIC_LOSS": [0.0, 3000.5, 1e4]})
+    curve = result["curves"].sort_values("threshold")
+    summary = result["summary"].iloc[0]
+    hydraulic = sweep_rule(flight_set, "GREEN_HYDRAULIC_LOSS")["curve"].sort_values("threshold")
+    delays = result["delays"]["delay_s"]
+    ok = (summary["positives"] == 10 and summary["negatives"] == 20 and summary["roc_auc"] == 1.0
+          and summary["current_tpr"] == 1.0 and summary["current_fpr"] == 0.0
+          and curve["tp"].tolist() == [0, 10, 10, 10] and curve["fp"].tolist() == [0, 0, 20, 20]
+          and (np.diff(hydraulic["tpr"]) >= 0).all() and (np.diff(hydraulic["fpr"]) >= 0).all()
+          and len(delays) == 10 and (delays >= 0).all() and set(result["delays"]["scenario"]) != {"hydraulic_failure"})
+    return ("PASSED" if ok else "FAILED"), (f"AUC {summary['roc_auc']}, tp {curve['tp'].tolist()}, fp {curve['fp'].tolist()}, "
+                                            f"delays {sorted(delays.tolist())}")
+
+
+def main():
+    tests = [test_one_simulator_copy, test_broadcast_matches_loop, test_current_thresholds_match_detector, test_roc_and_delays]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} detector calibration checks passed.")
+
+
+if __name__ == '__main__':
+    main()
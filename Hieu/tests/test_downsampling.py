@@ -0,0 +1,89 @@
+# test_downsampling.py
+# Checks the chart decimation: LTTB and min/max keep the first and last samples, never return
+# more than the point budget, keep a single-sample spike, and the dashboard payload counts the
+# samples inside a zoom window rather than the whole flight.
+# Run from the project root: python tests/test_downsampling.py
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.downsampling import downsampled_payload, lttb_indices, minmax_indices
+
+BUDGETS = (4, 5, 17, 100, 999)
+LENGTHS = (10, 101, 1000, 5001)
+
+
+def _signal(n: int) -> tuple:
+    rng = np.random.default_rng(n)
+    x = np.arange(n, dtype=np.float64) / 4.0
+    return x, np.sin(x / 7.0) + rng.normal(0.0, 0.05, n)
+
+
+def _both(x: np.ndarray, y: np.ndarray, n_out: int) -> dict:
+    return {"lttb": lttb_indices(x, y, n_out), "minmax": minmax_indices(y, n_out)}
+
+
+def test_endpoints_kept() -> tuple[str, str]:
+    missing = []
+    for n in LENGTHS:
+        x, y = _signal(n)
+        for n_out in BUDGETS:
+            for method, idx in _both(x, y, n_out).items():
+                if idx[0] != 0 or idx[-1] != n - 1:
+                    missing.append((method, n, n_out))
+    return ("PASSED" if not missing else "FAILED"), f"(method, samples, budget) without both end points: {missing}"
+
+
+def test_within_budget() -> tuple[str, str]:
+    over = []
+    for n in LENGTHS:
+        x, y = _signal(n)
+        for n_out in BUDGETS:
+            for method, idx in _both(x, y, n_out).items():
+                if len(idx) > min(n_out, n) or np.any(np.diff(idx) <= 0):
+                    over.append((method, n, n_out, len(idx)))
+    return ("PASSED" if not over else "FAILED"), f"(method, samples, budget, returned) over budget or unsorted: {over}"
+
+
+def test_spike_kept() -> tuple[str, str]:
+    x, y = _signal(5001)
+    lost = []
+    for spike_at, height in ((1, 40.0), (2717, -25.0), (4998, 60.0)):
+        spiked = y.copy()
+        spiked[spike_at] = height
+        for method, idx in _both(x, spiked, 200).items():
+            if spike_at not in idx:
+                lost.append((method, spike_at))
+    return ("PASSED" if not lost else "FAILED"), f"(method, sample) spikes dropped: {lost}"
+
+
+def test_payload_counts_window() -> tuple[str, str]:
+    df = pd.DataFrame({"timestamp": np.arange(0, 600, 0.25), "altitude_ft": np.linspace(0.0, 1.0, 2400)})
+    whole = downsampled_payload(df, n_out=100)
+    zoomed = downsampled_payload(df, n_out=100, x_range=(100.0, 149.75))
+    open_ended = downsampled_payload(df, n_out=100, x_range=(590.0, float('inf')))
+    counts = (whole["total_samples"], zoomed["total_samples"], open_ended["total_samples"])
+    ok = counts == (2400, 200, 40) and zoomed["channels"]["altitude_ft"]["x"][0] == 100.0
+    return ("PASSED" if ok else "FAILED"), f"total_samples whole/zoomed/open-ended: {counts}"
+
+
+def main():
+    tests = [test_endpoints_kept, test_within_budget, test_spike_kept, test_payload_counts_window]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} downsampling checks passed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# test_envelope_index.py
+# Checks the per-phase fleet envelopes: the index file round trip and its phase timeline, quiet
+# normal flights at other lengths and sample rates, a cruise excursion that only the phase-aware
+# envelope catches, block-wise results that equal whole-flight ones, and trigger windows, envelope
+# phases and dashboard phase names that all follow the one PHASE_TABLE.
+# Run from the project root: python tests/test_envelope_index.py
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.anomaly_detector import AnomalyDetector
+from data_analysis.analysis_modules.envelope_index import EnvelopeDetector, EnvelopeIndex, build_envelope_index
+from data_analysis.analysis_modules.streaming_detector import StreamingAnomalyDetector
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+from src.data_simulation.data_input_simulator.telemetry_generator import (
+    TelemetryGenerator, CRUISE_START_SECONDS, DEFAULT_FLIGHT_SECONDS, FLIGHT_PHASES, PHASE_TABLE, flight_phase_at
+)
+
+
+def _generator(scenario: str, seconds: int, hz: int) -> TelemetryGenerator:
+    return TelemetryGenerator(dict(ScenarioLoader().load(scenario)), seconds, hz)
+
+
+def test_index_round_trip() -> tuple[str, str]:
+    generator = _generator("normal_flight", DEFAULT_FLIGHT_SECONDS, 2)
+    np.random.seed(0)
+    flights = [(generator.generate(), generator.get_phase_starts()) for _ in range(20)]
+    index = build_envelope_index(flights, FLIGHT_PHASES, DEFAULT_FLIGHT_SECONDS, CRUISE_START_SECONDS)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = index.save(os.path.join(tmp, "envelopes.npz"))
+        size = os.path.getsize(path)
+        loaded = EnvelopeIndex.load(path)
+    cruise = np.percentile(pd.concat([df[(df['timestamp'] >= 20) & (df['timestamp'] < 90)] for df, _ in flights])['roll_angle_deg']
+                           .to_numpy(dtype=np.float32), 99.9)
+    stretched = _generator("normal_flight", 1000, 4).get_phase_starts()
+    ok = (np.array_equal(loaded.table, index.table) and loaded.phases == index.phases and loaded.info["flights"] == 20
+          and np.isclose(loaded.percentile(99.9)[2, loaded.channels.index('roll_angle_deg')], cruise)
+          and np.array_equal(loaded.phase_starts(1000), stretched) and size < 16 * 1024)
+    return ("PASSED" if ok else "FAILED"), f"{size} bytes, phase starts at 1000 s {loaded.phase_starts(1000).tolist()}"
+
+
+def test_normal_flights_quiet() -> tuple[str, str]:
+    detector = EnvelopeDetector()
+    noisy = {}
+    for seconds, hz, count in ((135, 1, 40), (600, 4, 10), (1350, 10, 3), (200, 2, 10)):
+        generator = _generator("normal_flight", seconds, hz)
+        np.random.seed(seconds + hz)
+        for number in range(count):
+            found = detector.detect(generator.generate())
+            if found:
+                noisy[(seconds, hz, number)] = found
+    return ("PASSED" if not noisy else "FAILED"), f"{len(noisy)} normal flights alarmed {noisy}"
+
+
+def test_cruise_g_excursion() -> tuple[str, str]:
+    np.random.seed(3)
+    df = _generator("normal_flight", 600, 4).generate()
+    bump = (df['timestamp'] >= 300) & (df['timestamp'] < 302)
+    df.loc[bump, 'vertical_g_force'] = np.float32(1.2)  # the touchdown load, but in cruise
+    rules = AnomalyDetector().detect(df)
+    found = AnomalyDetector([EnvelopeDetector()]).detect(df)
+    ok = not rules and found == [("ENVELOPE_EXCEEDANCE:vertical_g_force", 300)]
+    return ("PASSED" if ok else "FAILED"), f"rules {rules}, with envelopes {found}"
+
+
+def test_streaming_matches_whole() -> tuple[str, str]:
+    index = EnvelopeIndex.load()
+    differing = []
+    for name in ("hydraulic_failure", "pressurization_misjudgment", "supervisory_decision_error"):
+        blocks = list(_generator(name, 600, 4).iter_blocks(150, seed=4))
+        whole = AnomalyDetector([EnvelopeDetector(index)]).detect(pd.concat(blocks))
+        streamed = StreamingAnomalyDetector(AnomalyDetector([EnvelopeDetector(index, flight_seconds=600)])).detect_blocks(blocks)
+        if whole != streamed or not any(anomaly.startswith("ENVELOPE_EXCEEDANCE:") for anomaly, _ in whole):
+            differing.append(name)
+    return ("PASSED" if not differing else "FAILED"), f"scenarios with different results: {differing}"
+
+
+def test_one_phase_table() -> tuple[str, str]:
+    index = EnvelopeIndex.load()
+    inconsistent = []
+    for seconds in (66, DEFAULT_FLIGHT_SECONDS, 1000):
+        generator = TelemetryGenerator({}, seconds, 4)
+        windows = generator.get_phase_windows()
+        timestamps = np.arange(seconds * 4) / 4
+        envelope_phases = [index.phases[i] for i in index.phase_ids(timestamps, seconds)]
+        for timestamp, envelope_phase in zip(timestamps, envelope_phases):
+            row = [name for name, _ in FLIGHT_PHASES].index(envelope_phase)
+            in_windows = {name for name, (start, end) in windows.items() if start <= timestamp < end}
+            if flight_phase_at(timestamp, seconds) != envelope_phase or in_windows != set(PHASE_TABLE[row][2]):
+                inconsistent.append((seconds, float(timestamp)))
+    ok = (not inconsistent and index.phases == [name for name, _ in FLIGHT_PHASES]
+          and list(index.reference_starts) == [start for _, start in FLIGHT_PHASES]
+          and flight_phase_at(DEFAULT_FLIGHT_SECONDS) == "SHUTDOWN")
+    return ("PASSED" if ok else "FAILED"), f"samples where triggers, envelopes and the dashboard disagree: {inconsistent[:5]}"
+
+
+def main():
+    tests = [test_index_round_trip, test_normal_flights_quiet, test_cruise_g_excursion, test_streaming_matches_whole,
+             test_one_phase_table]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} envelope index checks passed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+# test_evaluation.py
+# Cross-checks the vectorized multi-hot evaluation against a straightforward per-run loop.
+# Run from the project root: python tests/test_evaluation.py
+
+import os
+import random
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.evaluation import evaluate_runs
+from data_analysis.analysis_modules.hfacs_analyzer import ALL_EVIDENCE_TAGS, HFACS_RUBRIC
+
+
+def _random_runs(n_runs: int, seed: int = 0):
+    rng = random.Random(seed)
+    expected = [rng.sample(ALL_EVIDENCE_TAGS, rng.randint(0, 4)) for _ in range(n_runs)]
+    predicted = [", ".join(tags[:rng.randint(0, len(tags))] + rng.sample(ALL_EVIDENCE_TAGS, rng.randint(0, 2)))
+                 for tags in expected]
+    scenarios = [rng.choice(["flap_jam", "sensor_failure", "skill_based_error"]) for _ in range(n_runs)]
+    return predicted, expected, scenarios
+
+
+def _loop_counts(predicted, expected, scenarios):
+    per_tag, per_level, per_scenario = {}, {}, {}
+    for predicted_str, expected_tags, scenario in zip(predicted, expected, scenarios):
+        p, e = set(predicted_str.split(", ")) - {""}, set(expected_tags)
+        for tag in p | e:
+            outcome = "tp" if tag in p and tag in e else ("fp" if tag in p else "fn")
+            for table, key in ((per_tag, tag), (per_level, HFACS_RUBRIC[tag][0]), (per_scenario, scenario)):
+                table.setdefault(key, {"tp": 0, "fp": 0, "fn": 0})[outcome] += 1
+    return per_tag, per_level, per_scenario
+
+
+def test_matches_loop() -> tuple[str, str]:
+    predicted, expected, scenarios = _random_runs(2000)
+    evaluation = evaluate_runs(predicted, expected, scenarios)
+    mismatches = 0
+    for table_name, loop_table in zip(("per_tag", "per_level", "per_scenario"), _loop_counts(predicted, expected, scenarios)):
+        table = evaluation[table_name]
+        for key, counts in loop_table.items():
+            mismatches += any(int(table.loc[key, k]) != v for k, v in counts.items())
+    return ("PASSED" if mismatches == 0 else "FAILED"), f"{mismatches} mismatching rows; overall {evaluation['overall']}"
+
+
+def test_bootstrap_interval() -> tuple[str, str]:
+    predicted, expected, scenarios = _random_runs(20000, seed=1)
+    start = time.perf_counter()
+    overall = evaluate_runs(predicted, expected, scenarios, n_bootstrap=500)["overall"]
+    elapsed = time.perf_counter() - start
+    low, high = overall["f1_score_ci"]
+    ok = low < overall["f1_score"] < high and high - low < 0.05
+    return ("PASSED" if ok else "FAILED"), f"F1 {overall['f1_score']:.3f} in [{low:.3f}, {high:.3f}], {elapsed:.2f}s"
+
+
+def main():
+    tests = [test_matches_loop, test_bootstrap_interval]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<26} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} evaluation checks passed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# test_fast_classifier.py
+# Trains the local pre-classifier on keyword-labelled accident summaries and checks that the
+# engine only calls the (stub) panel for low-confidence texts. Run from the project root:
+#   python tests/test_fast_classifier.py
+
+import os
+import sys
+import tempfile
+
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.fast_classifier import FastHFACSClassifier
+from data_analysis.analysis_modules.resilience import ResilientModel
+from data_analysis.analysis_modules.stub_backend import FaultInjectingBackend
+from data_analysis.analysis_modules.risk_engine import RiskTriageEngine, FAST_CLASSIFIER_LABEL
+
+DATA_PATH = os.path.join(os.path.dirname(PROJECT_ROOT), "NewData1.csv")
+KEYWORD_TAGS = {"weather": "L2_WEATHER", "fog": "L2_WEATHER", "fuel": "L1_CHOICE_DECISIONS"}
+
+
+def _labelled_summaries():
+    summaries = pd.read_csv(DATA_PATH)["Summary"].dropna().tolist()
+    labels = [sorted({tag for word, tag in KEYWORD_TAGS.items() if word in text.lower()}) for text in summaries]
+    return summaries, labels
+
+
+def test_confident_predictions_are_accurate(model, texts, labels) -> tuple[str, str]:
+    report = model.evaluate(texts, labels, min_confidence=0.95)
+    ok = report["confident_exact_match"] is not None and report["confident_exact_match"] >= 0.95
+    return ("PASSED" if ok else "FAILED"), f"holdout {report}"
+
+
+def test_save_load_roundtrip(model, texts) -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "fast.npz")
+        model.save(path)
+        loaded = FastHFACSClassifier.load(path)
+    same = loaded.predict_many(texts[:50]) == model.predict_many(texts[:50])
+    return ("PASSED" if same else "FAILED"), f"{loaded.trained_examples} examples seen by the reloaded model"
+
+
+def test_engine_skips_panel_when_confident(model, texts) -> tuple[str, str]:
+    backend = FaultInjectingBackend(latency_s=0.0)
+    engine = RiskTriageEngine("stub", "local", "", use_cache=False, model=ResilientModel(backend),
+                              fast_classifier=model, fast_min_confidence=0.95)
+    results = [engine.analyze_text(text) for text in texts[:40]]
+    local = sum(FAST_CLASSIFIER_LABEL in r["intermediate_findings"] for r in results)
+    stats = engine.fast_path_stats
+    ok = local == stats["local"] and backend.calls == 4 * stats["panel"] and stats["local"] > 0
+    return ("PASSED" if ok else "FAILED"), f"{stats}, backend calls {backend.calls}"
+
+
+def main():
+    texts, labels = _labelled_summaries()
+    split = int(len(texts) * 0.8)
+    model = FastHFACSClassifier(n_features=2 ** 14).fit(texts[:split], labels[:split])
+    holdout_texts, holdout_labels = texts[split:], labels[split:]
+
+    checks = [
+        ("test_confident_predictions_are_accurate", lambda: test_confident_predictions_are_accurate(model, holdout_texts, holdout_labels)),
+        ("test_save_load_roundtrip", lambda: test_save_load_roundtrip(model, holdout_texts)),
+        ("test_engine_skips_panel_when_confident", lambda: test_engine_skips_panel_when_confident(model, holdout_texts)),
+    ]
+    results = []
+    for name, check in checks:
+        status, message = check()
+        results.append(status)
+        print(f"{name:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} fast classifier checks passed.")
+
+
+if __name__ == '__main__':
+    main()
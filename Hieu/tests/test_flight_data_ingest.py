@@ -0,0 +1,127 @@
+# test_flight_data_ingest.py
+# Checks the ingestion of recorded flight data: simulator CSVs give the detector's own results,
+# a mapped recorder export (datetimes, scaling, low-rate channels, missing channels) is typed and
+# gap-filled across chunk boundaries, runs land in the run catalog, a file that fails mid-way still
+# leaves a readable columnar store, and the telemetry schema is loaded once (the one the store uses).
+# Run from the project root: python tests/test_flight_data_ingest.py
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.anomaly_detector import AnomalyDetector
+from data_analysis.analysis_modules.flight_data_ingest import ChannelMap, ingest_flight_file, iter_flight_data
+from data_analysis.analysis_modules.run_catalog import RunCatalog, decode_anomalies, source_fingerprint
+from src.data_simulation.data_input_simulator.columnar_store import read_columnar
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+from src.data_simulation.data_input_simulator.telemetry_generator import TelemetryGenerator
+from src.data_simulation.data_input_simulator.telemetry_schema import save_telemetry
+
+
+def test_one_schema_copy() -> tuple[str, str]:
+    # Imported without the src. prefix, telemetry_schema would load a second time beside columnar_store's.
+    duplicates = sorted(name for name in sys.modules if name.startswith("data_simulation."))
+    return ("PASSED" if not duplicates else "FAILED"), f"simulator modules loaded a second time: {duplicates}"
+
+
+def test_simulator_csv_matches_detector() -> tuple[str, str]:
+    differing = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ("mechanical_asymmetry", "engine_maintenance_policy", "sensor_failure"):
+            np.random.seed(0)
+            df = TelemetryGenerator(dict(ScenarioLoader().load(name)), 600, 4).generate()
+            path = save_telemetry(df, os.path.join(tmp, f"{name}.csv"))
+            result = ingest_flight_file(path, ChannelMap.load("identity"), chunk_rows=333)
+            if result["anomalies"] != AnomalyDetector().detect(df) or result["rows"] != len(df):
+                differing.append(name)
+    return ("PASSED" if not differing else "FAILED"), f"scenarios with different detections: {differing}"
+
+
+def test_partial_store_readable() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp:
+        np.random.seed(0)
+        df = TelemetryGenerator(dict(ScenarioLoader().load("sensor_failure")), 600, 4).generate()
+        path = save_telemetry(df, os.path.join(tmp, "flight.csv"))
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        row = lines[451].split(",")
+        row[lines[0].split(",").index("altitude_ft")] = "not-a-number"   # in the fifth 100-row chunk
+        lines[451] = ",".join(row)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        store_dir = os.path.join(tmp, "store")
+        try:
+            ingest_flight_file(path, ChannelMap.load("identity"), chunk_rows=100, store_dir=store_dir)
+            error = None
+        except ValueError as e:
+            error = e
+        stored = read_columnar(store_dir)
+    ok = error is not None and len(stored) == 400 and stored['timestamp'].tolist() == df['timestamp'].iloc[:400].tolist()
+    return ("PASSED" if ok else "FAILED"), f"error: {error!r}, rows readable from the partial store: {len(stored)}"
+
+
+def _recorder_export(path: str):
+    times = pd.date_range("2024-03-01 10:00:00", periods=40, freq="500ms")
+    hydraulic = np.where(np.arange(40) % 4 == 0, 3000.0, np.nan)  # recorded at a quarter of the rate
+    hydraulic[[24, 28, 32, 36]] = 500.0
+    pd.DataFrame({
+        "UTC_TIME": times.strftime("%Y-%m-%d %H:%M:%S.%f"),
+        "ALT_STD": np.linspace(3000, 2000, 40),
+        "HYD_G_PRESS": hydraulic,
+        "FLAP_MOT_L_CUR": np.full(40, 2500.0),  # mA, mapped with scale 0.001
+        "WARNINGS": [""] * 30 + ["HYD G SYS LO PR;ENG 1 FIRE"] + [""] * 9,
+    }).to_csv(path, index=False)
+
+
+def test_mapped_recording() -> tuple[str, str]:
+    channel_map = ChannelMap.load("generic_fdr")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.csv")
+        _recorder_export(path)
+        restricted = channel_map.restricted_to(pd.read_csv(path, nrows=0).columns)
+        frame = pd.concat(iter_flight_data(path, restricted, chunk_rows=7))
+        result = ingest_flight_file(path, channel_map, chunk_rows=7)
+    ok = (frame['timestamp'].iloc[[0, -1]].tolist() == [0.0, 19.5]
+          and frame['green_hydraulic_pressure_psi'].iloc[21:25].tolist() == [3000.0, 3000.0, 3000.0, 500.0]
+          and frame['left_flap_motor_current'].iloc[0] == np.float32(2.5)
+          and str(frame['altitude_ft'].dtype) == 'int32'
+          and frame['ecam_alerts'].iloc[30] == "HYD G SYS LO PR|ENG 1 FIRE"
+          and result["anomalies"] == [("GREEN_HYDRAULIC_LOSS", 12), ("CRITICAL_ECAM_ALERT", 15)]
+          and "FLAP_STUCK" not in result["rules"])
+    return ("PASSED" if ok else "FAILED"), f"anomalies {result['anomalies']}, rules run: {len(result['rules'])}"
+
+
+def test_runs_catalogued() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.csv")
+        _recorder_export(path)
+        catalog = RunCatalog(os.path.join(tmp, "catalog.csv"))
+        result = ingest_flight_file(path, ChannelMap.load("generic_fdr"), catalog=catalog)
+        entry = catalog.find(source_fingerprint(path), kind="ingest")
+        runs = len(catalog.entries())
+    ok = (entry is not None and entry["run_id"] == result["run_id"] and runs == 1
+          and decode_anomalies(entry["anomalies"]) == result["anomalies"] and entry["rows"] == "40")
+    return ("PASSED" if ok else "FAILED"), f"catalog entry: {entry}"
+
+
+def main():
+    tests = [test_one_schema_copy, test_simulator_csv_matches_detector, test_partial_store_readable, test_mapped_recording,
+             test_runs_catalogued]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} flight data ingestion checks passed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# test_hfacs_batching.py
+# Checks HFACSAnalyzer.analyze_batch against the local stub backend (no GCP access needed):
+# batched results equal what analyze() returns flight by flight, truncated or malformed batch
+# answers are split down until every flight is answered, and plan_batches keeps each request
+# inside the prompt and output token budgets.
+# Run from the project root: python tests/test_hfacs_batching.py
+
+import json
+import os
+import re
+import sys
+import tempfile
+from types import SimpleNamespace
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.hfacs_analyzer import ALL_EVIDENCE_TAGS, BATCH_OUTPUT_TOKENS_PER_FLIGHT, HFACSAnalyzer
+from data_analysis.analysis_modules.logging_utils import configure_logging
+from data_analysis.analysis_modules.rate_limiter import TokenBucketLimiter
+from data_analysis.analysis_modules.resilience import ResilientModel
+from data_analysis.analysis_modules.stub_backend import FaultInjectingBackend
+from data_analysis.analysis_modules.vertex_client import estimate_tokens
+
+_FLIGHT_ID = re.compile(r"=== FLIGHT (FLT-\d+) ===")
+PROMPT = "Known tags: {ALL_EVIDENCE_TAGS}\nAnswer with comma-separated tags or NONE.\nCombined Reports to analyze:\n{combined_text}"
+
+
+class RecordingBackend(FaultInjectingBackend):
+    """Stub backend that logs every request and can spoil answers covering more than one flight."""
+    def __init__(self, spoil=None):
+        super().__init__(latency_s=0.0, jitter=0.0)
+        self.spoil = spoil
+        self.requests = []  # (flights in the prompt, batched?, estimated prompt tokens)
+
+    def generate_content(self, prompt, generation_config=None, **kwargs):
+        response = super().generate_content(prompt, generation_config=generation_config, **kwargs)
+        flights = len(set(_FLIGHT_ID.findall(prompt)))
+        self.requests.append((max(flights, 1), generation_config is not None, estimate_tokens(prompt)))
+        if self.spoil and generation_config is not None and flights > 1:
+            return self.spoil(response)
+        return response
+
+
+def _truncate(response):
+    """Keeps the first half of the JSON answer and reports MAX_TOKENS, as a cut-off reply would."""
+    items = json.loads(response.text)
+    candidate = SimpleNamespace(finish_reason=SimpleNamespace(name="MAX_TOKENS"), safety_ratings=[])
+    return SimpleNamespace(text=json.dumps(items[:len(items) // 2]), candidates=[candidate])
+
+
+def _malform(response):
+    return SimpleNamespace(text=response.text[:-7] + " (continued", candidates=response.candidates)
+
+
+def _contexts(count: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    contexts = {}
+    for number in range(count):
+        tags = list(rng.choice(ALL_EVIDENCE_TAGS, size=int(rng.integers(0, 4)), replace=False))
+        filler = " ".join(["Crew continued the approach as briefed."] * int(rng.integers(1, 30)))
+        notes = "; ".join(f"investigator notes {tag}" for tag in tags) or "no findings"
+        contexts[f"FLT-{number:03d}"] = {'ALL_EVIDENCE_TAGS': ", ".join(ALL_EVIDENCE_TAGS),
+                                         'combined_text': f"{filler}\nNotes: {notes}."}
+    return contexts
+
+
+def _analyzer(directory: str, backend) -> HFACSAnalyzer:
+    with open(os.path.join(directory, "prompt.txt"), 'w', encoding='utf-8') as f:
+        f.write(PROMPT)
+    limiter = TokenBucketLimiter(requests_per_minute=1e6, tokens_per_minute=1e9)
+    return HFACSAnalyzer("demo-project", "us-central1", None, "prompt.txt", directory,
+                         rate_limiter=limiter, model=ResilientModel(backend))
+
+
+def test_batch_matches_single() -> tuple[str, str]:
+    contexts = _contexts(40)
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = RecordingBackend()
+        analyzer = _analyzer(tmp, backend)
+        single = {flight_id: analyzer.analyze(ctx) for flight_id, ctx in contexts.items()}
+        backend.requests.clear()
+        batched = analyzer.analyze_batch(contexts)
+    found = sum(1 for result in single.values() if result[0] != "No Fault")
+    ok = batched == single and len(backend.requests) == 1 and 0 < found < len(contexts)
+    return ("PASSED" if ok else "FAILED"), f"{len(contexts)} flights ({found} with findings) in {len(backend.requests)} request(s), batched == single: {batched == single}"
+
+
+def _split_down(spoil) -> tuple:
+    contexts = _contexts(13, seed=1)
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = RecordingBackend()
+        analyzer = _analyzer(tmp, backend)
+        single = {flight_id: analyzer.analyze(ctx) for flight_id, ctx in contexts.items()}
+        backend.requests.clear()
+        backend.spoil = spoil
+        batched = analyzer.analyze_batch(contexts)
+    return batched == single, [flights for flights, _, _ in backend.requests]
+
+
+def test_truncated_reply_splits() -> tuple[str, str]:
+    matches, sizes = _split_down(_truncate)
+    # Each cut-off answer still covers its first half, so only the rest is re-sent: 13 -> 7 missing -> 4 + 3 -> singles.
+    ok = matches and sizes == [13, 4, 3, 1, 1, 1, 1]
+    return ("PASSED" if ok else "FAILED"), f"batched == single: {matches}, flights per request: {sizes}"
+
+
+def test_malformed_reply_splits() -> tuple[str, str]:
+    matches, sizes = _split_down(_malform)
+    # Nothing parses, so the batch halves until every flight goes through analyze() on its own.
+    ok = matches and sizes[0] == 13 and sizes.count(1) == 13 and sorted(set(sizes)) == [1, 2, 3, 4, 6, 7, 13]
+    return ("PASSED" if ok else "FAILED"), f"batched == single: {matches}, flights per request: {sizes}"
+
+
+def test_token_budget() -> tuple[str, str]:
+    contexts = _contexts(60, seed=2)
+    ids = list(contexts)
+    max_prompt_tokens, max_output_tokens = 1400, 6 * BATCH_OUTPUT_TOKENS_PER_FLIGHT
+    with tempfile.TemporaryDirectory() as tmp:
+        backend = RecordingBackend()
+        analyzer = _analyzer(tmp, backend)
+        batches = analyzer.plan_batches(contexts, max_prompt_tokens, max_output_tokens)
+        sent = [estimate_tokens(analyzer._format_batch_prompt({i: contexts[i] for i in batch})) for batch in batches]
+        estimated = [analyzer._estimate_batch_tokens([contexts[i] for i in batch]) for batch in batches]
+        # A batch closed below 6 flights must be one the next flight would have pushed over the budget.
+        loose = [n for n, batch in enumerate(batches[:-1]) if len(batch) < 6 and analyzer._estimate_batch_tokens(
+            [contexts[i] for i in batch + [ids[ids.index(batch[-1]) + 1]]]) <= max_prompt_tokens]
+        results = analyzer.analyze_batch(contexts, max_prompt_tokens, max_output_tokens)
+    over_budget = [tokens for tokens, batch in zip(sent, batches) if tokens > max_prompt_tokens and len(batch) > 1]
+    sent_over = [tokens for flights, _, tokens in backend.requests if tokens > max_prompt_tokens and flights > 1]
+    ok = (not over_budget and not sent_over and not loose and all(e >= t for e, t in zip(estimated, sent))
+          and max(len(batch) for batch in batches) == 6 and any(len(batch) < 6 for batch in batches[:-1])
+          and [i for batch in batches for i in batch] == ids and set(results) == set(contexts))
+    return ("PASSED" if ok else "FAILED"), f"{len(batches)} batches of {[len(b) for b in batches]}, largest prompt ~{max(sent)} tokens (budget {max_prompt_tokens})"
+
+
+def main():
+    configure_logging(level="ERROR")  # the split-and-retry messages are expected here
+    tests = [test_batch_matches_single, test_truncated_reply_splits, test_malformed_reply_splits, test_token_budget]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} batched analysis checks passed.")
+
+
+if __name__ == '__main__':
+    main()
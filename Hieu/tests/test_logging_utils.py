@@ -0,0 +1,62 @@
+# test_logging_utils.py
+# Checks level filtering, lazy argument formatting and the JSON-lines file output.
+# Run from the project root: python tests/test_logging_utils.py
+
+import json
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.logging_utils import configure_logging, get_logger
+
+
+class _CountingArg:
+    """Counts how often the logger turns it into a string."""
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return "arg"
+
+
+def test_filtered_records_are_not_formatted() -> tuple[str, str]:
+    configure_logging(level="INFO", console=False)
+    arg = _CountingArg()
+    for _ in range(1000):
+        get_logger("test").debug("tick %s", arg)
+    return ("PASSED" if arg.formatted == 0 else "FAILED"), f"{arg.formatted} formatting calls for 1000 filtered records"
+
+
+def test_json_lines_output() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "run.jsonl")
+        configure_logging(level="DEBUG", json_path=path, console=False)
+        logger = get_logger("test")
+        logger.debug("tick %d", 7, extra={"flight_id": "VN-A688"})
+        logger.warning("rate limited")
+        configure_logging(level="INFO", console=False)  # closes the file handler
+        with open(path, encoding="utf-8") as f:
+            entries = [json.loads(line) for line in f]
+    ok = (len(entries) == 2 and entries[0]["message"] == "tick 7" and entries[0]["flight_id"] == "VN-A688"
+          and entries[0]["logger"] == "hfacs.test" and entries[1]["level"] == "WARNING")
+    return ("PASSED" if ok else "FAILED"), f"{len(entries)} JSON lines, first {entries[0] if entries else None}"
+
+
+def main():
+    tests = [test_filtered_records_are_not_formatted, test_json_lines_output]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} logging checks passed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,58 @@
+# test_near_duplicates.py
+# Checks the MinHash/LSH near-duplicate index used by the bulk accident classifier.
+# Run from the project root: python tests/test_near_duplicates.py
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.near_duplicates import NearDuplicateIndex, cluster_summaries, normalize_summary
+
+SUMMARIES = {
+    "a": "The aircraft crashed into a mountain while en route in poor weather. 23 killed.",
+    "b": "The aircraft crashed into a mountain while en route in poor weather. 41 killed.",
+    "c": "the aircraft crashed into a mountain, while en route in poor weather -- 7 killed",
+    "d": "Shortly after takeoff, the No. 2 engine failed and the crew lost control during the return to the airport.",
+    "e": "Crashed while attempting to land. Icing.",
+}
+
+
+def test_normalization() -> tuple[str, str]:
+    normalized = normalize_summary("Flight 1234 crashed, 23 killed!")
+    return ("PASSED" if normalized == "flight # crashed # killed" else "FAILED"), repr(normalized)
+
+
+def test_clusters() -> tuple[str, str]:
+    assignments = cluster_summaries(SUMMARIES)
+    expected = {"a": "a", "b": "a", "c": "a", "d": "d", "e": "e"}
+    actual = {key: rep for key, (rep, _) in assignments.items()}
+    similarities_ok = all(score >= 0.85 for score in (assignments["b"][1], assignments["c"][1]))
+    status = "PASSED" if actual == expected and similarities_ok else "FAILED"
+    return status, f"{actual}"
+
+
+def test_resume_is_stable() -> tuple[str, str]:
+    first, second = NearDuplicateIndex(), NearDuplicateIndex()
+    run_1 = {key: first.add(key, text) for key, text in SUMMARIES.items()}
+    run_2 = {key: second.add(key, text) for key, text in SUMMARIES.items()}
+    repeated = first.add("b", SUMMARIES["b"])
+    status = "PASSED" if run_1 == run_2 and repeated == run_1["b"] and len(first) == len(SUMMARIES) else "FAILED"
+    return status, f"stats {first.stats()}"
+
+
+def main():
+    tests = [test_normalization, test_clusters, test_resume_is_stable]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<28} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} near-duplicate checks passed.")
+
+
+if __name__ == '__main__':
+    main()
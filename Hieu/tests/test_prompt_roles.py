@@ -0,0 +1,123 @@
+# test_prompt_roles.py
+# Checks the role-scoped panel inputs on the scenario documents: the tech/ops specialist gets only
+# Level 1-2 tags and no maintenance logs, the maint/org specialist Level 3-4 tags and every
+# section, and the evidence text matches what risk_engine's _format_hfacs_input produced before
+# format_evidence_sections replaced it.
+# Run from the project root: python tests/test_prompt_roles.py
+
+import os
+import sys
+from types import SimpleNamespace
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.hfacs_analyzer import ALL_EVIDENCE_TAGS, HFACS_RUBRIC
+from data_analysis.analysis_modules.prompt_roles import (
+    ROLE_SCOPES, build_role_context, format_evidence_sections, prompt_token_report
+)
+from data_analysis.analysis_modules.vertex_client import load_prompt
+from src.data_simulation.data_input_simulator.document_generator import DocumentGenerator
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+
+PROMPTS_DIR = os.path.join(PROJECT_ROOT, "config", "prompts", "prompts")
+
+
+def _documents(scenario: str = "flap_jam") -> tuple:
+    documents = DocumentGenerator(ScenarioLoader().load(scenario)).generate_all_documents()
+    return documents['narrative_report'], documents['maintenance_logs'], documents['context_data']
+
+
+def _legacy_format_hfacs_input(narrative, maint_logs, context) -> str:
+    """RiskTriageEngine._format_hfacs_input as it was before the role scoping."""
+    narrative_text = ""
+    if narrative and 'transcript' in narrative:
+        for entry in narrative['transcript']:
+            if 'speaker' in entry:
+                narrative_text += f"- {entry['speaker']}: {entry['dialogue']}\n"
+            elif 'sound' in entry:
+                narrative_text += f"- (Sound: {entry['sound']})\n"
+    logs_text = ""
+    if maint_logs:
+        for log in maint_logs:
+            logs_text += f"- {log['entry_date']}: {log['report']} | Action: {log['action']}\n"
+    context_text = ""
+    if context:
+        for key, value in context.items():
+            context_text += f"- {key.replace('_', ' ').title()}: {value}\n"
+    return (
+        f"NARRATIVE REPORT (CVR):\n{narrative_text}\n"
+        f"MAINTENANCE LOGS:\n{logs_text}\n"
+        f"CONTEXT DATA:\n{context_text}"
+    )
+
+
+def _levels(tag_list: str) -> set:
+    return {HFACS_RUBRIC[tag][0][:7] for tag in tag_list.split(', ')}
+
+
+def test_tech_ops_scope() -> tuple[str, str]:
+    narrative, logs, context = _documents()
+    role_context = build_role_context("tech_ops_specialist", narrative, logs, context)
+    tags = role_context['ALL_EVIDENCE_TAGS'].split(', ')
+    text = role_context['combined_text']
+    expected_tags = [tag for tag in ALL_EVIDENCE_TAGS if tag.startswith(("L1_", "L2_"))]
+    ok = (tags == expected_tags and _levels(role_context['ALL_EVIDENCE_TAGS']) == {"Level 1", "Level 2"}
+          and "MAINTENANCE LOGS" not in text and not any(log['report'] in text for log in logs)
+          and "NARRATIVE REPORT (CVR)" in text and "CONTEXT DATA" in text
+          and all(entry.get('dialogue', entry.get('sound')) in text for entry in narrative['transcript']))
+    return ("PASSED" if ok else "FAILED"), f"{len(tags)} tags, levels {sorted(_levels(role_context['ALL_EVIDENCE_TAGS']))}, maintenance in text: {'MAINTENANCE LOGS' in text}"
+
+
+def test_maint_org_scope() -> tuple[str, str]:
+    narrative, logs, context = _documents()
+    role_context = build_role_context("maint_org_specialist", narrative, logs, context)
+    tags = role_context['ALL_EVIDENCE_TAGS'].split(', ')
+    expected_tags = [tag for tag in ALL_EVIDENCE_TAGS if tag.startswith(("L3_", "L4_"))]
+    general = build_role_context("general_analyst", narrative, logs, context)
+    ok = (tags == expected_tags and _levels(role_context['ALL_EVIDENCE_TAGS']) == {"Level 3", "Level 4"}
+          and role_context['combined_text'] == general['combined_text']
+          and all(log['report'] in role_context['combined_text'] for log in logs)
+          and general['ALL_EVIDENCE_TAGS'].split(', ') == ALL_EVIDENCE_TAGS)
+    return ("PASSED" if ok else "FAILED"), f"{len(tags)} tags, levels {sorted(_levels(role_context['ALL_EVIDENCE_TAGS']))}"
+
+
+def test_sections_match_legacy_format() -> tuple[str, str]:
+    differing = []
+    cases = [("empty documents", (None, None, None)), ("no transcript", ({"source": "CVR"}, [], {}))]
+    cases += [(name, _documents(name)) for name in ScenarioLoader().list_scenarios()]
+    for name, (narrative, logs, context) in cases:
+        legacy = _legacy_format_hfacs_input(narrative, logs, context)
+        without_logs = legacy.split("MAINTENANCE LOGS:\n")[0] + "CONTEXT DATA:\n" + legacy.split("CONTEXT DATA:\n")[1]
+        if (format_evidence_sections(narrative, logs, context) != legacy
+                or format_evidence_sections(narrative, logs, context, ROLE_SCOPES["tech_ops_specialist"]["sections"]) != without_logs
+                or format_evidence_sections(narrative, logs, context, ("maintenance",)) != legacy[legacy.index("MAINTENANCE LOGS:"):legacy.index("CONTEXT DATA:")]):
+            differing.append(name)
+    return ("PASSED" if not differing else "FAILED"), f"{len(cases)} document sets; differing from the legacy text: {differing}"
+
+
+def test_prompts_format_and_shrink() -> tuple[str, str]:
+    narrative, logs, context = _documents()
+    analyzers = {role: SimpleNamespace(prompt_template=load_prompt(os.path.join(PROMPTS_DIR, f"{role}_prompt.txt")))
+                 for role in ROLE_SCOPES}
+    report = prompt_token_report(analyzers, narrative, logs, context)
+    ok = (report["general_analyst"]["scoped_tokens"] == report["general_analyst"]["unscoped_tokens"]
+          and all(report[role]["scoped_tokens"] < report[role]["unscoped_tokens"]
+                  for role in ("tech_ops_specialist", "maint_org_specialist")))
+    return ("PASSED" if ok else "FAILED"), f"(scoped, unscoped) tokens: { {role: tuple(counts.values()) for role, counts in report.items()} }"
+
+
+def main():
+    tests = [test_tech_ops_scope, test_maint_org_scope, test_sections_match_legacy_format, test_prompts_format_and_shrink]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} prompt role checks passed.")
+
+
+if __name__ == '__main__':
+    main()
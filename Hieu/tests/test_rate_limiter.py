@@ -0,0 +1,153 @@
+# test_rate_limiter.py
+# Checks the shared rate limiter with an injected clock, so no check sleeps: the token buckets
+# refill at the configured rate, 429s halve the rate (once per cooldown) and successes win it back,
+# configure_rate_limiter() changes the limiter analyzers already hold, and worker processes share
+# one quota through the coordinator.
+# Run from the project root: python tests/test_rate_limiter.py
+
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules import rate_limiter
+from data_analysis.analysis_modules.hfacs_analyzer import HFACSAnalyzer
+from data_analysis.analysis_modules.rate_limiter import (
+    COORDINATOR_ADDRESS_ENV, TokenBucketLimiter, configure_rate_limiter, connect_rate_limiter,
+    get_rate_limiter, start_rate_limiter_coordinator
+)
+from data_analysis.analysis_modules.stub_backend import FaultInjectingBackend
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class _FreshProcessLimiter:
+    """Runs a check against an unset process-wide limiter and a given coordinator address."""
+    def __init__(self, address: str = None):
+        self.address = address
+
+    def __enter__(self):
+        self._saved = (rate_limiter._process_limiter, os.environ.get(COORDINATOR_ADDRESS_ENV))
+        rate_limiter._process_limiter = None
+        os.environ.pop(COORDINATOR_ADDRESS_ENV, None)
+        if self.address:
+            os.environ[COORDINATOR_ADDRESS_ENV] = self.address
+        return self
+
+    def __exit__(self, *exc):
+        rate_limiter._process_limiter, address = self._saved
+        os.environ.pop(COORDINATOR_ADDRESS_ENV, None)
+        if address is not None:
+            os.environ[COORDINATOR_ADDRESS_ENV] = address
+
+
+def test_token_bucket_refill() -> tuple[str, str]:
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(requests_per_minute=60, tokens_per_minute=6000, clock=clock)
+    burst = [limiter.reserve(50) for _ in range(60)]  # the full bucket: 60 requests, 3000 tokens
+    queued = [limiter.reserve(50) for _ in range(3)]   # one request per second after that
+    clock.advance(63)                                  # pays the queue back and refills 60 requests
+    refilled = [limiter.reserve() for _ in range(60)]
+    clock.advance(60)
+    full_tokens = limiter.reserve(6000)                # the whole token bucket in one request
+    token_bound = limiter.reserve(3000)                # requests are left, tokens are not: 30 s at 100 tokens/s
+    clock.advance(120)
+    oversize = limiter.reserve(10 ** 6)                # capped at one bucket, so it passes once the bucket is full
+    after_oversize = limiter.reserve(3000)
+    ok = (burst == [0.0] * 60 and queued == [1.0, 2.0, 3.0] and refilled == [0.0] * 60 and full_tokens == 0.0
+          and abs(token_bound - 30.0) < 1e-9 and oversize == 0.0 and abs(after_oversize - 30.0) < 1e-9
+          and abs(limiter.stats()["total_wait_seconds"] - 66.0) < 1e-6)
+    return ("PASSED" if ok else "FAILED"), f"queued waits {queued}, token-bound wait {token_bound:.1f}s, after an oversize prompt {after_oversize:.1f}s"
+
+
+def test_aimd_on_rate_limits() -> tuple[str, str]:
+    clock = FakeClock()
+    limiter = TokenBucketLimiter(requests_per_minute=60, tokens_per_minute=60000, clock=clock)
+    rates = []
+    limiter.on_rate_limited()
+    rates.append(limiter.stats()["requests_per_minute"])
+    first_wait = limiter.reserve()   # the 429 empties the request bucket; refills at the halved rate
+    limiter.on_rate_limited()        # same burst (inside the cooldown): counted, not halved again
+    rates.append(limiter.stats()["requests_per_minute"])
+    for _ in range(6):
+        clock.advance(2.5)
+        limiter.on_rate_limited()
+    rates.append(limiter.stats()["requests_per_minute"])  # floored at min_fraction
+    for _ in range(20):
+        limiter.on_success()
+    rates.append(limiter.stats()["requests_per_minute"])
+    for _ in range(100):
+        limiter.on_success()
+    rates.append(limiter.stats()["requests_per_minute"])
+    ok = (rates == [30.0, 30.0, 6.0, 30.0, 60.0] and abs(first_wait - 2.0) < 1e-9
+          and limiter.stats()["rate_limited_count"] == 8)
+    return ("PASSED" if ok else "FAILED"), f"req/min after 429s and successes: {rates}, first wait {first_wait:.1f}s"
+
+
+def test_configure_in_place() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp, _FreshProcessLimiter():
+        with open(os.path.join(tmp, "prompt.txt"), 'w', encoding='utf-8') as f:
+            f.write("Evidence: {combined_text}")
+        analyzer = HFACSAnalyzer("demo-project", "us-central1", None, "prompt.txt", tmp, model=FaultInjectingBackend())
+        configured = configure_rate_limiter(30, 3000)
+        follows = analyzer.rate_limiter is configured is get_rate_limiter()
+        quota = analyzer.rate_limiter.stats()
+        configured.on_rate_limited()
+        configure_rate_limiter(30, 3000)   # same quota again (e.g. from a second script): keeps the backoff
+        kept = configured.stats()["requests_per_minute"]
+        configure_rate_limiter(90, 9000)
+        changed = configured.stats()["requests_per_minute"]
+        try:
+            configure_rate_limiter(30, 3000, burst=5)
+            rejected = False
+        except TypeError:
+            rejected = True
+    ok = (follows and quota["requests_per_minute"] == 30.0 and quota["tokens_per_minute"] == 3000
+          and kept == 15.0 and changed == 90.0 and rejected)
+    return ("PASSED" if ok else "FAILED"), f"analyzer follows configure: {follows}, rate after 429 + same quota {kept}, after new quota {changed}"
+
+
+def test_coordinator_shared_quota() -> tuple[str, str]:
+    manager, address = start_rate_limiter_coordinator(requests_per_minute=120, tokens_per_minute=10 ** 6)
+    try:
+        with _FreshProcessLimiter(address):
+            first, second = get_rate_limiter(), connect_rate_limiter(address)
+            waits = [client.reserve() for _ in range(60) for client in (first, second)]
+            queued = second.reserve()     # 120 requests taken between the two: the next one queues
+            first.on_rate_limited()
+            halved = second.stats()["requests_per_minute"]
+            configured = configure_rate_limiter(600, 10 ** 6)
+            reconfigured = second.stats()["requests_per_minute"]
+    finally:
+        manager.shutdown()
+    ok = (max(waits) == 0.0 and 0.3 < queued <= 0.5 and halved == 60.0 and configured is first
+          and reconfigured == 600.0)
+    return ("PASSED" if ok else "FAILED"), f"121st request across two clients waits {queued:.2f}s, 429 seen by the other client: {halved} req/min, after configure: {reconfigured}"
+
+
+def main():
+    tests = [test_token_bucket_refill, test_aimd_on_rate_limits, test_configure_in_place,
+             test_coordinator_shared_quota]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} rate limiter checks passed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# test_report_renderer.py
+# Checks the batch report chart rendering: charts written inline and through the process pool,
+# and a pool broken by a dying worker falling back to in-process rendering for the rest.
+# Run from the project root: python tests/test_report_renderer.py
+
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules import report_renderer
+from data_analysis.analysis_modules.report_renderer import CHART_RENDERERS, ChartJob, render_charts
+
+PARENT_PID = os.getpid()
+
+
+def _dies_in_worker(payload: dict):
+    """Renders normally in this process; kills any worker process that runs it (the pool breaks)."""
+    if os.getpid() != PARENT_PID:
+        os._exit(1)
+    return CHART_RENDERERS["overall_metrics"](payload)
+
+
+CHART_RENDERERS["dies_in_worker"] = _dies_in_worker  # inherited by forked workers
+
+
+def _jobs(directory: str, kinds) -> list:
+    payloads = {
+        "overall_metrics": {"precision": 0.8, "recall": 0.6, "f1_score": 0.69, "num_runs": 12},
+        "grouped_prf1": {"names": ["a", "b"], "precision": [0.5, 1.0], "recall": [0.4, 0.9], "f1_score": [0.44, 0.95],
+                         "title": "Per scenario"},
+        "confusion_breakdown": {"names": ["L1_X", "L2_Y"], "tp": [3, 1], "fp": [0, 2], "fn": [1, 0], "title": "Drill-down"},
+        "dies_in_worker": {"precision": 0.1, "recall": 0.2, "f1_score": 0.13, "num_runs": 3},
+    }
+    return [ChartJob(kind, payloads[kind], os.path.join(directory, f"{number}_{kind}.png")) for number, kind in enumerate(kinds)]
+
+
+def _all_written(jobs, written) -> bool:
+    return sorted(written) == sorted(job.output_path for job in jobs) and all(
+        os.path.getsize(job.output_path) > 0 for job in jobs)
+
+
+def test_inline_and_pool() -> tuple[str, str]:
+    kinds = ["overall_metrics", "grouped_prf1", "confusion_breakdown"]
+    with tempfile.TemporaryDirectory() as tmp:
+        inline_jobs = _jobs(os.path.join(tmp, "inline"), kinds)
+        pool_jobs = _jobs(os.path.join(tmp, "pool"), kinds)
+        inline_ok = _all_written(inline_jobs, render_charts(inline_jobs, max_workers=1))
+        pool_ok = _all_written(pool_jobs, render_charts(pool_jobs, max_workers=2))
+    return ("PASSED" if inline_ok and pool_ok else "FAILED"), f"inline written: {inline_ok}, pool written: {pool_ok}"
+
+
+def test_broken_pool_falls_back() -> tuple[str, str]:
+    kinds = ["dies_in_worker", "overall_metrics", "grouped_prf1", "confusion_breakdown"]
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = _jobs(tmp, kinds)
+        written = render_charts(jobs, max_workers=2)
+        ok = _all_written(jobs, written) and len(written) == len(set(written))
+    return ("PASSED" if ok else "FAILED"), f"{len(written)}/{len(jobs)} charts written after a worker died"
+
+
+def test_failing_job_not_retried() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp:
+        jobs = _jobs(tmp, ["overall_metrics", "grouped_prf1"])
+        jobs[1].payload = {"names": ["a"]}  # missing metrics: the renderer raises KeyError
+        calls = []
+        inline = report_renderer._render_inline
+        report_renderer._render_inline = lambda remaining: calls.append(remaining) or inline(remaining)
+        try:
+            written = render_charts(jobs, max_workers=2)
+        finally:
+            report_renderer._render_inline = inline
+    ok = written == [jobs[0].output_path] and not calls
+    return ("PASSED" if ok else "FAILED"), f"written {len(written)}, in-process fallbacks {len(calls)}"
+
+
+def main():
+    tests = [test_inline_and_pool, test_broken_pool_falls_back, test_failing_job_not_retried]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} report renderer checks passed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,153 @@
+# test_resilience.py
+# Exercises the circuit breaker (which 429s must not trip) and request hedging (within the rate
+# limiter's quota) against the local fault-injecting backend (no GCP credentials needed); a timed-out
+# call is retried once, without sleeping.
+# Run from the project root: python tests/test_resilience.py
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+from google.api_core.exceptions import ResourceExhausted
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.hfacs_analyzer import HFACSAnalyzer
+from data_analysis.analysis_modules.rate_limiter import TokenBucketLimiter
+from data_analysis.analysis_modules.resilience import CircuitBreaker, CircuitOpenError, ResilientModel
+from data_analysis.analysis_modules.stub_backend import FaultInjectingBackend
+from data_analysis.analysis_modules.risk_engine import RiskTriageEngine
+from src.data_simulation.data_input_simulator.main_simulator import ScenarioSimulator
+
+
+def test_breaker_fails_fast() -> tuple[str, str]:
+    backend = FaultInjectingBackend(latency_s=0.01, error_rate=1.0)
+    model = ResilientModel(backend, breaker=CircuitBreaker(min_calls=5, reset_timeout=60))
+    rejected = 0
+    for _ in range(50):
+        try:
+            model.generate_content("ping")
+        except CircuitOpenError:
+            rejected += 1
+        except Exception:
+            pass
+    if backend.calls == 5 and rejected == 45:
+        return "PASSED", f"backend saw {backend.calls} calls, {rejected} rejected without a call"
+    return "FAILED", f"backend saw {backend.calls} calls, {rejected} rejected"
+
+
+def test_rate_limits_keep_circuit_closed() -> tuple[str, str]:
+    backend = FaultInjectingBackend(latency_s=0.001, rate_limit_rate=1.0)
+    model = ResilientModel(backend, breaker=CircuitBreaker(min_calls=5, reset_timeout=60))
+    rate_limited = 0
+    for _ in range(20):
+        try:
+            model.generate_content("ping")
+        except ResourceExhausted:
+            rate_limited += 1
+    state = model.breaker.state
+    ok = state == CircuitBreaker.CLOSED and rate_limited == backend.calls == 20 and model.breaker.rejected_calls == 0
+    return ("PASSED" if ok else "FAILED"), f"state after {rate_limited} 429s: {state}, backend saw {backend.calls} calls"
+
+
+def test_breaker_recovers() -> tuple[str, str]:
+    backend = FaultInjectingBackend(latency_s=0.001, error_rate=1.0)
+    model = ResilientModel(backend, breaker=CircuitBreaker(min_calls=3, reset_timeout=0.2))
+    for _ in range(3):
+        try:
+            model.generate_content("ping")
+        except Exception:
+            pass
+    backend.degrade(error_rate=0.0)
+    time.sleep(0.25)
+    model.generate_content("probe")  # half-open probe succeeds -> closed
+    state = model.breaker.state
+    return ("PASSED" if state == CircuitBreaker.CLOSED else "FAILED"), f"state after probe: {state}"
+
+
+def _p99(model, n=300) -> float:
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        model.generate_content("ping")
+        latencies.append(time.perf_counter() - start)
+    return float(np.percentile(latencies[50:], 99))
+
+
+HEDGE_KNOBS = dict(latency_s=0.005, jitter=0.2, slow_rate=0.05, slow_latency_s=0.3)
+
+
+def test_hedging_bounds_tail() -> tuple[str, str]:
+    plain = _p99(ResilientModel(FaultInjectingBackend(seed=1, **HEDGE_KNOBS)))
+    limiter = TokenBucketLimiter(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9)
+    hedged_model = ResilientModel(FaultInjectingBackend(seed=1, **HEDGE_KNOBS), hedge=True, min_hedge_delay=0.01,
+                                  rate_limiter=limiter)
+    hedged = _p99(hedged_model)
+    counted = limiter.stats()["hedged_requests"] == hedged_model.hedged_calls > 0
+    status = "PASSED" if hedged < plain / 2 and counted else "FAILED"
+    return status, f"p99 {plain * 1000:.0f} ms -> {hedged * 1000:.0f} ms with {hedged_model.hedged_calls} hedged calls"
+
+
+def test_hedges_respect_quota() -> tuple[str, str]:
+    # Room for 3 requests a minute: hedges may use those, then wait on the first call instead.
+    limiter = TokenBucketLimiter(requests_per_minute=3, tokens_per_minute=10 ** 6)
+    backend = FaultInjectingBackend(seed=1, **HEDGE_KNOBS)
+    model = ResilientModel(backend, hedge=True, min_hedge_delay=0.01, rate_limiter=limiter)
+    _p99(model)
+    stats = limiter.stats()
+    ok = (model.hedged_calls == stats["hedged_requests"] == 3 and model.skipped_hedges == stats["skipped_hedges"] > 0
+          and backend.calls == 300 + model.hedged_calls)
+    return ("PASSED" if ok else "FAILED"), f"{model.hedged_calls} hedges sent, {model.skipped_hedges} skipped for lack of quota"
+
+
+def test_timeouts_retry_once() -> tuple[str, str]:
+    backend = FaultInjectingBackend(latency_s=0.01, jitter=0.0, slow_rate=1.0, slow_latency_s=0.3)
+    model = ResilientModel(backend, timeout=0.05)
+    with tempfile.TemporaryDirectory() as tmp:
+        with open(os.path.join(tmp, "prompt.txt"), 'w', encoding='utf-8') as f:
+            f.write("Evidence: {combined_text}")
+        analyzer = HFACSAnalyzer("stub", "local", "", "prompt.txt", tmp, model=model,
+                                 rate_limiter=TokenBucketLimiter(requests_per_minute=10 ** 6, tokens_per_minute=10 ** 9))
+        start = time.perf_counter()
+        level = analyzer.analyze({'combined_text': "L1_MISJUDGMENTS"})[0]
+        elapsed = time.perf_counter() - start
+    ok = level == "API_Error: Failed after Timeout retries" and backend.calls == 2 and elapsed < 0.5
+    return ("PASSED" if ok else "FAILED"), f"'{level}' after {backend.calls} calls in {elapsed:.2f}s"
+
+
+def test_engine_bounded_under_outage() -> tuple[str, str]:
+    backend = FaultInjectingBackend(latency_s=0.01)
+    model = ResilientModel(backend, breaker=CircuitBreaker(min_calls=4, reset_timeout=60))
+    engine = RiskTriageEngine("stub", "local", "", use_cache=False, model=model)
+    simulator = ScenarioSimulator("flap_jam")
+    simulator.run()
+    flight = simulator.get_data()
+
+    engine.analyze_flight(flight)
+    backend.degrade(error_rate=1.0)
+    start = time.perf_counter()
+    for _ in range(5):
+        report, _ = engine.analyze_flight(flight)
+    elapsed = time.perf_counter() - start
+    status = "PASSED" if elapsed < 2.0 and report["hfacs_level"].startswith("API_Error") else "FAILED"
+    return status, f"5 flights during outage in {elapsed:.2f}s, final level '{report['hfacs_level']}'"
+
+
+def main():
+    tests = [test_breaker_fails_fast, test_rate_limits_keep_circuit_closed, test_breaker_recovers, test_hedging_bounds_tail,
+             test_hedges_respect_quota, test_timeouts_retry_once, test_engine_bounded_under_outage]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<36} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} resilience checks passed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+# test_scenario_expander.py
+# Checks the scenario templates: variants depend only on (seed, index), building one copies only
+# the containers along the sampled paths, the ground-truth rules follow the sampled values, and
+# the pressurization family's labels and transcript match what the simulated flight actually does.
+# Run from the project root: python tests/test_scenario_expander.py
+
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.logging_utils import configure_logging
+from src.data_simulation.data_input_simulator.scenario_expander import (
+    ScenarioExpander, ScenarioTemplate, _set_path, list_templates
+)
+from src.data_simulation.data_input_simulator.telemetry_generator import DEFAULT_FLIGHT_SECONDS, TelemetryGenerator
+
+DELAY = "telemetry_events.0.parameters.pilot_reaction_time_seconds.delay"
+
+
+def test_variants_deterministic() -> tuple[str, str]:
+    differing = []
+    for name in list_templates():
+        first, second = ScenarioTemplate.from_file(name), ScenarioTemplate.from_file(name)
+        forward = [first.build_variant(index, seed=7) for index in range(20)]
+        backward = [second.build_variant(index, seed=7) for index in reversed(range(20))][::-1]
+        other_seed = [first.build_variant(index, seed=8)["variant_parameters"] for index in range(20)]
+        if forward != backward or [v["variant_parameters"] for v in forward] == other_seed:
+            differing.append(name)
+    expander = ScenarioExpander.from_names(list_templates(), seed=3)
+    streamed = list(expander.iter_variants(9))
+    rebuilt = [expander.templates[i % 3].build_variant(i // 3, 3) for i in range(9)]
+    ok = not differing and streamed == rebuilt
+    return ("PASSED" if ok else "FAILED"), f"templates not reproducible per (seed, index): {differing}, stream matches rebuild: {streamed == rebuilt}"
+
+
+def test_copies_only_along_path() -> tuple[str, str]:
+    base = {"a": {"b": {"c": 1}, "shared": {"x": 1}}, "events": [{"p": {"v": 1}}, {"q": 2}], "other": [1, 2]}
+    variant = dict(base)
+    _set_path(variant, "a.b.c", 5)
+    _set_path(variant, "events.0.p.v", 9)
+    _set_path(variant, "a.new.key", 3)
+    plain_ok = (base["a"]["b"]["c"] == 1 and base["events"][0]["p"]["v"] == 1 and "new" not in base["a"]
+                and variant["a"]["b"]["c"] == 5 and variant["events"][0]["p"]["v"] == 9 and variant["a"]["new"] == {"key": 3}
+                and variant["a"]["shared"] is base["a"]["shared"] and variant["events"][1] is base["events"][1]
+                and variant["other"] is base["other"])
+
+    template = ScenarioTemplate.from_file("pressurization_misjudgment_family")
+    built, base_event = template.build_variant(0), template.base["telemetry_events"][0]
+    scenario_ok = (built["maintenance_logs"] is template.base["maintenance_logs"]
+                   and built["context_data"] is template.base["context_data"]
+                   and built["telemetry_events"] is not template.base["telemetry_events"]
+                   and built["telemetry_events"][1] is template.base["telemetry_events"][1]
+                   and built["telemetry_events"][0]["parameters"]["ecam_alerts"] is base_event["parameters"]["ecam_alerts"]
+                   and built["telemetry_events"][0]["parameters"]["pilot_reaction_time_seconds"]["delay"] == built["variant_parameters"][DELAY]
+                   and base_event["parameters"]["pilot_reaction_time_seconds"]["delay"] == 60.0
+                   and base_event["trigger_condition"] == "random_time_in_phase")
+    ok = plain_ok and scenario_ok
+    return ("PASSED" if ok else "FAILED"), f"plain dict: {plain_ok}, scenario variant shares untouched parts: {scenario_ok}"
+
+
+def test_ground_truth_rules() -> tuple[str, str]:
+    wrong = []
+    hydraulic = ScenarioTemplate.from_file("hydraulic_failure_family")
+    for index in range(60):
+        variant = hydraulic.build_variant(index)
+        tagged = "L1_ATTENTION_FAILURES" in variant["ground_truth"]["hfacs_analysis"]["evidence_tags"]
+        if tagged != (variant["variant_parameters"][DELAY] > 10):
+            wrong.append(variant["variant_id"])
+    pressurization = ScenarioTemplate.from_file("pressurization_misjudgment_family")
+    for index in range(60):
+        variant = pressurization.build_variant(index)
+        values = variant["variant_parameters"]
+        delay, rate = values[DELAY], values["telemetry_events.0.parameters.cabin_altitude_ft.rate_of_climb_fpm"]
+        reachable = values["telemetry_events.0.onset_into_cruise_seconds"] + delay + 120000 / rate < 115
+        tags = variant["ground_truth"]["hfacs_analysis"]["evidence_tags"]
+        transcript = variant["narrative_report"]["transcript"]
+        expected_lines = [f"T+{delay:g}s", f"T+{delay + 2:g}s"] if reachable else []
+        if (("L1_RULE_BASED_DECISIONS" in tags) != (reachable and delay >= 20) or "L1_MISJUDGMENTS" not in tags
+                or not variant["ground_truth"]["is_anomaly"]
+                or [line["relative_timestamp"] for line in transcript[2:]] != expected_lines):
+            wrong.append(variant["variant_id"])
+    return ("PASSED" if not wrong else "FAILED"), f"variants whose labels do not follow the rules: {wrong}"
+
+
+def test_labels_match_simulation() -> tuple[str, str]:
+    template = ScenarioTemplate.from_file("pressurization_misjudgment_family")
+    mismatched, unreachable = [], 0
+    for index in range(80):
+        variant = template.build_variant(index, seed=1)
+        expects_descent = len(variant["narrative_report"]["transcript"]) == 4
+        unreachable += not expects_descent
+        for hz in (1, 4):
+            telemetry = TelemetryGenerator(variant, DEFAULT_FLIGHT_SECONDS, hz).generate()
+            excess_alert = any("CAB PR EXCESS CAB ALT" in str(alerts) for alerts in telemetry["ecam_alerts"])
+            if excess_alert != expects_descent or (telemetry["cabin_altitude_ft"].max() > 10000) != expects_descent:
+                mismatched.append((variant["variant_id"], hz))
+    ok = not mismatched and 0 < unreachable < 80
+    return ("PASSED" if ok else "FAILED"), f"{unreachable}/80 variants never pass 10,000 ft; label/flight mismatches: {mismatched}"
+
+
+def test_invalid_templates_rejected() -> tuple[str, str]:
+    base = {"template_name": "broken", "base_scenario": "pressurization_misjudgment",
+            "parameters": {DELAY: {"distribution": "uniform", "low": 1, "high": 2}}}
+    cases = {
+        "unknown distribution": {"parameters": {DELAY: {"distribution": "poisson"}}},
+        "derived from nothing": {"parameters": {DELAY: {"distribution": "derived", "from": "missing"}}},
+        "missing event": {"parameters": {"telemetry_events.5.parameters.x": {"distribution": "constant", "value": 1}}},
+        "unknown rule parameter": {"ground_truth_rules": [{"when": {"parameter": "missing", "op": "<", "value": 1}}]},
+        "unknown rule operator": {"ground_truth_rules": [{"when": {"parameter": DELAY, "op": "~", "value": 1}}]},
+        "unknown expression variable": {"ground_truth_rules": [{"when": {"expression": "d > 1", "variables": {"d": "missing"}}}]},
+        "bad expression": {"ground_truth_rules": [{"when": {"expression": "d >", "variables": {"d": DELAY}}}]},
+        "undeclared expression variable": {"ground_truth_rules": [{"when": {"expression": "d + e > 1", "variables": {"d": DELAY}}}]},
+    }
+    accepted = []
+    for name, change in cases.items():
+        try:
+            ScenarioTemplate({**base, **change})
+            accepted.append(name)
+        except ValueError:
+            pass
+    return ("PASSED" if not accepted else "FAILED"), f"invalid templates accepted: {accepted}"
+
+
+def main():
+    configure_logging(level="ERROR")  # skipped-trigger warnings are expected here
+    tests = [test_variants_deterministic, test_copies_only_along_path, test_ground_truth_rules,
+             test_labels_match_simulation, test_invalid_templates_rejected]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} scenario expander checks passed.")
+
+
+if __name__ == '__main__':
+    main()
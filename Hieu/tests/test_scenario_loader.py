@@ -0,0 +1,138 @@
+# test_scenario_loader.py
+# Checks the shared scenario registry on a scratch copy of the scenario files: a file is re-read
+# only when its mtime changes (and its compiled triggers go with the old config), returned configs
+# cannot be mutated, and the by_phase / by_level indexes follow the files on disk.
+# Run from the project root: python tests/test_scenario_loader.py
+
+import copy
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from src.data_simulation.data_input_simulator.scenario_loader import (
+    DEFAULT_SCENARIOS_DIR, ScenarioLoader, ScenarioRegistry, thaw
+)
+
+FIXTURE_SCENARIOS = ("flap_jam", "hydraulic_failure", "normal_flight", "pressurization_misjudgment")
+
+
+def _scratch_dir(tmp: str) -> str:
+    for name in FIXTURE_SCENARIOS:
+        shutil.copy(os.path.join(DEFAULT_SCENARIOS_DIR, f"{name}.json"), tmp)
+    return tmp
+
+
+def _rewrite(directory: str, name: str, edit) -> None:
+    """Applies edit to the scenario's JSON and moves its mtime forward, as an editor saving the file would."""
+    path = os.path.join(directory, f"{name}.json")
+    with open(path, encoding='utf-8') as f:
+        data = json.load(f)
+    edit(data)
+    before = os.stat(path).st_mtime_ns
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.utime(path, ns=(before + 2_000_000_000, before + 2_000_000_000))
+
+
+def test_reload_on_mtime_change() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = ScenarioRegistry(_scratch_dir(tmp))
+        first = registry.get("flap_jam")
+        cached = registry.get("flap_jam") is first
+        _rewrite(tmp, "flap_jam", lambda data: data.update(description="Edited on disk."))
+        reloaded = registry.get("flap_jam")
+        # A touch without a content change still counts as a new version of the file.
+        path = os.path.join(tmp, "flap_jam.json")
+        os.utime(path, ns=(os.stat(path).st_mtime_ns + 1_000_000_000,) * 2)
+        touched = registry.get("flap_jam")
+    ok = cached and reloaded is not first and reloaded["description"] == "Edited on disk." and touched is not reloaded
+    return ("PASSED" if ok else "FAILED"), f"cached hit: {cached}, reloaded: {reloaded is not first}, touched: {touched is not reloaded}"
+
+
+def test_configs_immutable() -> tuple[str, str]:
+    config = ScenarioLoader().load("flap_jam")
+    mutations = {
+        "set key": lambda: config.__setitem__("scenario_name", "x"),
+        "update": lambda: config.update(description="x"),
+        "nested dict": lambda: config["ground_truth"]["hfacs_analysis"].__setitem__("winning_level", "x"),
+        "nested list": lambda: config["telemetry_events"].append({}),
+        "list item": lambda: config["maintenance_logs"].__setitem__(0, {}),
+        "pop": lambda: config.pop("context_data"),
+    }
+    allowed = []
+    for name, mutate in mutations.items():
+        try:
+            mutate()
+            allowed.append(name)
+        except TypeError:
+            pass
+    private = thaw(config)
+    private["ground_truth"]["hfacs_analysis"]["evidence_tags"].append("L1_EXTRA")
+    deep = copy.deepcopy(config)
+    deep["telemetry_events"].clear()
+    untouched = ScenarioLoader().load("flap_jam")
+    ok = (not allowed and type(private) is dict and type(deep) is dict and untouched is config
+          and len(untouched["telemetry_events"]) == 1
+          and "L1_EXTRA" not in untouched["ground_truth"]["hfacs_analysis"]["evidence_tags"])
+    return ("PASSED" if ok else "FAILED"), f"mutations that went through: {allowed}"
+
+
+def test_phase_and_level_indexes() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp:
+        loader = ScenarioLoader(_scratch_dir(tmp))
+        before = (loader.scenarios_by_phase("CRUISE"), loader.scenarios_by_phase("CLIMB"),
+                  loader.scenarios_by_level("Level 1: Unsafe Acts"), loader.scenarios_by_level("No Fault"))
+        expected_before = (["hydraulic_failure", "normal_flight", "pressurization_misjudgment"], ["hydraulic_failure"],
+                           ["pressurization_misjudgment"], ["normal_flight"])
+
+        def to_level_one_in_climb(data):
+            data["valid_flight_phases"] = ["CLIMB"]
+            data["ground_truth"]["hfacs_analysis"]["winning_level"] = "Level 1: Unsafe Acts"
+        _rewrite(tmp, "flap_jam", to_level_one_in_climb)
+        os.remove(os.path.join(tmp, "normal_flight.json"))
+        after = (loader.scenarios_by_phase("CLIMB"), loader.scenarios_by_phase("APPROACH_LANDING"),
+                 loader.scenarios_by_level("Level 1: Unsafe Acts"), loader.scenarios_by_level("No Fault"))
+        expected_after = (["flap_jam", "hydraulic_failure"], [], ["flap_jam", "pressurization_misjudgment"], [])
+    ok = before == expected_before and after == expected_after
+    return ("PASSED" if ok else "FAILED"), f"before edit {before}, after edit {after}"
+
+
+def test_compiled_triggers_dropped_on_reload() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = ScenarioRegistry(_scratch_dir(tmp))
+        old = registry.get("flap_jam").compiled_triggers
+        _rewrite(tmp, "flap_jam", lambda data: data["telemetry_events"][0].update(
+            trigger_condition="rises(flap_lever_position >= 2) and phase(APPROACH_LANDING)"))
+        new = registry.get("flap_jam").compiled_triggers
+        # A trigger that no longer compiles fails the reload instead of serving the stale config.
+        _rewrite(tmp, "flap_jam", lambda data: data["telemetry_events"][0].update(trigger_condition="rises(("))
+        try:
+            registry.get("flap_jam")
+            rejected = False
+        except ValueError:
+            rejected = True
+    ok = (old is not new and [t.source for t in old] == ["flap_lever_position moves to 3"]
+          and [t.source for t in new] == ["rises(flap_lever_position >= 2) and phase(APPROACH_LANDING)"] and rejected)
+    return ("PASSED" if ok else "FAILED"), f"old {list(old)}, new {list(new)}, broken trigger rejected: {rejected}"
+
+
+def main():
+    tests = [test_reload_on_mtime_change, test_configs_immutable, test_phase_and_level_indexes,
+             test_compiled_triggers_dropped_on_reload]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} scenario loader checks passed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+# test_statistical_detectors.py
+# Checks the EWMA / CUSUM / rolling z-score detectors: the vectorized scans against plain loops,
+# a slow vibration creep that the rules miss, quiet normal flights, and block-wise results that
+# equal whole-flight ones.
+# Run from the project root: python tests/test_statistical_detectors.py
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.anomaly_detector import AnomalyDetector
+from data_analysis.analysis_modules.statistical_detectors import (
+    CUSUMDetector, EWMADetector, RollingZScoreDetector, default_statistical_detectors
+)
+from data_analysis.analysis_modules.streaming_detector import StreamingAnomalyDetector
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+from src.data_simulation.data_input_simulator.telemetry_generator import TelemetryGenerator
+
+
+def _normal_flight(seed: int, seconds: int = 600, hz: int = 4) -> pd.DataFrame:
+    np.random.seed(seed)
+    return TelemetryGenerator(dict(ScenarioLoader().load("normal_flight")), seconds, hz).generate()
+
+
+def test_scans_match_loops() -> tuple[str, str]:
+    rng = np.random.default_rng(0)
+    z = rng.normal(0.3, 1.0, (500, 3))
+    cusum, ewma, zscore = CUSUMDetector(k=0.5, h=1e9), EWMADetector(lam=0.1), RollingZScoreDetector(window=20)
+    states = [{"margin": 0.0, **d._initial_state(3)} for d in (cusum, ewma, zscore)]
+    for part in (z[:123], z[123:124], z[124:]):  # state carried across uneven blocks
+        cusum._scan(part, states[0])
+        ewma._scan(part, states[1])
+        zscore._scan(part, states[2])
+    upper, level = np.zeros(3), np.zeros(3)
+    for row in z:
+        upper = np.maximum(0.0, upper + row - 0.5)
+        level = 0.1 * row + 0.9 * level
+    window = z[-20:]
+    errors = [np.abs(states[0]["upper"] - upper).max(), np.abs(states[1]["ewma"] - level).max(),
+              np.abs(states[2]["history"] - window).max()]
+    ok = max(errors) < 1e-9
+    return ("PASSED" if ok else "FAILED"), f"max deviation from loop recursions {max(errors):.2e}"
+
+
+def test_vibration_creep_detected() -> tuple[str, str]:
+    df = _normal_flight(5)
+    creep = np.clip((df['timestamp'].to_numpy() - 200) / 300, 0, 1) * 0.04  # +2 deviations over 5 minutes
+    df['engine_1_vibration_n1'] = (df['engine_1_vibration_n1'] + creep).astype('float32')
+    rules = AnomalyDetector().detect(df)
+    found = AnomalyDetector(default_statistical_detectors()).detect(df)
+    names = [name for name, _ in found]
+    ok = not rules and "CUSUM_SHIFT:engine_1_vibration_n1" in names and "EWMA_DRIFT:engine_1_vibration_n1" in names \
+        and all(200 < timestamp < 600 for _, timestamp in found)
+    return ("PASSED" if ok else "FAILED"), f"rules {rules}, statistical {found}"
+
+
+def test_normal_flights_quiet() -> tuple[str, str]:
+    detector = AnomalyDetector(default_statistical_detectors())
+    alarms = {seed: detector.detect(_normal_flight(seed)) for seed in range(40)}
+    alarms.update({f"long{seed}": detector.detect(_normal_flight(seed, 1350, 10)) for seed in range(5)})
+    noisy = {seed: found for seed, found in alarms.items() if found}
+    return ("PASSED" if not noisy else "FAILED"), f"{len(noisy)}/{len(alarms)} normal flights alarmed {noisy}"
+
+
+def test_streaming_matches_whole() -> tuple[str, str]:
+    loader = ScenarioLoader()
+    differing = []
+    for name in ("hydraulic_failure", "pressurization_misjudgment", "supervisory_decision_error"):
+        blocks = list(TelemetryGenerator(dict(loader.load(name)), 600, 4).iter_blocks(150, seed=4))
+        whole = AnomalyDetector(default_statistical_detectors()).detect(pd.concat(blocks))
+        streamed = StreamingAnomalyDetector(AnomalyDetector(default_statistical_detectors())).detect_blocks(blocks)
+        if whole != streamed or not any(":" in anomaly for anomaly, _ in whole):
+            differing.append(name)
+    return ("PASSED" if not differing else "FAILED"), f"scenarios with different results: {differing}"
+
+
+def main():
+    tests = [test_scans_match_loops, test_vibration_creep_detected, test_normal_flights_quiet, test_streaming_matches_whole]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} statistical detector checks passed.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+# test_telemetry_schema.py
+# Checks that generated telemetry uses the declared channel dtypes, that it survives a CSV
+# save/load round trip (including CSVs written before the schema), and the memory saving.
+# Run from the project root: python tests/test_telemetry_schema.py
+
+import os
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.anomaly_detector import AnomalyDetector
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+from src.data_simulation.data_input_simulator.telemetry_generator import TelemetryGenerator
+from src.data_simulation.data_input_simulator.telemetry_schema import (
+    apply_schema, load_telemetry, memory_report, save_telemetry, split_alerts, validate_schema
+)
+
+
+def _flight(scenario_name: str = "engine_maintenance_policy", **options) -> pd.DataFrame:
+    np.random.seed(0)
+    return TelemetryGenerator(dict(ScenarioLoader().load(scenario_name)), **options).generate()
+
+
+def test_generated_dtypes() -> tuple[str, str]:
+    df = _flight()
+    wrong = validate_schema(df)
+    alerts = [split_alerts(value) for value in df['ecam_alerts'] if value]
+    ok = not wrong and df['timestamp'].dtype == np.int32 and alerts == [['ENG 1 VIB', 'ENG 1 STALL', 'ENG 1 FIRE', 'ENG 1 FIRE -> PULL/AGENT']]
+    return ("PASSED" if ok else "FAILED"), f"mismatched channels {wrong}, alerts {alerts}"
+
+
+def test_memory_saving() -> tuple[str, str]:
+    df = _flight(total_flight_seconds=1350, data_frequency_hz=10)
+    wide = df.astype({column: 'float64' for column in df.columns if column != 'ecam_alerts'})
+    wide['ecam_alerts'] = [split_alerts(value) for value in df['ecam_alerts']]  # the pre-schema list column
+    compact, before = memory_report(df)["bytes"], memory_report(wide)["bytes"]
+    ok = compact * 2.5 < before
+    return ("PASSED" if ok else "FAILED"), f"{compact / 1024:.0f} KiB vs {before / 1024:.0f} KiB per flight"
+
+
+def test_csv_round_trip() -> tuple[str, str]:
+    df = _flight("sensor_failure")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = save_telemetry(df, os.path.join(tmp, "telemetry.csv"))
+        loaded = load_telemetry(path)
+        legacy = df.copy()
+        legacy['ecam_alerts'] = [split_alerts(value) for value in df['ecam_alerts']]
+        legacy.astype({'vertical_g_force': 'float64'}).to_csv(os.path.join(tmp, "legacy.csv"), index=False)
+        legacy_loaded = load_telemetry(os.path.join(tmp, "legacy.csv"))
+    same = loaded.equals(df) and legacy_loaded.equals(df)
+    detections = AnomalyDetector().detect(loaded) == AnomalyDetector().detect(df)
+    ok = same and detections and not validate_schema(loaded)
+    return ("PASSED" if ok else "FAILED"), f"round trip equal: {same}, same detections: {detections}"
+
+
+def test_out_of_range_rejected() -> tuple[str, str]:
+    df = pd.DataFrame({'timestamp': [0, 1], 'flap_lever_position': [0, 400]})
+    try:
+        apply_schema(df)
+    except ValueError as e:
+        return "PASSED", str(e)
+    return "FAILED", "flap_lever_position=400 was cast to int8"
+
+
+def main():
+    tests = [test_generated_dtypes, test_memory_saving, test_csv_round_trip, test_out_of_range_rejected]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} telemetry schema checks passed.")
+
+
+if __name__ == '__main__':
+    main()
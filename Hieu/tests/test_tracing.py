@@ -0,0 +1,71 @@
+# test_tracing.py
+# Traces one simulated flight through the risk engine (stub panel backend) and checks the
+# span tree, the summary's self times and the Chrome trace export.
+# Run from the project root: python tests/test_tracing.py
+
+import json
+import os
+import sys
+import tempfile
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules.tracing import Tracer, enable_tracing, get_tracer, write_run_trace
+from data_analysis.analysis_modules.resilience import ResilientModel
+from data_analysis.analysis_modules.stub_backend import FaultInjectingBackend
+from data_analysis.analysis_modules.risk_engine import RiskTriageEngine
+from data_simulation.data_input_simulator.main_simulator import ScenarioSimulator
+
+
+def test_disabled_tracer_records_nothing() -> tuple[str, str]:
+    tracer = Tracer(enabled=False)
+    for _ in range(1000):
+        with tracer.span("noop"):
+            pass
+    return ("PASSED" if not tracer.spans() else "FAILED"), f"{len(tracer.spans())} spans recorded while disabled"
+
+
+def test_flight_span_tree() -> tuple[str, str]:
+    enable_tracing()
+    simulator = ScenarioSimulator(scenario_name="flap_jam")
+    simulator.run()
+    engine = RiskTriageEngine("stub", "local", "", use_cache=False,
+                              model=ResilientModel(FaultInjectingBackend(latency_s=0.01)))
+    engine.analyze_flight(simulator.get_data())
+    enable_tracing(False, reset=False)
+
+    parents = {event["name"]: event["args"].get("parent") for event in get_tracer().spans()}
+    expected = {"telemetry.profile": "simulate", "detect": "analyze_flight", "detect.FLAP_STUCK": "detect",
+                "panel.general_analyst": "explain.expert_panel", "llm.generate": "panel.adjudicator"}
+    wrong = {name: parents.get(name) for name, parent in expected.items() if parents.get(name) != parent}
+    summary = get_tracer().summary().set_index("span")
+    ok = not wrong and (summary["self_ms"] <= summary["total_ms"] + 1e-6).all() and summary.loc["llm.generate", "count"] == 4
+    return ("PASSED" if ok else "FAILED"), f"{len(parents)} span names, wrong parents {wrong}"
+
+
+def test_chrome_trace_export() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = write_run_trace(tmp, "test")
+        with open(paths["trace"], encoding="utf-8") as f:
+            events = json.load(f)["traceEvents"]
+        summary_exists = os.path.exists(paths["summary"])
+    complete = [e for e in events if e["ph"] == "X"]
+    ok = summary_exists and len(complete) == len(get_tracer().spans()) and all(e["dur"] >= 0 for e in complete)
+    return ("PASSED" if ok else "FAILED"), f"{len(complete)} complete events exported"
+
+
+def main():
+    tests = [test_disabled_tracer_records_nothing, test_flight_span_tree, test_chrome_trace_export]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} tracing checks passed.")
+
+
+if __name__ == '__main__':
+    main()
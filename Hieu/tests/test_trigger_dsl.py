@@ -0,0 +1,221 @@
+# test_trigger_dsl.py
+# Checks the trigger expression language: operator precedence, rises/falls/changes and delay()
+# evaluated block by block with the carried lookback, the legacy trigger strings against the
+# start indices the generator used before the DSL, and the tokenizer, parser, phase() and
+# pick_random error cases (unknown channels are rejected at compile time).
+# Run from the project root: python tests/test_trigger_dsl.py
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from src.data_simulation.data_input_simulator.scenario_loader import ScenarioLoader
+from src.data_simulation.data_input_simulator.telemetry_generator import TelemetryGenerator
+from src.data_simulation.data_input_simulator.trigger_dsl import (
+    TriggerContext, compile_event_triggers, compile_trigger, translate_legacy_trigger
+)
+
+PHASES = {'CLIMB': (5, 20), 'CRUISE': (20, 90), 'APPROACH': (90, 125)}
+
+
+def _frame(n: int = 400, hz: int = 4, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'timestamp': np.arange(n) / hz,
+        'flap_lever_position': np.repeat(rng.integers(0, 5, n // 8), 8)[:n],
+        'altitude_ft': rng.integers(0, 20000, n),
+        'roll_angle_deg': rng.normal(0.0, 3.0, n),
+        'left_flap_angle_deg': rng.normal(10.0, 2.0, n),
+        'right_flap_angle_deg': rng.normal(10.0, 2.0, n),
+        'autopilot_status': rng.integers(0, 2, n),
+    })
+
+
+def _mask(expression: str, df: pd.DataFrame, hz: int = 4) -> np.ndarray:
+    return compile_trigger(expression).mask(TriggerContext(df, PHASES, sample_rate_hz=hz))
+
+
+def _blockwise_mask(expression: str, df: pd.DataFrame, block: int, hz: int = 4) -> np.ndarray:
+    """Evaluates block by block, carrying lookback_samples() samples in front of each block as the chunked generator does."""
+    trigger = compile_trigger(expression)
+    carry = trigger.lookback_samples(hz)
+    parts = []
+    for start in range(0, len(df), block):
+        front = max(start - carry, 0)
+        window = df.iloc[front:start + block]
+        parts.append(trigger.mask(TriggerContext(window, PHASES, sample_rate_hz=hz))[start - front:])
+    return np.concatenate(parts)
+
+
+def test_precedence() -> tuple[str, str]:
+    df = _frame()
+    flap, alt, roll = (df[c].to_numpy() for c in ('flap_lever_position', 'altitude_ft', 'roll_angle_deg'))
+    left, right = df['left_flap_angle_deg'].to_numpy(), df['right_flap_angle_deg'].to_numpy()
+    cases = {
+        "flap_lever_position == 3 or altitude_ft > 15000 and roll_angle_deg < 0": (flap == 3) | ((alt > 15000) & (roll < 0)),
+        "not flap_lever_position == 3 and altitude_ft > 5000": (flap != 3) & (alt > 5000),
+        "NOT (flap_lever_position == 3 OR altitude_ft > 5000)": ~((flap == 3) | (alt > 5000)),
+        "altitude_ft - 1000 * 2 > 10000": alt - 2000 > 10000,
+        "(altitude_ft - 1000) * 2 > 10000": (alt - 1000) * 2 > 10000,
+        "abs(left_flap_angle_deg - right_flap_angle_deg) > 2 or -roll_angle_deg > 4": (np.abs(left - right) > 2) | (-roll > 4),
+        "(left_flap_angle_deg - right_flap_angle_deg) > 1 and (flap_lever_position >= 2)": ((left - right) > 1) & (flap >= 2),
+        "window(10, 20) and not phase(CRUISE)": (df['timestamp'] >= 10).to_numpy() & (df['timestamp'] < 20).to_numpy(),
+        "phase(CRUISE, 5, 60) or timestamp < 0.5": ((df['timestamp'] >= 25) & (df['timestamp'] < 30) | (df['timestamp'] < 0.5)).to_numpy(),
+    }
+    wrong = [expression for expression, expected in cases.items() if not np.array_equal(_mask(expression, df), expected)]
+    return ("PASSED" if not wrong else "FAILED"), f"{len(cases) - len(wrong)}/{len(cases)} expressions as expected, wrong: {wrong}"
+
+
+def test_edges_across_blocks() -> tuple[str, str]:
+    df = _frame()
+    flap = df['flap_lever_position'].to_numpy().astype(float)
+    step = np.diff(flap, prepend=flap[0])
+    expected = {
+        "rises(flap_lever_position)": step > 0,
+        "falls(flap_lever_position)": step < 0,
+        "changes(flap_lever_position)": step != 0,
+        "rises(flap_lever_position >= 3)": np.diff((flap >= 3).astype(int), prepend=int(flap[0] >= 3)) > 0,
+        "falls(autopilot_status == 1) and phase(CRUISE)": None,
+        "rises(changes(flap_lever_position))": None,
+    }
+    wrong = []
+    for expression, reference in expected.items():
+        whole = _mask(expression, df)
+        if reference is not None and not np.array_equal(whole, reference):
+            wrong.append((expression, "whole flight"))
+        # Blocks of 8 start exactly where the lever moves; blocks of 7 and 1 split everywhere else.
+        for block in (8, 7, 1):
+            if not np.array_equal(_blockwise_mask(expression, df, block), whole):
+                wrong.append((expression, block))
+    boundary_edges = int(_mask("changes(flap_lever_position)", df)[8::8].sum())
+    ok = not wrong and boundary_edges > 0
+    return ("PASSED" if ok else "FAILED"), f"{boundary_edges} lever moves on a block's first sample; mismatches: {wrong}"
+
+
+def test_delay_lookback() -> tuple[str, str]:
+    df = _frame()
+    condition = (df['flap_lever_position'] == 2).to_numpy()
+    shifted = np.zeros_like(condition)
+    shifted[12:] = condition[:-12]
+    trigger = compile_trigger("delay(rises(flap_lever_position == 2), 2.5) or delay(flap_lever_position == 4, 0.5)")
+    lookbacks = (compile_trigger("delay(flap_lever_position == 2, 3)").lookback_samples(4), trigger.lookback_samples(4),
+                 trigger.lookback_samples(1), compile_trigger("delay(flap_lever_position == 2, -3)").lookback_samples(4))
+    wrong = [] if np.array_equal(_mask("delay(flap_lever_position == 2, 3)", df), shifted) else ["delay(..., 3)"]
+    for expression in ("delay(flap_lever_position == 2, 3)", trigger.expression,
+                       "delay(delay(changes(autopilot_status), 1), 1.25) and altitude_ft > 2000"):
+        whole = _mask(expression, df)
+        for block in (5, 13, 100):
+            if not np.array_equal(_blockwise_mask(expression, df, block), whole):
+                wrong.append((expression, block))
+    ok = not wrong and lookbacks == (12, 13, 4, 0)
+    return ("PASSED" if ok else "FAILED"), f"lookback samples {lookbacks}; mismatches: {wrong}"
+
+
+def _legacy_start_index(df: pd.DataFrame, event: dict) -> int:
+    """The trigger handling of TelemetryGenerator._inject_events before the trigger language."""
+    trigger_condition = event.get('trigger_condition')
+    if trigger_condition.startswith("flap_lever_position moves to"):
+        hits = df.index[df['flap_lever_position'] == int(trigger_condition.split(' to ')[1])]
+        return hits[0] if not hits.empty else -1
+    if trigger_condition == "random_time_in_phase":
+        valid_phases = event.get('valid_flight_phases', ['CRUISE'])
+        if 'CLIMB' in valid_phases:
+            return np.random.randint(5, 20)
+        if 'CRUISE' in valid_phases:
+            return np.random.randint(25, 85)
+        return np.random.randint(95, 115)
+    if trigger_condition == "cabin_altitude_exceeds_10000":
+        hits = df.index[df['cabin_altitude_ft'] > 10000]
+        return hits[0] if not hits.empty else -1
+    raise ValueError(trigger_condition)
+
+
+def test_legacy_triggers() -> tuple[str, str]:
+    generator = TelemetryGenerator(dict(ScenarioLoader().load("normal_flight")))
+    np.random.seed(0)
+    df = generator.generate()
+    df.loc[70:, 'cabin_altitude_ft'] = np.float32(10500)
+    events = [{"trigger_condition": f"flap_lever_position moves to {position}"} for position in range(5)]
+    events += [{"trigger_condition": "cabin_altitude_exceeds_10000"}, {"trigger_condition": "random_time_in_phase"}]
+    events += [{"trigger_condition": "random_time_in_phase", "valid_flight_phases": phases}
+               for phases in (["CLIMB"], ["CRUISE"], ["CLIMB", "CRUISE"], ["APPROACH_LANDING"])]
+    differing = []
+    for event, trigger in zip(events, compile_event_triggers(events)):
+        for seed in range(25):
+            np.random.seed(seed)
+            old = _legacy_start_index(df, event)
+            np.random.seed(seed)
+            new = trigger.first_index(TriggerContext(df, generator.get_phase_windows()))
+            if old != new:
+                differing.append((trigger.source, event.get('valid_flight_phases'), seed, old, new))
+    translations = (translate_legacy_trigger("flap_lever_position moves to 3"), translate_legacy_trigger("cabin_altitude_exceeds_10000"),
+                    translate_legacy_trigger("random_time_in_phase", ["APPROACH_LANDING"]), translate_legacy_trigger("altitude_ft > 5"))
+    ok = not differing and translations == ("flap_lever_position == 3", "cabin_altitude_ft > 10000",
+                                            "pick_random(phase(APPROACH, 5, 10))", "altitude_ft > 5")
+    return ("PASSED" if ok else "FAILED"), f"{len(events)} legacy triggers x 25 seeds; differing start indices: {differing[:5]}"
+
+
+def _raises(action) -> bool:
+    try:
+        action()
+    except ValueError:
+        return True
+    return False
+
+
+def test_error_cases() -> tuple[str, str]:
+    df = _frame(40)
+    ctx = lambda: TriggerContext(df, PHASES, sample_rate_hz=4)
+    compile_errors = {
+        "tokenizer": "altitude_ft > 1e3 ; roll_angle_deg < 2",
+        "bad character": "altitude_ft > $5",
+        "no comparison": "altitude_ft",
+        "dangling operator": "altitude_ft >",
+        "unbalanced": "(altitude_ft > 5",
+        "trailing tokens": "altitude_ft > 5 roll_angle_deg",
+        "phase without name": "phase(5)",
+        "phase with one trim": "phase(CRUISE, 5)",
+        "window arity": "window(5)",
+        "delay without seconds": "delay(altitude_ft > 5)",
+        "unknown channel": "altitude_feet > 5",
+        "unknown channel in edge": "rises(flap_lever)",
+        "empty": "   ",
+    }
+    accepted = [name for name, expression in compile_errors.items() if not _raises(lambda e=expression: compile_event_triggers([{"trigger_condition": e}]))]
+    # Outside scenario events any channel name compiles; the context rejects it when evaluated.
+    late = compile_trigger("altitude_feet > 5")
+    evaluation_errors = {
+        "unknown phase": lambda: compile_trigger("phase(TAXI)").mask(ctx()),
+        "unknown channel": lambda: late.mask(ctx()),
+    }
+    accepted += [name for name, action in evaluation_errors.items() if not _raises(action)]
+
+    never = compile_trigger("pick_random(altitude_ft < 0)")
+    rng = np.random.RandomState(5)
+    picks = {compile_trigger("pick_random(phase(CLIMB))").first_index(TriggerContext(df, PHASES, 4, rng=rng)) for _ in range(30)}
+    pick_ok = (never.first_index(ctx()) == -1 and not never.mask(ctx()).any() and len(picks) > 1
+               and all(20 <= pick < 40 for pick in picks) and not compile_trigger("pick_random(phase(CLIMB)) or altitude_ft > 5").blockwise
+               and compile_trigger("pick_random(phase(CLIMB))").blockwise)
+    ok = not accepted and pick_ok and late.channels == frozenset({'altitude_feet'})
+    return ("PASSED" if ok else "FAILED"), f"errors not raised: {accepted}, pick_random: {pick_ok} ({len(picks)} distinct picks)"
+
+
+def main():
+    tests = [test_precedence, test_edges_across_blocks, test_delay_lookback, test_legacy_triggers, test_error_cases]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} trigger DSL checks passed.")
+
+
+if __name__ == '__main__':
+    main()
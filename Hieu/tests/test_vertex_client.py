@@ -0,0 +1,136 @@
+# test_vertex_client.py
+# Checks the process-wide Vertex AI session with vertexai, the model class and the credential
+# loader patched out (no GCP access needed): several HFACSAnalyzers, built one after another and
+# from threads, share one credentials load, one vertexai.init and one ResilientModel, and prompt
+# files are re-read only when they change.
+# Run from the project root: python tests/test_vertex_client.py
+
+import os
+import sys
+import tempfile
+import threading
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+for path in (PROJECT_ROOT, os.path.join(PROJECT_ROOT, 'src')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from data_analysis.analysis_modules import vertex_client
+from data_analysis.analysis_modules.hfacs_analyzer import HFACSAnalyzer
+from data_analysis.analysis_modules.logging_utils import configure_logging
+from data_analysis.analysis_modules.resilience import ResilientModel
+
+
+class _PatchedVertex:
+    """Counts the calls that would reach Vertex AI and undoes the patches on exit."""
+    def __init__(self):
+        self.inits, self.models, self.credential_loads = [], [], []
+
+    def __enter__(self):
+        test = self
+
+        class FakeModel:
+            def __init__(self, model_name, **kwargs):
+                test.models.append(model_name)
+
+        self._saved = (vertex_client.vertexai.init, vertex_client.GenerativeModel,
+                       vertex_client.service_account.Credentials.from_service_account_file)
+        vertex_client.vertexai.init = lambda **kwargs: self.inits.append(kwargs)
+        vertex_client.GenerativeModel = FakeModel
+        vertex_client.service_account.Credentials.from_service_account_file = (
+            lambda path: self.credential_loads.append(path) or ("credentials", path))
+        vertex_client.reset()
+        return self
+
+    def __exit__(self, *exc):
+        (vertex_client.vertexai.init, vertex_client.GenerativeModel,
+         vertex_client.service_account.Credentials.from_service_account_file) = self._saved
+        vertex_client.reset()
+
+
+def _prompt_files(directory: str, count: int) -> list:
+    names = []
+    for number in range(count):
+        name = f"role_{number}.txt"
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as f:
+            f.write(f"Role {number}. Evidence: {{combined_text}}")
+        names.append(name)
+    return names
+
+
+def _analyzer(directory: str, prompt: str, project: str = "demo-project") -> HFACSAnalyzer:
+    return HFACSAnalyzer(project, "us-central1", os.path.join(directory, "key.json"), prompt, directory)
+
+
+def test_one_session_per_process() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp, _PatchedVertex() as vertex:
+        prompts = _prompt_files(tmp, 4)
+        analyzers = [_analyzer(tmp, prompt) for prompt in prompts]
+        threaded = []
+        workers = [threading.Thread(target=lambda p=prompt: threaded.append(_analyzer(tmp, p))) for prompt in prompts * 3]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        models = {id(analyzer.model) for analyzer in analyzers + threaded}
+        templates = {analyzer.prompt_template for analyzer in analyzers}
+        ok = (len(vertex.inits) == 1 and len(vertex.models) == 1 and len(vertex.credential_loads) == 1
+              and len(models) == 1 and isinstance(analyzers[0].model, ResilientModel)
+              and vertex.inits[0]["project"] == "demo-project" and len(templates) == 4)
+        message = (f"{len(analyzers) + len(threaded)} analyzers: {len(vertex.inits)} init, {len(vertex.models)} model, "
+                   f"{len(vertex.credential_loads)} credential load, {len(models)} distinct handle")
+    return ("PASSED" if ok else "FAILED"), message
+
+
+def test_reinit_for_new_project() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as tmp, _PatchedVertex() as vertex:
+        prompt = _prompt_files(tmp, 1)[0]
+        first = _analyzer(tmp, prompt, "project-a")
+        second = _analyzer(tmp, prompt, "project-b")
+        third = _analyzer(tmp, prompt, "project-b")
+        wider = vertex_client.get_model("project-b", "us-central1", os.path.join(tmp, "key.json"), max_output_tokens=8192)
+        ok = (len(vertex.inits) == 2 and [init["project"] for init in vertex.inits] == ["project-a", "project-b"]
+              and first.model is not second.model and second.model is third.model and wider is not third.model
+              and len(vertex.models) == 3 and len(vertex.credential_loads) == 1)
+        message = f"inits {[init['project'] for init in vertex.inits]}, models built {len(vertex.models)}"
+    return ("PASSED" if ok else "FAILED"), message
+
+
+def test_prompt_cache() -> tuple[str, str]:
+    reads = []
+    real_open = open
+
+    def counting_open(path, *args, **kwargs):
+        reads.append(path)
+        return real_open(path, *args, **kwargs)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, _prompt_files(tmp, 1)[0])
+        vertex_client.open = counting_open  # module global shadows the builtin inside vertex_client
+        try:
+            first = [vertex_client.load_prompt(path) for _ in range(5)]
+            with real_open(path, 'w', encoding='utf-8') as f:
+                f.write("Edited role. Evidence: {combined_text}")
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_mtime_ns + 1_000_000_000,) * 2)
+            second = [vertex_client.load_prompt(path) for _ in range(5)]
+        finally:
+            del vertex_client.open
+            vertex_client.reset()
+    ok = len(reads) == 2 and len(set(first)) == 1 and second == ["Edited role. Evidence: {combined_text}"] * 5
+    return ("PASSED" if ok else "FAILED"), f"{len(reads)} file reads for 10 loads around one edit"
+
+
+def main():
+    configure_logging(level="ERROR")  # the re-initialization warning is expected here
+    tests = [test_one_session_per_process, test_reinit_for_new_project, test_prompt_cache]
+    results = []
+    for test in tests:
+        status, message = test()
+        results.append(status)
+        print(f"{test.__name__:<40} {status:<7} {message}")
+    print(f"\n{results.count('PASSED')}/{len(results)} vertex client checks passed.")
+
+
+if __name__ == '__main__':
+    main()